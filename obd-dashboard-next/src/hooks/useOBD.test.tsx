@@ -145,6 +145,27 @@ describe("useOBD", () => {
     expect(result.current.pids.some((pid) => pid.pid === "RPM")).toBe(true);
   });
 
+  it("ignores event messages that carry no PID snapshot", () => {
+    const { result } = renderHook(() => useOBD(), {
+      wrapper: ({ children }) => <LanguageProvider>{children}</LanguageProvider>,
+    });
+
+    const socket = MockWebSocket.latest();
+
+    act(() => {
+      socket?.simulateOpen();
+    });
+    act(() => {
+      socket?.simulateMessage({ timestamp: 1000, pids: { RPM: 1200 } });
+    });
+    act(() => {
+      socket?.simulateMessage({ type: "dtc", confirmed: [] });
+    });
+
+    expect(recordPidSamples).toHaveBeenCalledTimes(1);
+    expect(result.current.pids.some((pid) => pid.pid === "RPM")).toBe(true);
+  });
+
   it("cleans up history when the socket closes", () => {
     const { result } = renderHook(() => useOBD(), {
       wrapper: ({ children }) => <LanguageProvider>{children}</LanguageProvider>,
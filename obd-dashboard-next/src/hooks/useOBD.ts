@@ -168,7 +168,13 @@ export default function useOBD() {
 
     const handleMessage = (event: MessageEvent<string>) => {
       try {
-        const parsed = JSON.parse(event.data) as Partial<OBDServerResponse>;
+        const parsed = JSON.parse(event.data) as Partial<OBDServerResponse> & {
+          type?: string;
+        };
+        if (parsed.type !== undefined) {
+          // Event messages (e.g. `dtc`) carry no PID snapshot.
+          return;
+        }
         const normalized = normalizeResponse(parsed);
         setLastValidResponse(normalized);
         recordPidSamples({
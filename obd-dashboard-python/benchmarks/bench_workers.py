@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Measure client capacity and delivery latency of the WebSocket workers.
+
+A synthetic acquisition loop publishes samples (30 PIDs, stamped with the send
+time) through `WorkerPool` at a fixed rate while client processes hold many
+connections open and record how late every message arrives. Run it once per
+worker count to see how capacity scales on the target machine::
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --clients 400 --rate 10
+
+Worker count 0 serves from the acquisition process itself (the default mode).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import websockets  # noqa: E402
+
+from obd_dashboard_server.fanout import Fanout  # noqa: E402
+from obd_dashboard_server.workers import WorkerPool  # noqa: E402
+
+_PIDS = {f"PID_{index:02d}": float(index) for index in range(30)}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+
+async def _client(url: str, duration: float, latencies: List[float], stats: Dict[str, int]) -> None:
+    connected = False
+    try:
+        async with websockets.connect(url, max_queue=None) as ws:
+            connected = True
+            stats["connected"] += 1
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=max(0.01, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                payload = json.loads(raw)
+                latencies.append(time.time() - payload["sent"])
+                stats["received"] += 1
+    except (OSError, websockets.exceptions.WebSocketException):
+        # A server closing the socket at the end of the run is not a failure.
+        if not connected:
+            stats["failed"] += 1
+
+
+def _client_process(url: str, count: int, duration: float, results: Any) -> None:
+    async def run() -> None:
+        latencies: List[float] = []
+        stats = {"connected": 0, "received": 0, "failed": 0}
+        await asyncio.gather(*(_client(url, duration, latencies, stats) for _ in range(count)))
+        results.put((latencies, stats))
+
+    asyncio.run(run())
+
+
+async def _in_process_server(host: str, port: int, rate: float, delay: float, duration: float) -> None:
+    fanout = Fanout()
+    server = await websockets.serve(fanout.serve_client, host, port)
+    await asyncio.sleep(delay)
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        await fanout.publish({"timestamp": "", "pids": _PIDS, "sent": time.time()})
+        await asyncio.sleep(1.0 / rate)
+    # Leave the idle client handlers to asyncio.run, which cancels them on exit.
+    server.close()
+
+
+def _run_case(workers: int, args: argparse.Namespace) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    url = f"ws://{args.host}:{args.port}"
+    pool = None
+    server = None
+    if workers > 0:
+        pool = WorkerPool(workers, args.host, args.port)
+        pool.start()
+    else:
+        server = ctx.Process(
+            target=_serve_in_process,
+            args=(args.host, args.port, args.rate, args.warmup * 2, args.duration),
+        )
+        server.start()
+    time.sleep(args.warmup)
+
+    per_proc = max(1, args.clients // args.client_procs)
+    clients = [
+        ctx.Process(target=_client_process, args=(url, per_proc, args.duration + args.warmup, results))
+        for _ in range(args.client_procs)
+    ]
+    for proc in clients:
+        proc.start()
+    time.sleep(args.warmup)
+
+    if pool is not None:
+        end = time.monotonic() + args.duration
+        while time.monotonic() < end:
+            pool.publish({"timestamp": "", "pids": _PIDS, "sent": time.time()})
+            time.sleep(1.0 / args.rate)
+
+    latencies: List[float] = []
+    totals = {"connected": 0, "received": 0, "failed": 0}
+    for _ in clients:
+        lat, stats = results.get()
+        latencies.extend(lat)
+        for key in totals:
+            totals[key] += stats[key]
+    for proc in clients:
+        proc.join()
+    if pool is not None:
+        pool.stop()
+    if server is not None:
+        server.join()
+    return {
+        "workers": workers,
+        "connected": totals["connected"],
+        "failed": totals["failed"],
+        "msgs_per_s": totals["received"] / args.duration,
+        "p50_ms": _percentile(latencies, 50) * 1000.0,
+        "p99_ms": _percentile(latencies, 99) * 1000.0,
+        "max_ms": max(latencies) * 1000.0 if latencies else float("nan"),
+        "mean_ms": statistics.fmean(latencies) * 1000.0 if latencies else float("nan"),
+    }
+
+
+def _serve_in_process(host: str, port: int, rate: float, delay: float, duration: float) -> None:
+    asyncio.run(_in_process_server(host, port, rate, delay, duration))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4], help="Worker counts to compare")
+    ap.add_argument("--clients", type=int, default=200, help="Concurrent WebSocket clients")
+    ap.add_argument("--client-procs", type=int, default=4, help="Processes used to drive the clients")
+    ap.add_argument("--rate", type=float, default=10.0, help="Samples per second")
+    ap.add_argument("--duration", type=float, default=10.0, help="Seconds of publishing per case")
+    ap.add_argument("--warmup", type=float, default=1.0, help="Seconds to let servers and clients settle")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18765)
+    args = ap.parse_args()
+
+    print(f"{args.clients} clients, {args.rate:g} samples/s, {args.duration:g}s per case")
+    print(f"{'workers':>7} {'connected':>9} {'failed':>6} {'msgs/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for workers in args.workers:
+        row = _run_case(workers, args)
+        print(
+            f"{row['workers']:>7} {row['connected']:>9} {row['failed']:>6} {row['msgs_per_s']:>9.0f} "
+            f"{row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
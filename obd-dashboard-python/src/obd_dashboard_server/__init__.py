@@ -1,5 +1,6 @@
 """OBD dashboard server package."""
 
 from .server import main
+from .shm import LatestValuesReader
 
-__all__ = ["main"]
+__all__ = ["LatestValuesReader", "main"]
@@ -0,0 +1,430 @@
+"""
+Local adapter broker: one process owns the ELM327, several clients share it.
+
+The broker opens the physical adapter once and listens on one TCP port per
+client class. Every port speaks enough of the ELM327 protocol for python-OBD
+(`socket://host:port`), so `obd-dashboard-server`, `obdtools log` and ad-hoc
+scripts can run side by side::
+
+    obd-adapter-broker --port /dev/ttyUSB0
+    obd-dashboard-server --port socket://127.0.0.1:35000     # live
+    obdtools log -- --port socket://127.0.0.1:35001           # logging
+
+OBD requests are queued and sent one at a time, highest class first
+(live > logging > dtc); DTC modes (03/07/0A/04/02) never rank above `dtc`. A
+request identical to one already queued or on the wire joins it and receives
+the same answer. AT commands that change the link settings (echo, linefeeds,
+headers, spaces, protocol) are emulated per client and never reach the
+adapter, whose own settings stay fixed (E0 L0 S1 H1). The broker logs how
+adapter time is split between classes and clients.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .console import log
+
+CLIENT_CLASSES = ("live", "logging", "dtc")
+PRIORITIES = {name: rank for rank, name in enumerate(CLIENT_CLASSES)}
+DEFAULT_PORTS = {"live": 35000, "logging": 35001, "dtc": 35002}
+DEFAULT_STATS_PERIOD = 60.0
+_DTC_MODES = ("03", "07", "0A", "04", "02")
+_BAUD_PROBE_ORDER = (38400, 9600, 230400, 115200, 57600, 19200)
+_HEX = re.compile(r"^[0-9A-F]+$")
+_PROMPT = b">"
+
+
+def _command_key(raw: bytes) -> str:
+    return raw.replace(b"\x7f", b"").replace(b" ", b"").strip().upper().decode("latin-1", "replace")
+
+
+class SerialAdapter:
+    """
+    Blocking access to the physical ELM327 (used from the broker's I/O thread).
+
+    Args:
+        url: Serial device or pyserial URL.
+        baudrate: Fixed baud rate, or None to probe common rates.
+        timeout: Seconds to wait for the prompt after a command.
+    """
+
+    def __init__(self, url: str, baudrate: Optional[int] = None, timeout: float = 5.0) -> None:
+        self.url = url
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.version = "ELM327 v1.5"
+        self.protocol_number = "0"
+        self.protocol_name = "AUTO"
+        self._port: Any = None
+
+    def open(self) -> None:
+        import serial
+
+        self._port = serial.serial_for_url(self.url, timeout=self.timeout)
+        if not self.url.startswith("socket://"):
+            self._select_baudrate()
+        banner = self._text(self.transact(b"ATZ", settle=1.0))
+        self.version = next((line for line in banner if line.upper().startswith("ELM")), self.version)
+        for command in (b"ATE0", b"ATL0", b"ATS1", b"ATH1", b"ATSP0"):
+            self.transact(command)
+        # Let the adapter search the bus protocol once, on behalf of every client.
+        self.transact(b"0100")
+        self.protocol_number = (self._text(self.transact(b"ATDPN")) or ["0"])[0]
+        self.protocol_name = (self._text(self.transact(b"ATDP")) or ["AUTO"])[0]
+
+    def _select_baudrate(self) -> None:
+        if self.baudrate:
+            self._port.baudrate = self.baudrate
+            return
+        for baud in _BAUD_PROBE_ORDER:
+            self._port.baudrate = baud
+            self._port.reset_input_buffer()
+            self._port.write(b"\x7f\x7f\r")
+            if self._read_until_prompt().endswith(_PROMPT):
+                return
+        raise OSError(f"No ELM327 prompt on {self.url}")
+
+    def transact(self, command: bytes, settle: float = 0.0) -> bytes:
+        """Send one command and return the raw answer (without the prompt)."""
+
+        self._port.reset_input_buffer()
+        self._port.write(command + b"\r")
+        self._port.flush()
+        if settle:
+            time.sleep(settle)
+        return self._read_until_prompt().replace(b"\x00", b"").rstrip(_PROMPT)
+
+    def close(self) -> None:
+        if self._port is not None:
+            with contextlib.suppress(Exception):
+                self._port.close()
+
+    def _read_until_prompt(self) -> bytes:
+        buffer = bytearray()
+        while _PROMPT not in buffer:
+            data = self._port.read(self._port.in_waiting or 1)
+            if not data:
+                break
+            buffer.extend(data)
+        return bytes(buffer)
+
+    @staticmethod
+    def _text(raw: bytes) -> List[str]:
+        return [line.strip() for line in raw.decode("latin-1").split("\r") if line.strip()]
+
+
+@dataclass
+class ClientStats:
+    """Adapter usage of one client (or of a whole class)."""
+
+    queries: int = 0
+    joined: int = 0
+    adapter_time: float = 0.0
+    wait_time: float = 0.0
+
+    def add(self, other: "ClientStats") -> None:
+        self.queries += other.queries
+        self.joined += other.joined
+        self.adapter_time += other.adapter_time
+        self.wait_time += other.wait_time
+
+
+@dataclass
+class _Request:
+    key: str
+    priority: int
+    seq: int
+    enqueued: float
+    waiters: List[Tuple["ElmSession", "asyncio.Future[bytes]"]] = field(default_factory=list)
+
+
+class AdapterBroker:
+    """
+    Serialize client requests onto one adapter by priority, merging duplicates.
+
+    Args:
+        adapter: Object with a blocking `transact(command: bytes) -> bytes`
+            plus `version`, `protocol_number` and `protocol_name`.
+        stats_period: Seconds between usage summaries in the log (0 disables).
+    """
+
+    def __init__(self, adapter: Any, *, stats_period: float = DEFAULT_STATS_PERIOD) -> None:
+        self.adapter = adapter
+        self.stats_period = stats_period
+        self.busy_time = 0.0
+        self.transactions = 0
+        self.stats: Dict[str, ClientStats] = {}
+        self._queue: List[_Request] = []
+        self._pending: Dict[str, _Request] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        # One thread owns the serial port, so requests never interleave on the wire.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="adapter-io")
+        self._started = time.monotonic()
+
+    async def query(self, command: str, session: "ElmSession") -> bytes:
+        """Queue `command` for `session` (or join an identical pending request)."""
+
+        priority = PRIORITIES[session.client_class]
+        if command[:2] in _DTC_MODES:
+            priority = max(priority, PRIORITIES["dtc"])
+        future: "asyncio.Future[bytes]" = asyncio.get_running_loop().create_future()
+        request = self._pending.get(command)
+        if request is None:
+            request = _Request(command, priority, next(self._seq), time.monotonic())
+            self._pending[command] = request
+            self._queue.append(request)
+            self._wakeup.set()
+        else:
+            # A higher-priority client joining lifts the shared request.
+            request.priority = min(request.priority, priority)
+            self._stats_for(session).joined += 1
+        request.waiters.append((session, future))
+        return await future
+
+    async def run(self) -> None:
+        """Drain the queue forever. Cancel to stop."""
+
+        loop = asyncio.get_running_loop()
+        last_stats = time.monotonic()
+        try:
+            while True:
+                if not self._queue:
+                    self._wakeup.clear()
+                    timeout = self.stats_period if self.stats_period else None
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                if self._queue:
+                    await self._serve_next(loop)
+                if self.stats_period and time.monotonic() - last_stats >= self.stats_period:
+                    log(f"Broker: {self.summary()}")
+                    last_stats = time.monotonic()
+        finally:
+            self._executor.shutdown(wait=False)
+            if self.transactions:
+                log(f"Broker: {self.summary()}")
+
+    async def _serve_next(self, loop: asyncio.AbstractEventLoop) -> None:
+        request = min(self._queue, key=lambda item: (item.priority, item.seq))
+        self._queue.remove(request)
+        started = time.monotonic()
+        try:
+            answer = await loop.run_in_executor(self._executor, self.adapter.transact, request.key.encode())
+        except Exception as exc:
+            log(f"Adapter query {request.key} failed: {exc}", level="warning")
+            answer = b"CAN ERROR\r"
+        finally:
+            # Late joiners after this point queue a fresh request.
+            self._pending.pop(request.key, None)
+        cost = time.monotonic() - started
+        self.busy_time += cost
+        self.transactions += 1
+        share = cost / len(request.waiters)
+        for session, future in request.waiters:
+            stats = self._stats_for(session)
+            stats.queries += 1
+            stats.adapter_time += share
+            stats.wait_time += started - request.enqueued
+            if not future.done():
+                future.set_result(answer)
+
+    def _stats_for(self, session: "ElmSession") -> ClientStats:
+        return self.stats.setdefault(session.label, ClientStats())
+
+    def class_stats(self) -> Dict[str, ClientStats]:
+        totals = {name: ClientStats() for name in CLIENT_CLASSES}
+        for label, stats in self.stats.items():
+            totals[label.split(":", 1)[0]].add(stats)
+        return totals
+
+    def summary(self) -> str:
+        elapsed = max(1e-9, time.monotonic() - self._started)
+        parts = [f"{self.transactions} adapter queries, adapter busy {self.busy_time / elapsed:.0%}"]
+        for name, stats in self.class_stats().items():
+            if not stats.queries:
+                continue
+            share = stats.adapter_time / self.busy_time if self.busy_time else 0.0
+            wait = stats.wait_time / stats.queries * 1000.0
+            parts.append(f"{name} {share:.0%} ({stats.queries} answers, {stats.joined} joined, wait {wait:.1f} ms)")
+        clients = ", ".join(
+            f"{label} {stats.adapter_time / self.busy_time:.0%}"
+            for label, stats in sorted(self.stats.items())
+            if self.busy_time and stats.queries
+        )
+        return "; ".join(parts) + (f"; per client: {clients}" if clients else "")
+
+
+class ElmSession:
+    """
+    Per-client view of the adapter: echo/linefeed/header/space settings are
+    emulated locally, OBD requests go through the broker.
+    """
+
+    def __init__(self, broker: AdapterBroker, client_class: str, peer: str) -> None:
+        self.broker = broker
+        self.client_class = client_class
+        self.label = f"{client_class}:{peer}"
+        self.reset()
+
+    def reset(self) -> None:
+        self.echo = True
+        self.linefeeds = False
+        self.headers = False
+        self.spaces = True
+
+    async def handle(self, raw: bytes) -> bytes:
+        """Return the full reply (echo, lines, prompt) to one command line."""
+
+        key = _command_key(raw)
+        echo = raw.strip() + b"\r" if self.echo else b""
+        if not key:
+            lines = ["?"]
+        elif key.startswith("AT"):
+            lines = await self._at(key[2:])
+        elif _HEX.match(key):
+            answer = await self.broker.query(key, self)
+            lines = [text for line in answer.decode("latin-1").split("\r") if line.strip() for text in self._format(line)]
+        else:
+            lines = ["?"]
+        eol = "\r\n" if self.linefeeds else "\r"
+        return echo + ("".join(line + eol for line in lines) + eol + ">").encode("latin-1")
+
+    async def _at(self, command: str) -> List[str]:
+        adapter = self.broker.adapter
+        if command in ("Z", "WS"):
+            self.reset()
+            return [adapter.version]
+        if command == "D":
+            self.reset()
+            return ["OK"]
+        if command[:1] in ("E", "L", "H", "S") and command[1:] in ("0", "1"):
+            setattr(self, {"E": "echo", "L": "linefeeds", "H": "headers", "S": "spaces"}[command[0]], command[1] == "1")
+            return ["OK"]
+        if command.startswith(("SP", "TP")):
+            return ["OK"]
+        if command == "DPN":
+            return [adapter.protocol_number]
+        if command == "DP":
+            return [adapter.protocol_name]
+        if command == "I":
+            return [adapter.version]
+        if command in ("RV", "@1"):
+            answer = await self.broker.query("AT" + command, self)
+            return [line.strip() for line in answer.decode("latin-1").split("\r") if line.strip()]
+        return ["?"]
+
+    def _format(self, line: str) -> List[str]:
+        tokens = line.split()
+        if self.headers or not tokens or not all(_HEX.match(token.upper()) for token in tokens):
+            frames = [tokens]
+        else:
+            frames = self._strip_header(tokens)
+        return [" ".join(frame) if self.spaces else "".join(frame) for frame in frames]
+
+    @staticmethod
+    def _strip_header(tokens: List[str]) -> List[List[str]]:
+        # The adapter runs with ATH1; rebuild what an ELM327 prints with ATH0.
+        if len(tokens[0]) not in (3, 8):
+            # Legacy protocols: three header bytes in front, checksum at the end.
+            return [tokens[3:-1]]
+        if len(tokens) < 2:
+            return [tokens]
+        pci, data = tokens[1].upper(), tokens[2:]
+        if pci[0] == "1" and data:
+            # First frame: total length on its own line, then "0: data".
+            return [[f"{int(pci[1] + data[0], 16):03X}"], ["0:"] + data[1:]]
+        if pci[0] == "2":
+            return [[f"{int(pci[1], 16):X}:"] + data]
+        return [data]
+
+
+async def serve_broker(
+    broker: AdapterBroker,
+    host: str,
+    ports: Dict[str, int],
+) -> List[asyncio.AbstractServer]:
+    """Start one ELM-compatible listener per client class."""
+
+    servers = []
+    for client_class, port in ports.items():
+
+        async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, client_class: str = client_class) -> None:
+            peer = writer.get_extra_info("peername")
+            session = ElmSession(broker, client_class, f"{peer[0]}:{peer[1]}" if peer else "?")
+            log(f"Broker client connected ({session.label}).")
+            buffer = bytearray()
+            try:
+                while True:
+                    data = await reader.read(256)
+                    if not data:
+                        break
+                    buffer.extend(data)
+                    while b"\r" in buffer:
+                        raw, _, rest = bytes(buffer).partition(b"\r")
+                        buffer = bytearray(rest)
+                        writer.write(await session.handle(raw))
+                        await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+                log(f"Broker client disconnected ({session.label}).")
+
+        servers.append(await asyncio.start_server(handler, host, port))
+        log(f"Broker: {client_class} clients on socket://{host}:{port}", level="success")
+    return servers
+
+
+async def _main_async(args: argparse.Namespace) -> None:
+    adapter = SerialAdapter(args.port, args.baudrate)
+    loop = asyncio.get_running_loop()
+    log(f"Opening adapter on {args.port}...")
+    await loop.run_in_executor(None, adapter.open)
+    log(f"Adapter ready: {adapter.version}, protocol {adapter.protocol_name} ({adapter.protocol_number}).", level="success")
+    broker = AdapterBroker(adapter, stats_period=args.stats_every)
+    ports = {"live": args.live_port, "logging": args.logging_port, "dtc": args.dtc_port}
+    servers = await serve_broker(broker, args.host, {name: port for name, port in ports.items() if port})
+    try:
+        await broker.run()
+    finally:
+        for server in servers:
+            server.close()
+        adapter.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="obd-adapter-broker",
+        description="Share one ELM327 between several local clients over socket://",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--port", default="/dev/ttyUSB0", help="Serial port (or pyserial URL) of the adapter")
+    parser.add_argument("--baudrate", type=int, default=None, help="Adapter baud rate (default: probe)")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address for the client ports")
+    parser.add_argument("--live-port", type=int, default=DEFAULT_PORTS["live"], help="Port for live display clients (0 disables)")
+    parser.add_argument("--logging-port", type=int, default=DEFAULT_PORTS["logging"], help="Port for logging clients (0 disables)")
+    parser.add_argument("--dtc-port", type=int, default=DEFAULT_PORTS["dtc"], help="Port for DTC tools (0 disables)")
+    parser.add_argument("--stats-every", type=float, default=DEFAULT_STATS_PERIOD, help="Seconds between usage summaries (0 disables)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_main_async(args))
+    except KeyboardInterrupt:
+        log("Broker stopped.", level="warning")
+    except OSError as exc:
+        log(f"Broker failed: {exc}", level="error")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
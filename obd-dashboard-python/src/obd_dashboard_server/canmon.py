@@ -0,0 +1,506 @@
+"""
+Passive CAN monitor: decode broadcast frames instead of polling PIDs.
+
+Request/response polling costs one bus round-trip per value, which caps the
+whole PID set at a few dozen samples per second. Most cars already broadcast
+engine speed, vehicle speed or pedal position at 50-100 Hz. In monitor mode the
+adapter is switched to `ATMA` (or `STMA` on STN chips), only the arbitration
+IDs named in the signal definitions are let through its hardware filter, and
+every received frame is decoded into named signals::
+
+    {"signals": [
+      {"name": "RPM", "id": "0x0C9", "start": 8, "length": 16, "scale": 0.25, "unit": "rpm"},
+      {"name": "SPEED", "id": "0x3E9", "start": 0, "length": 16, "scale": 0.01, "unit": "km/h"},
+      {"name": "PEDAL", "id": "0x0BE", "start": 16, "length": 8, "scale": 0.392157, "unit": "%"}
+    ]}
+
+`start` counts bits from the most significant bit of byte 0 for `"byte_order":
+"big"` (the default, Motorola) and from the least significant bit of byte 0
+for `"little"` (Intel). `signed`, `scale` and `offset` are optional.
+
+`DumpPort` stands in for the adapter: it answers the setup commands and, once
+monitoring starts, streams frames from a recorded dump (candump log or
+`candump` console output, or raw ELM monitor lines), optionally at the
+recorded pace. It is what `--can-dump FILE` and the tests use.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import binascii
+import contextlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .console import log
+
+DEFAULT_CAN_PROTOCOL = "6"
+DEFAULT_PUBLISH_HZ = 50.0
+_EXTENDED_PROTOCOLS = ("7", "9")
+_PROMPT = b">"
+_STATS_PERIOD = 60.0
+
+Frame = Tuple[int, bytes]
+
+
+@dataclass
+class SignalDef:
+    """One signal packed into the payload of a CAN frame."""
+
+    name: str
+    can_id: int
+    start: int
+    length: int
+    byte_order: str = "big"
+    signed: bool = False
+    scale: float = 1.0
+    offset: float = 0.0
+    unit: str = ""
+
+    def decode(self, data: bytes) -> Optional[float]:
+        """Physical value of the signal in `data`, or None if the frame is too short."""
+
+        size = len(data) * 8
+        if self.start + self.length > size:
+            return None
+        mask = (1 << self.length) - 1
+        if self.byte_order == "little":
+            raw = (int.from_bytes(data, "little") >> self.start) & mask
+        else:
+            raw = (int.from_bytes(data, "big") >> (size - self.start - self.length)) & mask
+        if self.signed and raw >> (self.length - 1):
+            raw -= 1 << self.length
+        return raw * self.scale + self.offset
+
+
+def _parse_id(value: Any) -> int:
+    if isinstance(value, int):
+        return value
+    return int(str(value), 16)
+
+
+def load_signal_defs(path: str) -> List[SignalDef]:
+    """
+    Read signal definitions from a JSON file (a list, or `{"signals": [...]}`).
+
+    Raises:
+        ValueError: When a definition is missing a field or is out of range.
+    """
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data.get("signals", []) if isinstance(data, dict) else data
+    defs: List[SignalDef] = []
+    for index, item in enumerate(items):
+        try:
+            signal = SignalDef(
+                name=str(item["name"]),
+                can_id=_parse_id(item["id"]),
+                start=int(item["start"]),
+                length=int(item["length"]),
+                byte_order=str(item.get("byte_order", "big")).lower(),
+                signed=bool(item.get("signed", False)),
+                scale=float(item.get("scale", 1.0)),
+                offset=float(item.get("offset", 0.0)),
+                unit=str(item.get("unit", "")),
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"signal #{index + 1} in {path}: {exc!r}") from exc
+        if signal.byte_order not in ("big", "little"):
+            raise ValueError(f"signal {signal.name}: byte_order must be 'big' or 'little'")
+        if not 1 <= signal.length <= 64 or signal.start < 0 or signal.start + signal.length > 64:
+            raise ValueError(f"signal {signal.name}: bits {signal.start}..{signal.start + signal.length - 1} do not fit in 8 bytes")
+        defs.append(signal)
+    if not defs:
+        raise ValueError(f"{path} defines no signals")
+    return defs
+
+
+class FrameDecoder:
+    """Decode frames by arbitration ID through a set of signal definitions."""
+
+    def __init__(self, signals: Iterable[SignalDef]) -> None:
+        self.signals = list(signals)
+        self.by_id: Dict[int, List[SignalDef]] = {}
+        for signal in self.signals:
+            self.by_id.setdefault(signal.can_id, []).append(signal)
+
+    @property
+    def ids(self) -> List[int]:
+        return sorted(self.by_id)
+
+    @property
+    def units(self) -> Dict[str, str]:
+        return {signal.name: signal.unit for signal in self.signals}
+
+    def decode(self, can_id: int, data: bytes) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        for signal in self.by_id.get(can_id, ()):
+            value = signal.decode(data)
+            if value is not None:
+                values[signal.name] = value
+        return values
+
+
+class MonitorLineParser:
+    """
+    Incremental parser for the adapter's monitor output (ATH1, spaces optional).
+
+    Chunks are split on CR and each line is decoded with one `unhexlify` call;
+    status lines (`BUFFER FULL`, `DATA ERROR`, prompts) are counted, not raised.
+    """
+
+    def __init__(self, id_chars: int = 3) -> None:
+        self.id_chars = id_chars
+        self.frames = 0
+        self.errors = 0
+        self.overflows = 0
+        self.prompts = 0
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> List[Frame]:
+        lines = (self._buffer + chunk).split(b"\r")
+        self._buffer = lines.pop()
+        frames: List[Frame] = []
+        id_chars = self.id_chars
+        for line in lines:
+            line = line.replace(b" ", b"").strip(b"\n\x00")
+            if line.startswith(_PROMPT):
+                self.prompts += 1
+                line = line.lstrip(_PROMPT)
+            if not line:
+                continue
+            try:
+                frames.append((int(line[:id_chars], 16), binascii.unhexlify(line[id_chars:])))
+            except (ValueError, binascii.Error):
+                if line.startswith(b"BUFFERFULL"):
+                    self.overflows += 1
+                else:
+                    self.errors += 1
+        self.frames += len(frames)
+        return frames
+
+
+def acceptance_filter(ids: Iterable[int], extended: bool = False) -> Tuple[int, int]:
+    """
+    Smallest ELM `ATCF`/`ATCM` (filter, mask) pair passing every ID in `ids`.
+
+    Bits on which the IDs disagree are left out of the mask, so a few unrelated
+    IDs may pass too; they are dropped by the decoder.
+    """
+
+    ids = list(ids)
+    width = 0x1FFFFFFF if extended else 0x7FF
+    differing = 0
+    for can_id in ids[1:]:
+        differing |= can_id ^ ids[0]
+    mask = width & ~differing
+    return ids[0] & mask, mask
+
+
+class CanMonitor:
+    """
+    Put an ELM327/STN adapter in monitor mode and decode what it hears.
+
+    Args:
+        port: Open pyserial port (or `DumpPort`).
+        decoder: Signal definitions to apply.
+        protocol: ELM protocol number of the bus (6 = CAN 11/500, 8 = 11/250,
+            7 and 9 for 29-bit IDs).
+    """
+
+    def __init__(self, port: Any, decoder: FrameDecoder, *, protocol: str = DEFAULT_CAN_PROTOCOL) -> None:
+        self.port = port
+        self.decoder = decoder
+        self.protocol = protocol
+        self.extended = protocol in _EXTENDED_PROTOCOLS
+        self.parser = MonitorLineParser(8 if self.extended else 3)
+        self.stn = False
+        self.restarts = 0
+        self.decoded = 0
+        self.latest: Dict[str, float] = {}
+        self.updated = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def command(self, text: str, settle: float = 0.0, timeout: float = 2.0) -> str:
+        self.port.reset_input_buffer()
+        self.port.write(text.encode() + b"\r")
+        if settle:
+            time.sleep(settle)
+        buffer = bytearray()
+        deadline = time.monotonic() + timeout
+        while _PROMPT not in buffer and time.monotonic() < deadline:
+            buffer.extend(self.port.read(getattr(self.port, "in_waiting", 0) or 1))
+        return buffer.decode("latin-1").replace(">", "").strip()
+
+    def setup(self) -> None:
+        """Reset the adapter, select the bus protocol and install the ID filter."""
+
+        self.command("ATZ", settle=1.0)
+        # Raw frames: headers on, no spaces (fewer bytes on the serial link), no ISO-TP formatting.
+        for text in ("ATE0", "ATL0", "ATS0", "ATH1", "ATCAF0", f"ATSP{self.protocol}"):
+            self.command(text)
+        self.stn = self.command("STI").upper().startswith("STN")
+        ids = self.decoder.ids
+        digits = 8 if self.extended else 3
+        if self.stn:
+            self.command("STFAC")
+            for can_id in ids:
+                self.command(f"STFAP {can_id:0{digits}X},{(0x1FFFFFFF if self.extended else 0x7FF):0{digits}X}")
+        else:
+            filt, mask = acceptance_filter(ids, self.extended)
+            self.command(f"ATCF {filt:0{digits}X}")
+            self.command(f"ATCM {mask:0{digits}X}")
+
+    def monitor_blocking(self, on_frame: Optional[Callable[[float, Dict[str, float]], None]] = None) -> None:
+        """Read frames until `stop()`; restarts monitoring if the adapter drops out of it."""
+
+        start = "STMA" if self.stn else "ATMA"
+        self.port.reset_input_buffer()
+        self.port.write(start.encode() + b"\r")
+        decode = self.decoder.decode
+        prompts = self.parser.prompts
+        while not self._stop.is_set():
+            chunk = self.port.read(getattr(self.port, "in_waiting", 0) or 1)
+            if not chunk:
+                continue
+            now = time.time()
+            for can_id, data in self.parser.feed(chunk):
+                values = decode(can_id, data)
+                if not values:
+                    continue
+                self.decoded += 1
+                with self._lock:
+                    self.latest.update(values)
+                    self.updated = now
+                if on_frame is not None:
+                    on_frame(now, values)
+            if self.parser.prompts != prompts:
+                # BUFFER FULL or a bus error ended ATMA; start again.
+                prompts = self.parser.prompts
+                self.restarts += 1
+                self.port.write(start.encode() + b"\r")
+        # Any character stops monitoring; wait for the prompt so the port is clean.
+        self.port.write(b"\r")
+        with contextlib.suppress(Exception):
+            deadline = time.monotonic() + 1.0
+            while time.monotonic() < deadline and _PROMPT not in self.port.read(64):
+                pass
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def snapshot(self) -> Tuple[float, Dict[str, float]]:
+        with self._lock:
+            return self.updated, dict(self.latest)
+
+    def summary(self, elapsed: float) -> str:
+        rate = self.parser.frames / elapsed if elapsed > 0 else 0.0
+        return (
+            f"{self.parser.frames} frames ({rate:.0f}/s), {self.decoded} decoded, "
+            f"{self.parser.errors} malformed, {self.parser.overflows} buffer overflows, {self.restarts} restarts"
+        )
+
+    async def run(self, publish: Callable[[Dict[str, Any]], Awaitable[None]], rate: float = DEFAULT_PUBLISH_HZ) -> None:
+        """
+        Monitor in a thread and publish the latest decoded values as samples
+        (at most `rate` per second, only when something changed). Cancel to stop.
+        """
+
+        loop = asyncio.get_running_loop()
+        reader = loop.run_in_executor(None, self.monitor_blocking)
+        period = 1.0 / rate if rate > 0 else 0.0
+        started = last_stats = time.monotonic()
+        published = 0.0
+        seq = 0
+        try:
+            while True:
+                await asyncio.sleep(period)
+                if reader.done():
+                    reader.result()
+                    return
+                updated, values = self.snapshot()
+                if updated > published and values:
+                    published = updated
+                    stamp = datetime.fromtimestamp(updated).isoformat(timespec="milliseconds")
+                    seq += 1
+                    await publish({"timestamp": stamp, "seq": seq, "pids": values})
+                if time.monotonic() - last_stats >= _STATS_PERIOD:
+                    log(f"CAN monitor: {self.summary(time.monotonic() - started)}")
+                    last_stats = time.monotonic()
+        finally:
+            self.stop()
+            with contextlib.suppress(Exception):
+                await reader
+            log(f"CAN monitor: {self.summary(time.monotonic() - started)}")
+
+
+_CANDUMP_LOG = re.compile(r"^\((?P<t>[\d.]+)\)\s+\S+\s+(?P<id>[0-9A-Fa-f]+)#(?P<data>[0-9A-Fa-f]*)")
+_CANDUMP_CONSOLE = re.compile(r"^\s*\S+\s+(?P<id>[0-9A-Fa-f]+)\s+\[\d+\]\s+(?P<data>(?:[0-9A-Fa-f]{2}\s*)*)$")
+
+
+def read_frame_dump(path: str, id_chars: int = 3) -> List[Tuple[Optional[float], int, bytes]]:
+    """
+    Load a recorded frame dump as `(timestamp or None, id, data)` tuples.
+
+    Accepts `candump -l` logs (`(t) can0 0C9#0011...`), `candump` console
+    output (`can0  0C9   [8]  00 11 ...`) and ELM monitor lines (`0C9 00 11 ...`).
+    """
+
+    frames: List[Tuple[Optional[float], int, bytes]] = []
+    parser = MonitorLineParser(id_chars)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            match = _CANDUMP_LOG.match(line)
+            if match:
+                frames.append((float(match["t"]), int(match["id"], 16), bytes.fromhex(match["data"])))
+                continue
+            match = _CANDUMP_CONSOLE.match(line)
+            if match:
+                frames.append((None, int(match["id"], 16), bytes.fromhex(match["data"])))
+                continue
+            frames.extend((None, can_id, data) for can_id, data in parser.feed(line.encode() + b"\r"))
+    return frames
+
+
+class DumpPort:
+    """
+    Fake ELM327 that answers setup commands and streams a frame dump on ATMA/STMA.
+
+    Args:
+        frames: `(timestamp or None, id, data)` tuples, e.g. from `read_frame_dump`.
+        timing: Reproduce the recorded spacing of timestamped frames.
+        loop: Start over at the end of the dump instead of going quiet.
+        stn: Answer `STI` like an STN chip (enables the STMA/STFAP path).
+    """
+
+    def __init__(
+        self,
+        frames: List[Tuple[Optional[float], int, bytes]],
+        *,
+        timing: bool = False,
+        loop: bool = False,
+        stn: bool = False,
+    ) -> None:
+        self.frames = frames
+        self.timing = timing
+        self.loop = loop
+        self.stn = stn
+        self.timeout: Optional[float] = 0.05
+        self.baudrate = 38400
+        self.spaces = True
+        self.filters: List[Tuple[int, int]] = []
+        self.commands: List[str] = []
+        self._out = bytearray()
+        self._monitoring = False
+        self._cursor = 0
+        self._t0: Optional[Tuple[float, float]] = None
+        self._cf = 0
+        self._cm = 0
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._out)
+
+    def reset_input_buffer(self) -> None:
+        self._out.clear()
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self._monitoring = False
+
+    def write(self, data: bytes) -> int:
+        if self._monitoring:
+            self._monitoring = False
+            self._out += b"STOPPED\r\r>"
+            return len(data)
+        for raw in data.split(b"\r")[:-1]:
+            self._answer(raw.decode("latin-1").replace(" ", "").upper())
+        return len(data)
+
+    def _answer(self, command: str) -> None:
+        self.commands.append(command)
+        reply = "OK"
+        if command == "ATZ":
+            reply = "ELM327 v1.5"
+        elif command == "STI":
+            reply = "STN1110 v4.0.1" if self.stn else "?"
+        elif command in ("ATS0", "ATS1"):
+            self.spaces = command == "ATS1"
+        elif command.startswith("ATCF"):
+            self._cf = int(command[4:], 16)
+        elif command.startswith("ATCM"):
+            self._cm = int(command[4:], 16)
+        elif command == "STFAC":
+            self.filters = []
+        elif command.startswith("STFAP"):
+            pattern, _, mask = command[5:].partition(",")
+            self.filters.append((int(pattern, 16), int(mask, 16)))
+        elif command in ("ATMA", "STMA"):
+            self._monitoring = True
+            self._t0 = None
+            return
+        self._out += reply.encode() + b"\r\r>"
+
+    def _passes(self, can_id: int) -> bool:
+        if self.filters:
+            return any(can_id & mask == pattern & mask for pattern, mask in self.filters)
+        return can_id & self._cm == self._cf & self._cm
+
+    def _next_line(self) -> Optional[bytes]:
+        while True:
+            if self._cursor >= len(self.frames):
+                if not self.loop or not self.frames:
+                    return None
+                self._cursor, self._t0 = 0, None
+            stamp, can_id, data = self.frames[self._cursor]
+            self._cursor += 1
+            if not self._passes(can_id):
+                continue
+            if self.timing and stamp is not None:
+                if self._t0 is None:
+                    self._t0 = (time.monotonic(), stamp)
+                delay = self._t0[0] + (stamp - self._t0[1]) - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            head = f"{can_id:08X}" if can_id > 0x7FF else f"{can_id:03X}"
+            body = data.hex().upper()
+            if self.spaces:
+                return (head + " " + " ".join(body[i:i + 2] for i in range(0, len(body), 2)) + " \r").encode()
+            return (head + body + "\r").encode()
+
+    def read(self, size: int = 1) -> bytes:
+        if self._monitoring and not self._out:
+            line = self._next_line()
+            if line is None:
+                time.sleep(self.timeout or 0)
+            else:
+                self._out += line
+        chunk = bytes(self._out[:size])
+        del self._out[:size]
+        return chunk
+
+
+def open_monitor_port(port: str, baudrate: Optional[int], dump: Optional[str], timing: bool, protocol: str) -> Any:
+    """Open the adapter (or a `DumpPort` over `dump`) for monitoring."""
+
+    if dump:
+        frames = read_frame_dump(dump, 8 if protocol in _EXTENDED_PROTOCOLS else 3)
+        log(f"CAN monitor: replaying {len(frames)} frames from {dump}" + (" at the recorded pace." if timing else "."))
+        return DumpPort(frames, timing=timing, loop=True)
+    import serial
+
+    handle = serial.serial_for_url(port, timeout=0.1)
+    handle.baudrate = baudrate or 38400
+    return handle
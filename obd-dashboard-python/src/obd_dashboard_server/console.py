@@ -0,0 +1,32 @@
+"""
+Console logging helpers shared by the server modules.
+"""
+
+from __future__ import annotations
+
+import sys
+
+_COLOR_RESET = "\033[0m"
+_COLOR_MAP = {
+    "info": "\033[36m",      # cyan
+    "success": "\033[32m",   # green
+    "warning": "\033[33m",   # yellow
+    "error": "\033[31m",     # red
+}
+
+
+def log(message: str, level: str = "info") -> None:
+    """
+    Emit a tagged, colorized log line to stderr.
+
+    Args:
+        message: Human-readable text to display.
+        level: Optional severity keyword (`info`, `success`, `warning`, `error`).
+
+    Returns:
+        None. Writes the formatted string directly to stderr.
+    """
+
+    color = _COLOR_MAP.get(level, "")
+    reset = _COLOR_RESET if color else ""
+    print(f"{color}[obd-ws] {message}{reset}", file=sys.stderr)
@@ -0,0 +1,125 @@
+"""
+Authenticated runtime control of the acquisition scheduler.
+
+Clients holding the control token can send a `control` message on their
+WebSocket connection to swap the polled PIDs, per-PID rates and the polling
+interval without restarting the server (and re-probing the adapter)::
+
+    {"type": "control", "token": "...", "interval": 0.5,
+     "pids": ["RPM", "SPEED", "COOLANT_TEMP"], "rates": {"COOLANT_TEMP": 0.2}}
+
+`pids` also accepts `"all"` (every Mode 01 PID known to python-OBD) and
+`"supported"` (the ECU-reported set). `rates` are in Hz; `0` or `null` removes
+an override. Omitted keys keep their current value. The change is applied at
+the start of the next cycle and announced to every client as a `config` event.
+"""
+
+from __future__ import annotations
+
+import hmac
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+MIN_INTERVAL = 0.2
+
+PidSpec = Union[str, List[str]]
+
+
+@dataclass
+class ControlRequest:
+    """Validated control message; None means "leave unchanged"."""
+
+    interval: Optional[float] = None
+    pids: Optional[PidSpec] = None
+    rates: Dict[str, Optional[float]] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"interval": self.interval, "pids": self.pids, "rates": dict(self.rates)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ControlRequest":
+        """
+        Build a request from a plain dict (e.g. one forwarded by a worker).
+        """
+
+        return cls(interval=data.get("interval"), pids=data.get("pids"), rates=dict(data.get("rates") or {}))
+
+
+def parse_control_message(message: Dict[str, Any]) -> ControlRequest:
+    """
+    Validate the body of a `control` message.
+
+    Raises:
+        ValueError: When a field has the wrong type or an out-of-range value.
+    """
+
+    request = ControlRequest()
+    if "interval" in message and message["interval"] is not None:
+        try:
+            interval = float(message["interval"])
+        except (TypeError, ValueError) as exc:
+            raise ValueError("interval must be a number of seconds") from exc
+        if interval < MIN_INTERVAL:
+            raise ValueError(f"interval must be at least {MIN_INTERVAL}s")
+        request.interval = interval
+    if "pids" in message and message["pids"] is not None:
+        pids = message["pids"]
+        if isinstance(pids, str):
+            if pids not in ("all", "supported"):
+                raise ValueError("pids must be a list of names, 'all' or 'supported'")
+        elif not isinstance(pids, list) or not pids or not all(isinstance(name, str) for name in pids):
+            raise ValueError("pids must be a non-empty list of PID names")
+        request.pids = pids
+    rates = message.get("rates") or {}
+    if not isinstance(rates, dict):
+        raise ValueError("rates must map PID names to Hz")
+    for name, hz in rates.items():
+        if hz is None or hz == 0:
+            request.rates[str(name)] = None
+            continue
+        try:
+            value = float(hz)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"rate for {name} must be a number of Hz") from exc
+        if value < 0:
+            raise ValueError(f"rate for {name} must be positive")
+        request.rates[str(name)] = value
+    if request.interval is None and request.pids is None and not request.rates:
+        raise ValueError("nothing to change (expected interval, pids or rates)")
+    return request
+
+
+class ControlChannel:
+    """
+    Check the token of incoming control messages and hand them to `apply`.
+
+    Args:
+        token: Shared secret clients must present.
+        apply: Coroutine applying a validated request and returning the reply
+            fields to send back (e.g. the resulting configuration).
+    """
+
+    def __init__(self, token: str, apply: Callable[[ControlRequest], Awaitable[Dict[str, Any]]]) -> None:
+        self._token = token.encode()
+        self._apply = apply
+
+    async def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process one `control` message.
+
+        Returns:
+            A `control_ack` reply for the sender.
+        """
+
+        presented = str(message.get("token", "")).encode()
+        if not hmac.compare_digest(presented, self._token):
+            return {"type": "control_ack", "ok": False, "error": "invalid token"}
+        try:
+            request = parse_control_message(message)
+        except ValueError as exc:
+            return {"type": "control_ack", "ok": False, "error": str(exc)}
+        try:
+            result = await self._apply(request)
+        except ValueError as exc:
+            return {"type": "control_ack", "ok": False, "error": str(exc)}
+        return {"type": "control_ack", "ok": True, **result}
@@ -0,0 +1,179 @@
+"""
+Background DTC and readiness monitor for the acquisition scheduler.
+
+The monitor never talks to the adapter on its own. The scheduler asks it for
+the next due command whenever an idle slot is available, runs the query, and
+hands the response back through `handle`. A `dtc` message is produced only when
+the trouble-code sets (or the MIL state / DTC count) differ from what was last
+published.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import obd
+
+from .console import log
+
+if TYPE_CHECKING:
+    from obd import OBD, OBDCommand, OBDResponse
+
+
+DEFAULT_DTC_PERIOD = 5.0
+_MAX_CONSECUTIVE_NULLS = 3
+
+# (python-OBD command name, field of the published message)
+_DTC_COMMANDS: Tuple[Tuple[str, str], ...] = (
+    ("STATUS", "status"),
+    ("GET_DTC", "confirmed"),            # Mode 03
+    ("GET_CURRENT_DTC", "pending"),      # Mode 07
+    ("GET_PERMANENT_DTC", "permanent"),  # Mode 0A
+)
+
+
+def _normalize_codes(value: Any) -> List[Tuple[str, str]]:
+    """
+    Convert the python-OBD DTC list shape into sorted `(code, description)` pairs.
+    """
+
+    if value is None:
+        return []
+    pairs: List[Tuple[str, str]] = []
+    try:
+        for item in value:
+            code, desc = item[0], item[1] if len(item) > 1 else ""
+            pairs.append((str(code), str(desc or "")))
+    except Exception:
+        text = str(value)
+        return [(text, "")] if text else []
+    return sorted(set(pairs))
+
+
+def _status_fields(value: Any) -> Tuple[Optional[bool], Optional[int]]:
+    """
+    Read the MIL flag and DTC count from a python-OBD `Status` object.
+    """
+
+    if value is None:
+        return None, None
+    mil = getattr(value, "MIL", getattr(value, "mil", None))
+    count = getattr(value, "DTC_count", getattr(value, "dtc_count", None))
+    return (bool(mil) if mil is not None else None, int(count) if count is not None else None)
+
+
+class DTCMonitor:
+    """
+    Low-priority background task polling Mode 03/07/0A and the STATUS monitor.
+
+    Args:
+        connection: Active python-OBD session (used only for support checks).
+        period: Minimum seconds between two queries of the same command.
+    """
+
+    name = "dtc"
+
+    def __init__(self, connection: "OBD", period: float = DEFAULT_DTC_PERIOD) -> None:
+        self.period = max(0.0, float(period))
+        self._commands: List[Tuple["OBDCommand", str]] = []
+        commands_obj = getattr(obd, "commands", None)
+        supports = getattr(connection, "supports", None)
+        for cmd_name, field in _DTC_COMMANDS:
+            cmd = getattr(commands_obj, cmd_name, None)
+            if cmd is None:
+                continue
+            if callable(supports):
+                try:
+                    if not supports(cmd):
+                        continue
+                except Exception:
+                    pass
+            self._commands.append((cmd, field))
+        self._due: Dict[str, float] = {}
+        self._nulls: Dict[str, int] = {}
+        self._pending_fields = {field for _cmd, field in self._commands}
+        self._state: Dict[str, Any] = {
+            "mil": None,
+            "dtc_count": None,
+            "confirmed": [],
+            "pending": [],
+            "permanent": [],
+        }
+        self._published: Optional[Tuple[Any, ...]] = None
+
+    @property
+    def commands(self) -> List["OBDCommand"]:
+        """Commands still in rotation (unsupported ones are dropped over time)."""
+
+        return [cmd for cmd, _field in self._commands]
+
+    def next_command(self, now: float) -> Optional["OBDCommand"]:
+        """
+        Return the most overdue command, or None when nothing is due yet.
+        """
+
+        best: Optional["OBDCommand"] = None
+        best_due = now
+        for cmd, _field in self._commands:
+            due = self._due.get(cmd.name, 0.0)
+            if due <= best_due:
+                best, best_due = cmd, due
+        return best
+
+    def handle(self, cmd: "OBDCommand", response: Optional["OBDResponse"], now: float) -> Optional[Dict[str, Any]]:
+        """
+        Fold a query result into the monitor state.
+
+        Args:
+            cmd: Command that was queried.
+            response: python-OBD response, or None when the query raised.
+            now: Monotonic timestamp of the query completion.
+
+        Returns:
+            A `dtc` message when the code sets changed, otherwise None.
+        """
+
+        self._due[cmd.name] = now + self.period
+        field = next((f for c, f in self._commands if c is cmd), None)
+        if field is None:
+            return None
+        if response is None or response.is_null():
+            misses = self._nulls.get(cmd.name, 0) + 1
+            self._nulls[cmd.name] = misses
+            if misses >= _MAX_CONSECUTIVE_NULLS:
+                log(f"{cmd.name} gave no data {misses} times; dropping it from DTC polling.", level="warning")
+                self._commands = [(c, f) for c, f in self._commands if c is not cmd]
+                self._pending_fields.discard(field)
+            return self._maybe_publish()
+        self._nulls[cmd.name] = 0
+        self._pending_fields.discard(field)
+        if field == "status":
+            self._state["mil"], self._state["dtc_count"] = _status_fields(response.value)
+        else:
+            self._state[field] = _normalize_codes(response.value)
+        return self._maybe_publish()
+
+    def _maybe_publish(self) -> Optional[Dict[str, Any]]:
+        # Wait until every command answered once so the first message is complete.
+        if self._pending_fields:
+            return None
+        key = (
+            self._state["mil"],
+            self._state["dtc_count"],
+            tuple(code for code, _ in self._state["confirmed"]),
+            tuple(code for code, _ in self._state["pending"]),
+            tuple(code for code, _ in self._state["permanent"]),
+        )
+        if key == self._published:
+            return None
+        self._published = key
+        return {
+            "type": "dtc",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "mil": self._state["mil"],
+            "dtc_count": self._state["dtc_count"],
+            "confirmed": [{"code": c, "description": d} for c, d in self._state["confirmed"]],
+            "pending": [{"code": c, "description": d} for c, d in self._state["pending"]],
+            "permanent": [{"code": c, "description": d} for c, d in self._state["permanent"]],
+        }
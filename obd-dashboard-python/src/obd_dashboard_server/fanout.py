@@ -0,0 +1,154 @@
+"""
+Fan-out of telemetry messages to connected WebSocket clients.
+
+Every client owns a small queue holding the newest sample plus any pending
+event messages, so a slow client only ever misses superseded samples and never
+steals messages from the other clients. When a `ControlChannel` is attached,
+incoming `control` messages are answered on the same connection.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+import websockets
+
+from .console import log
+
+if TYPE_CHECKING:
+    from websockets.legacy.server import WebSocketServerProtocol
+
+    from .control import ControlChannel
+
+
+CLIENT_QUEUE_SIZE = 8
+
+
+async def _push_latest(queue: asyncio.Queue[Dict[str, Any]], payload: Dict[str, Any]) -> None:
+    """
+    Keep only the most recent sample in the queue, plus any undelivered events.
+
+    Args:
+        queue: The asyncio queue shared with websocket consumers.
+        payload: The newest telemetry snapshot or event message.
+
+    Returns:
+        None. Discards superseded samples (and the oldest events if still full).
+
+    The websocket consumers only care about the newest sample, so a bounded queue
+    avoids unnecessary backlog and backpressure handling in the rest of the code.
+    Event messages (payloads with a `type`, e.g. `dtc`) are not superseded by the
+    next sample and stay queued until a consumer picks them up.
+    """
+
+    if queue.full() or (payload.get("type") is None and not queue.empty()):
+        events: List[Dict[str, Any]] = []
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item.get("type") is not None:
+                events.append(item)
+        keep = queue.maxsize - 1 if queue.maxsize > 0 else len(events)
+        for item in events[-keep:] if keep > 0 else []:
+            queue.put_nowait(item)
+    await queue.put(payload)
+
+
+async def consumer_handler(websocket: "WebSocketServerProtocol", queue: asyncio.Queue[Dict[str, Any]]) -> None:
+    """
+    Relay queue entries to a connected WebSocket client until they disconnect.
+
+    Args:
+        websocket: Client connection created by `websockets.serve`.
+        queue: Per-client queue fed by `Fanout.publish`.
+
+    Returns:
+        None. Completes when the websocket is closed.
+    """
+
+    peer = getattr(websocket, "remote_address", "unknown")
+    log(f"Client connected: {peer}.")
+    try:
+        while True:
+            data = await queue.get()
+            await websocket.send(json.dumps(data, default=str))
+    except websockets.exceptions.ConnectionClosed:
+        log(f"Client disconnected: {peer}.")
+
+
+async def control_handler(websocket: "WebSocketServerProtocol", control: "ControlChannel") -> None:
+    """
+    Answer `control` messages sent by a client; anything else is ignored.
+
+    Args:
+        websocket: Client connection created by `websockets.serve`.
+        control: Channel validating the token and applying the request.
+
+    Returns:
+        None. Completes when the websocket is closed.
+    """
+
+    peer = getattr(websocket, "remote_address", "unknown")
+    with contextlib.suppress(websockets.exceptions.ConnectionClosed):
+        async for raw in websocket:
+            try:
+                message = json.loads(raw)
+            except (TypeError, ValueError):
+                continue
+            if not isinstance(message, dict) or message.get("type") != "control":
+                continue
+            reply = await control.handle(message)
+            if not reply.get("ok"):
+                log(f"Rejected control message from {peer}: {reply.get('error')}", level="warning")
+            await websocket.send(json.dumps(reply, default=str))
+
+
+class Fanout:
+    """
+    Broadcast every published message to all subscribed client queues.
+
+    Args:
+        maxsize: Capacity of each client queue (the newest sample plus events).
+        control: Optional channel answering `control` messages from clients.
+    """
+
+    def __init__(self, maxsize: int = CLIENT_QUEUE_SIZE, control: Optional["ControlChannel"] = None) -> None:
+        self.maxsize = maxsize
+        self.control = control
+        self._queues: Set[asyncio.Queue[Dict[str, Any]]] = set()
+
+    def __len__(self) -> int:
+        return len(self._queues)
+
+    def subscribe(self) -> asyncio.Queue[Dict[str, Any]]:
+        queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=self.maxsize)
+        self._queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[Dict[str, Any]]) -> None:
+        self._queues.discard(queue)
+
+    async def publish(self, payload: Dict[str, Any]) -> None:
+        for queue in list(self._queues):
+            await _push_latest(queue, payload)
+
+    async def serve_client(self, websocket: "WebSocketServerProtocol", *_unused: Any) -> None:
+        """
+        `websockets.serve` handler relaying this fan-out to one client.
+
+        `websockets.serve` provides `(websocket, path)` on older releases; the path is unused.
+        """
+
+        queue = self.subscribe()
+        tasks = [asyncio.ensure_future(consumer_handler(websocket, queue))]
+        if self.control is not None:
+            tasks.append(asyncio.ensure_future(control_handler(websocket, self.control)))
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.unsubscribe(queue)
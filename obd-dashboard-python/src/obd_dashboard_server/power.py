@@ -0,0 +1,253 @@
+"""
+Engine-state-aware polling profiles.
+
+The scheduler feeds every sample to `PowerManager.observe`, which infers the
+engine state (off, cranking, idle, driving) from RPM, SPEED and the control
+module voltage, and hands back a new `PollingProfile` when the state changes.
+Profiles trade sample rate for adapter traffic and CPU: with the ignition on and
+the engine off only a handful of state PIDs are read at 0.2 Hz, while driving
+keeps the fast tier at the full configured rate.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from obd import OBDCommand
+
+
+ENGINE_STATES: Tuple[str, ...] = ("off", "cranking", "idle", "driving")
+STATE_PIDS: FrozenSet[str] = frozenset({"RPM", "SPEED", "CONTROL_MODULE_VOLTAGE"})
+# PIDs that follow the driver's inputs; everything else moves slowly (temperatures, levels, counters).
+FAST_TIER: FrozenSet[str] = frozenset({
+    "RPM",
+    "SPEED",
+    "THROTTLE_POS",
+    "RELATIVE_THROTTLE_POS",
+    "ACCELERATOR_POS_D",
+    "ACCELERATOR_POS_E",
+    "ENGINE_LOAD",
+    "ABSOLUTE_LOAD",
+    "INTAKE_PRESSURE",
+    "MAF",
+    "TIMING_ADVANCE",
+    "SHORT_FUEL_TRIM_1",
+    "SHORT_FUEL_TRIM_2",
+    "COMMANDED_EQUIV_RATIO",
+})
+
+CRANKING_RPM = 50.0
+RUNNING_RPM = 400.0
+MOVING_SPEED = 3.0          # km/h
+CHARGING_VOLTAGE = 13.3     # alternator output, engine running
+CRANKING_VOLTAGE = 10.5     # starter motor pulling the battery down
+DEFAULT_HOLD = 3
+
+
+def infer_engine_state(rpm: Optional[float], speed: Optional[float], voltage: Optional[float]) -> Optional[str]:
+    """
+    Classify the engine state from the latest RPM, SPEED and voltage readings.
+
+    Args:
+        rpm: Engine speed in rev/min, or None when unavailable.
+        speed: Vehicle speed in km/h, or None when unavailable.
+        voltage: Control module voltage in volts, or None when unavailable.
+
+    Returns:
+        One of `ENGINE_STATES`, or None when there is nothing to go on.
+    """
+
+    if rpm is None:
+        if voltage is None:
+            return None
+        if voltage < CRANKING_VOLTAGE:
+            return "cranking"
+        return "idle" if voltage >= CHARGING_VOLTAGE else "off"
+    if rpm < RUNNING_RPM:
+        if rpm >= CRANKING_RPM or (voltage is not None and voltage < CRANKING_VOLTAGE):
+            return "cranking"
+        return "off"
+    if speed is not None and speed >= MOVING_SPEED:
+        return "driving"
+    return "idle"
+
+
+@dataclass(frozen=True)
+class PollingProfile:
+    """
+    Which PIDs to poll and how often while the engine is in a given state.
+
+    Attributes:
+        name: Engine state the profile applies to.
+        interval: Seconds between cycles (None keeps the configured `--interval`).
+        pids: PID names to poll (None polls every configured PID).
+        slow_period: Minimum seconds between reads of PIDs outside `FAST_TIER`
+            (0 reads them every cycle).
+    """
+
+    name: str
+    interval: Optional[float] = None
+    pids: Optional[FrozenSet[str]] = None
+    slow_period: float = 0.0
+
+    def select(
+        self, cmds: Sequence["OBDCommand"], base_interval: float
+    ) -> Tuple[List["OBDCommand"], float, Dict[str, float]]:
+        """
+        Apply the profile to the configured command set.
+
+        Returns:
+            `(commands, interval, periods)` where `periods` maps PID names to
+            their minimum read period in seconds.
+        """
+
+        interval = self.interval if self.interval is not None else base_interval
+        chosen = [
+            cmd for cmd in cmds if self.pids is None or getattr(cmd, "name", "") in self.pids
+        ]
+        periods: Dict[str, float] = {}
+        if self.slow_period > interval:
+            for cmd in chosen:
+                name = getattr(cmd, "name", "")
+                if name not in FAST_TIER:
+                    periods[name] = self.slow_period
+        return chosen, interval, periods
+
+
+DEFAULT_PROFILES: Dict[str, PollingProfile] = {
+    "off": PollingProfile("off", interval=5.0, pids=STATE_PIDS),
+    "cranking": PollingProfile("cranking", pids=STATE_PIDS | {"COOLANT_TEMP"}),
+    "idle": PollingProfile("idle", slow_period=10.0),
+    "driving": PollingProfile("driving", slow_period=2.0),
+}
+
+
+@dataclass
+class ProfileUsage:
+    """Wall time, adapter queries and CPU time spent under one profile."""
+
+    seconds: float = 0.0
+    queries: int = 0
+    cpu_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        minutes = self.seconds / 60.0
+        return {
+            "seconds": round(self.seconds, 1),
+            "queries_per_min": round(self.queries / minutes, 1) if minutes > 0 else 0.0,
+            "cpu_percent": round(self.cpu_seconds / self.seconds * 100.0, 2) if self.seconds > 0 else 0.0,
+        }
+
+
+@dataclass
+class PowerManager:
+    """
+    Track the engine state and pick the matching polling profile.
+
+    Switching up (cranking, driving) happens on the first matching sample so the
+    dashboard reacts immediately; switching down (idle, off) waits for `hold`
+    consecutive samples to avoid flapping at traffic lights.
+    """
+
+    profiles: Mapping[str, PollingProfile] = field(default_factory=lambda: dict(DEFAULT_PROFILES))
+    hold: int = DEFAULT_HOLD
+    state: str = "driving"
+    usage: Dict[str, ProfileUsage] = field(default_factory=dict)
+    _candidate: Optional[str] = None
+    _streak: int = 0
+    _since: Optional[float] = None
+    _since_cpu: float = 0.0
+
+    @property
+    def profile(self) -> PollingProfile:
+        return self.profiles[self.state]
+
+    def observe(self, pids: Mapping[str, Any], queries: int, now: Optional[float] = None) -> Optional[PollingProfile]:
+        """
+        Account the last cycle and feed its sample to the state machine.
+
+        Args:
+            pids: Latest PID values (magnitudes) keyed by command name.
+            queries: Adapter queries issued during the cycle.
+            now: Monotonic timestamp (defaults to `time.monotonic()`).
+
+        Returns:
+            The new profile when the engine state changed, otherwise None.
+        """
+
+        now = time.monotonic() if now is None else now
+        self._account(queries, now)
+        inferred = infer_engine_state(
+            _as_float(pids.get("RPM")),
+            _as_float(pids.get("SPEED")),
+            _as_float(pids.get("CONTROL_MODULE_VOLTAGE")),
+        )
+        if inferred is None or inferred == self.state or inferred not in self.profiles:
+            self._candidate, self._streak = None, 0
+            return None
+        if inferred != self._candidate:
+            self._candidate, self._streak = inferred, 0
+        self._streak += 1
+        upward = ENGINE_STATES.index(inferred) > ENGINE_STATES.index(self.state)
+        if not upward and self._streak < self.hold:
+            return None
+        self.state = inferred
+        self._candidate, self._streak = None, 0
+        return self.profile
+
+    def profile_message(self, interval: float, pids: Sequence[str]) -> Dict[str, Any]:
+        """Build the `profile` event published to clients on every switch."""
+
+        return {
+            "type": "profile",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "engine_state": self.state,
+            "interval": interval,
+            "pids": sorted(pids),
+        }
+
+    def metrics_message(self, full_rate_qpm: float) -> Dict[str, Any]:
+        """
+        Build the `metrics` event comparing actual traffic with full-rate polling.
+
+        Args:
+            full_rate_qpm: Queries per minute the configured PIDs would cost if
+                every one of them were polled at `--interval`.
+        """
+
+        total = ProfileUsage()
+        for usage in self.usage.values():
+            total.seconds += usage.seconds
+            total.queries += usage.queries
+            total.cpu_seconds += usage.cpu_seconds
+        overall = total.as_dict()
+        return {
+            "type": "metrics",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "engine_state": self.state,
+            "profiles": {name: usage.as_dict() for name, usage in self.usage.items()},
+            "queries_per_min": overall["queries_per_min"],
+            "full_rate_queries_per_min": round(full_rate_qpm, 1),
+            "saved_queries_per_min": round(max(0.0, full_rate_qpm - overall["queries_per_min"]), 1),
+            "cpu_percent": overall["cpu_percent"],
+        }
+
+    def _account(self, queries: int, now: float) -> None:
+        cpu = time.process_time()
+        usage = self.usage.setdefault(self.state, ProfileUsage())
+        if self._since is not None:
+            usage.seconds += now - self._since
+            usage.cpu_seconds += cpu - self._since_cpu
+        usage.queries += queries
+        self._since, self._since_cpu = now, cpu
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,355 @@
+"""
+Acquisition scheduler pacing the live PID polling loop.
+
+Each cycle queries the foreground (live) commands back-to-back, publishes the
+sample, then treats the time left before the next deadline as an idle slot.
+Background tasks such as `DTCMonitor` may only borrow from that idle slot and
+only up to a fixed share of the adapter time, so they never sit in front of a
+live PID query.
+
+Foreground commands can carry a minimum read period (slow tiers); published
+samples always contain the latest value of every active PID. An optional
+`PowerManager` swaps the active profile when the engine state changes, and
+`reconfigure` lets a control client replace the command set, per-PID rates and
+interval while the loop keeps running.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from .console import log
+from .power import STATE_PIDS
+
+if TYPE_CHECKING:
+    from obd import OBD, OBDCommand
+
+    from .power import PowerManager
+
+
+DEFAULT_BACKGROUND_SHARE = 0.1
+DEFAULT_STATS_PERIOD = 60.0
+_COST_SMOOTHING = 0.2
+
+Publisher = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class SchedulerStats:
+    """
+    Running counters describing how adapter time was spent.
+
+    `background_delay_*` measure how far background queries pushed the next
+    foreground cycle past its deadline, i.e. the extra latency they added to
+    RPM/SPEED updates.
+    """
+
+    cycles: int = 0
+    foreground_queries: int = 0
+    foreground_time: float = 0.0
+    background_queries: int = 0
+    background_time: float = 0.0
+    background_deferred: int = 0
+    background_delay_total: float = 0.0
+    background_delay_max: float = 0.0
+    overruns: int = 0
+
+    def summary(self) -> str:
+        busy = self.foreground_time + self.background_time
+        share = (self.background_time / busy * 100.0) if busy > 0 else 0.0
+        fg_avg = (self.foreground_time / self.cycles * 1000.0) if self.cycles else 0.0
+        return (
+            f"{self.cycles} cycles, foreground {fg_avg:.0f} ms/cycle, "
+            f"{self.background_queries} background queries ({share:.1f}% of adapter time, "
+            f"{self.background_deferred} deferred), background delay "
+            f"max {self.background_delay_max * 1000.0:.1f} ms / total {self.background_delay_total * 1000.0:.1f} ms, "
+            f"{self.overruns} overruns"
+        )
+
+
+class AcquisitionScheduler:
+    """
+    Deadline-paced poller with an idle-slot background class.
+
+    Args:
+        connection: Active python-OBD session.
+        cmds: Foreground commands queried every cycle.
+        interval: Seconds between cycle starts.
+        publish: Coroutine receiving every outgoing message (samples and events).
+        background: Low-priority tasks exposing `next_command(now)` and
+            `handle(cmd, response, now)`.
+        background_share: Fraction of adapter time background tasks may use.
+        stats_period: Seconds between scheduler summaries in the log (0 disables).
+        power: Optional `PowerManager` switching polling profiles by engine state.
+    """
+
+    def __init__(
+        self,
+        connection: "OBD",
+        cmds: Sequence["OBDCommand"],
+        interval: float,
+        publish: Publisher,
+        *,
+        background: Sequence[Any] = (),
+        background_share: float = DEFAULT_BACKGROUND_SHARE,
+        stats_period: float = DEFAULT_STATS_PERIOD,
+        power: Optional["PowerManager"] = None,
+    ) -> None:
+        self.connection = connection
+        self.base_cmds: List["OBDCommand"] = list(cmds)
+        self.base_interval = interval
+        self.cmds: List["OBDCommand"] = []
+        self.interval = interval
+        self.periods: Dict[str, float] = {}
+        self.rate_periods: Dict[str, float] = {}
+        self.power = power
+        self.publish = publish
+        self.background = list(background)
+        self.background_share = min(max(0.0, background_share), 1.0)
+        self.stats_period = stats_period
+        self.stats = SchedulerStats()
+        self._credit = 0.0
+        self._cost_estimate: Optional[float] = None
+        self._rotation = 0
+        self._reported_failures: set[str] = set()
+        self._responded_names: set[str] = set()
+        self._reported_response_pids = False
+        self._latest: Dict[str, Any] = {}
+        self._next_due: Dict[str, float] = {}
+        # State PIDs must keep being retried: an ECU asleep with the engine off
+        # answers NO DATA until the next start.
+        self._keep_retrying: set[str] = set(STATE_PIDS) if power is not None else set()
+        self._quiet: set[str] = set()
+        self._apply_profile()
+
+    def _apply_profile(self) -> None:
+        """
+        Derive the active commands, interval and per-PID periods.
+
+        A PID whose period changed is read on the next cycle, so a shorter
+        period does not wait out the deadline set under the previous one.
+        """
+
+        previous = self.periods
+        if self.power is None:
+            self.cmds, self.interval, self.periods = list(self.base_cmds), self.base_interval, {}
+        else:
+            self.cmds, self.interval, self.periods = self.power.profile.select(self.base_cmds, self.base_interval)
+        if self.rate_periods:
+            self.periods = {**self.periods, **self.rate_periods}
+        for name in set(previous) | set(self.periods):
+            if previous.get(name) != self.periods.get(name):
+                self._next_due.pop(name, None)
+        active = {getattr(cmd, "name", str(cmd)) for cmd in self.cmds}
+        for name in list(self._latest):
+            if name not in active:
+                del self._latest[name]
+
+    async def run(self) -> None:
+        """
+        Poll forever, publishing one sample per cycle. Cancel the task to stop.
+        """
+
+        deadline = time.monotonic()
+        last_accrual = deadline
+        last_stats = deadline
+        try:
+            while True:
+                started = time.monotonic()
+                queries_before = self.stats.foreground_queries
+                pids = self._poll_foreground(started)
+                self.stats.foreground_time += time.monotonic() - started
+                self.stats.cycles += 1
+                await self.publish({
+                    "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+                    "seq": self.stats.cycles,
+                    "pids": pids,
+                })
+                if self.power is not None:
+                    await self._observe_power(pids, self.stats.foreground_queries - queries_before)
+
+                deadline += self.interval
+                now = time.monotonic()
+                if now > deadline:
+                    # Foreground alone overran the period: skip the missed ticks.
+                    self.stats.overruns += 1
+                    deadline = now
+                self._credit = min(
+                    self._credit + (now - last_accrual) * self.background_share,
+                    self.background_share * self.interval * 2,
+                )
+                last_accrual = now
+                await self._run_background(deadline)
+
+                if self.stats_period and now - last_stats >= self.stats_period:
+                    log(f"Scheduler: {self.stats.summary()}")
+                    if self.power is not None:
+                        await self.publish(self.power.metrics_message(self.full_rate_queries_per_min()))
+                    last_stats = now
+                await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+        finally:
+            if self.stats.cycles:
+                log(f"Scheduler: {self.stats.summary()}")
+
+    def reconfigure(
+        self,
+        *,
+        cmds: Optional[Sequence["OBDCommand"]] = None,
+        interval: Optional[float] = None,
+        rates: Optional[Dict[str, Optional[float]]] = None,
+    ) -> None:
+        """
+        Replace the configured commands, interval and/or per-PID rates.
+
+        Changes take effect from the next cycle; the connection is left untouched.
+
+        Args:
+            cmds: New foreground command set (None keeps the current one).
+            interval: New base interval in seconds (None keeps the current one).
+            rates: Per-PID read rates in Hz; None or 0 removes an override.
+        """
+
+        if cmds is not None:
+            self.base_cmds = list(cmds)
+            # Give explicitly requested PIDs another chance even if they failed before.
+            names = {getattr(cmd, "name", str(cmd)) for cmd in self.base_cmds}
+            self._reported_failures -= names
+        if interval is not None:
+            self.base_interval = interval
+        for name, hz in (rates or {}).items():
+            if hz:
+                self.rate_periods[name] = 1.0 / hz
+            else:
+                self.rate_periods.pop(name, None)
+            self._next_due.pop(name, None)
+        self._apply_profile()
+
+    def config_message(self) -> Dict[str, Any]:
+        """Describe the active configuration as a `config` event."""
+
+        return {
+            "type": "config",
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "interval": self.base_interval,
+            "active_interval": self.interval,
+            "pids": [getattr(cmd, "name", str(cmd)) for cmd in self.base_cmds],
+            "active_pids": [getattr(cmd, "name", str(cmd)) for cmd in self.cmds],
+            "rates": {name: 1.0 / period for name, period in sorted(self.rate_periods.items())},
+        }
+
+    def full_rate_queries_per_min(self) -> float:
+        """Adapter queries per minute if every configured PID ran at the base interval."""
+
+        return len(self.base_cmds) * 60.0 / self.base_interval if self.base_interval > 0 else 0.0
+
+    async def _observe_power(self, pids: Dict[str, Any], queries: int) -> None:
+        assert self.power is not None
+        profile = self.power.observe(pids, queries)
+        if profile is None:
+            return
+        self._apply_profile()
+        names = [getattr(cmd, "name", str(cmd)) for cmd in self.cmds]
+        log(
+            f"Engine state '{self.power.state}': polling {len(names)} PIDs every {self.interval}s"
+            + (f" (slow tier every {profile.slow_period}s)" if self.periods else "")
+            + "."
+        )
+        await self.publish(self.power.profile_message(self.interval, names))
+
+    def _poll_foreground(self, now: float) -> Dict[str, Any]:
+        for cmd in self.cmds:
+            cmd_name = getattr(cmd, "name", str(cmd))
+            if cmd_name in self._reported_failures:
+                continue
+            if self._next_due.get(cmd_name, 0.0) > now:
+                continue
+            self._next_due[cmd_name] = now + self.periods.get(cmd_name, 0.0)
+            self.stats.foreground_queries += 1
+            try:
+                rsp = self.connection.query(cmd)
+            except Exception as exc:
+                self._report_failure(cmd_name, f"{cmd_name} not supported or query failed: {exc}")
+                continue
+            if rsp is None or rsp.is_null():
+                self._report_failure(cmd_name, f"{cmd_name} not supported by ECU (null response)")
+                continue
+            value = rsp.value
+            if value is None:
+                self._report_failure(cmd_name, f"{cmd_name} responded with empty value")
+                continue
+            self._latest[cmd_name] = getattr(value, "magnitude", value)
+            self._responded_names.add(cmd_name)
+            self._quiet.discard(cmd_name)
+        if not self._reported_response_pids and self._responded_names:
+            log(f"Responding Mode 01 PIDs: {', '.join(sorted(self._responded_names))}")
+            self._reported_response_pids = True
+        return dict(self._latest)
+
+    def _report_failure(self, cmd_name: str, message: str) -> None:
+        if cmd_name in self._keep_retrying:
+            self._latest.pop(cmd_name, None)
+            if cmd_name not in self._quiet:
+                log(f"{message}; will keep retrying it for engine-state detection", level="warning")
+                self._quiet.add(cmd_name)
+            return
+        log(message, level="warning")
+        self._reported_failures.add(cmd_name)
+
+    def _next_background(self, now: float) -> Optional[tuple[Any, "OBDCommand"]]:
+        count = len(self.background)
+        for offset in range(count):
+            task = self.background[(self._rotation + offset) % count]
+            cmd = task.next_command(now)
+            if cmd is not None:
+                self._rotation = (self._rotation + offset + 1) % count
+                return task, cmd
+        return None
+
+    def _expected_cost(self) -> float:
+        # Until a background query has been timed, assume it costs as much as a live PID.
+        if self._cost_estimate is not None:
+            return self._cost_estimate
+        if self.stats.foreground_queries:
+            return self.stats.foreground_time / self.stats.foreground_queries
+        return 0.0
+
+    async def _run_background(self, deadline: float) -> None:
+        """
+        Spend the idle slot before `deadline` on due background queries.
+        """
+
+        while self.background and self._credit > 0:
+            now = time.monotonic()
+            picked = self._next_background(now)
+            if picked is None:
+                return
+            if deadline - now < self._expected_cost():
+                self.stats.background_deferred += 1
+                return
+            task, cmd = picked
+            started = time.monotonic()
+            try:
+                rsp = self.connection.query(cmd)
+            except Exception as exc:
+                log(f"Background {getattr(cmd, 'name', cmd)} query failed: {exc}", level="warning")
+                rsp = None
+            finished = time.monotonic()
+            cost = finished - started
+            self._credit -= cost
+            if self._cost_estimate is None:
+                self._cost_estimate = cost
+            else:
+                self._cost_estimate += (cost - self._cost_estimate) * _COST_SMOOTHING
+            self.stats.background_queries += 1
+            self.stats.background_time += cost
+            if finished > deadline:
+                late = finished - deadline
+                self.stats.background_delay_total += late
+                self.stats.background_delay_max = max(self.stats.background_delay_max, late)
+            message = task.handle(cmd, rsp, finished)
+            if message is not None:
+                await self.publish(message)
@@ -6,6 +6,13 @@ This module provides a small CLI (`obd-dashboard-server` or `python -m obd_dashb
 
   * Opens a serial (or socket) connection to an ELM327-compatible interface.
   * Periodically queries Mode 01 PIDs using python-OBD.
+  * Switches polling profiles by inferred engine state to save adapter traffic and CPU.
+  * Interleaves low-priority DTC/readiness polling in idle slots and publishes `dtc` messages on change.
+  * Optionally mirrors the latest values into a seqlock-protected shared-memory region.
+  * Optionally pushes 10 s compressed columnar batches to a fleet collector, spooling to disk offline.
+  * Records raw adapter traffic (`--capture`) and replays recorded transcripts as an adapter (`--replay`).
+  * Alternatively decodes broadcast CAN frames in adapter monitor mode (`--can-monitor`) instead of polling.
+  * Accepts token-authenticated `control` messages that change PIDs, rates and interval live.
   * Caches the latest sample and serves it to any WebSocket client (the dashboard UI).
 
 Typical usage::
@@ -20,26 +27,34 @@ import asyncio
 import asyncio.subprocess
 from asyncio.subprocess import Process
 import contextlib
-import json
-from datetime import datetime
+import os
 import re
 import sys
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import obd
 import websockets
 
+from .canmon import DEFAULT_CAN_PROTOCOL, DEFAULT_PUBLISH_HZ, CanMonitor, FrameDecoder, load_signal_defs, open_monitor_port
+from .console import log
+from .control import ControlChannel, ControlRequest, PidSpec
+from .dtc import DEFAULT_DTC_PERIOD, DTCMonitor
+from .fanout import Fanout
+from .power import PowerManager
+from .scheduler import DEFAULT_BACKGROUND_SHARE, AcquisitionScheduler, Publisher
+from .shm import DEFAULT_SHM_PATH, LatestValuesWriter
+from .transcript import TranscriptReplay, capture_serial, serve_pty
+from .uplink import (
+    DEFAULT_BATCH_SECONDS,
+    DEFAULT_SPOOL_DIR,
+    DEFAULT_SPOOL_MAX_BYTES,
+    SpoolQueue,
+    Uplink,
+)
+from .workers import WorkerPool
+
 if TYPE_CHECKING:
     from obd import OBD, OBDCommand
-    from websockets.legacy.server import WebSocketServerProtocol
-
 
-_COLOR_RESET = "\033[0m"
-_COLOR_MAP = {
-    "info": "\033[36m",      # cyan
-    "success": "\033[32m",   # green
-    "warning": "\033[33m",   # yellow
-    "error": "\033[31m",     # red
-}
 
 DEFAULT_PORT = "/dev/ttyUSB0"
 DEFAULT_WS_PORT = 8765
@@ -104,23 +119,6 @@ def _mode1_supported_commands(connection: "OBD") -> List["OBDCommand"]:
     ]
 
 
-def log(message: str, level: str = "info") -> None:
-    """
-    Emit a tagged, colorized log line to stderr.
-
-    Args:
-        message: Human-readable text to display.
-        level: Optional severity keyword (`info`, `success`, `warning`, `error`).
-
-    Returns:
-        None. Writes the formatted string directly to stderr.
-    """
-
-    color = _COLOR_MAP.get(level, "")
-    reset = _COLOR_RESET if color else ""
-    print(f"{color}[obd-ws] {message}{reset}", file=sys.stderr)
-
-
 def build_command_list(connection: "OBD", only_supported: bool) -> List["OBDCommand"]:
     """
     Resolve the list of Mode 01 commands to poll from the ECU.
@@ -142,25 +140,32 @@ def build_command_list(connection: "OBD", only_supported: bool) -> List["OBDComm
     return commands
 
 
-async def _push_latest(queue: asyncio.Queue[Dict[str, Any]], payload: Dict[str, Any]) -> None:
+def resolve_commands(connection: "OBD", spec: PidSpec) -> List["OBDCommand"]:
     """
-    Keep only the most recent payload in the single-slot queue.
+    Turn a control-message PID selection into commands.
 
     Args:
-        queue: The asyncio queue shared with websocket consumers.
-        payload: The newest telemetry snapshot.
+        connection: Active python-OBD connection.
+        spec: `"all"`, `"supported"` or a list of PID names (case-insensitive).
 
     Returns:
-        None. Discards the previous payload if the queue is full.
+        The matching `OBDCommand` objects, in the requested order.
 
-    The websocket consumers only care about the newest sample, so a bounded queue
-    avoids unnecessary backlog and backpressure handling in the rest of the code.
+    Raises:
+        ValueError: When a requested name is not a known Mode 01 PID.
     """
 
-    if queue.full():
-        with contextlib.suppress(asyncio.QueueEmpty):
-            queue.get_nowait()
-    await queue.put(payload)
+    if spec == "all":
+        return _mode1_commands()
+    if spec == "supported":
+        return build_command_list(connection, True)
+    known: Dict[str, "OBDCommand"] = {}
+    for cmd in _mode1_commands() + _mode1_supported_commands(connection):
+        known.setdefault(getattr(cmd, "name", "").upper(), cmd)
+    unknown = [name for name in spec if name.upper() not in known]
+    if unknown:
+        raise ValueError(f"unknown PIDs: {', '.join(unknown)}")
+    return [known[name.upper()] for name in spec]
 
 
 def _extract_emulator_port(line: str) -> Optional[str]:
@@ -246,81 +251,199 @@ async def _shutdown_emulator(proc: Optional[Process], relay_task: Optional[async
             await proc.wait()
 
 
-async def poll_obd(connection: "OBD", cmds: List["OBDCommand"], interval: float, queue: asyncio.Queue[Dict[str, Any]]) -> None:
+async def poll_obd(
+    connection: "OBD",
+    cmds: List["OBDCommand"],
+    interval: float,
+    publish: Publisher,
+    *,
+    background: Optional[List[Any]] = None,
+    background_share: float = DEFAULT_BACKGROUND_SHARE,
+    power: Optional[PowerManager] = None,
+) -> None:
     """
-    Continuously query the ECU and enqueue JSON-ready payloads.
+    Continuously query the ECU and publish JSON-ready payloads.
 
     Args:
         connection: Active python-OBD session.
         cmds: Commands to execute during each polling cycle.
         interval: Seconds between sampling rounds (>= 0.2).
-        queue: Sink for latest samples to share with websocket handlers.
+        publish: Coroutine receiving samples and event messages.
+        background: Optional low-priority tasks (e.g. `DTCMonitor`) run in idle slots.
+        background_share: Fraction of adapter time background tasks may use.
+        power: Optional engine-state tracker switching polling profiles.
 
     Returns:
         None. Runs until the surrounding task is cancelled.
     """
 
-    reported_response_pids = False
-    responded_names: set[str] = set()
-    reported_failures: set[str] = set()
+    scheduler = AcquisitionScheduler(
+        connection,
+        cmds,
+        interval,
+        publish,
+        background=background or (),
+        background_share=background_share,
+        power=power,
+    )
+    await scheduler.run()
+
+
+async def _pump_control(pool: WorkerPool, apply: Callable[[ControlRequest], Awaitable[Dict[str, Any]]]) -> None:
+    """
+    Apply control requests forwarded by the worker processes and send each
+    result back to the worker that received it.
+    """
+
+    loop = asyncio.get_running_loop()
+    while True:
+        forwarded = await loop.run_in_executor(None, pool.next_control, 0.5)
+        if forwarded is None:
+            continue
+        ticket, request = forwarded
+        reply = await apply(request)
+        pool.reply(ticket, reply)
+        if not reply.get("ok", True):
+            log(f"Rejected forwarded control message: {reply.get('error')}", level="warning")
+
+
+class WorkersExited(RuntimeError):
+    """Every WebSocket worker process died; nothing serves clients any more."""
+
+
+async def _supervise_workers(pool: WorkerPool) -> None:
+    """
+    Block while the worker processes serve clients.
+
+    Raises:
+        WorkersExited: All workers died (`main` turns it into exit status 1).
+    """
 
     while True:
-        pids: Dict[str, Any] = {}
-        for cmd in cmds:
-            cmd_name = getattr(cmd, "name", str(cmd))
-            if cmd_name in reported_failures:
-                continue
-            try:
-                rsp = connection.query(cmd)
-            except Exception as exc:
-                if cmd_name not in reported_failures:
-                    log(f"{cmd_name} not supported or query failed: {exc}", level="warning")
-                    reported_failures.add(cmd_name)
-                continue
-            if rsp is None or rsp.is_null():
-                if cmd_name not in reported_failures:
-                    log(f"{cmd_name} not supported by ECU (null response)", level="warning")
-                    reported_failures.add(cmd_name)
-                continue
-            value = rsp.value
-            if value is None:
-                if cmd_name not in reported_failures:
-                    log(f"{cmd_name} responded with empty value", level="warning")
-                    reported_failures.add(cmd_name)
-                continue
-            pids[cmd_name] = getattr(value, "magnitude", value)
-            responded_names.add(cmd_name)
-        if not reported_response_pids and responded_names:
-            log(f"Responding Mode 01 PIDs: {', '.join(sorted(responded_names))}")
-            reported_response_pids = True
-        payload = {
-            "timestamp": datetime.now().isoformat(timespec="seconds"),
-            "pids": pids,
-        }
-        await _push_latest(queue, payload)
-        await asyncio.sleep(interval)
-
-
-async def consumer_handler(websocket: "WebSocketServerProtocol", queue: asyncio.Queue[Dict[str, Any]]) -> None:
-    """
-    Relay queue entries to a connected WebSocket client until they disconnect.
+        await asyncio.sleep(1.0)
+        if pool.alive() == 0:
+            raise WorkersExited("All WebSocket workers exited")
 
-    Args:
-        websocket: Client connection created by `websockets.serve`.
-        queue: Source of the latest payload produced by `poll_obd`.
 
-    Returns:
-        None. Completes when the websocket is closed.
+def _connect_obd(args: argparse.Namespace, selected_port: str) -> "OBD":
+    """
+    Open the python-OBD connection, trying the configured baud rates in turn.
+
+    Exits the process when no attempt reaches the ECU.
+    """
+
+    baud_attempts: List[Optional[int]]
+    if args.baudrate is not None:
+        baud_attempts = [args.baudrate]
+    else:
+        baud_attempts = list(_DEFAULT_BAUD_PROBE_ORDER)
+
+    connection: Optional["OBD"] = None
+    last_exc: Optional[BaseException] = None
+    for baud in baud_attempts:
+        baud_label = "auto" if baud is None else str(baud)
+        log(f"Connecting to ECU on {selected_port} (baud={baud_label})...")
+        try:
+            with capture_serial(args.capture) if args.capture else contextlib.nullcontext():
+                candidate = obd.OBD(portstr=selected_port, baudrate=baud, fast=False, timeout=2)
+        except Exception as exc:
+            last_exc = exc
+            log(f"Serial open failed at baud={baud_label}: {exc}", level="warning")
+            continue
+        if candidate.is_connected():
+            connection = candidate
+            break
+        last_exc = RuntimeError(candidate.status())
+        log(f"ECU did not respond at baud={baud_label}; trying next option.", level="warning")
+        with contextlib.suppress(Exception):
+            candidate.close()
+
+    if connection and args.capture:
+        log(f"Recording adapter traffic to {args.capture}.")
+
+    if not connection:
+        error_tail = f" (last error: {last_exc})" if last_exc else ""
+        log(f"Unable to connect after trying {len(baud_attempts)} baud rate option(s){error_tail}.", level="error")
+        sys.exit(1)
+    return connection
+
+
+def _plan_polling(
+    connection: "OBD", args: argparse.Namespace
+) -> Tuple[List["OBDCommand"], List[Any], Optional[PowerManager]]:
+    """
+    Select the polled PIDs and set up the DTC monitor and power profiles.
+    """
+
+    supported_cmds = _mode1_supported_commands(connection)
+    supported_names = ", ".join(sorted(cmd.name for cmd in supported_cmds)) if supported_cmds else "none"
+    log(f"Supported Mode 01 PIDs: {supported_names}")
+    cmds = build_command_list(connection, args.only_supported)
+    if args.emulator and not args.emulator_all_pids:
+        preferred = {name.upper() for name in _EMULATOR_DEFAULT_PIDS}
+        curated_cmds = [
+            cmd
+            for cmd in cmds
+            if getattr(cmd, "name", "").upper() in preferred
+        ]
+        if curated_cmds:
+            omitted = len(cmds) - len(curated_cmds)
+            cmds = curated_cmds
+            log(
+                f"Emulator mode: limiting to {len(cmds)} curated PIDs "
+                f"(omitted {omitted}; pass --emulator-all-pids to disable)."
+            )
+        else:
+            log(
+                "Emulator mode: curated PID list not available in this environment; "
+                "falling back to full PID set.",
+                level="warning",
+            )
+    log(f"Streaming {len(cmds)} PIDs every {args.interval}s on ws://{args.host}:{args.ws_port}")
+
+    background: List[Any] = []
+    if not args.no_dtc:
+        dtc_monitor = DTCMonitor(connection, period=args.dtc_period)
+        if dtc_monitor.commands:
+            background.append(dtc_monitor)
+            log(
+                f"DTC monitor: {', '.join(cmd.name for cmd in dtc_monitor.commands)} every "
+                f"{args.dtc_period}s within {args.background_share:.0%} of adapter time."
+            )
+        else:
+            log("DTC monitor disabled: no DTC commands available.", level="warning")
+
+    power: Optional[PowerManager] = None
+    if not args.no_power_mode:
+        if any(getattr(cmd, "name", "") == "RPM" for cmd in cmds):
+            power = PowerManager()
+            log("Power mode: switching polling profiles by engine state (off/cranking/idle/driving).")
+        else:
+            log("Power mode disabled: RPM is not part of the polled PIDs.", level="warning")
+    return cmds, background, power
+
+
+async def _start_can_monitor(args: argparse.Namespace, selected_port: str) -> CanMonitor:
+    """
+    Open the adapter (or replay a frame dump) and prepare it for monitoring.
+
+    Exits the process when the signal file or the port cannot be used.
     """
 
-    peer = getattr(websocket, "remote_address", "unknown")
-    log(f"Client connected: {peer}.")
     try:
-        while True:
-            data = await queue.get()
-            await websocket.send(json.dumps(data, default=str))
-    except websockets.exceptions.ConnectionClosed:
-        log(f"Client disconnected: {peer}.")
+        decoder = FrameDecoder(load_signal_defs(args.can_monitor))
+        port = open_monitor_port(selected_port, args.baudrate, args.can_dump, args.replay_timing, args.can_protocol)
+    except (OSError, ValueError) as exc:
+        log(f"CAN monitor unavailable: {exc}", level="error")
+        sys.exit(1)
+    monitor = CanMonitor(port, decoder, protocol=args.can_protocol)
+    await asyncio.get_running_loop().run_in_executor(None, monitor.setup)
+    ids = ", ".join(f"{can_id:03X}" for can_id in decoder.ids)
+    log(
+        f"CAN monitor: {len(decoder.signals)} signal(s) from IDs {ids} on protocol {args.can_protocol} "
+        f"({'STN STMA' if monitor.stn else 'ELM ATMA'}), publishing up to {args.can_rate:g} samples/s."
+    )
+    return monitor
 
 
 async def main_async(args: argparse.Namespace) -> None:
@@ -338,90 +461,143 @@ async def main_async(args: argparse.Namespace) -> None:
     emulator_log_task: Optional[asyncio.Task] = None
     selected_port = args.port or DEFAULT_PORT
     connection: Optional["OBD"] = None
+    shm_writer: Optional[LatestValuesWriter] = None
+    pool: Optional[WorkerPool] = None
+    monitor: Optional[CanMonitor] = None
 
     try:
-        if args.emulator:
+        if args.workers > 0:
+            # Start the workers before opening the adapter so they never inherit it.
+            pool = WorkerPool(args.workers, args.host, args.ws_port, control_token=args.control_token)
+            pool.start()
+            log(f"Started {args.workers} WebSocket worker process(es) sharing port {args.ws_port}.")
+
+        if args.replay:
+            replay = TranscriptReplay(args.replay, timing=args.replay_timing)
+            selected_port = serve_pty(replay)
+            log(
+                f"Replaying {replay.exchange_count} recorded exchanges from {args.replay} on {selected_port}"
+                + (" with recorded latencies." if args.replay_timing else "."),
+                level="success",
+            )
+        elif args.emulator:
             emulator_proc, emulator_log_task, selected_port = await _spawn_emulator(
                 args.emulator_scenario, args.emulator_timeout
             )
 
-        baud_attempts: List[Optional[int]]
-        if args.baudrate is not None:
-            baud_attempts = [args.baudrate]
+        if args.can_monitor:
+            monitor = await _start_can_monitor(args, selected_port)
         else:
-            baud_attempts = list(_DEFAULT_BAUD_PROBE_ORDER)
-
-        last_exc: Optional[BaseException] = None
-        for baud in baud_attempts:
-            baud_label = "auto" if baud is None else str(baud)
-            log(f"Connecting to ECU on {selected_port} (baud={baud_label})...")
-            try:
-                candidate = obd.OBD(portstr=selected_port, baudrate=baud, fast=False, timeout=2)
-            except Exception as exc:
-                last_exc = exc
-                log(f"Serial open failed at baud={baud_label}: {exc}", level="warning")
-                continue
-            if candidate.is_connected():
-                connection = candidate
-                break
-            last_exc = RuntimeError(candidate.status())
-            log(f"ECU did not respond at baud={baud_label}; trying next option.", level="warning")
-            with contextlib.suppress(Exception):
-                candidate.close()
-
-        if not connection:
-            error_tail = f" (last error: {last_exc})" if last_exc else ""
-            log(f"Unable to connect after trying {len(baud_attempts)} baud rate option(s){error_tail}.", level="error")
-            sys.exit(1)
+            connection = _connect_obd(args, selected_port)
 
         poll_task = None
+        control_task = None
+        uplink_task = None
         try:
-            supported_cmds = _mode1_supported_commands(connection)
-            supported_names = ", ".join(sorted(cmd.name for cmd in supported_cmds)) if supported_cmds else "none"
-            log(f"Supported Mode 01 PIDs: {supported_names}")
-            cmds = build_command_list(connection, args.only_supported)
-            if args.emulator and not args.emulator_all_pids:
-                preferred = {name.upper() for name in _EMULATOR_DEFAULT_PIDS}
-                curated_cmds = [
-                    cmd
-                    for cmd in cmds
-                    if getattr(cmd, "name", "").upper() in preferred
-                ]
-                if curated_cmds:
-                    omitted = len(cmds) - len(curated_cmds)
-                    cmds = curated_cmds
+            cmds: List["OBDCommand"] = []
+            background: List[Any] = []
+            power: Optional[PowerManager] = None
+            if monitor is None:
+                cmds, background, power = _plan_polling(connection, args)
+
+            if args.shm:
+                try:
+                    shm_writer = LatestValuesWriter(args.shm)
+                    log(f"Publishing latest values to shared memory at {args.shm}.")
+                except OSError as exc:
+                    log(f"Shared-memory channel unavailable at {args.shm}: {exc}", level="warning")
+
+            uplink: Optional[Uplink] = None
+            if args.uplink:
+                try:
+                    spool = SpoolQueue(args.uplink_spool, max_bytes=int(args.uplink_max_mb * 1024 * 1024))
+                    uplink = Uplink(
+                        args.uplink, spool, vehicle=args.uplink_vehicle, batch_seconds=args.uplink_batch
+                    )
+                except (OSError, ValueError) as exc:
+                    log(f"Uplink disabled: {exc}", level="warning")
+                else:
                     log(
-                        f"Emulator mode: limiting to {len(cmds)} curated PIDs "
-                        f"(omitted {omitted}; pass --emulator-all-pids to disable)."
+                        f"Uplink: {args.uplink_batch}s batches as '{uplink.vehicle}' to {args.uplink}, "
+                        f"spooling up to {args.uplink_max_mb:g} MiB in {spool.directory} "
+                        f"({len(spool.pending())} pending)."
                     )
+                    uplink_task = asyncio.create_task(uplink.run())
+
+            fanout = Fanout()
+
+            async def publish(payload: Dict[str, Any]) -> None:
+                if shm_writer is not None and payload.get("type") is None:
+                    shm_writer.publish(payload["pids"])
+                if uplink is not None:
+                    uplink.add(payload)
+                if pool is not None:
+                    pool.publish(payload)
                 else:
+                    await fanout.publish(payload)
+
+            if monitor is not None:
+                if args.control_token:
+                    log("Control messages are not available in CAN monitor mode.", level="warning")
+                poll_task = asyncio.create_task(monitor.run(publish, rate=args.can_rate))
+            else:
+                scheduler = AcquisitionScheduler(
+                    connection,
+                    cmds,
+                    args.interval,
+                    publish,
+                    background=background,
+                    background_share=args.background_share,
+                    power=power,
+                )
+
+                async def apply_control(request: ControlRequest) -> Dict[str, Any]:
+                    new_cmds = resolve_commands(connection, request.pids) if request.pids is not None else None
+                    names = {getattr(cmd, "name", "") for cmd in (new_cmds if new_cmds is not None else scheduler.base_cmds)}
+                    unknown = [name for name in request.rates if name not in names]
+                    if unknown:
+                        raise ValueError(f"rates given for PIDs that are not polled: {', '.join(unknown)}")
+                    scheduler.reconfigure(cmds=new_cmds, interval=request.interval, rates=request.rates)
+                    config = scheduler.config_message()
                     log(
-                        "Emulator mode: curated PID list not available in this environment; "
-                        "falling back to full PID set.",
-                        level="warning",
+                        f"Control: now polling {len(config['pids'])} PIDs every {config['interval']}s"
+                        + (f" with rates {config['rates']}" if config["rates"] else "")
+                        + "."
                     )
-            log(f"Streaming {len(cmds)} PIDs every {args.interval}s on ws://{args.host}:{args.ws_port}")
+                    await publish(config)
+                    return {key: config[key] for key in ("interval", "pids", "rates")}
+
+                if args.control_token:
+                    if pool is not None:
+                        async def apply_forwarded(request: ControlRequest) -> Dict[str, Any]:
+                            try:
+                                return await apply_control(request)
+                            except ValueError as exc:
+                                return {"ok": False, "error": str(exc)}
 
-            queue = asyncio.Queue(maxsize=1)
-            poll_task = asyncio.create_task(poll_obd(connection, cmds, args.interval, queue))
+                        control_task = asyncio.create_task(_pump_control(pool, apply_forwarded))
+                    else:
+                        fanout.control = ControlChannel(args.control_token, apply_control)
+                    log("Control messages enabled (token required).")
 
-            async def handler(websocket, *_unused):
-                # `websockets.serve` provides `(websocket, path)` but the path is unused here.
-                await consumer_handler(websocket, queue)
+                poll_task = asyncio.create_task(scheduler.run())
 
             serve_kwargs = {"host": args.host, "port": args.ws_port}
 
             try:
-                log(
-                    f"WebSocket server listening on ws://{serve_kwargs['host']}:{serve_kwargs['port']}",
-                    level="success",
-                )
-                async with websockets.serve(handler, **serve_kwargs):
-                    try:
-                        await asyncio.Future()
-                    except asyncio.CancelledError:
-                        log("Shutdown signal received; closing WebSocket server...", level="warning")
-                        raise
+                if pool is not None:
+                    await _supervise_workers(pool)
+                else:
+                    log(
+                        f"WebSocket server listening on ws://{serve_kwargs['host']}:{serve_kwargs['port']}",
+                        level="success",
+                    )
+                    async with websockets.serve(fanout.serve_client, **serve_kwargs):
+                        try:
+                            await asyncio.Future()
+                        except asyncio.CancelledError:
+                            log("Shutdown signal received; closing WebSocket server...", level="warning")
+                            raise
             except OSError as exc:
                 log(
                     f"Failed to bind ws://{serve_kwargs['host']}:{serve_kwargs['port']}: {exc}",
@@ -431,18 +607,28 @@ async def main_async(args: argparse.Namespace) -> None:
             except asyncio.CancelledError:
                 pass
             finally:
-                if poll_task:
-                    poll_task.cancel()
-                    with contextlib.suppress(asyncio.CancelledError):
-                        await poll_task
+                for task in (control_task, poll_task, uplink_task):
+                    if task:
+                        task.cancel()
+                        with contextlib.suppress(asyncio.CancelledError):
+                            await task
         finally:
+            if shm_writer:
+                shm_writer.close()  # keep the file: open readers follow the next run
             if connection:
                 with contextlib.suppress(Exception):
                     connection.close()
+            if monitor is not None:
+                with contextlib.suppress(Exception):
+                    monitor.port.close()
             log("OBD connection closed and websocket server stopped.")
     except asyncio.CancelledError:
         log("Shutdown requested. Bye!", level="warning")
     finally:
+        if pool is not None:
+            pool.stop()
+            if pool.dropped:
+                log(f"Workers dropped {pool.dropped} message(s) while busy.", level="warning")
         await _shutdown_emulator(emulator_proc, emulator_log_task)
 
 def main():
@@ -450,7 +636,8 @@ def main():
     Parse CLI arguments, clamp defaults, and run the asyncio event loop.
 
     Returns:
-        None. Hands control to the asyncio runner.
+        None. Hands control to the asyncio runner; exits with status 1 if
+        every WebSocket worker process died.
     """
 
     parser = argparse.ArgumentParser(
@@ -496,9 +683,117 @@ def main():
         default=DEFAULT_EMULATOR_TIMEOUT,
         help="Seconds to wait for the emulator to expose its pseudo-terminal (default 5s).",
     )
+    parser.add_argument(
+        "--capture",
+        default=None,
+        metavar="FILE",
+        help="Record every byte exchanged with the adapter (with timestamps) to a JSON-lines transcript.",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        metavar="FILE",
+        help="Serve a recorded transcript on a pseudo-terminal and connect to it instead of a real adapter.",
+    )
+    parser.add_argument(
+        "--replay-timing",
+        action="store_true",
+        help="With --replay, wait the recorded latency before each response (with --can-dump, the recorded frame spacing).",
+    )
+    parser.add_argument(
+        "--can-monitor",
+        default=None,
+        metavar="SIGNALS.json",
+        help="Decode broadcast CAN frames (ATMA/STMA monitor mode) with these signal definitions instead of polling PIDs.",
+    )
+    parser.add_argument(
+        "--can-protocol",
+        default=DEFAULT_CAN_PROTOCOL,
+        help="ELM protocol of the monitored bus (6 = CAN 11-bit/500k, 8 = 11-bit/250k, 7/9 = 29-bit).",
+    )
+    parser.add_argument(
+        "--can-rate",
+        type=float,
+        default=DEFAULT_PUBLISH_HZ,
+        help="Maximum samples per second published in CAN monitor mode.",
+    )
+    parser.add_argument(
+        "--can-dump",
+        default=None,
+        metavar="FILE",
+        help="With --can-monitor, replay a recorded frame dump (candump or ELM monitor lines) instead of the adapter; "
+        "--replay-timing keeps its recorded pace.",
+    )
+    parser.add_argument(
+        "--no-dtc",
+        action="store_true",
+        help="Disable background polling of DTCs (Mode 03/07/0A) and the STATUS monitor.",
+    )
+    parser.add_argument(
+        "--dtc-period",
+        type=float,
+        default=DEFAULT_DTC_PERIOD,
+        help="Minimum seconds between two reads of the same DTC/STATUS command.",
+    )
+    parser.add_argument(
+        "--background-share",
+        type=float,
+        default=DEFAULT_BACKGROUND_SHARE,
+        help="Fraction of adapter time background (DTC) queries may use, taken from idle slots only.",
+    )
+    parser.add_argument(
+        "--no-power-mode",
+        action="store_true",
+        help="Poll every PID at --interval regardless of engine state.",
+    )
+    parser.add_argument(
+        "--shm",
+        nargs="?",
+        const=DEFAULT_SHM_PATH,
+        default=None,
+        help=f"Also publish latest values to a shared-memory file for local readers (default path {DEFAULT_SHM_PATH}).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Serve clients from N worker processes sharing the port (SO_REUSEPORT); 0 serves in-process.",
+    )
+    parser.add_argument(
+        "--uplink",
+        default=None,
+        help="Push batched samples to a fleet collector at this http(s):// or ws(s):// URL.",
+    )
+    parser.add_argument("--uplink-vehicle", default=None, help="Vehicle identifier sent with uplink batches (default hostname).")
+    parser.add_argument(
+        "--uplink-batch",
+        type=float,
+        default=DEFAULT_BATCH_SECONDS,
+        help="Seconds of samples per uplink batch.",
+    )
+    parser.add_argument("--uplink-spool", default=DEFAULT_SPOOL_DIR, help="Directory buffering batches while offline.")
+    parser.add_argument(
+        "--uplink-max-mb",
+        type=float,
+        default=DEFAULT_SPOOL_MAX_BYTES / (1024 * 1024),
+        help="Disk budget of the uplink spool in MiB; the oldest batches are evicted past it.",
+    )
+    parser.add_argument(
+        "--control-token",
+        default=os.environ.get("OBD_CONTROL_TOKEN"),
+        help="Accept live control messages (PIDs, rates, interval) carrying this token; "
+        "defaults to $OBD_CONTROL_TOKEN, disabled when unset.",
+    )
     args = parser.parse_args()
     args.interval = max(0.2, args.interval)
-    asyncio.run(main_async(args))
+    args.workers = max(0, args.workers)
+    args.uplink_batch = max(1.0, args.uplink_batch)
+    args.background_share = min(max(0.0, args.background_share), 1.0)
+    try:
+        asyncio.run(main_async(args))
+    except WorkersExited as exc:
+        log(f"{exc}; stopping.", level="error")
+        sys.exit(1)
 
 if __name__ == "__main__":
     try:
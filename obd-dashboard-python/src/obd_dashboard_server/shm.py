@@ -0,0 +1,291 @@
+"""
+Shared-memory channel exposing the latest PID values to co-located readers.
+
+The server maps a small file (by default on the `/dev/shm` tmpfs) and writes
+every sample into fixed-offset float64 slots, one per PID. Readers on the same
+machine map the same file and read the values directly, without WebSocket
+framing, JSON encoding or a TCP copy.
+
+Layout (little endian)::
+
+    0   magic      8s   b"OBDSHM1\\0"
+    8   version    u32
+    12  capacity   u32  number of slots
+    16  seq        u64  seqlock counter, odd while a write is in progress
+    24  timestamp  f64  epoch seconds of the last sample
+    32  used       u32  slots with a registered name
+    64  names      capacity x 32 bytes, NUL-padded ASCII
+    ..  values     capacity x f64, NaN when the PID has no value
+
+Writers bump `seq` to an odd value, update the slots, then bump it to the next
+even value. Readers retry until they observe the same even `seq` before and
+after copying what they need. A slot keeps its offset for the lifetime of the
+file, so readers can resolve a name once and keep reading the same slot.
+
+The file outlives the writer, and a restarted writer reuses it in place: it is
+only resized when the capacity changes (readers then map it again), the
+registered names keep their slots, values are reset to NaN and `seq` carries on
+from the previous run, so it never goes backwards for a reader that stays open.
+"""
+
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+DEFAULT_SHM_PATH = "/dev/shm/obd-dashboard"
+DEFAULT_CAPACITY = 256
+
+_MAGIC = b"OBDSHM1\0"
+_VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_SEQ = struct.Struct("<Q")
+_TIMESTAMP = struct.Struct("<d")
+_USED = struct.Struct("<I")
+_SEQ_OFFSET = 16
+_TIMESTAMP_OFFSET = 24
+_USED_OFFSET = 32
+_NAMES_OFFSET = 64
+_NAME_SIZE = 32
+_VALUE = struct.Struct("<d")
+_MAX_READ_RETRIES = 1000
+
+
+def _values_offset(capacity: int) -> int:
+    return _NAMES_OFFSET + capacity * _NAME_SIZE
+
+
+def _region_size(capacity: int) -> int:
+    return _values_offset(capacity) + capacity * _VALUE.size
+
+
+def _as_float(value: Any) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return number if math.isfinite(number) else math.nan
+
+
+class LatestValuesWriter:
+    """
+    Single writer publishing samples into the shared region.
+
+    Args:
+        path: File backing the region (created or resized as needed).
+        capacity: Number of PID slots to reserve.
+    """
+
+    def __init__(self, path: str = DEFAULT_SHM_PATH, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.path = path
+        self.capacity = capacity
+        size = _region_size(capacity)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+        self._values = _values_offset(capacity)
+        self._slots: Dict[str, int] = {}
+        self._used = 0
+        magic, version, previous_capacity = _HEADER.unpack_from(self._mm, 0)
+        reused = magic == _MAGIC and version == _VERSION
+        # Odd while the region is reset, so readers left from the previous run retry
+        self._seq = _SEQ.unpack_from(self._mm, _SEQ_OFFSET)[0] | 1 if reused else 0
+        _SEQ.pack_into(self._mm, _SEQ_OFFSET, self._seq)
+        if reused and previous_capacity == capacity:
+            self._used = min(_USED.unpack_from(self._mm, _USED_OFFSET)[0], capacity)
+            for index in range(self._used):
+                offset = _NAMES_OFFSET + index * _NAME_SIZE
+                raw = bytes(self._mm[offset : offset + _NAME_SIZE]).rstrip(b"\0")
+                self._slots.setdefault(raw.decode("ascii", "replace"), index)
+        else:
+            self._mm[_NAMES_OFFSET : self._values] = bytes(self._values - _NAMES_OFFSET)
+        _USED.pack_into(self._mm, _USED_OFFSET, self._used)
+        _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, capacity)
+        for index in range(capacity):
+            _VALUE.pack_into(self._mm, self._values + index * _VALUE.size, math.nan)
+        if reused:
+            self._seq += 1
+            _SEQ.pack_into(self._mm, _SEQ_OFFSET, self._seq)
+
+    def publish(self, pids: Mapping[str, Any], timestamp: Optional[float] = None) -> None:
+        """
+        Write one sample. PIDs missing from `pids` are set to NaN.
+
+        Args:
+            pids: Latest values keyed by PID name (non-numeric values become NaN).
+            timestamp: Epoch seconds of the sample (defaults to now).
+        """
+
+        mm = self._mm
+        self._seq += 1
+        _SEQ.pack_into(mm, _SEQ_OFFSET, self._seq)
+        seen = set()
+        for name, value in pids.items():
+            index = self._slots.get(name)
+            if index is None:
+                index = self._register(name)
+                if index is None:
+                    continue
+            seen.add(index)
+            _VALUE.pack_into(mm, self._values + index * _VALUE.size, _as_float(value))
+        for index in self._slots.values():
+            if index not in seen:
+                _VALUE.pack_into(mm, self._values + index * _VALUE.size, math.nan)
+        _TIMESTAMP.pack_into(mm, _TIMESTAMP_OFFSET, time.time() if timestamp is None else timestamp)
+        self._seq += 1
+        _SEQ.pack_into(mm, _SEQ_OFFSET, self._seq)
+
+    def close(self, unlink: bool = False) -> None:
+        """
+        Unmap the region.
+
+        The backing file is kept by default, so readers that stay open pick up
+        the next writer on the same path.
+
+        Args:
+            unlink: Also remove the backing file.
+        """
+
+        self._mm.close()
+        if unlink:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def _register(self, name: str) -> Optional[int]:
+        index = self._used
+        if index >= self.capacity:
+            return None
+        encoded = name.encode("ascii", "replace")[: _NAME_SIZE - 1]
+        offset = _NAMES_OFFSET + index * _NAME_SIZE
+        self._mm[offset : offset + _NAME_SIZE] = encoded.ljust(_NAME_SIZE, b"\0")
+        self._slots[name] = index
+        self._used += 1
+        _USED.pack_into(self._mm, _USED_OFFSET, self._used)
+        return index
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Consistent copy of the region taken by `LatestValuesReader.snapshot`."""
+
+    seq: int
+    timestamp: float
+    values: Dict[str, float]
+
+
+class LatestValuesReader:
+    """
+    Read-only view of a region written by `LatestValuesWriter`.
+
+    `get` reads a single slot in place; `values_view` returns a zero-copy
+    float64 `memoryview` over all slots (release it before `close`). When a
+    restarted writer changes the capacity, the reader maps the file again on
+    its next read; views taken before that must be released first.
+
+    Args:
+        path: File backing the region.
+    """
+
+    def __init__(self, path: str = DEFAULT_SHM_PATH) -> None:
+        self.path = path
+        self._mm: Optional[mmap.mmap] = None
+        self._map()
+
+    @property
+    def seq(self) -> int:
+        """Current sequence number (even when no write is in progress)."""
+
+        return _SEQ.unpack_from(self._mm, _SEQ_OFFSET)[0]
+
+    def slot(self, name: str) -> Optional[int]:
+        """Return the slot index of `name`, or None if the PID was never published."""
+
+        self._refresh_names()
+        return self._slots.get(name)
+
+    def get(self, name: str) -> Optional[float]:
+        """
+        Read the latest value of one PID.
+
+        Returns:
+            The value (NaN when the PID had no value in the last sample), or
+            None when the PID is unknown.
+        """
+
+        index = self.slot(name)
+        if index is None:
+            return None
+        offset = self._values + index * _VALUE.size
+        for _ in range(_MAX_READ_RETRIES):
+            before = self.seq
+            if before & 1:
+                continue
+            value = _VALUE.unpack_from(self._mm, offset)[0]
+            if self.seq == before:
+                return value
+        raise TimeoutError("Shared-memory writer kept the region locked.")
+
+    def snapshot(self) -> Snapshot:
+        """Copy every registered slot under the seqlock."""
+
+        for _ in range(_MAX_READ_RETRIES):
+            before = self.seq
+            if before & 1:
+                continue
+            self._refresh_names()
+            timestamp = _TIMESTAMP.unpack_from(self._mm, _TIMESTAMP_OFFSET)[0]
+            values = {
+                name: _VALUE.unpack_from(self._mm, self._values + index * _VALUE.size)[0]
+                for name, index in self._slots.items()
+            }
+            if self.seq == before:
+                return Snapshot(before, timestamp, values)
+        raise TimeoutError("Shared-memory writer kept the region locked.")
+
+    def values_view(self) -> memoryview:
+        """Zero-copy float64 view over every slot (index with `slot(name)`)."""
+
+        end = self._values + self.capacity * _VALUE.size
+        return memoryview(self._mm)[self._values : end].cast("d")
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _map(self) -> None:
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, capacity = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            mm.close()
+            raise ValueError(f"{self.path} is not an obd-dashboard shared-memory region.")
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = mm
+        self.capacity = capacity
+        self._values = _values_offset(capacity)
+        self._slots: Dict[str, int] = {}
+        self._used = 0
+
+    def _refresh_names(self) -> None:
+        if _HEADER.unpack_from(self._mm, 0)[2] != self.capacity:
+            # Writer restarted with another capacity: the file was resized and the slots moved
+            self._map()
+        used = _USED.unpack_from(self._mm, _USED_OFFSET)[0]
+        if used == self._used:
+            return
+        for index in range(self._used, min(used, self.capacity)):
+            offset = _NAMES_OFFSET + index * _NAME_SIZE
+            raw = bytes(self._mm[offset : offset + _NAME_SIZE]).rstrip(b"\0")
+            self._slots[raw.decode("ascii", "replace")] = index
+        self._used = used
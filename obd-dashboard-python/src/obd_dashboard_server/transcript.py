@@ -0,0 +1,355 @@
+"""
+Record and replay raw ELM327 serial transcripts.
+
+`capture_serial(path)` wraps the pyserial port python-OBD opens so every byte
+written to and read from the adapter is appended to a JSON-lines transcript
+with a monotonic timestamp::
+
+    {"format": "elm-transcript", "version": 1, "port": "/dev/ttyUSB0", "started": 1759658400.0}
+    {"t": 0.0012, "dir": "tx", "data": "010C\\r"}
+    {"t": 0.0583, "dir": "rx", "data": "7E8 04 41 0C 0B B8 \\r\\r>"}
+
+`TranscriptReplay` turns a transcript back into an adapter: each command gets
+the responses recorded for it, in recorded order (cycling when exhausted), and
+can optionally wait the recorded latency first. It is served on a TCP port (for
+`socket://host:port`) or a pseudo-terminal::
+
+    python -m obd_dashboard_server.transcript replay drive.jsonl --listen 35000 --timing
+    obd-dashboard-server --port socket://127.0.0.1:35000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import tty
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .console import log
+
+TRANSCRIPT_FORMAT = "elm-transcript"
+TRANSCRIPT_VERSION = 1
+_FLUSH_PERIOD = 1.0
+_PROMPT = b">"
+
+
+def _encode(data: bytes) -> str:
+    return data.decode("latin-1")
+
+
+def _decode(text: str) -> bytes:
+    return text.encode("latin-1")
+
+
+class TranscriptWriter:
+    """
+    Append tx/rx events to a JSON-lines transcript.
+
+    Consecutive chunks in the same direction (python-OBD reads the adapter a
+    few bytes at a time) are merged into one event stamped with the time of
+    its last byte. Writes are buffered and flushed at most once per second (and
+    on close), so recording does not add a disk write to every round-trip.
+    """
+
+    def __init__(self, path: str, port: str = "") -> None:
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+        self._t0 = time.monotonic()
+        self._last_flush = self._t0
+        self._lock = threading.Lock()
+        self._pending: Optional[Tuple[str, float, bytearray]] = None
+        header = {
+            "format": TRANSCRIPT_FORMAT,
+            "version": TRANSCRIPT_VERSION,
+            "port": port,
+            "started": time.time(),
+        }
+        self._file.write(json.dumps(header) + "\n")
+
+    def record(self, direction: str, data: bytes) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._pending is not None and self._pending[0] == direction:
+                self._pending = (direction, now, self._pending[2] + data)
+            else:
+                self._write_pending()
+                self._pending = (direction, now, bytearray(data))
+            if direction == "rx" and _PROMPT in data:
+                self._write_pending()
+            if now - self._last_flush >= _FLUSH_PERIOD:
+                self._file.flush()
+                self._last_flush = now
+
+    def _write_pending(self) -> None:
+        if self._pending is None:
+            return
+        direction, stamp, data = self._pending
+        self._pending = None
+        event = {"t": round(stamp - self._t0, 6), "dir": direction, "data": _encode(bytes(data))}
+        self._file.write(json.dumps(event) + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._write_pending()
+                self._file.close()
+
+
+class RecordingPort:
+    """
+    Transparent proxy around a pyserial port that records reads and writes.
+    """
+
+    def __init__(self, port: Any, writer: TranscriptWriter) -> None:
+        object.__setattr__(self, "_port", port)
+        object.__setattr__(self, "_writer", writer)
+
+    def write(self, data: bytes) -> Optional[int]:
+        self._writer.record("tx", bytes(data))
+        return self._port.write(data)
+
+    def read(self, size: int = 1) -> bytes:
+        data = self._port.read(size)
+        if data:
+            self._writer.record("rx", bytes(data))
+        return data
+
+    def close(self) -> None:
+        try:
+            self._port.close()
+        finally:
+            self._writer.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._port, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # python-OBD sets `baudrate` and `timeout` on the port it opened.
+        setattr(self._port, name, value)
+
+
+@contextlib.contextmanager
+def capture_serial(path: str) -> Iterator[List[RecordingPort]]:
+    """
+    Record every port python-OBD opens inside the block to `path`.
+
+    Yields the list of recording ports opened so far; each baud-rate attempt
+    opens a new port, so only the last one stays in use. The transcript is
+    closed together with the port (`connection.close()`).
+    """
+
+    import serial
+
+    original = serial.serial_for_url
+    opened: List[RecordingPort] = []
+
+    def recording_serial_for_url(url: str, *args: Any, **kwargs: Any) -> RecordingPort:
+        port = original(url, *args, **kwargs)
+        for previous in opened:
+            previous._writer.close()
+        recorder = RecordingPort(port, TranscriptWriter(path, port=str(url)))
+        opened.append(recorder)
+        return recorder
+
+    serial.serial_for_url = recording_serial_for_url
+    try:
+        yield opened
+    finally:
+        serial.serial_for_url = original
+
+
+@dataclass
+class Exchange:
+    """One recorded command and the adapter's answer."""
+
+    response: bytes
+    latency: float
+
+
+def _command_key(raw: bytes) -> str:
+    # The baud probe sends DEL characters; spaces and case do not matter to the ELM.
+    return raw.replace(b"\x7f", b"").replace(b" ", b"").strip().upper().decode("latin-1")
+
+
+def parse_transcript(path: str) -> Tuple[Dict[str, Any], List[Tuple[str, Exchange]]]:
+    """
+    Split a transcript into (header, [(command, exchange), ...]) in recorded order.
+
+    Raises:
+        ValueError: When the file is not an ELM transcript.
+    """
+
+    exchanges: List[Tuple[str, Exchange]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != TRANSCRIPT_FORMAT:
+            raise ValueError(f"{path} is not an ELM transcript.")
+        pending_tx = bytearray()
+        command: Optional[str] = None
+        sent_at = 0.0
+        response = bytearray()
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            data = _decode(event["data"])
+            if event["dir"] == "tx":
+                pending_tx.extend(data)
+                while b"\r" in pending_tx:
+                    raw, _, rest = bytes(pending_tx).partition(b"\r")
+                    pending_tx = bytearray(rest)
+                    command, sent_at, response = _command_key(raw), float(event["t"]), bytearray()
+            elif command is not None:
+                response.extend(data)
+                if _PROMPT in response:
+                    exchanges.append((command, Exchange(bytes(response), float(event["t"]) - sent_at)))
+                    command = None
+    return header, exchanges
+
+
+class TranscriptReplay:
+    """
+    Answer ELM327 commands from a recorded transcript.
+
+    Args:
+        path: Transcript written by `capture_serial`.
+        timing: Wait the recorded latency before answering.
+        speed: Divides recorded latencies (2.0 replays twice as fast).
+    """
+
+    def __init__(self, path: str, *, timing: bool = False, speed: float = 1.0) -> None:
+        self.header, exchanges = parse_transcript(path)
+        self.timing = timing
+        self.speed = speed if speed > 0 else 1.0
+        self._responses: Dict[str, List[Exchange]] = {}
+        for command, exchange in exchanges:
+            self._responses.setdefault(command, []).append(exchange)
+        self._cursor: Dict[str, int] = {}
+        self.unknown = 0
+        self._lock = threading.Lock()
+
+    @property
+    def commands(self) -> List[str]:
+        return sorted(self._responses)
+
+    @property
+    def exchange_count(self) -> int:
+        return sum(len(answers) for answers in self._responses.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cursor.clear()
+
+    def respond(self, raw: bytes) -> bytes:
+        """Return the next recorded answer to `raw` (a command without its CR)."""
+
+        key = _command_key(raw)
+        with self._lock:
+            answers = self._responses.get(key)
+            if not answers:
+                self.unknown += 1
+                return b"OK\r\r>" if key.startswith("AT") else b"NO DATA\r\r>"
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            exchange = answers[index % len(answers)]
+        if self.timing and exchange.latency > 0:
+            time.sleep(exchange.latency / self.speed)
+        return exchange.response
+
+    def serve_stream(self, read: Callable[[], bytes], write: Callable[[bytes], Any]) -> None:
+        """Answer commands from a byte stream until `read` returns b""."""
+
+        buffer = bytearray()
+        while True:
+            data = read()
+            if not data:
+                return
+            buffer.extend(data)
+            while b"\r" in buffer:
+                raw, _, rest = bytes(buffer).partition(b"\r")
+                buffer = bytearray(rest)
+                write(self.respond(raw))
+
+
+def serve_tcp(replay: TranscriptReplay, host: str, port: int) -> socketserver.ThreadingTCPServer:
+    """Start serving `replay` on TCP (for `socket://host:port`); returns the running server."""
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self) -> None:
+            sock: socket.socket = self.request
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Each new client starts from the beginning of the transcript.
+            replay.reset()
+            with contextlib.suppress(OSError):
+                replay.serve_stream(lambda: sock.recv(4096), sock.sendall)
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="elm-replay-tcp", daemon=True).start()
+    return server
+
+
+def serve_pty(replay: TranscriptReplay) -> str:
+    """Start serving `replay` on a new pseudo-terminal; returns its /dev/pts path."""
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    path = os.ttyname(slave)
+
+    def read() -> bytes:
+        try:
+            return os.read(master, 4096)
+        except OSError:
+            return b""
+
+    def write(data: bytes) -> None:
+        os.write(master, data)
+
+    threading.Thread(target=replay.serve_stream, args=(read, write), name="elm-replay-pty", daemon=True).start()
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m obd_dashboard_server.transcript",
+        description="Replay a recorded ELM327 transcript as an adapter.",
+    )
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    replay_parser = sub.add_parser("replay", help="Serve a transcript on TCP or a pseudo-terminal")
+    replay_parser.add_argument("transcript", help="Transcript recorded with --capture")
+    replay_parser.add_argument("--host", default="127.0.0.1", help="Bind address for --listen")
+    replay_parser.add_argument("--listen", type=int, default=None, help="TCP port (connect with socket://HOST:PORT)")
+    replay_parser.add_argument("--timing", action="store_true", help="Reproduce recorded response latencies")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="Latency divisor when --timing is set")
+    args = parser.parse_args(argv)
+
+    replay = TranscriptReplay(args.transcript, timing=args.timing, speed=args.speed)
+    log(f"Loaded {replay.exchange_count} exchanges for {len(replay.commands)} commands.")
+    if args.listen is not None:
+        serve_tcp(replay, args.host, args.listen)
+        log(f"Replaying on socket://{args.host}:{args.listen}", level="success")
+    else:
+        log(f"Replaying on {serve_pty(replay)}", level="success")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    if replay.unknown:
+        log(f"{replay.unknown} command(s) had no recorded answer.", level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""
+Fleet uplink: batched, compressed push of samples to a central collector.
+
+Samples are grouped into fixed-length blocks (10 s by default) and encoded
+column by column: one float64 timestamp array followed by one float64 array per
+PID (NaN where the PID had no value). The block is gzip-compressed, written to
+an on-disk spool, and the spool is drained oldest-first to the collector over
+HTTP(S) POST or WebSocket. While the collector is unreachable, batches keep
+accumulating on disk up to a byte budget; past it the oldest batches are
+evicted first.
+
+Batch layout before compression (little endian)::
+
+    b"OBDB1\\n"
+    header     JSON object + b"\\n": vehicle, seq, start, end, rows, pids
+    timestamps rows x f64 epoch seconds
+    columns    len(pids) x rows x f64
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import socket
+import sys
+import time
+import urllib.request
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import websockets
+
+from .console import log
+from .shm import _as_float
+
+DEFAULT_BATCH_SECONDS = 10.0
+DEFAULT_SPOOL_DIR = "~/.cache/obd-dashboard/uplink"
+DEFAULT_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_UPLINK_TIMEOUT = 10.0
+BATCH_CONTENT_TYPE = "application/vnd.obd-dashboard.batch+gzip"
+_MAGIC = b"OBDB1\n"
+_SUFFIX = ".obdb.gz"
+_MAX_BACKOFF = 60.0
+
+
+def encode_batch(
+    vehicle: str,
+    seq: int,
+    timestamps: List[float],
+    rows: List[Mapping[str, Any]],
+) -> bytes:
+    """
+    Encode one block of samples into the compressed columnar batch format.
+
+    Args:
+        vehicle: Identifier of the sending vehicle.
+        seq: Batch sequence number (monotonic per vehicle).
+        timestamps: Epoch seconds of each row.
+        rows: PID values of each row, keyed by PID name.
+
+    Returns:
+        The gzip-compressed batch.
+    """
+
+    names: List[str] = []
+    seen = set()
+    for row in rows:
+        for name in row:
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+    header = {
+        "vehicle": vehicle,
+        "seq": seq,
+        "start": timestamps[0] if timestamps else None,
+        "end": timestamps[-1] if timestamps else None,
+        "rows": len(rows),
+        "pids": names,
+    }
+    body = bytearray(_MAGIC)
+    body += json.dumps(header, separators=(",", ":")).encode() + b"\n"
+    columns = [array("d", timestamps)]
+    columns += [array("d", (_as_float(row.get(name)) for row in rows)) for name in names]
+    for column in columns:
+        if sys.byteorder == "big":
+            column.byteswap()
+        body += column.tobytes()
+    return gzip.compress(bytes(body), compresslevel=6)
+
+
+def decode_batch(data: bytes) -> Tuple[Dict[str, Any], List[float], Dict[str, List[float]]]:
+    """
+    Decode a batch produced by `encode_batch`.
+
+    Returns:
+        `(header, timestamps, columns)` where columns map PID name to values.
+
+    Raises:
+        ValueError: When the payload is not a valid batch.
+    """
+
+    try:
+        raw = gzip.decompress(data)
+    except (OSError, EOFError) as exc:
+        raise ValueError("batch is not gzip-compressed") from exc
+    if not raw.startswith(_MAGIC):
+        raise ValueError("not an obd-dashboard batch")
+    newline = raw.index(b"\n", len(_MAGIC))
+    header = json.loads(raw[len(_MAGIC) : newline])
+    rows = int(header["rows"])
+    names = list(header["pids"])
+    payload = raw[newline + 1 :]
+    if len(payload) != rows * 8 * (len(names) + 1):
+        raise ValueError("batch payload size does not match its header")
+    values = array("d")
+    values.frombytes(payload)
+    if sys.byteorder == "big":
+        values.byteswap()
+    timestamps = values[:rows].tolist()
+    columns = {name: values[(index + 1) * rows : (index + 2) * rows].tolist() for index, name in enumerate(names)}
+    return header, timestamps, columns
+
+
+class SpoolQueue:
+    """
+    Directory of pending batches with a byte budget and oldest-first eviction.
+
+    Batches are written atomically (temporary file, fsync, rename) with a
+    zero-padded sequence number, so their order survives restarts.
+
+    Args:
+        directory: Spool directory (created if missing).
+        max_bytes: Disk budget; the oldest batches are evicted past it.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_SPOOL_MAX_BYTES) -> None:
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.evicted = 0
+        pending = self.pending()
+        self._next_seq = int(pending[-1].name.split(".")[0]) + 1 if pending else 0
+
+    def pending(self) -> List[Path]:
+        """Pending batches, oldest first."""
+
+        return sorted(self.directory.glob(f"*{_SUFFIX}"))
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self.pending())
+
+    def next_seq(self) -> int:
+        seq = self._next_seq
+        self._next_seq += 1
+        return seq
+
+    def put(self, seq: int, data: bytes) -> Path:
+        """
+        Store one batch, then evict the oldest ones while over budget.
+        """
+
+        path = self.directory / f"{seq:012d}{_SUFFIX}"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        pending = self.pending()
+        total = sum(item.stat().st_size for item in pending)
+        # Always keep the newest batch, even if it alone exceeds the budget.
+        while total > self.max_bytes and len(pending) > 1:
+            oldest = pending.pop(0)
+            total -= oldest.stat().st_size
+            self.remove(oldest)
+            self.evicted += 1
+        return path
+
+    def remove(self, path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class Uplink:
+    """
+    Batch samples and push them to a collector, buffering on disk while offline.
+
+    Args:
+        url: Collector endpoint (`http://`, `https://`, `ws://` or `wss://`).
+        spool: Pending-batch queue on disk.
+        vehicle: Identifier sent with every batch (defaults to the hostname).
+        batch_seconds: Length of one block of samples.
+        timeout: Seconds to wait for the collector to acknowledge a batch.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        spool: SpoolQueue,
+        *,
+        vehicle: Optional[str] = None,
+        batch_seconds: float = DEFAULT_BATCH_SECONDS,
+        timeout: float = DEFAULT_UPLINK_TIMEOUT,
+    ) -> None:
+        if not url.startswith(("http://", "https://", "ws://", "wss://")):
+            raise ValueError(f"Unsupported uplink URL {url!r} (expected http(s):// or ws(s)://).")
+        self.url = url
+        self.spool = spool
+        self.vehicle = vehicle or socket.gethostname()
+        self.batch_seconds = batch_seconds
+        self.timeout = timeout
+        self.sent = 0
+        self.sent_bytes = 0
+        self._timestamps: List[float] = []
+        self._rows: List[Dict[str, Any]] = []
+        self._retry_at: Optional[float] = time.monotonic()
+        self._backoff = 1.0
+        self._offline = False
+
+    def add(self, payload: Dict[str, Any]) -> None:
+        """Append a sample message to the current block (events are ignored)."""
+
+        if payload.get("type") is not None:
+            return
+        self._timestamps.append(time.time())
+        self._rows.append(dict(payload.get("pids") or {}))
+
+    def flush(self) -> Optional[Path]:
+        """Encode the current block into the spool; returns its path, if any."""
+
+        if not self._rows:
+            return None
+        return self._store(*self._take())
+
+    async def flush_async(self) -> Optional[Path]:
+        """
+        Like `flush`, with the gzip encoding and the fsync'd spool write on a worker
+        thread so the event loop keeps serving clients meanwhile.
+        """
+
+        if not self._rows:
+            return None
+        block = self._take()
+        return await asyncio.get_running_loop().run_in_executor(None, self._store, *block)
+
+    def _take(self) -> tuple:
+        # On the event loop: samples added after this go to the next block.
+        block = (self._timestamps, self._rows)
+        self._timestamps, self._rows = [], []
+        return block
+
+    def _store(self, timestamps: List[float], rows: List[Dict[str, Any]]) -> Path:
+        seq = self.spool.next_seq()
+        data = encode_batch(self.vehicle, seq, timestamps, rows)
+        evicted = self.spool.evicted
+        path = self.spool.put(seq, data)
+        if self.spool.evicted != evicted:
+            log(f"Uplink spool over budget: evicted {self.spool.evicted - evicted} oldest batch(es).", level="warning")
+        return path
+
+    async def run(self) -> None:
+        """
+        Flush a block every `batch_seconds` and drain the spool. Cancel to stop.
+
+        The partial block is written to the spool on cancellation so it is sent
+        after the next start.
+        """
+
+        next_flush = time.monotonic() + self.batch_seconds
+        try:
+            while True:
+                wake = next_flush if self._retry_at is None else min(next_flush, self._retry_at)
+                await asyncio.sleep(max(0.0, wake - time.monotonic()))
+                now = time.monotonic()
+                if now >= next_flush:
+                    await self.flush_async()
+                    next_flush = now + self.batch_seconds
+                    if self._retry_at is None:
+                        self._retry_at = now
+                if self._retry_at is not None and now >= self._retry_at:
+                    await self.drain()
+        finally:
+            self.flush()
+            pending = len(self.spool.pending())
+            log(
+                f"Uplink: sent {self.sent} batch(es) ({self.sent_bytes / 1024:.1f} KiB), "
+                f"{pending} pending, {self.spool.evicted} evicted."
+            )
+
+    async def drain(self) -> int:
+        """
+        Send pending batches oldest-first until the spool is empty or a send fails.
+
+        Returns:
+            Number of batches acknowledged by the collector.
+        """
+
+        sent = 0
+        for path in self.spool.pending():
+            data = path.read_bytes()
+            try:
+                await self._send(data)
+            except (OSError, ValueError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as exc:
+                self._retry_at = time.monotonic() + self._backoff
+                if not self._offline:
+                    log(f"Uplink to {self.url} unavailable ({exc}); buffering batches on disk.", level="warning")
+                    self._offline = True
+                self._backoff = min(self._backoff * 2, _MAX_BACKOFF)
+                return sent
+            self.spool.remove(path)
+            self.sent += 1
+            self.sent_bytes += len(data)
+            sent += 1
+        if self._offline:
+            log(f"Uplink to {self.url} restored; spool drained.", level="success")
+            self._offline = False
+        self._retry_at = None
+        self._backoff = 1.0
+        return sent
+
+    async def _send(self, data: bytes) -> None:
+        if self.url.startswith(("ws://", "wss://")):
+            await asyncio.wait_for(self._send_ws(data), timeout=self.timeout)
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, self._send_http, data)
+
+    def _send_http(self, data: bytes) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=data,
+            method="POST",
+            headers={"Content-Type": BATCH_CONTENT_TYPE, "X-OBD-Vehicle": self.vehicle},
+        )
+        # urllib raises HTTPError (an OSError) for non-2xx statuses.
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def _send_ws(self, data: bytes) -> None:
+        async with websockets.connect(self.url, max_size=None) as ws:
+            await ws.send(data)
+            reply = json.loads(await ws.recv())
+            if not reply.get("ok"):
+                raise ValueError(f"collector rejected batch: {reply.get('error', 'no reason given')}")
@@ -0,0 +1,259 @@
+"""
+Multi-process serving: one acquisition process and N WebSocket workers.
+
+The process that owns the adapter keeps running the acquisition scheduler and
+hands every message to `WorkerPool.publish`. Each worker process binds the same
+port with SO_REUSEPORT (the kernel spreads incoming connections between them),
+keeps its own `Fanout`, and does the per-client JSON encoding and socket writes.
+Python-OBD polling therefore no longer shares a GIL with client traffic.
+
+Control messages received by a worker are checked against the token there and
+forwarded to the acquisition process through a shared `control` queue; the
+result comes back on that worker's reply queue and is sent to the client as
+its `control_ack`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import multiprocessing
+import os
+import queue as queue_module
+import signal
+from typing import Any, Dict, List, Optional, Tuple
+
+import websockets
+
+from .console import log
+from .control import ControlChannel, ControlRequest
+from .fanout import Fanout
+
+WORKER_INBOX_SIZE = 64
+CONTROL_REPLY_TIMEOUT = 5.0
+_STOP = None
+
+# (worker index, request number): where the result of a forwarded request goes.
+Ticket = Tuple[int, int]
+
+
+class WorkerPool:
+    """
+    Spawn and feed the WebSocket worker processes.
+
+    Args:
+        count: Number of worker processes.
+        host: Bind address shared by all workers.
+        port: Bind port shared by all workers (SO_REUSEPORT).
+        inbox_size: Messages buffered per worker before new ones are dropped.
+        control_token: Enables control messages; accepted requests land in `control`
+            and their results go back through `reply`.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        host: str,
+        port: int,
+        *,
+        inbox_size: int = WORKER_INBOX_SIZE,
+        control_token: Optional[str] = None,
+    ) -> None:
+        # "spawn" keeps the serial port and the acquisition event loop out of the workers.
+        ctx = multiprocessing.get_context("spawn")
+        self.dropped = 0
+        self.control: Optional[Any] = ctx.Queue() if control_token else None
+        self._inboxes: List[Any] = [ctx.Queue(maxsize=inbox_size) for _ in range(count)]
+        self._replies: List[Any] = [ctx.Queue() for _ in range(count)] if control_token else []
+        self._procs = [
+            ctx.Process(
+                target=worker_main,
+                args=(index, host, port, inbox, control_token, self.control,
+                      self._replies[index] if self._replies else None),
+                name=f"obd-ws-worker-{index}",
+                daemon=True,
+            )
+            for index, inbox in enumerate(self._inboxes)
+        ]
+
+    def start(self) -> None:
+        for proc in self._procs:
+            proc.start()
+
+    def alive(self) -> int:
+        """Number of worker processes still running."""
+
+        return sum(1 for proc in self._procs if proc.is_alive())
+
+    def publish(self, payload: Dict[str, Any]) -> None:
+        """
+        Hand a message to every worker without ever blocking the poller.
+
+        A worker that stopped draining its inbox loses new messages (counted in
+        `dropped`) instead of stalling acquisition.
+        """
+
+        for inbox in self._inboxes:
+            try:
+                inbox.put_nowait(payload)
+            except queue_module.Full:
+                self.dropped += 1
+
+    def stop(self, timeout: float = 5.0) -> None:
+        for inbox in self._inboxes + self._replies:
+            with contextlib.suppress(queue_module.Full, ValueError):
+                inbox.put_nowait(_STOP)
+        for proc in self._procs:
+            if proc.pid is None:
+                continue
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(timeout)
+        for inbox in self._inboxes + self._replies + ([self.control] if self.control is not None else []):
+            inbox.cancel_join_thread()
+            inbox.close()
+
+    def next_control(self, timeout: float) -> Optional[Tuple[Ticket, ControlRequest]]:
+        """
+        Wait up to `timeout` seconds for a control request forwarded by a worker.
+
+        Returns:
+            The request and the ticket to pass to `reply` with its result.
+        """
+
+        if self.control is None:
+            return None
+        try:
+            index, number, data = self.control.get(timeout=timeout)
+        except queue_module.Empty:
+            return None
+        return (index, number), ControlRequest.from_dict(data)
+
+    def reply(self, ticket: Ticket, result: Dict[str, Any]) -> None:
+        """
+        Send the result of a forwarded request back to the worker that received it.
+        """
+
+        index, number = ticket
+        with contextlib.suppress(IndexError, ValueError):
+            self._replies[index].put_nowait((number, result))
+
+
+class ControlForwarder:
+    """
+    Worker side of the control relay: forward a request, wait for its result.
+
+    Args:
+        index: Worker number, echoed back by the acquisition process.
+        control: Queue shared with the acquisition process (`WorkerPool.control`).
+        replies: This worker's reply queue.
+        timeout: Seconds to wait for the result before acknowledging the
+            request as accepted but not validated (`ok: null`).
+    """
+
+    def __init__(self, index: int, control: Any, replies: Any, timeout: float = CONTROL_REPLY_TIMEOUT) -> None:
+        self.index = index
+        self.control = control
+        self.replies = replies
+        self.timeout = timeout
+        self._numbers = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+
+    async def forward(self, request: ControlRequest) -> Dict[str, Any]:
+        """
+        `ControlChannel` apply callback. Raises ValueError when the acquisition process rejected the request.
+        """
+
+        number = next(self._numbers)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[number] = future
+        self.control.put((self.index, number, request.as_dict()))
+        try:
+            result = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            return {"ok": None, "status": "accepted, not validated"}
+        finally:
+            self._pending.pop(number, None)
+        if result.get("ok", True) is False:
+            raise ValueError(result.get("error") or "rejected")
+        return result
+
+    async def relay(self) -> None:
+        """
+        Resolve pending `forward` calls from the reply queue until the pool stops.
+        """
+
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self.replies.get)
+            if item is _STOP:
+                return
+            number, result = item
+            future = self._pending.get(number)
+            if future is not None and not future.done():
+                future.set_result(result)
+
+
+def worker_main(
+    index: int,
+    host: str,
+    port: int,
+    inbox: Any,
+    control_token: Optional[str] = None,
+    control: Optional[Any] = None,
+    replies: Optional[Any] = None,
+) -> None:
+    """
+    Entry point of a worker process.
+
+    Args:
+        index: Worker number (for logs).
+        host: Bind address.
+        port: Bind port, shared through SO_REUSEPORT.
+        inbox: `multiprocessing.Queue` fed by `WorkerPool.publish`.
+        control_token: Token expected in control messages (None disables them).
+        control: `multiprocessing.Queue` receiving accepted control requests.
+        replies: `multiprocessing.Queue` bringing back their results.
+    """
+
+    # Shutdown is driven by the acquisition process (stop message, then terminate).
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        asyncio.run(_serve_worker(index, host, port, inbox, control_token, control, replies))
+    except OSError as exc:
+        log(f"Worker {index} failed to bind ws://{host}:{port}: {exc}", level="error")
+
+
+async def _serve_worker(
+    index: int,
+    host: str,
+    port: int,
+    inbox: Any,
+    control_token: Optional[str],
+    control: Optional[Any],
+    replies: Optional[Any],
+) -> None:
+    channel: Optional[ControlChannel] = None
+    relay: Optional[asyncio.Task] = None
+    if control_token and control is not None and replies is not None:
+        # The acquisition process resolves PID names, applies the request and sends the result back.
+        forwarder = ControlForwarder(index, control, replies)
+        channel = ControlChannel(control_token, forwarder.forward)
+        relay = asyncio.create_task(forwarder.relay())
+    fanout = Fanout(control=channel)
+    loop = asyncio.get_running_loop()
+    try:
+        async with websockets.serve(fanout.serve_client, host, port, reuse_port=True):
+            log(f"Worker {index} (pid {os.getpid()}) serving ws://{host}:{port}")
+            while True:
+                payload: Optional[Dict[str, Any]] = await loop.run_in_executor(None, inbox.get)
+                if payload is _STOP:
+                    break
+                await fanout.publish(payload)
+    finally:
+        if relay is not None:
+            relay.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await relay
@@ -3,7 +3,10 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import importlib
+import math
+import os
 import sys
+import time
 import types
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, cast
@@ -40,10 +43,17 @@ def _install_test_stubs() -> None:
     if "websockets" not in sys.modules:
         fake_ws = types.ModuleType("websockets")
 
-        class _ConnectionClosed(Exception):
+        class _WebSocketException(Exception):
             pass
 
-        setattr(fake_ws, "exceptions", types.SimpleNamespace(ConnectionClosed=_ConnectionClosed))
+        class _ConnectionClosed(_WebSocketException):
+            pass
+
+        setattr(
+            fake_ws,
+            "exceptions",
+            types.SimpleNamespace(ConnectionClosed=_ConnectionClosed, WebSocketException=_WebSocketException),
+        )
 
         async def _unreachable(*_args, **_kwargs):
             raise RuntimeError("websockets.serve should not run in unit tests")
@@ -66,8 +76,10 @@ _install_test_stubs()
 
 if TYPE_CHECKING:
     server = cast(Any, None)
+    fanout_mod = cast(Any, None)
 else:
     server = cast(Any, importlib.import_module("obd_dashboard_server.server"))
+    fanout_mod = cast(Any, importlib.import_module("obd_dashboard_server.fanout"))
 
 
 class DummyCommand:
@@ -111,7 +123,7 @@ async def test_push_latest_keeps_newest_entry():
     queue: asyncio.Queue[dict[str, int]] = asyncio.Queue(maxsize=1)
     await queue.put({"value": 1})
 
-    await server._push_latest(queue, {"value": 2})
+    await fanout_mod._push_latest(queue, {"value": 2})
 
     assert queue.qsize() == 1
     payload = await queue.get()
@@ -131,7 +143,7 @@ async def test_consumer_handler_sends_queue_payload(monkeypatch):
             self.messages.append(data)
 
     ws = FakeWebSocket()
-    task = asyncio.create_task(server.consumer_handler(ws, queue))
+    task = asyncio.create_task(fanout_mod.consumer_handler(ws, queue))
 
     await queue.put({"hello": "world"})
     await asyncio.sleep(0)  # let handler run
@@ -158,3 +170,742 @@ async def test_wait_for_emulator_port_parses_stream():
     port = await server._wait_for_emulator_port(reader, detection_timeout=1)
 
     assert port == "/dev/pts/8"
+
+
+@pytest.mark.asyncio
+async def test_push_latest_keeps_pending_events():
+    queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=4)
+    await fanout_mod._push_latest(queue, {"pids": {"RPM": 1}})
+    await fanout_mod._push_latest(queue, {"type": "dtc", "confirmed": []})
+    await fanout_mod._push_latest(queue, {"pids": {"RPM": 2}})
+
+    items = [queue.get_nowait() for _ in range(queue.qsize())]
+
+    assert items == [{"type": "dtc", "confirmed": []}, {"pids": {"RPM": 2}}]
+
+
+class DummyResponse:
+    def __init__(self, value: Any):
+        self.value = value
+
+    def is_null(self) -> bool:
+        return self.value is None
+
+
+class ScriptedConnection:
+    def __init__(self, values: dict[str, Any], delay: float = 0.0):
+        self.values = values
+        self.delay = delay
+        self.queries: list[str] = []
+        self.spans: list[tuple[str, float, float]] = []
+
+    def query(self, cmd):
+        self.queries.append(cmd.name)
+        started = time.monotonic()
+        if self.delay:
+            time.sleep(self.delay)
+        self.spans.append((cmd.name, started, time.monotonic()))
+        return DummyResponse(self.values.get(cmd.name))
+
+
+def _install_dtc_commands(monkeypatch) -> None:
+    class FakeCommands:
+        STATUS = DummyCommand("STATUS", mode=1, pid=0x01)
+        GET_DTC = DummyCommand("GET_DTC", mode=3, pid=None)
+        GET_CURRENT_DTC = DummyCommand("GET_CURRENT_DTC", mode=7, pid=None)
+        GET_PERMANENT_DTC = DummyCommand("GET_PERMANENT_DTC", mode=10, pid=None)
+
+    monkeypatch.setattr(server.obd, "commands", FakeCommands, raising=False)
+
+
+def test_dtc_monitor_publishes_only_on_change(monkeypatch):
+    _install_dtc_commands(monkeypatch)
+    dtc = importlib.import_module("obd_dashboard_server.dtc")
+    status = types.SimpleNamespace(MIL=True, DTC_count=1)
+    monitor = dtc.DTCMonitor(DummyConnection([]), period=0)
+    answers = {
+        "STATUS": status,
+        "GET_DTC": [("P0301", "Cylinder 1 Misfire Detected")],
+        "GET_CURRENT_DTC": [],
+        "GET_PERMANENT_DTC": [],
+    }
+
+    messages = []
+    for _ in range(3):
+        for cmd in monitor.commands:
+            messages.append(monitor.handle(cmd, DummyResponse(answers[cmd.name]), now=0.0))
+    published = [m for m in messages if m is not None]
+
+    assert len(published) == 1
+    assert published[0]["type"] == "dtc"
+    assert published[0]["mil"] is True
+    assert [c["code"] for c in published[0]["confirmed"]] == ["P0301"]
+
+    answers["GET_DTC"] = []
+    changed = monitor.handle(monitor.commands[1], DummyResponse(answers["GET_DTC"]), now=0.0)
+    assert changed is not None and changed["confirmed"] == []
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_background_only_in_idle_slots(monkeypatch):
+    _install_dtc_commands(monkeypatch)
+    dtc = importlib.import_module("obd_dashboard_server.dtc")
+    scheduler_mod = importlib.import_module("obd_dashboard_server.scheduler")
+    conn = ScriptedConnection(
+        {
+            "RPM": 900,
+            "STATUS": types.SimpleNamespace(MIL=False, DTC_count=0),
+            "GET_DTC": [],
+            "GET_CURRENT_DTC": [],
+            "GET_PERMANENT_DTC": [],
+        },
+        delay=0.002,
+    )
+    published: list[dict[str, Any]] = []
+
+    async def publish(payload):
+        published.append(payload)
+
+    sched = scheduler_mod.AcquisitionScheduler(
+        conn,
+        [DummyCommand("RPM")],
+        0.05,
+        publish,
+        background=[dtc.DTCMonitor(conn, period=0.0)],
+        background_share=0.5,
+        stats_period=0,
+    )
+    started = time.monotonic()
+    task = asyncio.create_task(sched.run())
+    await asyncio.sleep(0.4)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    elapsed = time.monotonic() - started
+
+    samples = [p for p in published if "pids" in p]
+    events = [p for p in published if p.get("type") == "dtc"]
+    assert samples and all(p["pids"] == {"RPM": 900} for p in samples)
+    assert [p["seq"] for p in samples] == list(range(1, len(samples) + 1))
+    assert len(events) == 1
+    assert sched.stats.background_queries >= 4
+    # Credit accrues at background_share of wall time; only the query that spends it below zero overshoots.
+    costs = [end - start for _, start, end in conn.spans]
+    assert sched.stats.background_time <= 0.5 * elapsed + max(costs)
+    # Every background query ran after a sample, never in front of RPM, and started before the next
+    # sample was due (cycles are due every 50 ms from the first one; none overran).
+    assert conn.queries[0] == "RPM" and sched.stats.overruns == 0
+    first = conn.spans[0][1]
+    cycle = -1
+    for name, start, _ in conn.spans:
+        if name == "RPM":
+            cycle += 1
+        else:
+            assert start < first + (cycle + 1) * 0.05, (name, start - first)
+
+
+def test_infer_engine_state():
+    power = importlib.import_module("obd_dashboard_server.power")
+
+    assert power.infer_engine_state(0, 0, 12.4) == "off"
+    assert power.infer_engine_state(180, 0, 9.8) == "cranking"
+    assert power.infer_engine_state(820, 0, 14.1) == "idle"
+    assert power.infer_engine_state(2100, 62, 14.2) == "driving"
+    assert power.infer_engine_state(None, None, 14.0) == "idle"
+    assert power.infer_engine_state(None, None, None) is None
+
+
+def test_power_manager_switches_down_only_after_hold():
+    power = importlib.import_module("obd_dashboard_server.power")
+    manager = power.PowerManager(hold=2)
+
+    assert manager.observe({"RPM": 0, "SPEED": 0}, queries=10, now=0.0) is None
+    switched = manager.observe({"RPM": 0, "SPEED": 0}, queries=10, now=1.0)
+    assert switched is not None and switched.name == "off"
+
+    # Going back up is immediate.
+    switched = manager.observe({"RPM": 250, "SPEED": 0}, queries=3, now=6.0)
+    assert switched is not None and switched.name == "cranking"
+
+    metrics = manager.metrics_message(full_rate_qpm=600.0)
+    assert metrics["type"] == "metrics"
+    assert set(metrics["profiles"]) == {"driving", "off"}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_applies_engine_off_profile():
+    power = importlib.import_module("obd_dashboard_server.power")
+    scheduler_mod = importlib.import_module("obd_dashboard_server.scheduler")
+    conn = ScriptedConnection({"RPM": 0, "SPEED": 0, "COOLANT_TEMP": 40})
+    published: list[dict[str, Any]] = []
+
+    async def publish(payload):
+        published.append(payload)
+
+    sched = scheduler_mod.AcquisitionScheduler(
+        conn,
+        [DummyCommand("RPM"), DummyCommand("SPEED"), DummyCommand("COOLANT_TEMP")],
+        0.01,
+        publish,
+        stats_period=0,
+        power=power.PowerManager(hold=1),
+    )
+    task = asyncio.create_task(sched.run())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+    profiles = [p for p in published if p.get("type") == "profile"]
+    assert [p["engine_state"] for p in profiles] == ["off"]
+    assert profiles[0]["pids"] == ["RPM", "SPEED"]
+    # One full-rate cycle, then the engine-off profile waits 5s before the next one.
+    assert conn.queries == ["RPM", "SPEED", "COOLANT_TEMP"]
+    assert sched.interval == 5.0
+
+
+def test_scheduler_profile_switch_applies_new_slow_period_at_once():
+    power = importlib.import_module("obd_dashboard_server.power")
+    scheduler_mod = importlib.import_module("obd_dashboard_server.scheduler")
+    conn = ScriptedConnection({"RPM": 2100, "SPEED": 62, "COOLANT_TEMP": 90})
+
+    async def publish(payload):
+        pass
+
+    manager = power.PowerManager()
+    manager.state = "idle"
+    sched = scheduler_mod.AcquisitionScheduler(
+        conn,
+        [DummyCommand("RPM"), DummyCommand("SPEED"), DummyCommand("COOLANT_TEMP")],
+        0.1,
+        publish,
+        stats_period=0,
+        power=manager,
+    )
+    sched._poll_foreground(0.0)
+    assert sched.periods == {"COOLANT_TEMP": 10.0}
+
+    # Idle (10 s slow tier) -> driving (2 s): no waiting out the idle deadline.
+    manager.state = "driving"
+    sched._apply_profile()
+    conn.queries.clear()
+    for now in (1.0, 2.0, 3.0):
+        sched._poll_foreground(now)
+    assert conn.queries.count("COOLANT_TEMP") == 2
+    assert conn.queries.count("RPM") == 3
+
+
+def test_shared_memory_roundtrip(tmp_path):
+    shm = importlib.import_module("obd_dashboard_server.shm")
+    path = str(tmp_path / "latest")
+    writer = shm.LatestValuesWriter(path, capacity=8)
+    reader = shm.LatestValuesReader(path)
+    try:
+        writer.publish({"RPM": 850.0, "SPEED": 0, "FUEL_STATUS": "Closed loop"}, timestamp=1000.0)
+        snap = reader.snapshot()
+        assert snap.seq == 2 and snap.timestamp == 1000.0
+        assert snap.values["RPM"] == 850.0
+        assert math.isnan(snap.values["FUEL_STATUS"])
+
+        writer.publish({"RPM": 2000.0}, timestamp=1001.0)
+        assert reader.get("RPM") == 2000.0
+        assert math.isnan(reader.get("SPEED"))
+        assert reader.get("UNKNOWN") is None
+
+        view = reader.values_view()
+        assert view[reader.slot("RPM")] == 2000.0
+        view.release()
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_shared_memory_writer_restart_keeps_slots_and_sequence(tmp_path):
+    shm = importlib.import_module("obd_dashboard_server.shm")
+    path = str(tmp_path / "latest")
+    first = shm.LatestValuesWriter(path, capacity=8)
+    first.publish({"RPM": 850.0, "SPEED": 12.0})
+    first.close()
+    reader = shm.LatestValuesReader(path)
+    try:
+        assert reader.get("SPEED") == 12.0
+        size, last_seq = os.path.getsize(path), reader.seq
+
+        second = shm.LatestValuesWriter(path, capacity=8)
+        assert os.path.getsize(path) == size
+        assert reader.seq > last_seq and reader.seq % 2 == 0
+        assert math.isnan(reader.get("SPEED"))
+
+        second.publish({"SPEED": 30.0, "COOLANT_TEMP": 90.0})
+        assert reader.slot("SPEED") == 1 and reader.slot("COOLANT_TEMP") == 2
+        assert reader.get("SPEED") == 30.0 and math.isnan(reader.get("RPM"))
+        second.close()
+    finally:
+        reader.close()
+
+
+def test_shared_memory_reader_follows_a_capacity_change(tmp_path):
+    shm = importlib.import_module("obd_dashboard_server.shm")
+    path = str(tmp_path / "latest")
+    first = shm.LatestValuesWriter(path, capacity=8)
+    first.publish({"RPM": 850.0, "SPEED": 12.0})
+    first.close()
+    reader = shm.LatestValuesReader(path)
+    try:
+        assert reader.get("SPEED") == 12.0
+        for capacity in (2, 64):
+            writer = shm.LatestValuesWriter(path, capacity=capacity)
+            writer.publish({"COOLANT_TEMP": 90.0, "SPEED": float(capacity)})
+            assert reader.get("SPEED") == float(capacity) and reader.capacity == capacity
+            assert reader.slot("COOLANT_TEMP") == 0 and reader.get("RPM") is None
+            writer.close()
+    finally:
+        reader.close()
+        os.unlink(path)
+
+
+def test_shared_memory_reader_waits_for_even_sequence(tmp_path):
+    shm = importlib.import_module("obd_dashboard_server.shm")
+    path = str(tmp_path / "latest")
+    writer = shm.LatestValuesWriter(path, capacity=4)
+    writer.publish({"RPM": 800.0})
+    reader = shm.LatestValuesReader(path)
+    try:
+        shm._SEQ.pack_into(writer._mm, shm._SEQ_OFFSET, 3)  # writer stuck mid-update
+        with pytest.raises(TimeoutError):
+            reader.snapshot()
+    finally:
+        reader.close()
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_fanout_delivers_every_message_to_each_client():
+    fanout = importlib.import_module("obd_dashboard_server.fanout").Fanout()
+    first, second = fanout.subscribe(), fanout.subscribe()
+
+    await fanout.publish({"pids": {"RPM": 1}})
+    await fanout.publish({"type": "dtc", "confirmed": []})
+    fanout.unsubscribe(second)
+    await fanout.publish({"pids": {"RPM": 2}})
+
+    assert [first.get_nowait() for _ in range(first.qsize())] == [
+        {"type": "dtc", "confirmed": []},
+        {"pids": {"RPM": 2}},
+    ]
+    assert second.qsize() == 2 and len(fanout) == 1
+
+
+def test_worker_pool_drops_instead_of_blocking():
+    workers = importlib.import_module("obd_dashboard_server.workers")
+    pool = workers.WorkerPool(2, "127.0.0.1", 0, inbox_size=1)
+
+    pool.publish({"pids": {"RPM": 1}})
+    pool.publish({"pids": {"RPM": 2}})
+
+    assert pool.dropped == 2
+    pool.stop(timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_worker_control_ack_carries_the_acquisition_result():
+    import queue
+    import threading
+
+    workers = importlib.import_module("obd_dashboard_server.workers")
+    control_mod = importlib.import_module("obd_dashboard_server.control")
+    control, replies = queue.Queue(), queue.Queue()
+    forwarder = workers.ControlForwarder(1, control, replies, timeout=2.0)
+    channel = control_mod.ControlChannel("secret", forwarder.forward)
+    relay = asyncio.create_task(forwarder.relay())
+
+    def acquisition():  # stands in for _pump_control: validates PID names, replies per ticket
+        for _ in range(2):
+            index, number, data = control.get(timeout=2)
+            if data["pids"] == ["NOPE"]:
+                replies.put((number, {"ok": False, "error": "unknown PID NOPE"}))
+            else:
+                replies.put((number, {"interval": data["interval"], "pids": data["pids"], "rates": {}}))
+            assert index == 1
+
+    thread = threading.Thread(target=acquisition)
+    thread.start()
+    ok = await channel.handle({"type": "control", "token": "secret", "interval": 0.5, "pids": ["RPM"]})
+    bad = await channel.handle({"type": "control", "token": "secret", "pids": ["NOPE"]})
+    thread.join()
+    assert ok == {"type": "control_ack", "ok": True, "interval": 0.5, "pids": ["RPM"], "rates": {}}
+    assert bad == {"type": "control_ack", "ok": False, "error": "unknown PID NOPE"}
+
+    forwarder.timeout = 0.01  # nobody answers: accepted, but not validated
+    late = await channel.handle({"type": "control", "token": "secret", "interval": 1.0})
+    assert late["ok"] is None and late["status"] == "accepted, not validated"
+    replies.put(workers._STOP)
+    await relay
+
+
+@pytest.mark.asyncio
+async def test_supervise_workers_raises_when_all_workers_died(monkeypatch):
+    checks = []
+
+    class DeadPool:
+        def alive(self) -> int:
+            checks.append(1)
+            return 0 if len(checks) > 1 else 2
+
+    async def no_wait(_delay):
+        return None
+
+    monkeypatch.setattr(server.asyncio, "sleep", no_wait)
+    with pytest.raises(server.WorkersExited):
+        await server._supervise_workers(DeadPool())
+    assert len(checks) == 2
+
+
+@pytest.mark.asyncio
+async def test_control_channel_checks_token_and_fields():
+    control = importlib.import_module("obd_dashboard_server.control")
+    applied: list[Any] = []
+
+    async def apply(request):
+        applied.append(request)
+        return {"interval": request.interval}
+
+    channel = control.ControlChannel("secret", apply)
+
+    denied = await channel.handle({"type": "control", "token": "guess", "interval": 0.5})
+    invalid = await channel.handle({"type": "control", "token": "secret", "interval": 0.01})
+    accepted = await channel.handle(
+        {"type": "control", "token": "secret", "interval": 0.5, "rates": {"COOLANT_TEMP": 0.2, "RPM": 0}}
+    )
+
+    assert denied == {"type": "control_ack", "ok": False, "error": "invalid token"}
+    assert invalid["ok"] is False and "interval" in invalid["error"]
+    assert accepted == {"type": "control_ack", "ok": True, "interval": 0.5}
+    assert applied[0].rates == {"COOLANT_TEMP": 0.2, "RPM": None}
+
+
+def test_resolve_commands_matches_names_case_insensitively(monkeypatch):
+    class FakeCommands:
+        RPM = DummyCommand("RPM")
+        SPEED = DummyCommand("SPEED")
+
+    monkeypatch.setattr(server.obd, "commands", FakeCommands, raising=False)
+    conn = DummyConnection([])
+
+    assert server.resolve_commands(conn, ["speed", "RPM"]) == [FakeCommands.SPEED, FakeCommands.RPM]
+    with pytest.raises(ValueError, match="MAF"):
+        server.resolve_commands(conn, ["RPM", "MAF"])
+
+
+@pytest.mark.asyncio
+async def test_scheduler_reconfigure_applies_on_next_cycle():
+    scheduler_mod = importlib.import_module("obd_dashboard_server.scheduler")
+    conn = ScriptedConnection({"RPM": 900, "SPEED": 10, "COOLANT_TEMP": 80})
+    published: list[dict[str, Any]] = []
+
+    async def publish(payload):
+        published.append(payload)
+
+    sched = scheduler_mod.AcquisitionScheduler(
+        conn, [DummyCommand("RPM"), DummyCommand("SPEED")], 0.01, publish, stats_period=0
+    )
+    task = asyncio.create_task(sched.run())
+    await asyncio.sleep(0.005)
+    sched.reconfigure(cmds=[DummyCommand("RPM"), DummyCommand("COOLANT_TEMP")], rates={"COOLANT_TEMP": 0.5})
+    conn.queries.clear()
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+    assert "SPEED" not in conn.queries
+    assert conn.queries.count("COOLANT_TEMP") == 1 and conn.queries.count("RPM") > 1
+    assert set(published[-1]["pids"]) == {"RPM", "COOLANT_TEMP"}
+    config = sched.config_message()
+    assert config["pids"] == ["RPM", "COOLANT_TEMP"] and config["rates"] == {"COOLANT_TEMP": 0.5}
+
+
+def test_uplink_batch_roundtrip():
+    uplink = importlib.import_module("obd_dashboard_server.uplink")
+
+    data = uplink.encode_batch("car-1", 7, [1.0, 2.0], [{"RPM": 900}, {"RPM": 950, "SPEED": 12}])
+    header, timestamps, columns = uplink.decode_batch(data)
+
+    assert header["vehicle"] == "car-1" and header["seq"] == 7 and header["rows"] == 2
+    assert timestamps == [1.0, 2.0]
+    assert columns["RPM"] == [900.0, 950.0]
+    assert math.isnan(columns["SPEED"][0]) and columns["SPEED"][1] == 12.0
+
+
+def test_uplink_spool_evicts_oldest_first(tmp_path):
+    uplink = importlib.import_module("obd_dashboard_server.uplink")
+    spool = uplink.SpoolQueue(str(tmp_path), max_bytes=25)
+
+    for seq in range(4):
+        spool.put(spool.next_seq(), bytes([seq]) * 10)
+
+    assert [path.read_bytes()[0] for path in spool.pending()] == [2, 3]
+    assert spool.evicted == 2
+    assert uplink.SpoolQueue(str(tmp_path)).next_seq() == 4
+
+
+@pytest.mark.asyncio
+async def test_uplink_buffers_offline_then_drains_to_collector(tmp_path):
+    import http.server
+    import threading
+
+    uplink_mod = importlib.import_module("obd_dashboard_server.uplink")
+    received: list[tuple[str, bytes]] = []
+
+    class Collector(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.headers["X-OBD-Vehicle"], body))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *_args):
+            pass
+
+    httpd = http.server.HTTPServer(("127.0.0.1", 0), Collector)
+    port = httpd.server_address[1]
+    httpd.server_close()  # Start offline: nothing listens on the port yet.
+
+    link = uplink_mod.Uplink(
+        f"http://127.0.0.1:{port}/ingest", uplink_mod.SpoolQueue(str(tmp_path)), vehicle="car-1", timeout=1.0
+    )
+    link.add({"timestamp": "t", "pids": {"RPM": 900}})
+    link.add({"type": "dtc", "confirmed": []})
+    link.flush()
+    assert await link.drain() == 0
+    assert len(link.spool.pending()) == 1
+
+    httpd = http.server.HTTPServer(("127.0.0.1", port), Collector)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        link.add({"timestamp": "t", "pids": {"RPM": 950}})
+        put, threads = link.spool.put, []
+        link.spool.put = lambda *args: threads.append(threading.current_thread()) or put(*args)
+        await link.flush_async()
+        assert threads and threads[0] is not threading.current_thread()  # gzip + fsync off the loop
+        assert await link.drain() == 2
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    assert link.spool.pending() == []
+    values = [uplink_mod.decode_batch(body)[2]["RPM"] for _, body in received]
+    assert values == [[900.0], [950.0]] and {vehicle for vehicle, _ in received} == {"car-1"}
+
+
+def test_transcript_capture_and_replay_roundtrip(tmp_path, monkeypatch):
+    import socket
+    import serial
+
+    transcript = importlib.import_module("obd_dashboard_server.transcript")
+    path = str(tmp_path / "drive.jsonl")
+
+    class FakePort:
+        """Adapter answering 010C with two different RPM frames, byte by byte."""
+
+        answers = [b"41 0C 0B B8 \r\r>", b"41 0C 0F A0 \r\r>"]
+
+        def __init__(self):
+            self.pending = b""
+            self.timeout = 1
+
+        def write(self, data):
+            self.pending = self.answers.pop(0) if data == b"010C\r" else b"NO DATA\r\r>"
+
+        def read(self, size=1):
+            chunk, self.pending = self.pending[:size], self.pending[size:]
+            return chunk
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(serial, "serial_for_url", lambda *_a, **_k: FakePort())
+    with transcript.capture_serial(path):
+        port = serial.serial_for_url("/dev/fake")
+    port.timeout = 5
+    for command in (b"010C\r", b"010D\r", b"010C\r"):
+        port.write(command)
+        while port.read(1) != b">":
+            pass
+    port.close()
+
+    replay = transcript.TranscriptReplay(path)
+    assert replay.commands == ["010C", "010D"]
+    server = transcript.serve_tcp(replay, "127.0.0.1", 0)
+    try:
+        with socket.create_connection(server.server_address[:2], timeout=2) as sock:
+            answers = []
+            for command in (b"01 0c\r", b"010C\r", b"010C\r", b"ATE0\r"):
+                sock.sendall(command)
+                data = b""
+                while not data.endswith(b">"):
+                    data += sock.recv(64)
+                answers.append(data)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert answers == [b"41 0C 0B B8 \r\r>", b"41 0C 0F A0 \r\r>", b"41 0C 0B B8 \r\r>", b"OK\r\r>"]
+    assert replay.unknown == 1
+
+
+@pytest.mark.asyncio
+async def test_broker_orders_by_class_and_merges_identical_queries():
+    import threading
+    import time as time_mod
+
+    broker_mod = importlib.import_module("obd_dashboard_server.broker")
+
+    class FakeAdapter:
+        version = "ELM327 v1.5"
+        protocol_number = "A6"
+        protocol_name = "AUTO, ISO 15765-4 (CAN 11/500)"
+
+        def __init__(self):
+            self.sent = []
+            self.lock = threading.Lock()
+
+        def transact(self, command):
+            with self.lock:
+                self.sent.append(command.decode())
+            time_mod.sleep(0.02)
+            return b"7E8 04 41 " + command[2:4] + b" 0B B8 \r\r"
+
+    adapter = FakeAdapter()
+    broker = broker_mod.AdapterBroker(adapter, stats_period=0)
+    live = broker_mod.ElmSession(broker, "live", "a")
+    logger = broker_mod.ElmSession(broker, "logging", "b")
+    dtc = broker_mod.ElmSession(broker, "dtc", "c")
+    runner = asyncio.create_task(broker.run())
+    try:
+        first = asyncio.create_task(logger.handle(b"0105"))
+        await asyncio.sleep(0.005)  # 0105 is on the wire; the rest queue behind it
+        replies = await asyncio.gather(
+            first,
+            dtc.handle(b"03"),
+            logger.handle(b"010D"),
+            live.handle(b"010C"),
+            live.handle(b"01 0d"),
+        )
+        header_on = await live.handle(b"ATH1")
+    finally:
+        runner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await runner
+
+    # The live client joining 010D lifts it above its own later 010C; DTC goes last.
+    assert adapter.sent == ["0105", "010D", "010C", "03"]
+    # Sessions start with echo on and headers off, as an ELM327 after reset.
+    assert replies[2] == b"010D\r41 0D 0B B8\r\r>"
+    assert replies[4] == b"01 0d\r41 0D 0B B8\r\r>"
+    assert header_on == b"ATH1\rOK\r\r>"
+    stats = broker.class_stats()
+    assert stats["live"].queries == 2 and stats["live"].joined == 1
+    # 010D is billed half to each client; 0105 and 010C in full to theirs.
+    assert stats["live"].adapter_time == pytest.approx(stats["logging"].adapter_time, rel=0.5)
+    assert stats["logging"].adapter_time > stats["dtc"].adapter_time > 0
+
+
+@pytest.mark.asyncio
+async def test_broker_session_emulates_link_settings_per_client():
+    broker_mod = importlib.import_module("obd_dashboard_server.broker")
+
+    class FakeAdapter:
+        version = "ELM327 v1.5"
+        protocol_number = "A6"
+        protocol_name = "AUTO, ISO 15765-4 (CAN 11/500)"
+
+        def transact(self, command):
+            return b"7E8 06 41 00 BE 3F A8 13 \r7E9 06 41 00 98 18 80 11 \r\r"
+
+    broker = broker_mod.AdapterBroker(FakeAdapter(), stats_period=0)
+    runner = asyncio.create_task(broker.run())
+    session = broker_mod.ElmSession(broker, "logging", "x")
+    try:
+        for command in (b"ATZ", b"ATE0", b"ATH1", b"ATL1", b"ATSP0"):
+            await session.handle(command)
+        with_headers = await session.handle(b"0100")
+        await session.handle(b"ATS0")
+        await session.handle(b"ATH0")
+        compact = await session.handle(b"0100")
+        protocol = await session.handle(b"ATDPN")
+        unsupported = await session.handle(b"ATMA")
+    finally:
+        runner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await runner
+
+    assert with_headers == b"7E8 06 41 00 BE 3F A8 13\r\n7E9 06 41 00 98 18 80 11\r\n\r\n>"
+    assert compact == b"4100BE3FA813\r\n410098188011\r\n\r\n>"
+    assert protocol == b"A6\r\n\r\n>"
+    assert unsupported == b"?\r\n\r\n>"
+
+
+def test_can_monitor_decodes_frame_dump_through_fake_adapter(tmp_path):
+    import json
+    import threading
+
+    canmon = importlib.import_module("obd_dashboard_server.canmon")
+    signals = tmp_path / "signals.json"
+    signals.write_text(
+        json.dumps(
+            {
+                "signals": [
+                    {"name": "RPM", "id": "0x0C9", "start": 8, "length": 16, "scale": 0.25, "unit": "rpm"},
+                    {"name": "SPEED", "id": "3E9", "start": 0, "length": 16, "scale": 0.01, "unit": "km/h"},
+                    {"name": "TORQUE", "id": "0x0C9", "start": 32, "length": 12, "byte_order": "little", "signed": True},
+                ]
+            }
+        )
+    )
+    dump = tmp_path / "drive.log"
+    dump.write_text(
+        "(1700000000.000000) can0 0C9#0012C000FF0F0000\n"
+        "(1700000000.010000) can0 7E8#0441050000000000\n"
+        "can0  3E9   [8]  17 70 00 00 00 00 00 00\n"
+        "0C9 00 1F 40 00 01 00 00 00\n"
+    )
+
+    decoder = canmon.FrameDecoder(canmon.load_signal_defs(str(signals)))
+    assert decoder.units["RPM"] == "rpm"
+    port = canmon.DumpPort(canmon.read_frame_dump(str(dump)))
+    monitor = canmon.CanMonitor(port, decoder)
+    monitor.setup()
+    filt, mask = canmon.acceptance_filter(decoder.ids)
+    assert f"ATCM{mask:03X}" in port.commands and "ATS0" in port.commands
+
+    seen = []
+    done = threading.Event()
+
+    def on_frame(_stamp, values):
+        seen.append(values)
+        if len(seen) == 3:
+            done.set()
+
+    reader = threading.Thread(target=monitor.monitor_blocking, args=(on_frame,))
+    reader.start()
+    assert done.wait(2)
+    monitor.stop()
+    reader.join(2)
+
+    # 0x7E8 is outside the filter; TORQUE is a little-endian signed 12-bit field (0xFFF = -1).
+    assert seen == [{"RPM": 1200.0, "TORQUE": -1.0}, {"SPEED": 60.0}, {"RPM": 2000.0, "TORQUE": 1.0}]
+    assert monitor.snapshot()[1] == {"RPM": 2000.0, "TORQUE": 1.0, "SPEED": 60.0}
+    assert port.commands[-1] == "ATMA"
+
+
+def test_monitor_line_parser_handles_split_chunks_and_status_lines():
+    canmon = importlib.import_module("obd_dashboard_server.canmon")
+    parser = canmon.MonitorLineParser()
+    stream = b"0C90012C0FF0F000000\r3E9177000000000\rBUFFER FULL\r\r>0C9 00 1F\r"
+    frames = []
+    for index in range(0, len(stream), 7):
+        frames += parser.feed(stream[index : index + 7])
+    assert frames == [(0x0C9, bytes.fromhex("0012C0FF0F000000")), (0x3E9, bytes.fromhex("177000000000")), (0x0C9, b"\x00\x1f")]
+    assert (parser.overflows, parser.prompts, parser.errors) == (1, 1, 0)
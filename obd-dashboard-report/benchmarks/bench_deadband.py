@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Deadband recording: file size, values written and reconstruction error vs every value.
+
+Writes the same synthetic drive (--rows rows at 10 Hz) the way the logger does: once with
+every value, once change-only (`--deadband '*=0'`) and once with the per-PID bands below.
+The PIDs are quantized like python-OBD decodes them (whole km/h and degrees, 1/4 rpm,
+100/255 % steps...). Each file is loaded back with load_csv_with_units, which fills held
+cells, and compared with what was sampled: the error is reported per PID against its band.
+
+    python benchmarks/bench_deadband.py --rows 36000   # 1 h at 10 Hz
+"""
+from __future__ import annotations
+import argparse, datetime as dt, gzip, math, os, random, shutil, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from obdtools.csvio.readers import load_csv_with_units  # noqa: E402
+from obdtools.logger.core import number_cell, open_csv_with_header  # noqa: E402
+from obdtools.logger.deadband import DEADBAND_MARK, DeadbandFilter, parse_deadbands  # noqa: E402
+
+BANDS = ("RPM=25,SPEED=1,THROTTLE_POS=1,RELATIVE_THROTTLE_POS=1,ENGINE_LOAD=2,ABSOLUTE_LOAD=2,MAF=0.5,"
+         "INTAKE_PRESSURE=2,TIMING_ADVANCE=1,SHORT_FUEL_TRIM_1=2,LONG_FUEL_TRIM_1=0.8,O2_B1S2=0.05,"
+         "COMMANDED_EQUIV_RATIO=0.02,CATALYST_TEMP_B1S1=5,CONTROL_MODULE_VOLTAGE=0.1,*=0")
+
+
+def q(x: float, step: float) -> float:
+    return round(x / step) * step
+
+
+def synth(rows: int, seed: int = 1):
+    """A drive at 10 Hz: warm-up, town (stop and go), then motorway cruise."""
+    rnd = random.Random(seed)
+    speed, target, fuel, trim_l = 0.0, 0.0, 62.0, 1.6
+    for i in range(rows):
+        t = i / 10.0
+        if i % 300 == 0:                        # a new target speed every 30 s
+            target = rnd.choice((0, 30, 50, 50, 70)) if t < rows / 20 else rnd.choice((110, 120, 130, 130))
+        speed += max(-2.5, min(1.5, (target - speed) * 0.05)) + rnd.gauss(0, 0.05)
+        speed = max(0.0, speed)
+        accel = (target - speed) * 0.05
+        rpm = 800 + speed * 28 + max(0.0, accel) * 400 + rnd.gauss(0, 15)
+        throttle = max(0.0, min(100.0, 14 + speed * 0.12 + accel * 25 + rnd.gauss(0, 0.4)))
+        load = max(0.0, min(100.0, 18 + throttle * 0.7 + rnd.gauss(0, 0.8)))
+        coolant = min(90.0, 20 + t * 0.12) + rnd.gauss(0, 0.3)
+        fuel -= 0.00003 * (1 + speed / 50)
+        if i % 6000 == 0:
+            trim_l += rnd.choice((-0.8, 0.0, 0.8))
+        row = {
+            "RPM": q(rpm, 0.25), "SPEED": q(speed, 1), "THROTTLE_POS": q(throttle, 100 / 255),
+            "RELATIVE_THROTTLE_POS": q(throttle * 0.8, 100 / 255), "ENGINE_LOAD": q(load, 100 / 255),
+            "ABSOLUTE_LOAD": q(load * 0.9, 100 / 255), "MAF": q(rpm * load / 2000, 0.01),
+            "INTAKE_PRESSURE": q(30 + load * 0.7, 1), "TIMING_ADVANCE": q(10 + speed * 0.1 + rnd.gauss(0, 1), 0.5),
+            "SHORT_FUEL_TRIM_1": q(rnd.gauss(0, 1.2), 100 / 128), "LONG_FUEL_TRIM_1": q(trim_l, 100 / 128),
+            "O2_B1S2": q(0.7 + rnd.gauss(0, 0.01), 0.005), "COMMANDED_EQUIV_RATIO": q(1.0 + rnd.gauss(0, 0.004), 1 / 32768),
+            "CATALYST_TEMP_B1S1": q(min(650.0, 100 + t * 0.6) + speed + rnd.gauss(0, 2), 0.1),
+            "CONTROL_MODULE_VOLTAGE": q(14.1 + rnd.gauss(0, 0.03), 0.001),
+            "COOLANT_TEMP": q(coolant, 1), "INTAKE_TEMP": q(25 + rnd.gauss(0, 0.2), 1),
+            "AMBIANT_AIR_TEMP": 18.0, "BAROMETRIC_PRESSURE": 101.0, "FUEL_LEVEL": q(fuel, 100 / 255),
+            "OIL_TEMP": q(min(95.0, 20 + t * 0.08), 1), "RUN_TIME": float(int(t)),
+            "DISTANCE_W_MIL": 0.0, "DISTANCE_SINCE_DTC_CLEAR": q(1234 + t / 100, 1),
+            "FUEL_RAIL_PRESSURE_DIRECT": q(5000 + load * 80, 10), "EVAP_VAPOR_PRESSURE": q(-40 + rnd.gauss(0, 2), 0.25),
+            "WARMUPS_SINCE_DTC_CLEAR": 12.0, "FUEL_STATUS": "Closed loop, using oxygen sensor feedback" if t > 40 else "Open loop",
+            "OBD_COMPLIANCE": "EOBD (Europe)", "STATUS": "MIL off, 0 DTC",
+        }
+        yield t, row
+
+
+def write(path: str, rows: int, bands: dict | None, hold_s: float):
+    names = list(next(synth(1))[1])
+    units_row = ["" if bands is None else DEADBAND_MARK, "", ""] + ["unit"] * len(names)
+    band = DeadbandFilter(names, bands, hold_s) if bands is not None else None
+    t0 = dt.datetime(2025, 10, 5, 10, 0, 0)
+    sampled = []
+    c0 = time.process_time()
+    f, w = open_csv_with_header(path, ["timestamp_iso", "date", "time"] + names, units_row)
+    for t, values in synth(rows):
+        now = t0 + dt.timedelta(seconds=t)
+        row = [now.isoformat(sep=" ", timespec="milliseconds"), now.date().isoformat(), now.strftime("%H:%M:%S")] + \
+              [number_cell(v) for v in values.values()]
+        sampled.append(row[3:])
+        w.writerow(band.apply(row, 3, t) if band is not None else row)
+    f.close()
+    return time.process_time() - c0, sampled, band, names
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=36000)
+    ap.add_argument("--bands", default=BANDS, help="--deadband spec of the third run")
+    ap.add_argument("--hold-s", type=float, default=60.0)
+    ap.add_argument("--dir", default=None, help="Where to write (default: a temp dir)")
+    args = ap.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="bench_deadband_", dir=args.dir)
+    runs = [("every value", None), ("change-only", {"*": 0.0}), ("bands", parse_deadbands(args.bands))]
+    print(f"{args.rows} rows at 10 Hz, 30 PIDs, hold {args.hold_s:g} s")
+    print(f"{'recording':<12} {'values written':>15} {'size MB':>8} {'gzip MB':>8} {'write us/row':>13} {'load s':>7}")
+    errors = {}
+    try:
+        for label, bands in runs:
+            path = os.path.join(root, label.replace(" ", "_") + ".csv")
+            cpu, sampled, band, names = write(path, args.rows, bands, args.hold_s)
+            t = time.perf_counter()
+            df, _units = load_csv_with_units(path)
+            load = time.perf_counter() - t
+            assert len(df) == args.rows
+            with open(path, "rb") as fh:
+                gz = len(gzip.compress(fh.read(), 6))
+            s = band.stats() if band is not None else {"written": 1, "values": 1}
+            print(f"{label:<12} {s['written'] / s['values']:>15.1%} {os.path.getsize(path) / 1e6:>8.2f} "
+                  f"{gz / 1e6:>8.2f} {cpu / args.rows * 1e6:>13.1f} {load:>7.3f}")
+            if band is not None:
+                for j, n in enumerate(names):
+                    got = df[n].tolist()
+                    err = [abs(g - r[j]) for g, r in zip(got, sampled) if isinstance(r[j], float)]
+                    exact = all(g == r[j] for g, r in zip(got, sampled) if not isinstance(r[j], float))
+                    p = s["pids"][n]
+                    errors.setdefault(n, []).append((p["band"], p["written"] / p["samples"], max(err or [0.0]),
+                                                     math.sqrt(sum(e * e for e in err) / len(err)) if err else 0.0, exact))
+        print()
+        print(f"{'PID':<26} {'band':>6} {'written':>8} {'max err':>8} {'rms err':>8}   (bands run; change-only written)")
+        for n, ((_b0, w0, *_), (b, w, mx, rms, exact)) in errors.items():
+            assert mx <= b + 1e-9 and exact, n
+            print(f"{n:<26} {b:>6g} {w:>8.1%} {mx:>8.3g} {rms:>8.3g}   {w0:>6.1%}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
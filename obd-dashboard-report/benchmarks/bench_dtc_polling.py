@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""DTC polling vs live sampling: inline poll_once() every second vs the cooperative step().
+
+Simulates a slow adapter (--query-ms per round-trip) answering --pids live PIDs and the nine
+DTC snapshot queries, then runs the logger's loop shape (DeadlinePacer, sample every PID,
+DTC work, wait) for --seconds per mode. Reports the achieved live rate, overruns and the
+longest gap between two live rows, plus how long a DTC snapshot cycle takes (inline: the
+time the loop is blocked in poll_once) and the DTC adapter queries per minute. The first
+three modes read every DTC PID each cycle (--dtc-mode full); "status" reads the lists only
+on a STATUS change or every 60 s, and the counters once a minute.
+
+    python benchmarks/bench_dtc_polling.py --pids 4 --query-ms 60 --interval 0.5 --seconds 20
+"""
+from __future__ import annotations
+import argparse, sys, tempfile, time, types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from obdtools.logger.dtc import DTCLogger  # noqa: E402
+from obdtools.logger.pacing import DeadlinePacer  # noqa: E402
+
+DTC_CMDS = ["GET_CURRENT_DTC", "GET_DTC", "GET_PERMANENT_DTC", "STATUS", "FREEZE_DTC",
+            "WARMUPS_SINCE_DTC_CLEAR", "TIME_SINCE_DTC_CLEARED", "TIME_WITH_MIL_ON",
+            "DISTANCE_WITH_MIL_ON", "DISTANCE_SINCE_DTC_CLEARED"]
+
+
+class Cmd:
+    def __init__(self, name):
+        self.name = name
+
+
+class Resp:
+    def __init__(self, value):
+        self.value = value
+    def is_null(self):
+        return self.value is None
+
+
+class SlowConn:
+    def __init__(self, query_s: float):
+        self.query_s = query_s
+    def supports(self, cmd):
+        return True
+    def query(self, cmd, force=False):
+        time.sleep(self.query_s)
+        return Resp([] if cmd.name.endswith("_DTC") else 1.0)
+
+
+def run(mode: str, args, out_dir: str) -> dict:
+    conn = SlowConn(args.query_ms / 1000.0)
+    module = types.SimpleNamespace(commands=types.SimpleNamespace(**{n: Cmd(n) for n in DTC_CMDS}))
+    dtc = DTCLogger(conn, module, out_dir=Path(out_dir), prefix=mode, mode="status" if mode == "status" else "full")
+    live = [Cmd(f"PID_{k}") for k in range(args.pids)]
+    pacer = DeadlinePacer(args.interval)
+    rows, gap_max, last_row, last_poll, inline_s, polls, inline_q = 0, 0.0, None, 0.0, 0.0, 0, 0
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        pacer.tick()
+        for cmd in live:
+            conn.query(cmd)
+        now = time.monotonic()
+        if last_row is not None:
+            gap_max = max(gap_max, now - last_row)
+        last_row = now
+        rows += 1
+        if mode == "inline":
+            if now - last_poll >= 1.0:
+                inline_q += len(DTC_CMDS) - 1   # FREEZE_DTC is only read for a new code
+                dtc.poll_once()
+                last_poll = now
+                inline_s += time.monotonic() - now
+                polls += 1
+        else:
+            dtc.step(args.budget_ms / 1000.0 if mode == "budget" else 0.0)
+        pacer.wait()
+    s = pacer.stats()
+    cycle_s = inline_s / polls if mode == "inline" else (dtc.cycle_s_total / dtc.cycles if dtc.cycles else None)
+    dtc.close()
+    return {"hz": s["achieved_hz"], "overruns": s["overruns"], "skipped": s["skipped_ticks"],
+            "gap_ms": gap_max * 1000, "p99_ms": s["late_p99_ms"],
+            "cycle_s": cycle_s, "rows": rows,
+            "q_min": (inline_q if mode == "inline" else dtc.queries) / args.seconds * 60}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--pids", type=int, default=4)
+    ap.add_argument("--query-ms", type=float, default=60.0, help="Adapter round-trip per query")
+    ap.add_argument("--interval", type=float, default=0.5)
+    ap.add_argument("--budget-ms", type=float, default=150.0, help="Budget for the 'budget' mode")
+    ap.add_argument("--seconds", type=float, default=20.0, help="Duration of each mode")
+    args = ap.parse_args(argv)
+
+    print(f"{args.pids} live PIDs, {args.query_ms:g} ms per query, interval {args.interval:g} s "
+          f"(live work {args.pids * args.query_ms:.0f} ms per tick)")
+    print(f"{'mode':<16} {'live Hz':>8} {'overruns':>9} {'skipped':>8} {'max gap ms':>11} {'p99 late ms':>12} {'DTC cycle s':>12} {'DTC q/min':>10}")
+    with tempfile.TemporaryDirectory(prefix="bench_dtc_") as out_dir:
+        for mode in ("inline", "step", "budget", "status"):
+            r = run(mode, args, out_dir)
+            label = {"inline": "inline (1/s)", "step": "step, 1 query", "budget": f"step, {args.budget_ms:g} ms",
+                     "status": "step, status"}[mode]
+            cycle = f"{r['cycle_s']:.1f}" if r["cycle_s"] else "n/a"
+            print(f"{label:<16} {r['hz']:>8.2f} {r['overruns']:>9} {r['skipped']:>8} {r['gap_ms']:>11.0f} "
+                  f"{r['p99_ms']:>12.1f} {cycle:>12} {r['q_min']:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
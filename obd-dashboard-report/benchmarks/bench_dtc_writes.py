@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""DTC log disk traffic per hour: a snapshot row every cycle vs run-length encoded rows, and
+three CSVs vs the single-file journal.
+
+Simulates --hours of 1 s snapshot cycles on a simulated clock (instant adapter): a confirmed code
+appears at 20 min, the MIL comes on at 30 min, the code is cleared at 50 min, and the
+since-clear timer ticks once a minute. Counts rows, fsync calls and bytes written per hour.
+
+    python benchmarks/bench_dtc_writes.py --hours 1
+"""
+from __future__ import annotations
+import argparse, os, sys, tempfile, types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from obdtools.logger.dtc import DTCLogger  # noqa: E402
+
+NAMES = ["STATUS", "GET_CURRENT_DTC", "GET_DTC", "GET_PERMANENT_DTC", "WARMUPS_SINCE_DTC_CLEAR",
+         "TIME_SINCE_DTC_CLEARED"]
+
+
+class Cmd:
+    def __init__(self, name):
+        self.name = name
+
+
+class Resp:
+    def __init__(self, value):
+        self.value = value
+    def is_null(self):
+        return self.value is None
+
+
+class Status:
+    def __init__(self, mil, dtc_count):
+        self.mil, self.dtc_count = mil, dtc_count
+
+
+class SimCar:
+    def __init__(self):
+        self.t = 0.0
+    def supports(self, cmd):
+        return cmd.name in NAMES
+    def query(self, cmd, force=False):
+        m = int(self.t // 60) % 60                 # minute within the hour
+        code = 20 <= m < 50
+        if cmd.name == "STATUS":
+            return Resp(Status(30 <= m < 50, int(code)))
+        if cmd.name == "GET_DTC":
+            return Resp([("P0301", "Cylinder 1 misfire")] if code else [])
+        if cmd.name.endswith("_DTC"):
+            return Resp([])
+        if cmd.name == "TIME_SINCE_DTC_CLEARED":
+            return Resp(m - 50 if m >= 50 else m + 600)
+        return Resp(3)
+
+
+def run(heartbeat_s: float, journal: bool, args, out_dir: Path) -> dict:
+    car = SimCar()
+    module = types.SimpleNamespace(commands=types.SimpleNamespace(**{n: Cmd(n) for n in NAMES}))
+    dtc = DTCLogger(car, module, out_dir=out_dir, enable_freeze=False, heartbeat_s=heartbeat_s,
+                    journal=journal, clock=lambda: car.t)
+    fsyncs = [0]
+    real_fsync = os.fsync
+    def counting_fsync(fd):
+        fsyncs[0] += 1
+        real_fsync(fd)
+    os.fsync = counting_fsync
+    try:
+        for k in range(int(args.hours * 3600)):
+            car.t = float(k)
+            dtc.poll_once()
+        dtc.close()
+    finally:
+        os.fsync = real_fsync
+    size = sum(p.stat().st_size for p in out_dir.iterdir())
+    return {"rows": dtc.snapshot_rows + dtc.event_rows, "fsyncs": fsyncs[0], "bytes": size}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--hours", type=float, default=1.0)
+    args = ap.parse_args(argv)
+
+    print(f"{args.hours:g} h of 1 s DTC snapshot cycles (simulated clock), per hour:")
+    print(f"{'layout':<36} {'rows':>6} {'fsyncs':>7} {'KB':>8}")
+    modes = [("row every cycle (--dtc-heartbeat-s 0)", 0.0, False),
+             ("change-only, 60 s heartbeat", 60.0, False),
+             ("change-only, journal", 60.0, True)]
+    with tempfile.TemporaryDirectory(prefix="bench_dtc_writes_") as tmp:
+        for k, (label, hb, jr) in enumerate(modes):
+            out = Path(tmp) / str(k)
+            r = run(hb, jr, args, out)
+            print(f"{label:<36} {r['rows'] / args.hours:>6.0f} {r['fsyncs'] / args.hours:>7.0f} "
+                  f"{r['bytes'] / 1024 / args.hours:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
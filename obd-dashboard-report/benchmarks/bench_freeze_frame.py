@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Freeze-frame capture on a slow adapter: inline read of every mirrored DTC_ PID vs the
+bitmap-bounded background capture.
+
+A simulated ECU answers --pids live PIDs, supports --mirrored Mode 01 PIDs (so python-OBD marks
+that many DTC_ commands as supported) and stores --stored of them in its freeze frame (Mode 02
+PID 00 bitmap). A new confirmed code appears after 2 s. Each mode runs the logger's loop shape
+(DeadlinePacer, live PIDs, DTC work, wait) for --seconds, then reports the longest gap between
+live rows, the capture time and the values written. "inline" is the previous behaviour: a
+blocking poll_once() every second reading every DTC_ PID python-OBD marks supported.
+
+    python benchmarks/bench_freeze_frame.py --query-ms 60 --mirrored 40 --stored 12
+"""
+from __future__ import annotations
+import argparse, sys, tempfile, time, types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from obdtools.logger.dtc import DTCLogger  # noqa: E402
+from obdtools.logger.pacing import DeadlinePacer  # noqa: E402
+
+SNAPSHOT = ["GET_CURRENT_DTC", "GET_DTC", "GET_PERMANENT_DTC", "STATUS", "FREEZE_DTC"]
+
+
+class Cmd:
+    def __init__(self, name, pid=None):
+        self.name, self.pid = name, pid
+
+
+class Resp:
+    def __init__(self, value):
+        self.value = value
+        self.messages = []
+    def is_null(self):
+        return self.value is None
+
+
+class Status:
+    def __init__(self, mil, dtc_count):
+        self.mil, self.dtc_count = mil, dtc_count
+
+
+class SlowEcu:
+    def __init__(self, query_s: float, mirrored: int, stored: int, bitmap: bool):
+        self.query_s, self.bitmap = query_s, bitmap
+        self.mirrored = {f"DTC_PID_{p:02X}" for p in range(3, 3 + mirrored)}
+        self.stored = set(range(3, 3 + stored))
+        self.fault_at = time.monotonic() + 2.0
+    def supports(self, cmd):
+        return cmd.name in SNAPSHOT or cmd.name in self.mirrored
+    def query(self, cmd, force=False):
+        time.sleep(self.query_s)
+        fault = time.monotonic() >= self.fault_at
+        if cmd.name == "DTC_PIDS_A":
+            if not self.bitmap:
+                return Resp(None)
+            bits = sum(1 << (32 - p) for p in self.stored)
+            r = Resp(None)
+            r.messages = [types.SimpleNamespace(data=bytearray([0x42, 0, 0]) + bits.to_bytes(4, "big"))]
+            return r
+        if cmd.name == "STATUS":
+            return Resp(Status(fault, int(fault)))
+        if cmd.name == "GET_DTC":
+            return Resp([("P0301", "Cylinder 1 misfire")] if fault else [])
+        if cmd.name == "FREEZE_DTC":
+            return Resp(("P0301", "Cylinder 1 misfire") if fault else None)
+        if cmd.name.endswith("_DTC"):
+            return Resp([])
+        return Resp(1.0 if force or cmd.pid in self.stored else None)
+
+
+def run(mode: str, args, out_dir: str) -> dict:
+    conn = SlowEcu(args.query_ms / 1000.0, args.mirrored, args.stored, bitmap=mode != "inline")
+    names = {n: Cmd(n) for n in SNAPSHOT}
+    names["DTC_PIDS_A"] = Cmd("DTC_PIDS_A", 0)
+    names.update({f"DTC_PID_{p:02X}": Cmd(f"DTC_PID_{p:02X}", p) for p in range(3, 3 + max(args.mirrored, args.stored))})
+    dtc = DTCLogger(conn, types.SimpleNamespace(commands=types.SimpleNamespace(**names)),
+                    out_dir=Path(out_dir), prefix=mode)
+    live = [Cmd(f"PID_{k}") for k in range(args.pids)]
+    pacer = DeadlinePacer(args.interval)
+    gap_max, last_row, last_poll = 0.0, None, 0.0
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        pacer.tick()
+        for cmd in live:
+            conn.query(cmd)
+        now = time.monotonic()
+        if last_row is not None:
+            gap_max = max(gap_max, now - last_row)
+        last_row = now
+        if mode == "inline":
+            if now - last_poll >= 1.0:
+                dtc.poll_once()
+                last_poll = now
+        else:
+            dtc.step()
+        pacer.wait()
+    s = dtc.stats()
+    dtc.close()
+    return {"gap_ms": gap_max * 1000, "overruns": pacer.overruns, "capture_s": s["freeze_longest_s"],
+            "queries": s["queries_by_pid"].get("freeze", 0), "values": s["freeze_rows"]}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--pids", type=int, default=4)
+    ap.add_argument("--query-ms", type=float, default=60.0, help="Adapter round-trip per query")
+    ap.add_argument("--interval", type=float, default=0.5)
+    ap.add_argument("--mirrored", type=int, default=40, help="DTC_ PIDs python-OBD marks supported")
+    ap.add_argument("--stored", type=int, default=12, help="PIDs in the ECU's freeze frame")
+    ap.add_argument("--seconds", type=float, default=20.0, help="Duration of each mode")
+    args = ap.parse_args(argv)
+
+    print(f"{args.pids} live PIDs, {args.query_ms:g} ms per query, interval {args.interval:g} s, "
+          f"{args.mirrored} mirrored / {args.stored} stored freeze-frame PIDs, fault at 2 s")
+    print(f"{'mode':<28} {'max gap ms':>11} {'overruns':>9} {'capture s':>10} {'queries':>8} {'values':>7}")
+    with tempfile.TemporaryDirectory(prefix="bench_freeze_") as out_dir:
+        for mode in ("inline", "step"):
+            r = run(mode, args, out_dir)
+            label = {"inline": "inline, every mirrored PID", "step": "step, Mode 02 bitmap"}[mode]
+            print(f"{label:<28} {r['gap_ms']:>11.0f} {r['overruns']:>9} {r['capture_s']:>10.1f} "
+                  f"{r['queries']:>8} {r['values']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
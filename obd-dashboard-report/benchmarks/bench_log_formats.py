@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Log formats: file size, write CPU and report load time of CSV vs columnar logs.
+
+Writes the same synthetic drive (--rows rows of --pids PIDs) the way the logger does:
+CSV rows with timestamp_iso/date/time and rounded cells, or epoch-ns + float32 chunks
+(npz-chunks, and arrow when pyarrow is installed). Then loads each file with load_log,
+as `obdtools html` does.
+
+    python benchmarks/bench_log_formats.py --rows 36000 --pids 30   # 1 h at 10 Hz
+"""
+from __future__ import annotations
+import argparse, datetime as dt, math, os, shutil, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from obdtools.csvio.columnar import ARROW_AVAILABLE, EXTENSIONS, open_columnar_log  # noqa: E402
+from obdtools.csvio.readers import load_log  # noqa: E402
+from obdtools.logger.core import number_cell, open_csv_with_header  # noqa: E402
+
+
+def synth(rows: int, pids: int):
+    t0 = time.time_ns()
+    for i in range(rows):
+        yield t0 + i * 100_000_000, [800 + 50 * math.sin(i / 50 + k) + k * 3.3 for k in range(pids)]
+
+
+def size_of(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(p.stat().st_size for p in Path(path).iterdir())
+    return os.path.getsize(path)
+
+
+def write(fmt: str, path: str, rows: int, pids: int, chunk_rows: int) -> float:
+    names = [f"PID_{k:02d}" for k in range(pids)]
+    units = {n: "unit" for n in names}
+    c0 = time.process_time()
+    if fmt == "csv":
+        f, w = open_csv_with_header(path, ["timestamp_iso", "date", "time"] + names, ["", "", ""] + ["unit"] * pids)
+        for ts, values in synth(rows, pids):
+            now = dt.datetime.fromtimestamp(ts / 1e9)
+            w.writerow([now.isoformat(sep=' '), now.date().isoformat(), now.strftime("%H:%M:%S")]
+                       + [number_cell(v) for v in values])
+        f.close()
+    else:
+        w = open_columnar_log(fmt, path, names, units, {}, chunk_rows=chunk_rows)
+        for ts, values in synth(rows, pids):
+            w.writerow([ts] + values)
+        w.close()
+    return time.process_time() - c0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=36000)
+    ap.add_argument("--pids", type=int, default=30)
+    ap.add_argument("--chunk-rows", type=int, default=4096)
+    ap.add_argument("--dir", default=None, help="Where to write (default: a temp dir)")
+    args = ap.parse_args(argv)
+
+    formats = ["csv", "npz-chunks"] + (["arrow"] if ARROW_AVAILABLE else [])
+    if not ARROW_AVAILABLE:
+        print("[!] pyarrow not installed: skipping arrow")
+    root = tempfile.mkdtemp(prefix="bench_formats_", dir=args.dir)
+    print(f"{args.rows} rows x {args.pids} PIDs")
+    print(f"{'format':<11} {'size MB':>8} {'B/row':>7} {'write CPU s':>12} {'us/row':>7} {'load s':>7}")
+    try:
+        for fmt in formats:
+            path = os.path.join(root, "log" + EXTENSIONS.get(fmt, ".csv"))
+            cpu = write(fmt, path, args.rows, args.pids, args.chunk_rows)
+            t = time.perf_counter()
+            df, _units = load_log(path)
+            load = time.perf_counter() - t
+            assert len(df) == args.rows
+            size = size_of(path)
+            print(f"{fmt:<11} {size / 1e6:>8.2f} {size / args.rows:>7.0f} {cpu:>12.3f} "
+                  f"{cpu / args.rows * 1e6:>7.1f} {load:>7.3f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Sampling jitter of the logger loop: inline fsync per row vs the background writer.
+
+A synthetic loop ticks every --interval, spends --query-ms "talking to the ECU",
+then writes a 30-column row. Lateness of each tick against its deadline is the
+jitter the logger would see. Run it on tmpfs and on the real log filesystem:
+
+    python benchmarks/bench_logger_writer.py --dir /dev/shm /home/pi/logs --rows 1000
+"""
+from __future__ import annotations
+import argparse, csv, os, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from obdtools.logger.core import safe_fsync  # noqa: E402
+from obdtools.logger.writer import BackgroundWriter, CommitPolicy  # noqa: E402
+
+
+def pct(values, p):
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))] if s else float("nan")
+
+
+def run(mode: str, directory: str, rows: int, interval: float, query_ms: float) -> dict:
+    fd, path = tempfile.mkstemp(prefix="bench_", suffix=".csv", dir=directory)
+    os.close(fd)
+    f = open(path, "w", newline="", encoding="utf-8")
+    w = csv.writer(f, delimiter=";")
+    bg = BackgroundWriter(f, w, CommitPolicy(every_ms=1000)) if mode == "background" else None
+    late, write_s = [], []
+    next_t = time.monotonic()
+    try:
+        for i in range(rows):
+            now = time.monotonic()
+            late.append((now - next_t) * 1000)
+            time.sleep(query_ms / 1000)
+            row = [time.time(), i] + [i * 0.5 + k for k in range(28)]
+            t = time.perf_counter()
+            if bg is not None:
+                bg.put(row)
+            else:
+                w.writerow(row); safe_fsync(f)
+            write_s.append((time.perf_counter() - t) * 1000)
+            next_t += interval
+            time.sleep(max(0.0, next_t - time.monotonic()))
+    finally:
+        if bg is not None:
+            bg.close()
+        else:
+            f.close()
+        os.unlink(path)
+    return {"late": late, "write": write_s}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--dir", nargs="+", default=["/dev/shm", tempfile.gettempdir()], help="Directories to write in")
+    ap.add_argument("--rows", type=int, default=500)
+    ap.add_argument("--interval", type=float, default=0.02, help="Loop period in seconds")
+    ap.add_argument("--query-ms", type=float, default=5.0, help="Simulated ECU time per tick")
+    args = ap.parse_args(argv)
+
+    print(f"{'directory':<24} {'mode':<11} {'write p50':>10} {'write p99':>10} {'late p50':>9} {'late p99':>9} {'late max':>9}  (ms)")
+    for d in args.dir:
+        if not os.path.isdir(d):
+            print(f"[!] skipping {d}: not a directory"); continue
+        for mode in ("inline", "background"):
+            r = run(mode, d, args.rows, args.interval, args.query_ms)
+            print(f"{d:<24} {mode:<11} {pct(r['write'], 50):>10.3f} {pct(r['write'], 99):>10.3f} "
+                  f"{pct(r['late'], 50):>9.3f} {pct(r['late'], 99):>9.3f} {max(r['late']):>9.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""ODS checkpoint cost: odfpy (append to a DOM, save() the whole document) vs the streaming writer.
+
+Writes --rows rows of --pids PIDs and checkpoints every --save-every rows, the way
+`obdtools log --ods` does. Checkpoint times are reported per history bucket so growth
+with file size is visible. odfpy re-serializes everything on each save, so it is only
+run up to --odfpy-rows and timed at a few checkpoints; the streaming writer does all rows.
+
+    python benchmarks/bench_ods_writer.py --rows 100000 --pids 30 --save-every 5
+    python benchmarks/bench_ods_writer.py --rows 2000 --odfpy-rows 0 --verify
+"""
+from __future__ import annotations
+import argparse, math, os, shutil, statistics, sys, tempfile, time, zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from obdtools.logger.ods_stream import OdsStreamWriter  # noqa: E402
+
+try:
+    from odf.opendocument import OpenDocumentSpreadsheet
+    from odf.table import Table, TableCell, TableRow
+    from odf.text import P
+    ODF_AVAILABLE = True
+except Exception:
+    ODF_AVAILABLE = False
+
+
+def synth_row(i: int, pids: int) -> list:
+    return [f"2025-10-05 10:{(i // 60) % 60:02d}:{i % 60:02d}"] + \
+           [round(800 + 50 * math.sin(i / 50 + k) + k * 3.3, 2) for k in range(pids)]
+
+
+def header(pids: int):
+    names = [f"PID_{k:02d}" for k in range(pids)]
+    return ["timestamp_iso"] + names, [""] + ["unit"] * pids
+
+
+def report(name: str, times: dict) -> None:
+    """times: {history_rows_bucket: [checkpoint seconds]}"""
+    for bucket in sorted(times):
+        ts = times[bucket]
+        print(f"{name:<9} {bucket:>9} {len(ts):>6} {statistics.median(ts) * 1e3:>9.2f} {max(ts) * 1e3:>9.2f}")
+
+
+def _odf_row(values) -> "TableRow":
+    """The DOM row the logger built before the streaming writer (one TableCell per value)."""
+    tr = TableRow()
+    for val in values:
+        if val is None or val == "":
+            tr.addElement(TableCell())
+        elif isinstance(val, (int, float)) and not isinstance(val, bool):
+            tr.addElement(TableCell(valuetype="float", value=str(val)))
+        else:
+            cell = TableCell(valuetype="string"); cell.addElement(P(text=str(val))); tr.addElement(cell)
+    return tr
+
+
+def bench_stream(path: str, rows: int, pids: int, every: int, buckets: int):
+    hdr, units = header(pids)
+    times: dict = {}
+    c0 = time.process_time()
+    w = OdsStreamWriter(path, hdr, units)
+    for i in range(rows):
+        w.writerow(synth_row(i, pids))
+        if (i + 1) % every == 0:
+            t = time.perf_counter()
+            w.flush()
+            times.setdefault((i * buckets // rows + 1) * rows // buckets, []).append(time.perf_counter() - t)
+    w.close()
+    return time.process_time() - c0, times
+
+
+def bench_odfpy(path: str, rows: int, pids: int, every: int, samples: int):
+    hdr, units = header(pids)
+    doc, table = OpenDocumentSpreadsheet(), Table(name="OBD")
+    table.addElement(_odf_row(hdr)); table.addElement(_odf_row(units))
+    doc.spreadsheet.addElement(table)
+    doc.save(path)
+    times: dict = {}
+    marks = {max(every, rows * k // samples // every * every) for k in range(1, samples + 1)}
+    append_s = 0.0
+    for i in range(rows):
+        t = time.perf_counter()
+        table.addElement(_odf_row(synth_row(i, pids)))
+        append_s += time.perf_counter() - t
+        if i + 1 in marks:
+            t = time.perf_counter()
+            doc.save(path)
+            times[i + 1] = [time.perf_counter() - t]
+    return append_s, times
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--pids", type=int, default=30)
+    ap.add_argument("--save-every", type=int, default=5, help="Checkpoint every N rows (--ods-save-every)")
+    ap.add_argument("--odfpy-rows", type=int, default=10_000, help="Rows for the odfpy baseline (0 = skip)")
+    ap.add_argument("--verify", action="store_true", help="Read the result back with pandas/odfpy (slow)")
+    ap.add_argument("--dir", default=None, help="Where to write (default: a temp dir)")
+    args = ap.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="bench_ods_", dir=args.dir)
+    print(f"{args.rows} rows x {args.pids} PIDs, checkpoint every {args.save_every} rows")
+    try:
+        if args.odfpy_rows and not ODF_AVAILABLE:
+            print("[!] odfpy not installed: skipping the baseline")
+        elif args.odfpy_rows:
+            path = os.path.join(root, "odfpy.ods")
+            append_s, times = bench_odfpy(path, args.odfpy_rows, args.pids, args.save_every, 5)
+            print(f"\nodfpy: {append_s / args.odfpy_rows * 1e6:.0f} us/row to append; save() at history:")
+            print(f"{'writer':<9} {'rows':>9} {'n':>6} {'p50 ms':>9} {'max ms':>9}")
+            report("odfpy", times)
+            per_row = max(t[0] / n for n, t in times.items())
+            est = per_row * args.rows * args.rows / args.save_every / 2
+            print(f"odfpy estimate for {args.rows} rows: ~{est / 3600:.1f} h spent in save()")
+
+        path = os.path.join(root, "stream.ods")
+        cpu, times = bench_stream(path, args.rows, args.pids, args.save_every, 5)
+        print(f"\nstream: {cpu:.2f} s CPU total ({cpu / args.rows * 1e6:.0f} us/row incl. checkpoints), "
+              f"{os.path.getsize(path) / 1e6:.2f} MB")
+        print(f"{'writer':<9} {'rows <=':>9} {'n':>6} {'p50 ms':>9} {'max ms':>9}")
+        report("stream", times)
+        with zipfile.ZipFile(path) as z:
+            assert z.testzip() is None
+        if args.verify and ODF_AVAILABLE:
+            import pandas as pd
+            t = time.perf_counter()
+            n = len(pd.read_excel(path, engine="odf"))
+            print(f"read back with pandas/odf: {n - 1} data rows in {time.perf_counter() - t:.1f} s")
+            assert n - 1 == args.rows
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Following a fast obd-dashboard-server stream: rows handed to the writer thread per message
+vs in batches.
+
+A server process streams --samples sample messages of --pids PIDs (same shape as
+obd-dashboard-server's, with `seq`) as fast as the socket takes them, or at --rate per second.
+The logger (`run_ws_logger`) follows it into a CSV in /tmp; reported are the samples per
+second it keeps up with, the CPU per sample of the receive loop (the thread that has to keep
+up, or the server drops superseded samples) and of the whole logger process (plus the writer
+thread), and the writer queue items. Medians of --repeat runs.
+
+    python benchmarks/bench_ws_source.py --samples 20000 --pids 30
+"""
+from __future__ import annotations
+import argparse, asyncio, contextlib, io, json, multiprocessing as mp, statistics, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from obdtools.logger.wsource import run_ws_logger  # noqa: E402
+
+
+def serve(port: int, samples: int, pids: int, rate: float, ready) -> None:
+    import websockets
+
+    async def handler(ws, *_):
+        period = 1.0 / rate if rate > 0 else 0.0
+        t0 = time.monotonic()
+        for seq in range(1, samples + 1):
+            values = {f"PID_{k:02d}": round(1000.0 + seq * 0.1 + k, 3) for k in range(pids)}
+            await ws.send(json.dumps({"timestamp": "2025-10-05T10:00:00.000", "seq": seq, "pids": values}))
+            if period:
+                await asyncio.sleep(max(0.0, t0 + seq * period - time.monotonic()))
+        await ws.wait_closed()
+
+    async def main():
+        async with websockets.serve(handler, "127.0.0.1", port):
+            ready.set()
+            await asyncio.sleep(3600)
+
+    asyncio.run(main())
+
+
+def run(batch_ms: float, port: int, args, out_dir: str) -> dict:
+    ready = mp.Event()
+    proc = mp.Process(target=serve, args=(port, args.samples, args.pids, args.rate, ready), daemon=True)
+    proc.start()
+    ready.wait(10)
+    cpu, loop_cpu, wall = time.process_time(), time.thread_time(), time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        last = run_ws_logger(source=f"ws://127.0.0.1:{port}", out_base=f"{out_dir}/b{batch_ms:g}",
+                             batch_ms=batch_ms, max_rows=args.samples)
+    cpu, loop_cpu, wall = time.process_time() - cpu, time.thread_time() - loop_cpu, time.perf_counter() - wall
+    proc.terminate()
+    proc.join()
+    stats = json.loads(Path(last).with_name(Path(last).stem + ".stats.json").read_text())
+    return {"rate": args.samples / wall, "cpu_us": cpu / args.samples * 1e6,
+            "loop_us": loop_cpu / args.samples * 1e6, "items": stats["batches"], "missed": stats["missed_samples"]}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--samples", type=int, default=20000)
+    ap.add_argument("--pids", type=int, default=30)
+    ap.add_argument("--rate", type=float, default=0.0, help="Samples per second sent (0 = as fast as possible)")
+    ap.add_argument("--batch-ms", type=float, nargs="+", default=[0.0, 50.0, 200.0])
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per setting (medians are reported)")
+    args = ap.parse_args(argv)
+
+    print(f"{args.samples} samples of {args.pids} PIDs, " + (f"{args.rate:g}/s" if args.rate else "unthrottled"))
+    print(f"{'--batch-ms':>10} {'samples/s':>10} {'loop CPU us':>12} {'total CPU us':>13} {'queue items':>12} {'missed':>7}")
+    port = 8790
+    with tempfile.TemporaryDirectory(prefix="bench_ws_") as out_dir:
+        for b in args.batch_ms:
+            runs = []
+            for _ in range(args.repeat):
+                runs.append(run(b, port, args, out_dir))
+                port += 1
+            r = {k: statistics.median(x[k] for x in runs) for k in runs[0]}
+            print(f"{b:>10g} {r['rate']:>10.0f} {r['loop_us']:>12.1f} {r['cpu_us']:>13.1f} {r['items']:>12.0f} {r['missed']:>7.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,13 +3,16 @@ import argparse, os
 from .report.html_report import build_html_from_csv
 from .report.calc_export import csv_to_ods
 from .logger.cli_adapter import main as logger_main
+from .ingest.server import run_ingest
+from .csvio.compressed import strip_compression_ext
+from .csvio.columnar import is_columnar_log
 
 def main(argv=None):
     ap = argparse.ArgumentParser(prog="obdtools", description="OBD CSV tools")
     sub = ap.add_subparsers(dest="cmd", required=True)
 
     ap_html = sub.add_parser("html", help="Generate an offline HTML report from CSV")
-    ap_html.add_argument("--in", dest="inp", required=True, help="Input CSV file (semicolon separator)")
+    ap_html.add_argument("--in", dest="inp", required=True, help="Input CSV file (semicolon separator; .gz/.zst ok), columnar log (.arrow/.npzc) or ingest partition directory")
     ap_html.add_argument("--out", dest="out", default=None, help="Output HTML file (default: outputs/html/<input>_report.html)")
     ap_html.add_argument("--pids", default="", help="Comma-separated PIDs to include")
     ap_html.add_argument("--exclude", default="", help="Comma-separated PIDs to exclude")
@@ -18,6 +21,7 @@ def main(argv=None):
     ap_html.add_argument("--corr-top", type=int, default=12, help="PIDs in heatmap (by availability)")
     ap_html.add_argument("--title", default="OBD Report", help="Page title")
     ap_html.add_argument("--template", default=None, help="Custom HTML template path (optional)")
+    ap_html.add_argument("--profile", default=None, help="Profile sidecar from 'log --profile' (default: <input>.profile.json if present)")
 
     ap_calc = sub.add_parser("calc", help="Convert CSV to ODS (Calc)")
     ap_calc.add_argument("--in", dest="inp", required=True, help="Input CSV")
@@ -26,21 +30,30 @@ def main(argv=None):
     ap_log = sub.add_parser("log", help="Run the OBD logger (CSV; optional ODS + HTML)")
     ap_log.add_argument("logger_args", nargs=argparse.REMAINDER, help="Pass-through to logger args (use after --)")
 
+    ap_ing = sub.add_parser("ingest", help="Collect uplinked batches from vehicles into a vehicle/day store")
+    ap_ing.add_argument("--host", default="0.0.0.0", help="Bind address (default: 0.0.0.0)")
+    ap_ing.add_argument("--port", type=int, default=8780, help="HTTP port (default: 8780)")
+    ap_ing.add_argument("--store", default=os.path.join("outputs", "fleet"), help="Store root (partitions: <vehicle>/<YYYY-MM-DD>)")
+    ap_ing.add_argument("--stats-every", type=float, default=10.0, help="Print ingest rates every N seconds (0=off)")
+
     args = ap.parse_args(argv)
 
     if args.cmd == "html":
         pids = [x.strip() for x in args.pids.split(',') if x.strip()] or None
         exclude = [x.strip() for x in args.exclude.split(',') if x.strip()] or None
-        out = args.out or (os.path.join("outputs", "html", os.path.basename(args.inp).rsplit('.',1)[0] + "_report.html"))
+        src_name = os.path.basename(strip_compression_ext(os.path.normpath(args.inp)))
+        if os.path.isdir(args.inp) and not is_columnar_log(args.inp):  # vehicle/day partition -> <vehicle>_<day>
+            src_name = os.path.basename(os.path.dirname(os.path.normpath(args.inp))) + "_" + src_name
+        out = args.out or (os.path.join("outputs", "html", src_name.rsplit('.',1)[0] + "_report.html"))
         os.makedirs(os.path.dirname(out), exist_ok=True)
         build_html_from_csv(args.inp, out_path=out, title=args.title, pids=pids, exclude=exclude,
                             rolling_sec=args.rolling_sec, max_points=args.max_points, corr_top=args.corr_top,
-                            template_path=args.template)
+                            template_path=args.template, profile_path=args.profile)
         print(f"[ok] HTML written: {out}")
         return 0
 
     if args.cmd == "calc":
-        out = args.out or (os.path.join("outputs", "calc", os.path.basename(args.inp).rsplit('.',1)[0] + ".ods"))
+        out = args.out or (os.path.join("outputs", "calc", os.path.basename(strip_compression_ext(args.inp)).rsplit('.',1)[0] + ".ods"))
         os.makedirs(os.path.dirname(out), exist_ok=True)
         csv_to_ods(args.inp, out)
         print(f"[ok] ODS written: {out}")
@@ -48,7 +61,12 @@ def main(argv=None):
 
     if args.cmd == "log":
         rest = args.logger_args or []
+        if rest[:1] == ["--"]:
+            rest = rest[1:]
         return logger_main(rest)
 
+    if args.cmd == "ingest":
+        return run_ingest(args.host, args.port, args.store, args.stats_every)
+
 if __name__ == "__main__":
     raise SystemExit(main())
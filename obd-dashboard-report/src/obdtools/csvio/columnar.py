@@ -0,0 +1,243 @@
+from __future__ import annotations
+import json, math, os, struct, time, zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    "ARROW_AVAILABLE",
+    "FORMATS",
+    "ArrowLogWriter",
+    "NpzChunkWriter",
+    "is_columnar_log",
+    "load_columnar_log",
+    "open_columnar_log",
+    "to_float",
+]
+
+# Columnar logs: int64 epoch-ns timestamps + one float32 column per PID, written in chunks.
+#   .arrow  Arrow IPC *stream*: schema metadata holds the header, one record batch per chunk.
+#           A crash leaves a readable file (the reader stops at the truncated batch).
+#   .npzc/  directory: header.json + chunk_NNNNNN.npz (uncompressed: timestamp_ns, values[pid, row]).
+#           Each chunk is written to a temp name, fsynced and renamed, so chunks are all-or-nothing.
+FORMATS = ("csv", "arrow", "npz-chunks")
+EXTENSIONS = {"arrow": ".arrow", "npz-chunks": ".npzc"}
+MAGIC = "obdtools-columnar"
+VERSION = 1
+HEADER_FILE = "header.json"
+TS_COLUMN = "timestamp_ns"
+DEFAULT_CHUNK_ROWS = 4096
+DEFAULT_CHUNK_S = 60.0     # a partial chunk is written on the next commit once it is this old
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    ARROW_AVAILABLE = True
+except Exception:
+    pa = None
+    ARROW_AVAILABLE = False
+
+
+def to_float(value: Any) -> float:
+    """python-OBD value (Quantity, number, None, text) -> float, NaN when not numeric."""
+    if value is None:
+        return math.nan
+    try:
+        return float(getattr(value, "magnitude", value))
+    except Exception:
+        return math.nan
+
+
+class _ChunkBuffer:
+    """Preallocated chunk: rows are [ts_ns, v0, v1, ...]; `_emit` writes and resets it."""
+
+    def __init__(self, path: str, columns: Sequence[str], units: Dict[str, str], meta: Dict[str, Any],
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS, chunk_s: float = DEFAULT_CHUNK_S):
+        self.name = path
+        self.columns = list(columns)
+        self.header = {"format": MAGIC, "version": VERSION, "columns": self.columns,
+                       "units": {c: units.get(c, "") for c in self.columns}, "meta": dict(meta)}
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.chunk_s = float(chunk_s)
+        self._ts = np.empty(self.chunk_rows, dtype=np.int64)
+        self._vals = np.empty((len(self.columns), self.chunk_rows), dtype=np.float32)
+        self._n = 0
+        self._since = 0.0
+        self.chunks = self.rows = self.bytes_written = 0
+
+    def writerow(self, row: Sequence[Any]) -> None:
+        if not self._n:
+            self._since = time.monotonic()
+        self._ts[self._n] = row[0]
+        self._vals[:, self._n] = row[1:]
+        self._n += 1
+        self.rows += 1
+        if self._n >= self.chunk_rows:
+            self._flush_chunk()
+
+    def flush(self) -> None:
+        """Called before each fsync by the writer thread: cut the chunk once it is old enough."""
+        if self._n and time.monotonic() - self._since >= self.chunk_s:
+            self._flush_chunk()
+
+    def _flush_chunk(self) -> None:
+        self._emit(self._ts[:self._n], self._vals[:, :self._n])
+        self.chunks += 1
+        self._n = 0
+
+    def close(self) -> None:
+        if self._n:
+            self._flush_chunk()
+
+    def _emit(self, ts: np.ndarray, vals: np.ndarray) -> None:
+        raise NotImplementedError
+
+
+class NpzChunkWriter(_ChunkBuffer):
+    """Directory of uncompressed .npz chunks plus header.json."""
+
+    def __init__(self, path: str, columns: Sequence[str], units: Dict[str, str], meta: Dict[str, Any], **kw):
+        super().__init__(path, columns, units, meta, **kw)
+        os.makedirs(path, exist_ok=True)
+        self._atomic(HEADER_FILE, lambda f: f.write(json.dumps(self.header, indent=2).encode("utf-8")))
+
+    def _atomic(self, name: str, write) -> None:
+        final = os.path.join(self.name, name)
+        tmp = final + ".tmp"
+        with open(tmp, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, final)
+        self.bytes_written += os.path.getsize(final)
+
+    def _emit(self, ts, vals) -> None:
+        self._atomic(f"chunk_{self.chunks:06d}.npz",
+                     lambda f: np.savez(f, **{TS_COLUMN: ts, "values": np.ascontiguousarray(vals)}))
+
+    def fileno(self) -> int:
+        raise OSError("chunks are fsynced when written")
+
+
+class ArrowLogWriter(_ChunkBuffer):
+    """Arrow IPC stream; PID units in field metadata, the header in schema metadata."""
+
+    def __init__(self, path: str, columns: Sequence[str], units: Dict[str, str], meta: Dict[str, Any], **kw):
+        if not ARROW_AVAILABLE:
+            raise RuntimeError("pyarrow not available; install it (pip install pyarrow) or use --format npz-chunks")
+        super().__init__(path, columns, units, meta, **kw)
+        fields = [pa.field(TS_COLUMN, pa.int64())]
+        fields += [pa.field(c, pa.float32(), metadata={"unit": self.header["units"][c]}) for c in self.columns]
+        self.schema = pa.schema(fields, metadata={MAGIC: json.dumps(self.header)})
+        self._f = open(path, "wb")
+        self._w = pa.ipc.new_stream(self._f, self.schema)
+
+    def _emit(self, ts, vals) -> None:
+        arrays = [pa.array(ts)] + [pa.array(vals[j]) for j in range(len(self.columns))]
+        self._w.write_batch(pa.record_batch(arrays, schema=self.schema))
+
+    def flush(self) -> None:
+        super().flush()
+        self._f.flush()
+
+    def fileno(self) -> int:
+        return self._f.fileno()
+
+    def close(self) -> None:
+        super().close()
+        self._w.close()
+        self._f.close()
+
+
+def open_columnar_log(fmt: str, path: str, columns: Sequence[str], units: Dict[str, str],
+                      meta: Dict[str, Any], **kw) -> _ChunkBuffer:
+    if fmt == "arrow":
+        return ArrowLogWriter(path, columns, units, meta, **kw)
+    if fmt == "npz-chunks":
+        return NpzChunkWriter(path, columns, units, meta, **kw)
+    raise ValueError(f"Unknown columnar format '{fmt}'")
+
+
+# ------------ readers ------------
+
+def is_columnar_log(path: str | os.PathLike) -> bool:
+    p = Path(path)
+    return (p.is_dir() and (p / HEADER_FILE).is_file()) or (p.is_file() and p.suffix.lower() == ".arrow")
+
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")   # zip local file header (30 bytes)
+
+def _npz_members(path: Path) -> Dict[str, np.ndarray]:
+    """Arrays of an .npz; stored (uncompressed) members are memory-mapped, not read."""
+    out: Dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(path) as z, open(path, "rb") as f:
+        for info in z.infolist():
+            key = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                out[key] = np.load(z.open(info))
+                continue
+            f.seek(info.header_offset)
+            fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+            f.seek(info.header_offset + _LOCAL_HEADER.size + fields[-2] + fields[-1])
+            major, _minor = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if major == 1 else np.lib.format.read_array_header_2_0
+            shape, fortran, dtype = read_header(f)
+            out[key] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                 order="F" if fortran else "C")
+    return out
+
+
+def _load_npz_chunks(path: Path):
+    header = json.loads((path / HEADER_FILE).read_text(encoding="utf-8"))
+    ts_parts: List[np.ndarray] = []
+    val_parts: List[np.ndarray] = []
+    for chunk in sorted(path.glob("chunk_*.npz")):
+        m = _npz_members(chunk)
+        ts_parts.append(m[TS_COLUMN]); val_parts.append(m["values"])
+    ncols = len(header["columns"])
+    if not ts_parts:
+        return header, np.empty(0, np.int64), np.empty((ncols, 0), np.float32)
+    if len(ts_parts) == 1:
+        return header, ts_parts[0], val_parts[0]
+    return header, np.concatenate(ts_parts), np.concatenate(val_parts, axis=1)
+
+
+def _load_arrow(path: Path):
+    if not ARROW_AVAILABLE:
+        raise RuntimeError(f"{path} is an Arrow log; install pyarrow to read it")
+    source = pa.memory_map(str(path), "r")
+    reader = pa.ipc.open_stream(source)
+    header = json.loads(reader.schema.metadata[MAGIC.encode()])
+    batches = []
+    try:
+        for batch in reader:
+            batches.append(batch)
+    except (pa.ArrowInvalid, OSError):
+        pass   # truncated last batch (logger killed mid-write): keep what is complete
+    table = pa.Table.from_batches(batches, schema=reader.schema)
+    ts = table.column(TS_COLUMN).to_numpy()
+    cols = [table.column(c).to_numpy() for c in header["columns"]]
+    return header, ts, cols
+
+
+def load_columnar_log(path: str | os.PathLike) -> tuple[pd.DataFrame, dict[str, str]]:
+    """Load an .arrow / .npzc log like load_csv_with_units: (df with _ts and PID columns, units_map)."""
+    p = Path(path)
+    header, ts, values = _load_arrow(p) if p.is_file() else _load_npz_chunks(p)
+    if header.get("format") != MAGIC:
+        raise ValueError(f"{path} is not an obdtools columnar log")
+    meta = header.get("meta", {})
+    data: Dict[str, Any] = {"timestamp_epoch_ms": ts / 1e6}
+    for j, name in enumerate(header["columns"]):
+        data[name] = values[j]
+    df = pd.DataFrame(data, copy=False)
+    # Timestamps are UTC; shift by the logger's UTC offset so times read like its CSV logs
+    local_ns = ts + int(meta.get("utc_offset_s", 0)) * 1_000_000_000
+    df["_ts"] = pd.to_datetime(local_ns, unit="ns")
+    if not df["_ts"].is_monotonic_increasing:
+        df = df.sort_values("_ts")
+    units = {c: u for c, u in header.get("units", {}).items() if u}
+    df.attrs["sparse"] = bool(meta.get("sparse"))
+    return df, units
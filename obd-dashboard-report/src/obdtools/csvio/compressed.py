@@ -0,0 +1,141 @@
+from __future__ import annotations
+import gzip, io, os, shutil, zlib
+from typing import IO, Optional
+
+__all__ = [
+    "COMPRESSIONS",
+    "ZSTD_AVAILABLE",
+    "compress_file",
+    "compression_of",
+    "open_text",
+    "open_text_writer",
+    "strip_compression_ext",
+]
+
+# Compressed logs are ordinary CSVs behind a .gz / .zst suffix.
+#   Streaming (written while logging): the compressor is flushed at every commit (gzip
+#   Z_SYNC_FLUSH, zstd block flush), so a crash leaves every committed row decodable.
+#   Closed segments: compressed to <name>.tmp, fsynced, renamed, then the CSV is removed.
+# Readers decode on the fly and stop quietly at a truncated tail.
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+_CHUNK = 1 << 16
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except Exception:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+
+def compression_of(path: str) -> Optional[str]:
+    low = str(path).lower()
+    for kind, ext in COMPRESSIONS.items():
+        if low.endswith(ext):
+            return kind
+    return None
+
+
+def strip_compression_ext(path: str) -> str:
+    kind = compression_of(path)
+    return str(path)[:-len(COMPRESSIONS[kind])] if kind else str(path)
+
+
+def _require(kind: str) -> None:
+    if kind not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{kind}' (expected one of {', '.join(COMPRESSIONS)})")
+    if kind == "zstd" and not ZSTD_AVAILABLE:
+        raise RuntimeError("zstandard not available; install it (pip install zstandard) or use gzip")
+
+
+# ------------ writing ------------
+
+def open_text_writer(path: str, kind: str, level: Optional[int] = None) -> IO[str]:
+    """Text file whose flush() pushes everything written so far to disk as decodable data."""
+    _require(kind)
+    if kind == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6 if level is None else level)
+    raw = open(path, "wb")
+    writer = zstandard.ZstdCompressor(level=3 if level is None else level).stream_writer(raw, closefd=True)
+    return io.TextIOWrapper(writer, encoding="utf-8", newline="")
+
+
+def compress_file(path: str, kind: str, remove: bool = True) -> str:
+    """Compress a closed file to path + ext atomically; returns the new path."""
+    _require(kind)
+    out = path + COMPRESSIONS[kind]
+    tmp = out + ".tmp"
+    with open(path, "rb") as src, open(tmp, "wb") as raw:
+        if kind == "gzip":
+            with gzip.GzipFile(filename=os.path.basename(path), mode="wb", fileobj=raw, compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, _CHUNK)
+        else:
+            zstandard.ZstdCompressor(level=3).copy_stream(src, raw)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, out)
+    if remove:
+        os.remove(path)
+    return out
+
+
+# ------------ reading ------------
+
+class _TolerantDecoder(io.RawIOBase):
+    """Streaming decoder for multi-member gzip / multi-frame zstd that treats a truncated
+    or corrupt tail (logger killed mid-write) as end of file."""
+
+    def __init__(self, f: IO[bytes], kind: str):
+        self._f, self._kind = f, kind
+        self._d = self._new()
+        self._out = b""
+        self._eof = False
+
+    def _new(self):
+        if self._kind == "gzip":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self) -> None:
+        data = self._f.read(_CHUNK)
+        if not data:
+            self._eof = True
+            return
+        out = []
+        try:
+            while data:
+                out.append(self._d.decompress(data))
+                if not self._d.eof:
+                    break
+                data = self._d.unused_data   # next gzip member / zstd frame
+                self._d = self._new()
+        except (zlib.error, getattr(zstandard, "ZstdError", zlib.error)):
+            self._eof = True
+        self._out += b"".join(out)
+
+    def readinto(self, b) -> int:
+        while not self._out and not self._eof:
+            self._fill()
+        n = min(len(b), len(self._out))
+        b[:n] = self._out[:n]
+        self._out = self._out[n:]
+        return n
+
+    def close(self) -> None:
+        try:
+            self._f.close()
+        finally:
+            super().close()
+
+
+def open_text(path: str, encoding: str = "utf-8") -> IO[str]:
+    """Open a log for streaming text reads, decompressing .gz / .zst transparently."""
+    kind = compression_of(path)
+    if kind is None:
+        return open(path, "r", encoding=encoding, newline="")
+    _require(kind)
+    raw = _TolerantDecoder(open(path, "rb"), kind)
+    return io.TextIOWrapper(io.BufferedReader(raw, _CHUNK), encoding=encoding, newline="")
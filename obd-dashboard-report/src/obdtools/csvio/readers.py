@@ -1,13 +1,16 @@
 from __future__ import annotations
+import os
 import re
 from typing import Dict, List, Tuple
 import pandas as pd
 
 from ..utils.names import normalize_header
+from .compressed import compression_of, open_text
 
 __all__ = [
     "detect_units_row",
     "load_csv_with_units",
+    "load_log",
     "parse_time_column",
 ]
 
@@ -17,7 +20,7 @@ def detect_units_row(csv_path: str, sep: str = ";") -> Tuple[list[str], dict[str
     units_map: Dict[str, str] = {}
     has_units = False
 
-    with open(csv_path, "r", encoding="utf-8") as f:
+    with open_text(csv_path) as f:
         first = f.readline()
         if not first:
             return headers, units_map, False
@@ -50,16 +53,84 @@ def parse_time_column(df: pd.DataFrame) -> pd.Series:
         raise ValueError("All timestamps failed to parse.")
     return ts
 
+def _read_csv(csv_path: str, **kw) -> pd.DataFrame:
+    """pd.read_csv, streaming through the decoder for .gz / .zst logs (tolerates a truncated tail)."""
+    if compression_of(csv_path) is None:
+        return pd.read_csv(csv_path, **kw)
+    with open_text(csv_path) as f:
+        return pd.read_csv(f, **kw)
+
+def _pivot_long(df: pd.DataFrame) -> tuple[pd.DataFrame, dict[str, str]]:
+    """Long rows (time;pid;value[;unit]) -> one row per timestamp, one column per PID (NaN = not sampled)."""
+    key = "timestamp_iso" if "timestamp_iso" in df.columns else "timestamp_epoch_ms"
+    units_map: Dict[str, str] = {}
+    if "unit" in df.columns:
+        u = df.dropna(subset=["unit"]).drop_duplicates("pid")
+        units_map = dict(zip(u["pid"].astype(str), u["unit"].astype(str)))
+    df = df.dropna(subset=["pid"]).astype({"pid": str})
+    order = list(dict.fromkeys(df["pid"]))
+    wide = df.groupby([key, "pid"], sort=False)["value"].last().unstack("pid").reindex(columns=order)
+    for c in order:
+        num = pd.to_numeric(wide[c], errors="coerce")
+        if num.notna().sum() == wide[c].notna().sum():
+            wide[c] = num
+    wide = wide.reset_index()
+    wide.columns.name = None
+    return wide, units_map
+
+_TIME_COLUMNS = {"timestamp_iso", "date", "time", "timestamp_epoch_ms"}
+
+def _fill_held(df: pd.DataFrame) -> pd.DataFrame:
+    """Deadband logs: an empty cell repeats the value above it; 'nan' (the PID stopped answering) ends it."""
+    cols = [c for c in df.columns if c not in _TIME_COLUMNS]
+    df[cols] = df[cols].ffill()
+    for c in cols:
+        s = df[c]
+        if not pd.api.types.is_numeric_dtype(s) and (s == "nan").any():
+            s = s.mask(s == "nan")
+            num = pd.to_numeric(s, errors="coerce")
+            df[c] = num if num.notna().sum() == s.notna().sum() else s
+    return df
+
 def load_csv_with_units(csv_path: str, sep: str = ";") -> tuple[pd.DataFrame, dict[str, str]]:
-    """Load CSV, skip the units row (if present), normalize headers with ' [unit]' suffix."""
+    """Load CSV (plain, .csv.gz or .csv.zst), skip the units row (if present), normalize headers with ' [unit]' suffix.
+
+    Long logs (timestamp;pid;value;unit) are pivoted to the wide shape. Multi-rate logs (long, or
+    wide with the 'sparse' mark) get df.attrs["sparse"] = True: empty cells mean "not sampled".
+    Deadband logs (the 'deadband' mark, see logger.deadband) are forward-filled: an empty cell
+    repeats the last value written above it, in file order.
+    """
     headers, units_map, has_units = detect_units_row(csv_path, sep=sep)
-    df = pd.read_csv(csv_path, sep=sep, header=0, skiprows=[1] if has_units else None, na_values=[""], low_memory=False)
+    sparse = False
+    if {"pid", "value"}.issubset(headers):
+        df, units_map = _pivot_long(_read_csv(csv_path, sep=sep, header=0, na_values=[""], low_memory=False))
+        sparse = True
+    else:
+        mark = units_map.pop("timestamp_iso", "")
+        sparse = mark == "sparse"
+        held = mark == "deadband"
+        # 'nan' cells end a held value, so they must not be read as NaN before the fill
+        df = _read_csv(csv_path, sep=sep, header=0, skiprows=[1] if has_units else None, na_values=[""],
+                       keep_default_na=not held, low_memory=False)
+        if held:
+            df = _fill_held(df)
     ts = parse_time_column(df)
     df = df.assign(_ts=ts).dropna(subset=["_ts"]).sort_values("_ts")
-    known_time = {"timestamp_iso", "date", "time", "timestamp_epoch_ms", "_ts"}
+    known_time = _TIME_COLUMNS | {"_ts"}
     candidates = [c for c in df.columns if c not in known_time]
     if candidates:
         ren = {c: normalize_header(c) for c in candidates}
         df.rename(columns=ren, inplace=True)
         units_map = {normalize_header(k): v for k, v in units_map.items()}
+    df.attrs["sparse"] = sparse
     return df, units_map
+
+def load_log(path: str, sep: str = ";") -> tuple[pd.DataFrame, dict[str, str]]:
+    """Load a CSV log, a columnar log (.arrow / .npzc) or an ingest partition directory (<vehicle>/<YYYY-MM-DD>)."""
+    from .columnar import is_columnar_log, load_columnar_log
+    if is_columnar_log(path):
+        return load_columnar_log(path)
+    if os.path.isdir(path):
+        from ..ingest.store import load_partition
+        return load_partition(path)
+    return load_csv_with_units(path, sep=sep)
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
-# dtc_to_text.py — convert the 3 DTC CSVs to a simple text report (semicolon CSVs)
-import argparse, csv, glob, os, sys
+# dtc_to_text.py — convert the 3 DTC CSVs (or the single-file DTC journal) to a simple text report
+import argparse, csv, glob, json, os, sys
 from collections import defaultdict
 from datetime import datetime
 
@@ -21,41 +21,98 @@ def load_rows(path: str) -> list[list[str]]:
     return rows
 
 
-def parse_args():
-    ap = argparse.ArgumentParser(description="Build a text report from DTC CSVs")
+def load_journal(path: str) -> dict[str, list[list[str]]]:
+    """{"snapshot"|"events"|"freeze": rows, header first} from a *_dtc_journal_*.jsonl file."""
+    tables: dict[str, list[list[str]]] = {"snapshot": [], "events": [], "freeze": []}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue               # a line cut short by a crash
+            if isinstance(rec, dict):  # file header, or a table's {"table", "columns"}
+                if rec.get("table") in tables and not tables[rec["table"]]:
+                    tables[rec["table"]].append([str(c) for c in rec.get("columns", [])])
+            elif rec and rec[0] in tables and tables[rec[0]]:
+                tables[rec[0]].append(["" if v is None else str(v) for v in rec[1:]])
+    return tables
+
+
+# Columns that describe a snapshot row rather than the car's state
+_RUN_COLS = ("timestamp_iso", "row_kind", "cycles")
+
+
+def timeline(head: list[str], body: list[list[str]]) -> list[tuple[str, str, int, dict]]:
+    """(first seen, last seen, cycles, state) per run of identical snapshots.
+
+    Rows of the run-length encoded snapshot table (row_kind / cycles columns) extend the run
+    they belong to; older files without those columns count one cycle per row."""
+    idx = {name: i for i, name in enumerate(head)}
+    runs: list[tuple[str, str, int, dict]] = []
+    for row in body:
+        rec = dict(zip(head, row))
+        state = {k: v for k, v in rec.items() if k not in _RUN_COLS}
+        ts = rec.get("timestamp_iso", "")
+        try:
+            n = int(rec.get("cycles") or 1) if "cycles" in idx else 1
+        except ValueError:
+            n = 1
+        if runs and runs[-1][3] == state and rec.get("row_kind") != "change":
+            first, _last, cycles, _ = runs[-1]
+            runs[-1] = (first, ts, cycles + n, state)
+        else:
+            runs.append((ts, ts, n, state))
+    return runs
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Build a text report from DTC CSVs or a DTC journal")
     ap.add_argument("--dir", default="outputs/csv", help="Folder to search (when files not given)")
     ap.add_argument("--snapshot", help="Path to *_dtc_snapshot_*.csv")
     ap.add_argument("--events", help="Path to *_dtc_events_*.csv")
     ap.add_argument("--freeze", help="Path to *_dtc_freeze_*.csv")
+    ap.add_argument("--journal", help="Path to *_dtc_journal_*.jsonl (logger --dtc-journal); used instead of the CSVs")
     ap.add_argument("--out", default="dtc_report.txt", help="Output text file")
-    return ap.parse_args()
+    return ap.parse_args(argv)
 
 
-def main():
-    args = parse_args()
+def main(argv=None):
+    args = parse_args(argv)
     base = args.dir
 
-    snap = args.snapshot or pick_latest(os.path.join(base, "*_dtc_snapshot_*.csv"))
-    ev   = args.events   or pick_latest(os.path.join(base, "*_dtc_events_*.csv"))
-    frz  = args.freeze   or pick_latest(os.path.join(base, "*_dtc_freeze_*.csv"))
+    jr = args.journal
+    if not jr and not (args.snapshot or args.events or args.freeze):
+        # newest of the two layouts in --dir
+        latest_csv = pick_latest(os.path.join(base, "*_dtc_snapshot_*.csv"))
+        latest_jr = pick_latest(os.path.join(base, "*_dtc_journal_*.jsonl"))
+        if latest_jr and (not latest_csv or os.path.getmtime(latest_jr) >= os.path.getmtime(latest_csv)):
+            jr = latest_jr
+
+    if jr:
+        tables = load_journal(jr)
+        snap_rows, ev_rows, frz_rows = tables["snapshot"], tables["events"], tables["freeze"]
+        files = [("Journal ", jr)]
+    else:
+        snap = args.snapshot or pick_latest(os.path.join(base, "*_dtc_snapshot_*.csv"))
+        ev   = args.events   or pick_latest(os.path.join(base, "*_dtc_events_*.csv"))
+        frz  = args.freeze   or pick_latest(os.path.join(base, "*_dtc_freeze_*.csv"))
 
-    if not snap or not ev or not frz:
-        print("[!] Missing DTC files. Provide --snapshot/--events/--freeze or check --dir.", file=sys.stderr)
-        print("    snapshot:", snap, "\n    events:", ev, "\n    freeze:", frz, file=sys.stderr)
-        sys.exit(2)
+        if not snap or not ev or not frz:
+            print("[!] Missing DTC files. Provide --snapshot/--events/--freeze (or --journal) or check --dir.", file=sys.stderr)
+            print("    snapshot:", snap, "\n    events:", ev, "\n    freeze:", frz, file=sys.stderr)
+            sys.exit(2)
+        snap_rows, ev_rows, frz_rows = load_rows(snap), load_rows(ev), load_rows(frz)
+        files = [("Snapshot", snap), ("Events  ", ev), ("Freeze  ", frz)]
 
     # --- Snapshot: take the last row (most recent status)
-    snap_rows = load_rows(snap)
     snap_head, snap_body = (snap_rows[0], snap_rows[1:]) if snap_rows else ([], [])
     last_snap = snap_body[-1] if snap_body else []
     snap_map = dict(zip(snap_head, last_snap)) if snap_head and last_snap else {}
 
     # --- Events: list them all (chronological as in file)
-    ev_rows = load_rows(ev)
     ev_head, ev_body = (ev_rows[0], ev_rows[1:]) if ev_rows else ([], [])
 
     # --- Freeze: group by (timestamp_iso, freeze_dtc_code)
-    frz_rows = load_rows(frz)
     frz_head, frz_body = (frz_rows[0], frz_rows[1:]) if frz_rows else ([], [])
     # Expected columns: timestamp_iso, freeze_dtc_code, freeze_dtc_desc, pid_name, value
     idx = {name: i for i, name in enumerate(frz_head)} if frz_head else {}
@@ -79,9 +136,8 @@ def main():
     lines.append(f"Generated: {datetime.now().isoformat(sep=' ', timespec='seconds')}")
     lines.append("")
     lines.append("Files:")
-    lines.append(f"  Snapshot: {snap}")
-    lines.append(f"  Events  : {ev}")
-    lines.append(f"  Freeze  : {frz}")
+    for label, path in files:
+        lines.append(f"  {label}: {path}")
     lines.append("")
 
     # Snapshot summary
@@ -110,6 +166,19 @@ def main():
         lines.append("  (no snapshot rows)")
     lines.append("")
 
+    # Timeline: one line per run of identical snapshots
+    runs = timeline(snap_head, snap_body)
+    lines.append(f"TIMELINE ({len(runs)} state{'s' if len(runs) != 1 else ''} over {sum(r[2] for r in runs)} snapshot cycles)")
+    lines.append("-" * 60)
+    for first, last, cycles, st in runs:
+        mil = "ON " if st.get("mil_on") == "1" else "OFF"
+        lines.append(f"  [{first} -> {last}] ({cycles} cycle{'s' if cycles != 1 else ''})")
+        lines.append(f"     MIL {mil} | DTC {st.get('dtc_count', '')} | pending {st.get('codes_pending') or '-'} | "
+                     f"confirmed {st.get('codes_confirmed') or '-'} | permanent {st.get('codes_permanent') or '-'}")
+    if not runs:
+        lines.append("  (no snapshot rows)")
+    lines.append("")
+
     # Events list
     lines.append("EVENTS")
     lines.append("-" * 60)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+import gzip, json, sys
+from array import array
+from typing import Any, Dict, List, Tuple
+
+__all__ = ["BATCH_CONTENT_TYPE", "decode_batch"]
+
+# Format written by the bridge uplink (obd_dashboard_server.uplink):
+#   gzip( b"OBDB1\n" + JSON header + b"\n" + f64 timestamps + one f64 column per PID )
+BATCH_CONTENT_TYPE = "application/vnd.obd-dashboard.batch+gzip"
+_MAGIC = b"OBDB1\n"
+
+def decode_batch(data: bytes) -> Tuple[Dict[str, Any], array, Dict[str, array]]:
+    """Return (header, timestamps, columns); arrays are float64, NaN = no value. Raises ValueError."""
+    try:
+        raw = gzip.decompress(data)
+    except (OSError, EOFError) as e:
+        raise ValueError("batch is not gzip-compressed") from e
+    if not raw.startswith(_MAGIC):
+        raise ValueError("not an obd-dashboard batch")
+    try:
+        nl = raw.index(b"\n", len(_MAGIC))
+        header = json.loads(raw[len(_MAGIC):nl])
+        rows, names = int(header["rows"]), [str(n) for n in header["pids"]]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"invalid batch header: {e}") from e
+    values = array("d")
+    payload = memoryview(raw)[nl + 1:]
+    if len(payload) != rows * 8 * (len(names) + 1):
+        raise ValueError("batch payload size does not match its header")
+    values.frombytes(payload)
+    if sys.byteorder == "big":
+        values.byteswap()
+    ts = values[:rows]
+    cols = {n: values[(i + 1) * rows:(i + 2) * rows] for i, n in enumerate(names)}
+    return header, ts, cols
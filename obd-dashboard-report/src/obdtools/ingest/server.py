@@ -0,0 +1,211 @@
+from __future__ import annotations
+import argparse, asyncio, json, time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .batch import decode_batch
+from .store import PartitionStore
+
+__all__ = ["IngestMetrics", "IngestServer", "run_ingest"]
+
+MAX_BODY = 16 * 1024 * 1024
+MAX_GROUP = 256
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+class IngestMetrics:
+    """Totals plus rates over a sliding window of recent commits."""
+
+    def __init__(self, window: float = 60.0):
+        self.window = window
+        self.started = time.monotonic()
+        self.batches = self.rows = self.samples = self.bytes = 0
+        self.duplicates = self.errors = self.commits = 0
+        self.commit_time = 0.0
+        self.vehicles: set[str] = set()
+        self._recent: Deque[Tuple[float, int, int, int]] = deque()  # (t, batches, samples, bytes)
+        self._commit_ms: Deque[float] = deque(maxlen=1000)
+
+    def record_commit(self, items: List[Tuple[Dict[str, Any], int, int]], results: List[Dict[str, Any]], seconds: float) -> None:
+        now = time.monotonic()
+        samples = nbytes = 0
+        for (header, n_samples, size), res in zip(items, results):
+            self.vehicles.add(str(header.get("vehicle") or "unknown"))
+            if res["duplicate"]:
+                self.duplicates += 1
+                continue
+            self.batches += 1
+            self.rows += res["rows"]
+            samples += n_samples
+            nbytes += size
+        self.samples += samples
+        self.bytes += nbytes
+        self.commits += 1
+        self.commit_time += seconds
+        self._commit_ms.append(seconds * 1000.0)
+        self._recent.append((now, len(items), samples, nbytes))
+        while self._recent and now - self._recent[0][0] > self.window:
+            self._recent.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        recent = [r for r in self._recent if now - r[0] <= self.window]
+        span = min(self.window, max(1e-9, now - self.started))
+        lat = sorted(self._commit_ms)
+
+        def pct(q: float) -> Optional[float]:
+            return round(lat[min(len(lat) - 1, int(len(lat) * q))], 2) if lat else None
+        return {
+            "uptime_s": round(now - self.started, 1),
+            "vehicles": len(self.vehicles),
+            "batches": self.batches, "rows": self.rows, "samples": self.samples, "bytes": self.bytes,
+            "duplicates": self.duplicates, "errors": self.errors,
+            "batches_per_s": round(sum(r[1] for r in recent) / span, 2),
+            "samples_per_s": round(sum(r[2] for r in recent) / span, 1),
+            "bytes_per_s": round(sum(r[3] for r in recent) / span, 1),
+            "batches_per_commit": round(self.batches / self.commits, 2) if self.commits else 0.0,
+            "commit_ms_p50": pct(0.5), "commit_ms_p99": pct(0.99),
+        }
+
+class IngestServer:
+    """
+    Asyncio HTTP collector for uplinked batches.
+
+    POST (any path) a batch body -> written and fsynced, then 200 {"ok": true, ...}.
+    GET /metrics -> JSON ingest metrics.  Batches arriving together share one commit.
+    """
+
+    def __init__(self, store: PartitionStore, *, max_group: int = MAX_GROUP):
+        self.store = store
+        self.max_group = max_group
+        self.metrics = IngestMetrics()
+        self._queue: "asyncio.Queue[Tuple[Any, asyncio.Future]]" = asyncio.Queue()
+        self._writer: Optional[asyncio.Task] = None
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        self._writer = asyncio.create_task(self._write_loop())
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def stop(self) -> None:
+        if self._writer:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+        self.store.close()
+
+    async def submit(self, body: bytes) -> Dict[str, Any]:
+        """Decode, queue for the next group commit and wait until it is durable."""
+        header, ts, cols = decode_batch(body)
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put(((header, ts, cols, len(ts) * len(cols), len(body)), fut))
+        return await fut
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self._queue.get()]
+            while len(group) < self.max_group and not self._queue.empty():
+                group.append(self._queue.get_nowait())
+            batches = [(h, ts, cols) for (h, ts, cols, _, _), _ in group]
+            t0 = time.monotonic()
+            try:
+                results = await loop.run_in_executor(None, self.store.write_batches, batches)
+            except Exception as e:  # disk full, permissions...: fail the whole group, nothing is acked
+                self.metrics.errors += len(group)
+                for _, fut in group:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            self.metrics.record_commit([(h, n, size) for (h, _, _, n, size), _ in group], results, time.monotonic() - t0)
+            for (_, fut), res in zip(group, results):
+                if not fut.done():
+                    fut.set_result(res)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, path, _ = line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {"ok": False, "error": "bad request line"}, close=True)
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                close = headers.get("connection", "").lower() == "close"
+                if method == "GET" and path.split("?")[0] in ("/metrics", "/health"):
+                    await self._respond(writer, 200, self.metrics.snapshot(), close=close)
+                elif method != "POST":
+                    await self._respond(writer, 405, {"ok": False, "error": "POST batches, GET /metrics"}, close=close)
+                elif "content-length" not in headers:
+                    await self._respond(writer, 411, {"ok": False, "error": "Content-Length required"}, close=True)
+                    break
+                else:
+                    try:
+                        size = int(headers["content-length"])
+                    except ValueError:
+                        size = -1
+                    if size < 0:   # body length unknown: the rest of the stream cannot be framed
+                        self.metrics.errors += 1
+                        await self._respond(writer, 400, {"ok": False, "error": "bad Content-Length"}, close=True)
+                        break
+                    if size > MAX_BODY:
+                        await self._respond(writer, 413, {"ok": False, "error": "batch too large"}, close=True)
+                        break
+                    body = await reader.readexactly(size)
+                    try:
+                        res = await self.submit(body)
+                    except ValueError as e:
+                        self.metrics.errors += 1
+                        await self._respond(writer, 400, {"ok": False, "error": str(e)}, close=close)
+                    except Exception as e:
+                        await self._respond(writer, 500, {"ok": False, "error": str(e)}, close=True)
+                        break
+                    else:
+                        await self._respond(writer, 200, {"ok": True, **res}, close=close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], close: bool) -> None:
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+async def serve(host: str, port: int, root: str, stats_every: float = 10.0) -> None:
+    srv = IngestServer(PartitionStore(root))
+    server = await srv.start(host, port)
+    print(f"[*] Ingest listening on http://{host}:{port} -> {root} (GET /metrics for rates)", flush=True)
+    try:
+        async with server:
+            while True:
+                await asyncio.sleep(stats_every if stats_every > 0 else 3600)
+                if stats_every > 0 and srv.metrics.commits:
+                    m = srv.metrics.snapshot()
+                    print(f"[*] ingest: {m['samples_per_s']:.0f} samples/s, {m['batches_per_s']:.2f} batches/s, "
+                          f"{m['vehicles']} vehicle(s), commit p50 {m['commit_ms_p50']} ms, "
+                          f"{m['duplicates']} duplicate(s), {m['errors']} error(s)", flush=True)
+    finally:
+        await srv.stop()
+
+def run_ingest(host: str = "0.0.0.0", port: int = 8780, root: str = "outputs/fleet", stats_every: float = 10.0) -> int:
+    """Run the collector until Ctrl+C."""
+    try:
+        asyncio.run(serve(host, port, root, stats_every))
+    except KeyboardInterrupt:
+        print("[*] Ingest stopped.")
+    return 0
@@ -0,0 +1,288 @@
+from __future__ import annotations
+import datetime as dt, math, os, re, sys
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..utils.names import safe_id
+
+__all__ = ["PartitionStore", "is_partition", "load_partition", "vehicle_dir"]
+
+# Layout: <root>/<vehicle>/<YYYY-MM-DD>/ (UTC days)
+#   _ts.f64        float64 epoch seconds, one per row; its length is the commit marker
+#   <PID>.f64      float64 column aligned with _ts.f64 (NaN = no value)
+#   <root>/<vehicle>/batches.log   "seq start rows" of every stored batch (dedupes retries)
+TS_FILE = "_ts.f64"
+_EXT = ".f64"
+_ITEM = 8
+
+def _le_bytes(a: array) -> bytes:
+    if sys.byteorder == "big":
+        a = array("d", a)
+        a.byteswap()
+    return a.tobytes()
+
+def _nan_fill(n: int) -> bytes:
+    return _le_bytes(array("d", [math.nan])) * n
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def vehicle_dir(vehicle: str) -> str:
+    """Directory name for a vehicle id (no path separators, no leading dot)."""
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", vehicle).lstrip(".")
+    return name or "unknown"
+
+def is_partition(path: str | os.PathLike) -> bool:
+    return (Path(path) / TS_FILE).is_file()
+
+class _Partition:
+    """One vehicle/day directory of aligned float64 columns (append-only)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.mkdir(parents=True, exist_ok=True)
+        self.rows = self._recover()
+        self.committed = self.rows
+        self._files: Dict[str, BinaryIO] = {}
+        self._names: Set[str] = set(self.columns())
+        self._ts = open(path / TS_FILE, "ab")
+        self._pending_ts: List[bytes] = []
+        self._dirty: Set[str] = set()
+        self._new_files = False
+
+    def _recover(self) -> int:
+        """Cut columns back to the committed row count (or pad them) after a crash."""
+        ts_path = self.path / TS_FILE
+        size = ts_path.stat().st_size if ts_path.exists() else 0
+        rows = size // _ITEM
+        if size != rows * _ITEM:
+            os.truncate(ts_path, rows * _ITEM)
+        for col in self.path.glob(f"*{_EXT}"):
+            if col.name == TS_FILE:
+                continue
+            want, have = rows * _ITEM, col.stat().st_size
+            if have > want:
+                os.truncate(col, want)
+            elif have < want:
+                with open(col, "ab") as f:
+                    f.write(_nan_fill((want - have) // _ITEM))
+        return rows
+
+    def columns(self) -> List[str]:
+        return sorted(p.name[:-len(_EXT)] for p in self.path.glob(f"*{_EXT}") if p.name != TS_FILE)
+
+    def _file(self, name: str) -> BinaryIO:
+        f = self._files.get(name)
+        if f is None:
+            path = self.path / f"{name}{_EXT}"
+            new = not path.exists()
+            f = self._files[name] = open(path, "ab")
+            if new:
+                self._new_files = True
+                f.write(_nan_fill(self.rows))
+            self._names.add(name)
+        return f
+
+    def append(self, ts: array, cols: Dict[str, array]) -> None:
+        n = len(ts)
+        for name in self._names | set(cols):
+            col = cols.get(name)
+            self._file(name).write(_le_bytes(col) if col is not None else _nan_fill(n))
+            self._dirty.add(name)
+        self._pending_ts.append(_le_bytes(ts))
+        self.rows += n
+
+    def commit(self) -> None:
+        # Columns first, timestamps last: a row exists only once its timestamp is durable.
+        for name in self._dirty:
+            f = self._files[name]
+            f.flush()
+            os.fsync(f.fileno())
+        if self._pending_ts:
+            self._ts.write(b"".join(self._pending_ts))
+            self._ts.flush()
+            os.fsync(self._ts.fileno())
+        if self._new_files:
+            _fsync_dir(self.path)
+        self._dirty.clear()
+        self._pending_ts.clear()
+        self._new_files = False
+        self.committed = self.rows
+
+    def rollback(self) -> None:
+        """Drop the rows appended since the last commit (closes the partition; reopening cuts the columns)."""
+        self.close()
+        try:
+            os.truncate(self.path / TS_FILE, self.committed * _ITEM)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        for f in list(self._files.values()) + [self._ts]:
+            try:
+                f.close()
+            except Exception:
+                pass
+        self._files.clear()
+
+class PartitionStore:
+    """Append-only store of uplinked batches, partitioned by vehicle and UTC day."""
+
+    def __init__(self, root: str | os.PathLike, max_open: int = 64):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_open = max_open
+        self._parts: "OrderedDict[Tuple[str, str], _Partition]" = OrderedDict()
+        self._seen: Dict[str, Set[Tuple[int, float]]] = {}
+        self._logs: Dict[str, BinaryIO] = {}
+
+    def partition_path(self, vehicle: str, day: str) -> Path:
+        return self.root / vehicle_dir(vehicle) / day
+
+    def _partition(self, vehicle: str, day: str) -> _Partition:
+        key = (vehicle_dir(vehicle), day)
+        part = self._parts.get(key)
+        if part is None:
+            part = self._parts[key] = _Partition(self.partition_path(vehicle, day))
+        self._parts.move_to_end(key)
+        return part
+
+    def _seen_batches(self, vehicle: str) -> Set[Tuple[int, float]]:
+        key = vehicle_dir(vehicle)
+        seen = self._seen.get(key)
+        if seen is None:
+            seen = self._seen[key] = set()
+            log = self.root / key / "batches.log"
+            if log.exists():
+                for line in log.read_text(encoding="utf-8").splitlines():
+                    parts = line.split()
+                    if len(parts) >= 2:
+                        seen.add((int(parts[0]), float(parts[1])))
+        return seen
+
+    def _log(self, vehicle: str) -> BinaryIO:
+        key = vehicle_dir(vehicle)
+        f = self._logs.get(key)
+        if f is None:
+            (self.root / key).mkdir(parents=True, exist_ok=True)
+            f = self._logs[key] = open(self.root / key / "batches.log", "ab")
+        return f
+
+    def write_batches(self, batches: Sequence[Tuple[Dict[str, Any], array, Dict[str, array]]]) -> List[Dict[str, Any]]:
+        """Append decoded batches and make them durable with one fsync per touched file (group commit).
+
+        A batch counts as stored (and later copies as duplicates) only once every file is fsynced;
+        if the commit fails, the appended rows and log lines are dropped so a retry writes them again.
+        """
+        results: List[Dict[str, Any]] = []
+        touched: Dict[Tuple[str, str], _Partition] = {}
+        logs: Dict[str, int] = {}   # vehicle dir -> batches.log size before this group
+        stored: List[Tuple[Set[Tuple[int, float]], Tuple[int, float]]] = []
+        pending: Set[Tuple[str, int, float]] = set()
+        try:
+            for header, ts, cols in batches:
+                vehicle = str(header.get("vehicle") or "unknown")
+                key = (int(header.get("seq", -1)), float(header.get("start") or 0.0))
+                seen = self._seen_batches(vehicle)
+                if key in seen or (vehicle_dir(vehicle),) + key in pending:
+                    results.append({"rows": 0, "duplicate": True})
+                    continue
+                pending.add((vehicle_dir(vehicle),) + key)
+                stored.append((seen, key))
+                for day, lo, hi in _day_runs(ts):
+                    part = self._partition(vehicle, day)
+                    part.append(ts[lo:hi], {safe_id(n): c[lo:hi] for n, c in cols.items()})
+                    touched[(vehicle_dir(vehicle), day)] = part
+                log = self._log(vehicle)
+                logs.setdefault(vehicle_dir(vehicle), log.tell())
+                log.write(f"{key[0]} {key[1]!r} {len(ts)}\n".encode())
+                results.append({"rows": len(ts), "duplicate": False})
+            for part in touched.values():
+                part.commit()
+            for key in logs:
+                f = self._logs[key]
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            self._rollback(touched, logs)
+            raise
+        for seen, key in stored:
+            seen.add(key)
+        self._evict()
+        return results
+
+    def _rollback(self, touched: Dict[Tuple[str, str], _Partition], logs: Dict[str, int]) -> None:
+        for key, part in touched.items():
+            part.rollback()
+            self._parts.pop(key, None)
+        for key, size in logs.items():
+            f = self._logs.pop(key, None)
+            try:
+                if f is not None:
+                    f.close()
+            except OSError:
+                pass
+            try:
+                os.truncate(self.root / key / "batches.log", size)
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        while len(self._parts) > self.max_open:
+            _, part = self._parts.popitem(last=False)
+            part.close()
+
+    def close(self) -> None:
+        for part in self._parts.values():
+            part.close()
+        self._parts.clear()
+        for f in self._logs.values():
+            f.close()
+        self._logs.clear()
+
+def _day_runs(ts: array) -> List[Tuple[str, int, int]]:
+    """Split row indexes into runs sharing the same UTC day."""
+    runs: List[Tuple[str, int, int]] = []
+    start, current = 0, None
+    for i, t in enumerate(ts):
+        day = dt.datetime.fromtimestamp(t, tz=dt.timezone.utc).date().isoformat() if math.isfinite(t) else "unknown"
+        if day != current:
+            if current is not None:
+                runs.append((current, start, i))
+            start, current = i, day
+    if current is not None:
+        runs.append((current, start, len(ts)))
+    return runs
+
+def load_partition(path: str | os.PathLike, columns: Optional[Sequence[str]] = None) -> tuple[pd.DataFrame, dict[str, str]]:
+    """Load a vehicle/day partition like load_csv_with_units: (df with _ts and PID columns, units_map)."""
+    path = Path(path)
+    if not is_partition(path):
+        raise ValueError(f"{path} is not an ingest partition (missing {TS_FILE})")
+    ts = np.memmap(path / TS_FILE, dtype="<f8", mode="r") if (path / TS_FILE).stat().st_size else np.empty(0, "<f8")
+    rows = ts.shape[0]
+    data: Dict[str, Any] = {"timestamp_epoch_ms": np.asarray(ts) * 1000.0}
+    for col in sorted(path.glob(f"*{_EXT}")):
+        name = col.name[:-len(_EXT)]
+        if col.name == TS_FILE or (columns and name not in columns):
+            continue
+        arr = np.memmap(col, dtype="<f8", mode="r") if rows else np.empty(0, "<f8")
+        data[name] = np.asarray(arr[:rows])
+    df = pd.DataFrame(data)
+    df["_ts"] = pd.to_datetime(df["timestamp_epoch_ms"], unit="ms", errors="coerce")
+    df = df.dropna(subset=["_ts"]).sort_values("_ts")
+    return df, {}
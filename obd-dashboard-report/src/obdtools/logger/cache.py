@@ -0,0 +1,118 @@
+from __future__ import annotations
+import math, threading, time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Freshness (seconds) per PID class; a cached answer younger than this is reused.
+TTL_STATIC = math.inf      # support bitmaps, VIN, fuel type: fixed for the whole run
+TTL_COUNTER = 30.0         # since-clear counters: minute resolution on the ECU
+TTL_FREEZE = 30.0          # freeze-frame values only change when a new DTC is stored
+TTL_SLOW = 2.0             # temperatures, levels, voltages, long-term trims
+TTL_DTC = 0.5              # DTC lists and monitor status (shared within one DTC tick)
+TTL_FAST = 0.1             # everything else: only merge queries of the same instant
+
+STATIC_PIDS = {"VIN", "FUEL_TYPE", "OBD_COMPLIANCE", "ELM_VERSION", "CALIBRATION_ID", "CVN",
+               "ECU_NAME", "O2_SENSORS", "O2_SENSORS_ALT", "AUX_INPUT_STATUS", "EMISSION_REQ"}
+COUNTER_PIDS = {"WARMUPS_SINCE_DTC_CLEAR", "TIME_SINCE_DTC_CLEARED", "TIME_WITH_MIL_ON",
+                "DISTANCE_WITH_MIL_ON", "DISTANCE_SINCE_DTC_CLEAR", "DISTANCE_SINCE_DTC_CLEARED", "RUN_TIME"}
+DTC_PIDS = {"GET_DTC", "GET_CURRENT_DTC", "GET_PERMANENT_DTC", "STATUS", "STATUS_DRIVE_CYCLE", "FREEZE_DTC"}
+SLOW_PIDS = {"COOLANT_TEMP", "INTAKE_TEMP", "AMBIANT_AIR_TEMP", "OIL_TEMP", "FUEL_LEVEL",
+             "BAROMETRIC_PRESSURE", "CONTROL_MODULE_VOLTAGE", "ELM_VOLTAGE", "ETHANOL_PERCENT",
+             "HYBRID_BATTERY_REMAINING", "FUEL_INJECT_TIMING", "EVAP_VAPOR_PRESSURE",
+             "LONG_FUEL_TRIM_1", "LONG_FUEL_TRIM_2", "CATALYST_TEMP_B1S1", "CATALYST_TEMP_B2S1",
+             "CATALYST_TEMP_B1S2", "CATALYST_TEMP_B2S2"}
+
+
+def default_ttl(name: str) -> float:
+    """Default freshness for a python-OBD command name."""
+    n = name.upper()
+    if n in STATIC_PIDS or n.startswith(("PIDS_", "MIDS_")):
+        return TTL_STATIC
+    if n in COUNTER_PIDS:
+        return TTL_COUNTER
+    if n in DTC_PIDS:
+        return TTL_DTC
+    if n.startswith("DTC_"):
+        return TTL_FREEZE
+    if n in SLOW_PIDS:
+        return TTL_SLOW
+    return TTL_FAST
+
+
+def parse_ttl_overrides(spec: str) -> Dict[str, float]:
+    """'RPM=0,COOLANT_TEMP=5' -> {'RPM': 0.0, 'COOLANT_TEMP': 5.0} (names upper-cased)."""
+    out: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"Bad cache TTL '{part}' (expected PID=SECONDS)")
+        try:
+            ttl = float(value)
+        except ValueError:
+            raise ValueError(f"Bad cache TTL '{part}' (expected PID=SECONDS)") from None
+        if ttl < 0:
+            raise ValueError(f"Cache TTL for {name.strip()} must be >= 0")
+        out[name.strip().upper()] = ttl
+    return out
+
+
+class CachedConnection:
+    """Wrap a python-OBD connection; `query` reuses answers younger than the PID's TTL.
+
+    Everything else (supports, supported_commands, close, ...) is delegated unchanged.
+    Null answers are cached too: asking again within the TTL would cost the same round-trip.
+    """
+
+    def __init__(self, conn: Any, ttl: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.conn = conn
+        self.overrides = {k.upper(): v for k, v in (ttl or {}).items()}
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.per_pid: Dict[str, list] = {}  # name -> [hits, misses]
+
+    def ttl_for(self, cmd: Any) -> float:
+        name = str(getattr(cmd, "name", cmd))
+        return self.overrides.get(name.upper(), default_ttl(name))
+
+    def query(self, cmd: Any, force: bool = False, max_age: Optional[float] = None):
+        """Cached `conn.query`; `max_age` tightens (never loosens) the PID's TTL for this call."""
+        name = str(getattr(cmd, "name", cmd))
+        key = (getattr(cmd, "command", None) or name, getattr(cmd, "header", None))
+        ttl = self.ttl_for(cmd) if max_age is None else min(max_age, self.ttl_for(cmd))
+        counts = self.per_pid.setdefault(name, [0, 0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and ttl > 0 and self._clock() - entry[0] < ttl:
+                self.hits += 1; counts[0] += 1
+                return entry[1]
+            self.misses += 1; counts[1] += 1
+        r = self.conn.query(cmd, force=force)
+        with self._lock:
+            self._entries[key] = (self._clock(), r)
+        return r
+
+    def invalidate(self, cmd: Any = None) -> None:
+        """Forget one command's answer (or all of them), e.g. after clearing DTCs."""
+        with self._lock:
+            if cmd is None:
+                self._entries.clear()
+            else:
+                self._entries.pop((getattr(cmd, "command", None) or str(getattr(cmd, "name", cmd)),
+                                   getattr(cmd, "header", None)), None)
+
+    def summary(self, top: int = 5) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        text = f"{self.hits} hits / {self.misses} misses ({rate:.0%} served from cache)"
+        best = sorted(((h, n) for n, (h, _m) in self.per_pid.items() if h), reverse=True)[:top]
+        if best:
+            text += "; most reused: " + ", ".join(f"{n} {h}" for h, n in best)
+        return text
+
+    def __getattr__(self, name: str):
+        return getattr(self.conn, name)
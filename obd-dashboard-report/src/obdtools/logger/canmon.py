@@ -0,0 +1,277 @@
+from __future__ import annotations
+import binascii, json, os, re, signal, sys, time, datetime as dt
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .core import open_csv_with_header, make_output_filename, number_cell, NULL_CELL
+from .writer import BackgroundWriter, CommitPolicy, WriterError, DEFAULT_COMMIT_MS
+
+# Same signal-definition and dump formats as obd_dashboard_server.canmon.
+EXTENDED_PROTOCOLS = ("7", "9")
+
+
+@dataclass
+class SignalDef:
+    name: str
+    can_id: int
+    start: int
+    length: int
+    byte_order: str = "big"   # big: start from MSB of byte 0 (Motorola); little: from LSB of byte 0 (Intel)
+    signed: bool = False
+    scale: float = 1.0
+    offset: float = 0.0
+    unit: str = ""
+
+    def decode(self, data: bytes) -> Optional[float]:
+        size = len(data) * 8
+        if self.start + self.length > size:
+            return None
+        mask = (1 << self.length) - 1
+        if self.byte_order == "little":
+            raw = (int.from_bytes(data, "little") >> self.start) & mask
+        else:
+            raw = (int.from_bytes(data, "big") >> (size - self.start - self.length)) & mask
+        if self.signed and raw >> (self.length - 1):
+            raw -= 1 << self.length
+        return raw * self.scale + self.offset
+
+
+def load_signal_defs(path: str) -> List[SignalDef]:
+    """JSON list (or {"signals": [...]}) of {name, id, start, length, [byte_order, signed, scale, offset, unit]}."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data.get("signals", []) if isinstance(data, dict) else data
+    out: List[SignalDef] = []
+    for i, it in enumerate(items):
+        try:
+            cid = it["id"] if isinstance(it["id"], int) else int(str(it["id"]), 16)
+            s = SignalDef(str(it["name"]), cid, int(it["start"]), int(it["length"]),
+                          str(it.get("byte_order", "big")).lower(), bool(it.get("signed", False)),
+                          float(it.get("scale", 1.0)), float(it.get("offset", 0.0)), str(it.get("unit", "")))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"signal #{i + 1} in {path}: {e!r}") from e
+        if s.byte_order not in ("big", "little") or not 1 <= s.length <= 64 or s.start < 0 or s.start + s.length > 64:
+            raise ValueError(f"signal {s.name}: invalid byte_order or bit range")
+        out.append(s)
+    if not out:
+        raise ValueError(f"{path} defines no signals")
+    return out
+
+
+class LineParser:
+    """Streaming parser for ATMA output (ATH1, spaces optional): feed() -> [(id, data)]."""
+
+    def __init__(self, id_chars: int = 3):
+        self.id_chars = id_chars
+        self.frames = self.errors = self.overflows = self.prompts = 0
+        self._buf = b""
+
+    def feed(self, chunk: bytes) -> List[Tuple[int, bytes]]:
+        lines = (self._buf + chunk).split(b"\r")
+        self._buf = lines.pop()
+        out = []
+        n = self.id_chars
+        for line in lines:
+            line = line.replace(b" ", b"").strip(b"\n\x00")
+            if line.startswith(b">"):
+                self.prompts += 1
+                line = line.lstrip(b">")
+            if not line:
+                continue
+            try:
+                out.append((int(line[:n], 16), binascii.unhexlify(line[n:])))
+            except (ValueError, binascii.Error):
+                if line.startswith(b"BUFFERFULL"): self.overflows += 1
+                else: self.errors += 1
+        self.frames += len(out)
+        return out
+
+
+_CANDUMP_LOG = re.compile(r"^\(([\d.]+)\)\s+\S+\s+([0-9A-Fa-f]+)#([0-9A-Fa-f]*)")
+_CANDUMP_CONSOLE = re.compile(r"^\s*\S+\s+([0-9A-Fa-f]+)\s+\[\d+\]\s+((?:[0-9A-Fa-f]{2}\s*)*)$")
+
+def read_frame_dump(path: str, id_chars: int = 3) -> List[Tuple[Optional[float], int, bytes]]:
+    """candump -l, candump console output or raw ELM monitor lines -> [(t|None, id, data)]."""
+    frames: List[Tuple[Optional[float], int, bytes]] = []
+    p = LineParser(id_chars)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            m = _CANDUMP_LOG.match(line)
+            if m:
+                frames.append((float(m[1]), int(m[2], 16), bytes.fromhex(m[3]))); continue
+            m = _CANDUMP_CONSOLE.match(line)
+            if m:
+                frames.append((None, int(m[1], 16), bytes.fromhex(m[2]))); continue
+            frames.extend((None, cid, data) for cid, data in p.feed(line.encode() + b"\r"))
+    return frames
+
+
+class DumpPort:
+    """Fake adapter: 'OK' to setup commands, then streams a frame dump after ATMA/STMA (any write stops it)."""
+
+    def __init__(self, frames, timing: bool = False):
+        self.frames, self.timing = frames, timing
+        self.timeout, self.baudrate, self.commands = 0.05, 38400, []
+        self._out, self._on, self._i, self._t0 = bytearray(), False, 0, None
+
+    @property
+    def in_waiting(self): return len(self._out)
+    @property
+    def exhausted(self): return self._i >= len(self.frames) and not self._out   # every frame read
+    def reset_input_buffer(self): self._out.clear()
+    def close(self): self._on = False
+
+    def write(self, data: bytes):
+        if self._on:
+            self._on = False; self._out += b"STOPPED\r\r>"; return len(data)
+        for raw in data.split(b"\r")[:-1]:
+            cmd = raw.decode("latin-1").replace(" ", "").upper()
+            self.commands.append(cmd)
+            if cmd in ("ATMA", "STMA"):
+                self._on, self._t0 = True, None; continue
+            self._out += {"ATZ": b"ELM327 v1.5", "STI": b"?"}.get(cmd, b"OK") + b"\r\r>"
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        if self._on and not self._out:
+            if self._i >= len(self.frames):
+                time.sleep(self.timeout)
+            else:
+                t, cid, data = self.frames[self._i]; self._i += 1
+                if self.timing and t is not None:
+                    if self._t0 is None: self._t0 = (time.monotonic(), t)
+                    time.sleep(max(0.0, self._t0[0] + (t - self._t0[1]) - time.monotonic()))
+                self._out += (f"{cid:08X}" if cid > 0x7FF else f"{cid:03X}").encode() + data.hex().upper().encode() + b"\r"
+        out = bytes(self._out[:size]); del self._out[:size]
+        return out
+
+
+def _command(port, text: str, settle: float = 0.0, timeout: float = 2.0) -> str:
+    port.reset_input_buffer(); port.write(text.encode() + b"\r")
+    if settle: time.sleep(settle)
+    buf, end = bytearray(), time.monotonic() + timeout
+    while b">" not in buf and time.monotonic() < end:
+        buf.extend(port.read(getattr(port, "in_waiting", 0) or 1))
+    return buf.decode("latin-1").replace(">", "").strip()
+
+
+def setup_monitor(port, ids: List[int], protocol: str) -> bool:
+    """ATZ, raw frame format (E0 L0 S0 H1 CAF0), protocol, ID filter. Returns True on STN chips (use STMA)."""
+    _command(port, "ATZ", settle=1.0)
+    for c in ("ATE0", "ATL0", "ATS0", "ATH1", "ATCAF0", f"ATSP{protocol}"):
+        _command(port, c)
+    ext = protocol in EXTENDED_PROTOCOLS
+    width, digits = (0x1FFFFFFF, 8) if ext else (0x7FF, 3)
+    stn = _command(port, "STI").upper().startswith("STN")
+    if stn:
+        _command(port, "STFAC")
+        for cid in ids:
+            _command(port, f"STFAP {cid:0{digits}X},{width:0{digits}X}")
+    else:
+        diff = 0
+        for cid in ids[1:]:
+            diff |= cid ^ ids[0]
+        mask = width & ~diff
+        _command(port, f"ATCF {ids[0] & mask:0{digits}X}"); _command(port, f"ATCM {mask:0{digits}X}")
+    return stn
+
+
+def run_can_monitor(*, signals: str, port: str = "/dev/ttyUSB0", baud: int | None = None, protocol: str = "6",
+                    dump: str | None = None, timing: bool = False, out_base: str = "outputs/csv/obd_can",
+                    add_epoch: bool = False, max_rows: int = 0, fsync_rows: int = 0,
+                    fsync_ms: float = DEFAULT_COMMIT_MS, paranoid: bool = False) -> str:
+    """Log decoded broadcast frames until Ctrl+C (or max_rows, or the end of `dump`). One CSV row per decoded frame,
+    holding the latest value of every signal. Returns the CSV path.
+
+    Rows go through the background writer (group commit per fsync_rows / fsync_ms / paranoid,
+    as with PID polling), so the serial port is read again while the previous frames are written."""
+    defs = load_signal_defs(signals)
+    by_id: Dict[int, List[SignalDef]] = {}
+    for s in defs:
+        by_id.setdefault(s.can_id, []).append(s)
+    id_chars = 8 if protocol in EXTENDED_PROTOCOLS else 3
+    if dump:
+        frames = read_frame_dump(dump, id_chars)
+        print(f"[*] Replaying {len(frames)} frames from {dump}")
+        ser = DumpPort(frames, timing=timing)
+    else:
+        import serial
+        try:
+            ser = serial.serial_for_url(port, timeout=0.1); ser.baudrate = baud or 38400
+        except Exception as e:
+            raise SystemExit(f"[-] Failed to open {port}: {e}")
+
+    stn = setup_monitor(ser, sorted(by_id), protocol)
+    names = [s.name for s in defs]
+    header = ["timestamp_iso", "date", "time"] + (["timestamp_epoch_ms"] if add_epoch else []) + names
+    units_row = ["", "", ""] + ([""] if add_epoch else []) + [s.unit for s in defs]
+    os.makedirs(os.path.dirname(out_base) or ".", exist_ok=True)
+    csv_path = make_output_filename(out_base, ".csv")
+    f_csv, w_csv = open_csv_with_header(csv_path, header, units_row)
+    policy = CommitPolicy(every_rows=max(0, int(fsync_rows)), every_ms=max(0.0, float(fsync_ms)), paranoid=paranoid)
+    writer = BackgroundWriter(f_csv, w_csv, policy, name="obd-can-writer")
+    print(f"[*] CAN monitor ({'STMA' if stn else 'ATMA'}, protocol {protocol}): {len(defs)} signals from IDs "
+          + ", ".join(f"{i:03X}" for i in sorted(by_id)) + f". Writing to: {csv_path}")
+    print(f"[*] Durability: {policy.describe()}; rows go through a background writer (queue of {writer.maxsize}).")
+
+    running = True
+    def stop(_s, _f):
+        nonlocal running
+        running = False
+    try:
+        signal.signal(signal.SIGINT, stop); signal.signal(signal.SIGTERM, stop)
+    except Exception:
+        pass
+
+    parser = LineParser(id_chars)
+    latest: Dict[str, float] = {}
+    rows = 0
+    start_cmd = b"STMA\r" if stn else b"ATMA\r"
+    t0 = time.monotonic()
+    prompts = 0
+    ser.write(start_cmd)
+    try:
+        while running and not (max_rows and rows >= max_rows):
+            chunk = ser.read(getattr(ser, "in_waiting", 0) or 1)
+            if not chunk:
+                if getattr(ser, "exhausted", False):
+                    print(f"[*] End of {dump}.")
+                    break
+                continue
+            now = dt.datetime.now()
+            batch = []
+            for cid, data in parser.feed(chunk):
+                sigs = by_id.get(cid)
+                if not sigs:
+                    continue
+                for s in sigs:
+                    v = s.decode(data)
+                    if v is not None:
+                        latest[s.name] = v
+                row = [now.isoformat(sep=' '), now.date().isoformat(), now.strftime("%H:%M:%S")]
+                if add_epoch:
+                    row.append(int(now.timestamp() * 1000))
+                row += [number_cell(latest[n]) if n in latest else NULL_CELL for n in names]
+                batch.append(row); rows += 1
+            writer.put_many(batch)
+            try:
+                writer.check()
+            except WriterError as e:
+                print(f"[-] {e}; stopping.", file=sys.stderr)
+                break
+            if parser.prompts != prompts:   # BUFFER FULL / bus error ended monitoring: restart
+                prompts = parser.prompts; ser.write(start_cmd)
+    finally:
+        try: ser.write(b"\r")
+        except Exception: pass
+        writer.close()
+        try: ser.close()
+        except Exception: pass
+    el = max(1e-9, time.monotonic() - t0)
+    print(f"[*] CAN monitor: {parser.frames} frames ({parser.frames / el:.0f}/s), {rows} rows, "
+          f"{parser.errors} malformed, {parser.overflows} buffer overflows")
+    print(f"[*] Writer: {writer.summary()}")
+    return csv_path
@@ -0,0 +1,100 @@
+from __future__ import annotations
+import datetime as dt, json, os, re
+from typing import Any, Dict, List, Optional
+
+from .core import OBD_CMDS
+
+# Per-vehicle capability cache (JSON, one entry per vehicle): the Mode 01 commands the car
+# answers and their units, so the next start skips probing every command. Entries are keyed
+# by VIN ("vin:<VIN>") or, when the VIN cannot be read, by the PIDS_A/B/C support bitmaps
+# ("pids:<A>.<B>.<C>" in hex). A car with neither gets no entry.
+VERSION = 1
+BITMAP_PIDS = ("PIDS_A", "PIDS_B", "PIDS_C")
+_VIN_RE = re.compile(r"^[A-Z0-9]{10,17}$")   # some ECUs return a shortened VIN; it still identifies the car
+
+
+def default_cache_path() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "obdtools", "capabilities.json")
+
+
+def _command(name: str):
+    try:
+        return OBD_CMDS[name] if OBD_CMDS is not None and OBD_CMDS.has_name(name) else None
+    except Exception:
+        return None
+
+
+def _value(conn: Any, cmd: Any) -> Any:
+    try:
+        r = conn.query(cmd, force=True)
+        return None if r is None or r.is_null() else r.value
+    except Exception:
+        return None
+
+
+def read_vin(conn: Any) -> str:
+    """VIN via Mode 09 PID 02, or '' when unsupported / unreadable. Not asked when the car's
+    Mode 09 bitmap says VIN is unsupported."""
+    cmd = _command("VIN")
+    if cmd is None:
+        return ""
+    try:
+        known = any(getattr(c, "mode", None) == 9 for c in conn.supported_commands)
+        if known and not conn.supports(cmd):
+            return ""
+    except Exception:
+        pass
+    v = _value(conn, cmd)
+    if isinstance(v, (bytes, bytearray)):
+        v = v.decode("ascii", "ignore")
+    vin = re.sub(r"[^A-Z0-9]", "", str(v or "").upper())
+    return vin if _VIN_RE.match(vin) else ""
+
+
+def bitmap_key(conn: Any) -> str:
+    """'pids:<A>.<B>.<C>' from the Mode 01 support bitmaps ('-' for one that did not answer)."""
+    parts = []
+    for name in BITMAP_PIDS:
+        cmd = _command(name)
+        v = _value(conn, cmd) if cmd is not None else None
+        bits = "".join("1" if b else "0" for b in v) if v is not None else ""
+        parts.append(f"{int(bits, 2):08x}" if bits else "-")
+    return "" if all(p == "-" for p in parts) else "pids:" + ".".join(parts)
+
+
+def vehicle_key(conn: Any) -> str:
+    vin = read_vin(conn)
+    return f"vin:{vin}" if vin else bitmap_key(conn)
+
+
+def commands_from_names(names: List[str]) -> List[Any]:
+    return [c for c in (_command(n) for n in names) if c is not None]
+
+
+class CapabilityCache:
+    """JSON file of {vehicle key: {commands, units, protocol, saved, discovery_s}}; saved atomically."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == VERSION:
+                self.entries = dict(data.get("vehicles", {}))
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def lookup(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key) if key else None
+        return entry if entry and entry.get("commands") else None
+
+    def store(self, key: str, commands: List[str], units: Dict[str, str], **info) -> None:
+        self.entries[key] = {"commands": list(commands), "units": dict(units),
+                             "saved": dt.datetime.now().isoformat(timespec="seconds"), **info}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "vehicles": self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
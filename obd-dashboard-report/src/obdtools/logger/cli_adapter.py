@@ -1,29 +1,127 @@
 from __future__ import annotations
-import argparse, os
+import argparse, os, sys
 from .runner import run_logger
+from .cache import parse_ttl_overrides
+from .capabilities import default_cache_path
+from .dtc import DTC_MODES, DEFAULT_HEARTBEAT_S, DEFAULT_LISTS_S
+from .schedule import parse_rates, LAYOUTS
+from .deadband import parse_deadbands, DEFAULT_HOLD_S
+from .wsource import DEFAULT_BATCH_MS, WEBSOCKETS_AVAILABLE, run_ws_logger
+from ..csvio.columnar import FORMATS, DEFAULT_CHUNK_ROWS
+from ..csvio.compressed import COMPRESSIONS, ZSTD_AVAILABLE, strip_compression_ext
 from ..report.html_report import build_html_from_csv
 
 def main(argv=None):
     ap = argparse.ArgumentParser(description="OBD all-in-one logger (CSV + optional ODS + optional HTML)")
-    ap.add_argument("--port", default="/dev/ttyUSB0", help="Serial port (default: /dev/ttyUSB0)")
+    ap.add_argument("--port", default="/dev/ttyUSB0", help="Serial port or socket://host:port (default: /dev/ttyUSB0)")
     ap.add_argument("--baud", type=int, default=None, help="Baud rate (default: auto)")
     ap.add_argument("--interval", type=float, default=1.0, help="Sampling interval in seconds (default: 1.0)")
+    ap.add_argument("--rate", default="", metavar="PID=HZ,...", help="Per-PID sampling rates, e.g. RPM=10,COOLANT_TEMP=0.2 (others every --interval)")
+    ap.add_argument("--layout", choices=LAYOUTS, default="wide", help="wide: one row per tick, empty cells for PIDs not sampled; long: one timestamp;pid;value;unit row per sample")
+    ap.add_argument("--deadband", default="", metavar="PID=BAND,...", help="Write a PID's value only when it moves more than BAND (in its unit; 0 = on any change) from the last written one, e.g. SPEED=1,COOLANT_TEMP=0.5,*=0; readers repeat it in between")
+    ap.add_argument("--deadband-hold-s", type=float, default=DEFAULT_HOLD_S, help="With --deadband, write each value at least every N seconds")
     ap.add_argument("--out", default="outputs/csv/obd_all", help="Base name for CSV files; timestamp appended")
     ap.add_argument("--add-epoch", action="store_true", help="Add numeric timestamp_epoch_ms column")
     ap.add_argument("--rotate-min", type=int, default=0, help="Start a new file every N minutes (0=disabled)")
+    ap.add_argument("--rotate-mb", type=float, default=0, help="Start a new file once the current one reaches N MB on disk (0=disabled)")
+    ap.add_argument("--rotate-rows", type=int, default=0, help="Start a new file every N rows (0=disabled)")
+    ap.add_argument("--compress", choices=sorted(COMPRESSIONS), default=None, help="Compress CSV logs (zstd needs the zstandard package)")
+    ap.add_argument("--compress-when", choices=("stream", "closed"), default="stream", help="stream: write .csv.gz/.zst directly; closed: compress each finished segment on a worker thread")
     ap.add_argument("--only", default="", help="Comma-separated PID names to include (case-insensitive)")
     ap.add_argument("--skip", default="", help="Comma-separated PID names to exclude (case-insensitive)")
-    ap.add_argument("--ods", action="store_true", help="Also write an .ods spreadsheet (requires odfpy)")
-    ap.add_argument("--ods-save-every", type=int, default=5, help="Save .ods every N rows")
+    ap.add_argument("--format", dest="fmt", choices=FORMATS, default="csv", help="csv, or columnar arrow / npz-chunks (epoch-ns + float32 columns, loads fast in 'obdtools html')")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per chunk for columnar formats")
+    ap.add_argument("--ods", action="store_true", help="Also write an .ods spreadsheet (streamed, saved at checkpoints)")
+    ap.add_argument("--ods-save-every", type=int, default=5, help="Checkpoint the .ods every N rows (and at least every 10 s)")
     ap.add_argument("--html-export", action="store_true", help="On stop, build an HTML report for the last CSV")
     ap.add_argument("--title", default="OBD Report", help="Report title (when --html-export)")
+    ap.add_argument("--capture", default=None, metavar="FILE", help="Record raw adapter traffic (timestamped) to a JSON-lines transcript")
+    ap.add_argument("--no-cache", action="store_true", help="Query the adapter every time (disable the response cache)")
+    ap.add_argument("--cache-ttl", default="", metavar="PID=S,...", help="Per-PID cache freshness overrides in seconds, e.g. RPM=0,COOLANT_TEMP=5")
+    ap.add_argument("--capability-cache", default=default_cache_path(), metavar="FILE", help="Per-vehicle cache of supported PIDs and units (default: %(default)s)")
+    ap.add_argument("--no-capability-cache", action="store_true", help="Always discover supported PIDs, keep no capability cache")
+    ap.add_argument("--rediscover", action="store_true", help="Ignore the cached capabilities for this vehicle, discover again and update the cache")
+    ap.add_argument("--dtc-budget-ms", type=float, default=0.0, help="Time per tick the DTC snapshot may use (0 = one adapter query per tick)")
+    ap.add_argument("--dtc-mode", choices=DTC_MODES, default="status", help="status: read the DTC lists when STATUS (MIL, DTC count) changes or every --dtc-lists-s; full: every cycle")
+    ap.add_argument("--dtc-lists-s", type=float, default=DEFAULT_LISTS_S, help="With --dtc-mode status, re-read the DTC lists at least every N seconds (pending codes are not in STATUS)")
+    ap.add_argument("--dtc-heartbeat-s", type=float, default=DEFAULT_HEARTBEAT_S, help="DTC snapshot rows are written on change; an unchanged snapshot every N seconds (0 = every cycle)")
+    ap.add_argument("--profile", action="store_true", help="Time every loop stage per cycle and every PID query; summary on exit plus <log>.profile.json/.tsv (obdtools html shows it)")
+    ap.add_argument("--dtc-journal", action="store_true", help="Write DTC snapshots, events and freeze frames to one JSON-lines journal instead of three CSVs")
+    ap.add_argument("--fsync-rows", type=int, default=0, help="Group commit: fsync after N rows (0 = no row limit)")
+    ap.add_argument("--fsync-ms", type=float, default=1000.0, help="Group commit: fsync at most T ms after the first unsynced row (0 = no time limit)")
+    ap.add_argument("--paranoid", action="store_true", help="fsync after every row (still on the writer thread)")
+    ap.add_argument("--source", default=None, metavar="ws://HOST:PORT", help="Log the samples streamed by a running obd-dashboard-server instead of opening the adapter")
+    ap.add_argument("--batch-ms", type=float, default=DEFAULT_BATCH_MS, help="With --source, hand rows to the writer thread in batches of N ms (0 = every message)")
+    ap.add_argument("--can-monitor", default=None, metavar="SIGNALS.json", help="Record broadcast CAN signals in adapter monitor mode (ATMA/STMA) instead of polling PIDs")
+    ap.add_argument("--can-protocol", default="6", help="ELM protocol of the monitored bus (6 = CAN 11-bit/500k, 8 = 11-bit/250k, 7/9 = 29-bit)")
+    ap.add_argument("--can-dump", default=None, metavar="FILE", help="With --can-monitor, read frames from a candump/ELM dump instead of the adapter")
+    ap.add_argument("--can-timing", action="store_true", help="With --can-dump, keep the recorded frame spacing")
     args = ap.parse_args(argv)
+    try:
+        cache_ttl = parse_ttl_overrides(args.cache_ttl)
+        rates = parse_rates(args.rate)
+        deadband = parse_deadbands(args.deadband)
+    except ValueError as e:
+        ap.error(str(e))
+    if args.fmt != "csv" and args.layout == "long":
+        ap.error(f"--format {args.fmt} is columnar; use --layout wide")
+    if args.compress and args.fmt != "csv":
+        ap.error("--compress applies to --format csv")
+    if deadband and (args.fmt != "csv" or args.layout == "long"):
+        ap.error("--deadband applies to --format csv with --layout wide")
+    if args.compress == "zstd" and not ZSTD_AVAILABLE:
+        ap.error("--compress zstd needs the zstandard package (pip install zstandard); gzip works out of the box")
 
-    last_csv = run_logger(port=args.port, baud=args.baud, interval=args.interval, out_base=args.out,
-                          add_epoch=args.add_epoch, rotate_min=args.rotate_min, only=args.only, skip=args.skip,
-                          ods=args.ods, ods_save_every=args.ods_save_every)
+    if args.source:
+        if args.can_monitor:
+            ap.error("--source and --can-monitor are exclusive")
+        if not WEBSOCKETS_AVAILABLE:
+            ap.error("--source needs the websockets package (pip install websockets)")
+        polling = ("port", "baud", "interval", "rate", "ods", "ods_save_every", "capture", "no_cache", "cache_ttl",
+                   "capability_cache", "no_capability_cache", "rediscover", "dtc_budget_ms", "dtc_mode", "dtc_lists_s",
+                   "dtc_heartbeat_s", "profile", "dtc_journal")
+        ignored = ["--" + d.replace("_", "-") for d in polling if getattr(args, d) != ap.get_default(d)]
+        if ignored:
+            print(f"[!] {', '.join(ignored)} only apply when polling the adapter; ignored with --source.",
+                  file=sys.stderr)
+        last_csv = run_ws_logger(source=args.source, out_base=args.out, add_epoch=args.add_epoch, only=args.only,
+                                 skip=args.skip, layout=args.layout, fmt=args.fmt, chunk_rows=args.chunk_rows,
+                                 rotate_min=args.rotate_min, rotate_mb=args.rotate_mb, rotate_rows=args.rotate_rows,
+                                 compress=args.compress or "", compress_when=args.compress_when,
+                                 fsync_rows=args.fsync_rows, fsync_ms=args.fsync_ms, paranoid=args.paranoid,
+                                 batch_ms=args.batch_ms, deadband=deadband, deadband_hold_s=args.deadband_hold_s)
+        if not last_csv:
+            return 1
+    elif args.can_monitor:
+        from .canmon import run_can_monitor
+        ignored = [o for o, on in (("--rate", args.rate), ("--deadband", args.deadband), ("--layout long", args.layout == "long"),
+                                   ("--format", args.fmt != "csv"), ("--compress", args.compress),
+                                   ("--rotate-min", args.rotate_min), ("--rotate-mb", args.rotate_mb),
+                                   ("--rotate-rows", args.rotate_rows), ("--ods", args.ods), ("--capture", args.capture),
+                                   ("--profile", args.profile), ("--dtc-journal", args.dtc_journal)) if on]
+        if ignored:
+            print(f"[!] {', '.join(ignored)} do not apply to CAN monitoring; ignored with --can-monitor.", file=sys.stderr)
+        try:
+            last_csv = run_can_monitor(signals=args.can_monitor, port=args.port, baud=args.baud, protocol=args.can_protocol,
+                                       dump=args.can_dump, timing=args.can_timing, out_base=args.out, add_epoch=args.add_epoch,
+                                       fsync_rows=args.fsync_rows, fsync_ms=args.fsync_ms, paranoid=args.paranoid)
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"[-] CAN monitor: {e}")
+    else:
+        last_csv = run_logger(port=args.port, baud=args.baud, interval=args.interval, out_base=args.out,
+                              add_epoch=args.add_epoch, rotate_min=args.rotate_min, only=args.only, skip=args.skip,
+                              ods=args.ods, ods_save_every=args.ods_save_every, capture=args.capture,
+                              cache=not args.no_cache, cache_ttl=cache_ttl, fsync_rows=args.fsync_rows,
+                              fsync_ms=args.fsync_ms, paranoid=args.paranoid, rates=rates, layout=args.layout,
+                              fmt=args.fmt, chunk_rows=args.chunk_rows, rotate_mb=args.rotate_mb,
+                              rotate_rows=args.rotate_rows, compress=args.compress or "",
+                              compress_when=args.compress_when, rediscover=args.rediscover, dtc_budget_ms=args.dtc_budget_ms,
+                              dtc_mode=args.dtc_mode, dtc_lists_s=args.dtc_lists_s,
+                              dtc_heartbeat_s=args.dtc_heartbeat_s, dtc_journal=args.dtc_journal, profile=args.profile,
+                              deadband=deadband, deadband_hold_s=args.deadband_hold_s,
+                              capability_cache=None if args.no_capability_cache else args.capability_cache)
     if args.html_export:
-        base = os.path.splitext(os.path.basename(last_csv))[0]
+        base = os.path.splitext(os.path.basename(strip_compression_ext(last_csv.rstrip("/"))))[0]
         out_html = os.path.join("outputs", "html", base + "_report.html")
         os.makedirs(os.path.dirname(out_html), exist_ok=True)
         build_html_from_csv(last_csv, out_path=out_html, title=args.title)
@@ -14,15 +14,6 @@ except Exception:
     OBDCommand = object
     OBD_CMDS = None
 
-ODF_AVAILABLE = False
-try:
-    from odf.opendocument import OpenDocumentSpreadsheet
-    from odf.table import Table, TableRow, TableCell
-    from odf.text import P
-    ODF_AVAILABLE = True
-except Exception:
-    pass
-
 def safe_fsync(f):
     try:
         f.flush()
@@ -89,6 +80,43 @@ def detect_units_map(connection, cmds: List["OBDCommand"]) -> Dict[str, str]:
         units[name] = unit
     return units
 
+def unit_from_definition(cmd) -> str | None:
+    """Unit of a python-OBD command without talking to the car: decode an all-zero answer of
+    the command's length. '' for non-numeric commands, None if the decoder cannot be run."""
+    try:
+        from obd.protocols.protocol import Message
+        msg = Message([])
+        msg.data = bytearray([0x40 + int(cmd.mode), int(cmd.pid)])
+        msg.data += bytearray(max(0, int(cmd.bytes) - 2))
+        v = cmd.decode([msg])
+    except Exception:
+        return None
+    u = getattr(v, "units", None)
+    return str(u) if u else ""
+
+def units_from_definitions(cmds: List["OBDCommand"]) -> Tuple[Dict[str, str], List["OBDCommand"]]:
+    """Units per command name from the command definitions; also returns the commands whose
+    unit could not be derived that way (for detect_units_map)."""
+    units: Dict[str, str] = {}
+    unresolved: List["OBDCommand"] = []
+    for cmd in cmds:
+        unit = unit_from_definition(cmd)
+        if unit is None:
+            unresolved.append(cmd)
+        else:
+            units[getattr(cmd, "name", "UNKNOWN")] = unit
+    return units, unresolved
+
+def mark_supported(connection, cmds: List["OBDCommand"]) -> None:
+    """Add commands found by probing or from the capability cache to python-OBD's supported
+    set, so plain (non-forced) queries are sent for them."""
+    try:
+        known = connection.supported_commands
+        for cmd in cmds:
+            known.add(cmd)
+    except Exception:
+        pass
+
 def number_cell(mag):
     try:
         x = float(mag)
@@ -113,45 +141,23 @@ def value_to_cell(resp_value):
 
 def make_output_filename(base_name: str, ext: str) -> str:
     ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-    bn = base_name[:-4] if base_name.lower().endswith(ext) else base_name
-    return f"{bn}_{ts}{ext}"
+    bn = base_name[:-len(ext)] if base_name.lower().endswith(ext) else base_name
+    path, n = f"{bn}_{ts}{ext}", 1
+    # Size/row rotation can start several files per second; never reuse a name (or its compressed twin)
+    while os.path.exists(path) or os.path.exists(path + ".gz") or os.path.exists(path + ".zst"):
+        path, n = f"{bn}_{ts}_{n}{ext}", n + 1
+    return path
 
-def open_csv_with_header(path: str, header: list[str], units_row: list[str]):
+def open_csv_with_header(path: str, header: list[str], units_row: list[str] | None, compress: str | None = None):
     import csv
-    f = open(path, "w", newline="", encoding="utf-8")
+    if compress:
+        from ..csvio.compressed import open_text_writer
+        f = open_text_writer(path, compress)
+    else:
+        f = open(path, "w", newline="", encoding="utf-8")
     w = csv.writer(f, delimiter=';')
-    w.writerow(header); w.writerow(units_row)
+    w.writerow(header)
+    if units_row is not None:
+        w.writerow(units_row)
     safe_fsync(f)
     return f, w
-
-def ods_open_with_header(path: str, header: list[str], units_row: list[str]):
-    if not ODF_AVAILABLE:
-        raise RuntimeError("odfpy not available; install it")
-    doc = OpenDocumentSpreadsheet()
-    table = Table(name="OBD")
-    tr = TableRow()
-    for h in header:
-        cell = TableCell(valuetype="string"); cell.addElement(P(text=str(h))); tr.addElement(cell)
-    table.addElement(tr)
-    tr2 = TableRow()
-    for u in units_row:
-        cell = TableCell(valuetype="string"); cell.addElement(P(text=str(u))); tr2.addElement(cell)
-    table.addElement(tr2)
-    doc.spreadsheet.addElement(table)
-    doc.save(path)
-    return doc, table
-
-def ods_append_row(doc, table, row: list, save_path: str, save_now: bool):
-    from odf.table import TableRow, TableCell
-    from odf.text import P
-    tr = TableRow()
-    for val in row:
-        if val is None or val == "":
-            cell = TableCell(); tr.addElement(cell); continue
-        if isinstance(val, (int, float)) and not isinstance(val, bool):
-            cell = TableCell(valuetype="float", value=str(val)); tr.addElement(cell)
-        else:
-            cell = TableCell(valuetype="string"); cell.addElement(P(text=str(val))); tr.addElement(cell)
-    table.addElement(tr)
-    if save_now:
-        doc.save(save_path)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+import math
+from typing import Dict, List, Optional, Sequence
+
+from .core import NULL_CELL
+
+DEADBAND_MARK = "deadband"   # units-row cell under timestamp_iso: an empty cell repeats the value written above it
+GAP_CELL = "nan"             # a PID stopped answering: ends the hold, readers see NaN from here on
+DEFAULT_HOLD_S = 60.0
+
+
+def _norm(s: str) -> str:
+    return s.strip().lower().replace(" ", "_")
+
+
+def parse_deadbands(spec: str) -> Dict[str, float]:
+    """'RPM=25,COOLANT_TEMP=0.5,*=0' -> {'rpm': 25.0, 'coolant_temp': 0.5, '*': 0.0} (names normalized like --only).
+
+    Bands are in the PID's unit; 0 writes a value only when it changes. '*' applies to PIDs not listed.
+    """
+    out: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, sep, value = part.partition("=")
+        try:
+            band = float(value) if sep else math.nan
+        except ValueError:
+            band = math.nan
+        if not name.strip() or not (band >= 0 and math.isfinite(band)):
+            raise ValueError(f"Bad deadband '{part}' (expected PID=BAND with BAND >= 0)")
+        out[_norm(name)] = band
+    return out
+
+
+class DeadbandFilter:
+    """Change-only recording of wide rows, one band per PID.
+
+    A PID's value is written when it differs from the last value written to the file by more
+    than its band, or when that write is older than `hold_s`; otherwise its cell is left empty
+    and readers repeat the value above (csvio.readers). Every reconstructed sample is therefore
+    within the band of the value the logger read, and no value is older than `hold_s`. PIDs
+    without a band are written every time. `reset()` makes the next row complete (new file).
+    """
+
+    def __init__(self, names: Sequence[str], bands: Dict[str, float], hold_s: float = DEFAULT_HOLD_S):
+        self.bands_by_name = dict(bands)
+        self.hold_s = max(0.0, float(hold_s))
+        self.names: List[str] = []
+        self.bands: List[Optional[float]] = []
+        self.samples: List[int] = []
+        self.written: List[int] = []
+        self.max_error: List[float] = []
+        self._sq: List[float] = []
+        self.bytes_saved = 0
+        self.add(names)
+
+    def add(self, names: Sequence[str]) -> None:
+        """Append PIDs (columns); the next row is written in full."""
+        default = self.bands_by_name.get("*")
+        for n in names:
+            self.names.append(n)
+            self.bands.append(self.bands_by_name.get(_norm(n), default))
+            self.samples.append(0)
+            self.written.append(0)
+            self.max_error.append(0.0)
+            self._sq.append(0.0)
+        self.active = [i for i, b in enumerate(self.bands) if b is not None]
+        self.reset()
+
+    def reset(self) -> None:
+        self._last: List = [None] * len(self.names)   # last cell written to the current file
+        self._t = [0.0] * len(self.names)
+
+    def apply(self, row: list, offset: int, now: float, sampled=None) -> list:
+        """Copy of `row` with the cells (from `offset`, one per PID) that stay within their band
+        emptied. `now` is in seconds on any monotonic clock; `sampled` (indices) restricts the
+        filter to the PIDs read this tick, the others are left as they are."""
+        out = list(row)
+        last, stamp, hold = self._last, self._t, self.hold_s
+        for i in self.active:
+            if sampled is not None and i not in sampled:
+                continue
+            k = offset + i
+            cell = out[k]
+            prev = last[i]
+            if cell == NULL_CELL:
+                # No answer: mark the end of the held value once (nothing to end at the top of a file)
+                if prev != GAP_CELL:
+                    if prev is not None:
+                        out[k] = GAP_CELL
+                        self.written[i] += 1
+                    last[i] = GAP_CELL
+                continue
+            self.samples[i] += 1
+            if prev is None or prev == GAP_CELL or now - stamp[i] >= hold:
+                err = None
+            elif isinstance(cell, float) and isinstance(prev, float):
+                err = abs(cell - prev)
+                if err > self.bands[i]:
+                    err = None
+            else:
+                err = 0.0 if cell == prev else None
+            if err is None:
+                last[i] = cell
+                stamp[i] = now
+                self.written[i] += 1
+                continue
+            out[k] = NULL_CELL
+            self.bytes_saved += len(str(cell))
+            if err > self.max_error[i]:
+                self.max_error[i] = err
+            self._sq[i] += err * err
+        return out
+
+    def stats(self) -> dict:
+        samples = sum(self.samples[i] for i in self.active)
+        written = sum(self.written[i] for i in self.active)
+        pids = {}
+        for i in self.active:
+            n = self.samples[i]
+            pids[self.names[i]] = {
+                "band": self.bands[i], "samples": n, "written": self.written[i],
+                "max_error": round(self.max_error[i], 6),
+                "rms_error": round(math.sqrt(self._sq[i] / n), 6) if n else 0.0,
+            }
+        return {"hold_s": self.hold_s, "values": samples, "written": written,
+                "saved": round(1.0 - written / samples, 4) if samples else 0.0,
+                "bytes_saved": self.bytes_saved, "pids": pids}
+
+    def summary(self) -> str:
+        s = self.stats()
+        if not s["values"]:
+            return "no values"
+        text = (f"{s['written']} of {s['values']} values written ({s['saved']:.1%} fewer, "
+                f"{s['bytes_saved'] / 1e3:.1f} kB of cells saved), hold {self.hold_s:g} s")
+        worst = max(s["pids"].items(), key=lambda kv: kv[1]["max_error"] / kv[1]["band"] if kv[1]["band"] else 0.0)
+        if worst[1]["max_error"]:
+            text += f"; largest error {worst[0]} {worst[1]['max_error']:g} (band {worst[1]['band']:g})"
+        return text
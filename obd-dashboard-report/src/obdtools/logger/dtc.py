@@ -1,17 +1,31 @@
 from __future__ import annotations
 
+import json, time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
 
 # Reuse existing utils; no changes elsewhere
-from ..utils.fileio import AtomicCSVWriter, make_timestamped_file, ensure_dir
+from ..utils.fileio import AtomicCSVWriter, make_timestamped_file, ensure_dir, safe_fsync
 
-# ---------- Defaults (kept here; no CLI flags) ----------
+# ---------- Defaults (--dtc-mode, --dtc-lists-s, --dtc-heartbeat-s, --dtc-journal, --dtc-budget-ms override them) ----------
 DEFAULT_OUT_DIR = Path("outputs/csv")
 DEFAULT_PREFIX = "obd"              # filenames start with this prefix
 DEFAULT_ENABLE_FREEZE = True        # capture freeze frame when new confirmed DTC appears
 DEFAULT_TIMESTAMPED = True          # fresh files per run, like the main logger
+DEFAULT_PERIOD_S = 1.0              # a new snapshot cycle starts at most this often
+DTC_MODES = ("status", "full")      # status: lists only on a STATUS change / safety net; full: everything every cycle
+DEFAULT_MODE = "status"
+DEFAULT_LISTS_S = 60.0              # safety net: re-read the DTC lists at least this often in status mode
+DEFAULT_COUNTERS_S = 60.0           # since-clear counters have minute resolution on the ECU
+LIST_KEYS = ("pending", "confirmed", "permanent")
+COUNTER_KEYS = ("warmups", "time_since_clear", "time_with_mil_on", "dist_mil_on", "dist_since_clear")
+FREE_QUERY_S = 0.002                # answers faster than this (response cache hits) do not use up a tick
+DEFAULT_FREEZE_MAX_S = 30.0         # a freeze-frame capture stops reading after this long; rows so far are kept
+FREEZE_BITMAP_CMDS = ("DTC_PIDS_A", "DTC_PIDS_B", "DTC_PIDS_C")   # Mode 02 PIDs 00/20/40
+DEFAULT_HEARTBEAT_S = 60.0          # an unchanged snapshot is still written this often (0 = every cycle)
+JOURNAL_FORMAT = "dtc-journal"
+JOURNAL_VERSION = 1
 
 
 def _now_iso_local() -> str:
@@ -26,14 +40,14 @@ def _conn_supports(conn: Any, cmd: Any) -> bool:
         return False
 
 
-def _query(conn: Any, cmd: Any):
-    """Safe single query; returns python-OBD value or None."""
+def _query(conn: Any, cmd: Any, force: bool = False):
+    """Safe single query; returns python-OBD value or None. force: skip the support check."""
     if cmd is None:
         return None
     try:
-        if not _conn_supports(conn, cmd):
+        if not force and not _conn_supports(conn, cmd):
             return None
-        r = conn.query(cmd)
+        r = conn.query(cmd, force=force) if force else conn.query(cmd)
         if r is None or r.is_null():
             return None
         return r.value
@@ -41,6 +55,20 @@ def _query(conn: Any, cmd: Any):
         return None
 
 
+def _bitmap_bits(resp: Any) -> Optional[int]:
+    """32-bit support bitmap from a raw Mode 02 PID 00/20/40 answer (python-OBD does not decode
+    these); None for no answer or a negative response. Several ECUs: their bits are merged."""
+    bits = None
+    for msg in getattr(resp, "messages", None) or []:
+        try:
+            data = bytes(msg.data)
+        except Exception:
+            continue
+        if len(data) >= 6 and data[0] == 0x42:   # 42 <pid> [frame] b1 b2 b3 b4
+            bits = (bits or 0) | int.from_bytes(data[-4:], "big")
+    return bits
+
+
 def _normalize_dtc_list(val: Any) -> List[Tuple[str, str]]:
     """[(code, desc)] from various python-OBD shapes."""
     if val is None:
@@ -78,17 +106,78 @@ def _status_to_dict(status_val: Any) -> dict:
     return d
 
 
+class DTCJournal:
+    """Single-file alternative to the three DTC CSVs, JSON lines:
+      {"format": "dtc-journal", "version": 1, "started": local ISO}
+      {"table": "snapshot"|"events"|"freeze", "columns": [the CSV header]}   (once per table)
+      ["snapshot"|"events"|"freeze", value, ...]                           (one per CSV row)
+    Each batch of rows is one write and one fsync."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._f = path.open("w", encoding="utf-8")
+        self._f.write(json.dumps({"format": JOURNAL_FORMAT, "version": JOURNAL_VERSION,
+                                  "started": _now_iso_local()}) + "\n")
+        safe_fsync(self._f)
+
+    def table(self, name: str, header: Sequence[str]) -> "_JournalTable":
+        self._f.write(json.dumps({"table": name, "columns": list(header)}) + "\n")
+        return _JournalTable(self, name)
+
+    def write(self, name: str, rows: Iterable[Sequence[object]]) -> None:
+        lines = [json.dumps([name, *row]) + "\n" for row in rows]
+        if lines and not self._f.closed:
+            self._f.write("".join(lines))
+            safe_fsync(self._f)
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+
+class _JournalTable:
+    """AtomicCSVWriter look-alike writing one table of a DTCJournal."""
+
+    def __init__(self, journal: DTCJournal, name: str):
+        self.journal, self.name = journal, name
+        self.path = journal.path
+
+    def writerow(self, row: Sequence[object]) -> None:
+        self.journal.write(self.name, [row])
+
+    def writerows(self, rows: Iterable[Sequence[object]]) -> None:
+        self.journal.write(self.name, rows)
+
+    def close(self) -> None:
+        self.journal.close()
+
+
 class DTCLogger:
     """
     Inline (non-threaded) DTC logger.
     - Do NOT import python-OBD here. Inject the 'obd' module via ctor.
-    - Call .poll_once() from your main loop (e.g., every ~1s).
+    - Call .step() once per main-loop tick: the snapshot cycle (DTC lists, status, counters,
+      freeze frame) advances one adapter query per tick, or as many as fit in a time budget,
+      so it never stalls live PID sampling. .poll_once() runs a whole cycle at once.
+    - mode "status" (default) reads STATUS every cycle and the DTC lists only when its MIL
+      flag or DTC count changes, or every lists_s as a safety net (pending codes do not show
+      in STATUS); the since-clear counters every counters_s. Rows carry the last values read,
+      so the CSVs keep one snapshot per cycle. mode "full" reads everything every cycle.
+    - A new code starts a freeze-frame capture, a separate task step() advances alongside
+      the snapshot cycles: it reads the ECU's Mode 02 support bitmaps and then only the PIDs
+      stored in the frame (python-OBD's Mode 01 mirror when the ECU does not answer them),
+      stops after freeze_max_s, and writes its rows in one batch.
+    - Snapshot rows are run-length encoded: a row when any field changes, a heartbeat row
+      every heartbeat_s while nothing does, and an "end" row closing a run before a change
+      and on close(). `row_kind` says which, `cycles` how many snapshot cycles the row
+      stands for, so the full timeline can be rebuilt (see obdtools.dtc_to_text).
     - Call .close() on shutdown.
 
     Files (semicolon CSV, fresh per run):
       <prefix>_dtc_snapshot_YYYYMMDD_HHMMSS.csv
       <prefix>_dtc_events_YYYYMMDD_HHMMSS.csv
       <prefix>_dtc_freeze_YYYYMMDD_HHMMSS.csv
+    or, with journal=True, all three tables in <prefix>_dtc_journal_YYYYMMDD_HHMMSS.jsonl.
     """
 
     def __init__(
@@ -101,8 +190,25 @@ class DTCLogger:
         timestamped: bool = DEFAULT_TIMESTAMPED,
         enable_freeze: bool = DEFAULT_ENABLE_FREEZE,
         lock: Optional[Any] = None,  # optional shared lock (if your main loop already has one)
+        period_s: float = DEFAULT_PERIOD_S,
+        mode: str = DEFAULT_MODE,
+        lists_s: float = DEFAULT_LISTS_S,
+        counters_s: float = DEFAULT_COUNTERS_S,
+        freeze_max_s: float = DEFAULT_FREEZE_MAX_S,
+        heartbeat_s: float = DEFAULT_HEARTBEAT_S,
+        journal: bool = False,
+        clock: Callable[[], float] = time.monotonic,   # schedules lists/counters/heartbeats
     ) -> None:
+        if mode not in DTC_MODES:
+            raise ValueError(f"Unknown DTC mode '{mode}' (expected one of {', '.join(DTC_MODES)})")
         self.conn = conn
+        self.period_s = float(period_s)
+        self.mode = mode
+        self.lists_s = float(lists_s)
+        self.counters_s = float(counters_s)
+        self.freeze_max_s = float(freeze_max_s)
+        self.heartbeat_s = float(heartbeat_s)
+        self._clock = clock
         self._obd = obd_module
         self._lock = lock
         self._enable_freeze = bool(enable_freeze)
@@ -110,6 +216,14 @@ class DTCLogger:
         ensure_dir(out_dir)
         pre = f"{prefix}_" if prefix else ""
 
+        if journal:
+            jr_path = (make_timestamped_file(out_dir, f"{pre}dtc_journal.jsonl", ".jsonl") if timestamped
+                       else out_dir / f"{pre}dtc_journal.jsonl")
+            self._journal: Optional[DTCJournal] = DTCJournal(jr_path)
+            table = self._journal.table
+        else:
+            self._journal = None
+            table = None
         if timestamped:
             snap_path = make_timestamped_file(out_dir, f"{pre}dtc_snapshot.csv", ".csv")
             ev_path   = make_timestamped_file(out_dir, f"{pre}dtc_events.csv", ".csv")
@@ -119,8 +233,11 @@ class DTCLogger:
             ev_path   = out_dir / f"{pre}dtc_events.csv"
             frz_path  = out_dir / f"{pre}dtc_freeze.csv"
 
-        self._snap = AtomicCSVWriter(
-            snap_path,
+        def writer(name: str, path: Path, header: List[str]):
+            return table(name, header) if table is not None else AtomicCSVWriter(path, header)
+
+        self._snap = writer(
+            "snapshot", snap_path,
             [
                 "timestamp_iso",
                 "mil_on",
@@ -134,10 +251,12 @@ class DTCLogger:
                 "distance_with_mil_on_km",
                 "distance_since_clear_km",
                 "status_repr",
+                "row_kind",
+                "cycles",
             ],
         )
-        self._ev = AtomicCSVWriter(
-            ev_path,
+        self._ev = writer(
+            "events", ev_path,
             [
                 "timestamp_iso",
                 "event",
@@ -150,8 +269,8 @@ class DTCLogger:
                 "permanent_count",
             ],
         )
-        self._frz = AtomicCSVWriter(
-            frz_path,
+        self._frz = writer(
+            "freeze", frz_path,
             ["timestamp_iso", "freeze_dtc_code", "freeze_dtc_desc", "pid_name", "value"],
         )
 
@@ -168,10 +287,11 @@ class DTCLogger:
         self.CMD_DISTANCE_WITH_MIL_ON = getattr(cmds, "DISTANCE_WITH_MIL_ON", None)
         self.CMD_DISTANCE_SINCE_CLEAR = getattr(cmds, "DISTANCE_SINCE_DTC_CLEARED", None)
 
-        # all FREEZE FRAME PIDs start with "DTC_"
+        # all FREEZE FRAME PIDs start with "DTC_"; the support bitmaps and the frame's own DTC are not values
+        self.CMD_FREEZE_BITMAPS = [getattr(cmds, n, None) for n in FREEZE_BITMAP_CMDS]
         self.DTC_PID_CMDS = []
         for name in dir(cmds):
-            if name.startswith("DTC_"):
+            if name.startswith("DTC_") and name not in FREEZE_BITMAP_CMDS and name != "DTC_FREEZE_DTC":
                 try:
                     self.DTC_PID_CMDS.append(getattr(cmds, name))
                 except Exception:
@@ -194,21 +314,172 @@ class DTCLogger:
         }
         print("[DTC] support:", ", ".join(k for k,v in self._supports.items() if v))
 
+        # cooperative cycle state (see step())
+        self._task = None
+        self._freeze = None            # freeze-frame capture in progress (a generator like _task)
+        self._cycle_start: Optional[float] = None
+        self._avg_query_s = 0.0
+        self.cycles = self.queries = self.busy_ticks = 0
+        self.cycle_s_total = self.tick_s_max = 0.0
+
+        # status mode: what was read when, and the values rows carry in between
+        self._last_vals: dict = {}
+        self._status_key: Optional[tuple] = None
+        self._lists_at: Optional[float] = None
+        self._counters_at: Optional[float] = None
+        self.list_reads = self.list_reads_on_change = 0
+        self.query_counts: dict = {}   # snapshot key -> adapter queries issued
+
+        self.freeze_captures = self.freeze_rows = self.freeze_truncated = 0
+        self.freeze_from_bitmap = 0    # captures bounded by the ECU's Mode 02 bitmaps
+        self.freeze_s_max = 0.0
+
+        # run-length encoded snapshot rows: the last row written and the cycles folded since
+        self._snap_fields: Optional[list] = None
+        self._snap_at = 0.0
+        self._held_n = 0
+        self._held_ts = ""
+        self.snapshot_rows = self.event_rows = 0
+
 
     # ------------ public API ------------
     def poll_once(self) -> None:
-        """Poll DTC-related PIDs once and write snapshot/event rows."""
-        q = self._q
-
-        pending   = _normalize_dtc_list(q(self.CMD_GET_CURRENT_DTC))
-        confirmed = _normalize_dtc_list(q(self.CMD_GET_DTC))
-        permanent = _normalize_dtc_list(q(self.CMD_GET_PERMANENT_DTC))
-        status_val = q(self.CMD_STATUS)
-        warmups = q(self.CMD_WARMUPS_SINCE_CLEAR)
-        time_since_clear = q(self.CMD_TIME_SINCE_CLEAR)
-        time_with_mil_on = q(self.CMD_TIME_WITH_MIL_ON)
-        dist_mil_on = q(self.CMD_DISTANCE_WITH_MIL_ON)
-        dist_since_clear = q(self.CMD_DISTANCE_SINCE_CLEAR)
+        """Poll DTC-related PIDs once and write snapshot/event rows (a whole cycle, blocking),
+        including the freeze-frame capture a new code starts."""
+        for _ in self._cycle():
+            pass
+        if self._freeze is not None:
+            for _ in self._freeze:
+                pass
+            self._freeze = None
+
+    def step(self, budget_s: float = 0.0) -> int:
+        """Advance the snapshot cycle by one tick; returns the adapter queries issued.
+
+        One query is always allowed; more follow only while the elapsed time plus the average
+        query time stays within budget_s. A new cycle starts period_s after the last one started;
+        a freeze-frame capture uses the ticks (or the rest of the budget) the cycle leaves free.
+        """
+        now = time.monotonic()
+        if self._task is None:
+            # 5% slack: with ticks on the same grid as period_s, jitter must not skip a tick
+            if self._cycle_start is None or now - self._cycle_start >= self.period_s * 0.95:
+                self._task = self._cycle()
+                self._cycle_start = now
+            elif self._freeze is None:
+                return 0
+        issued = 0
+        while True:
+            snapshot = self._task is not None
+            q0 = time.monotonic()
+            try:
+                next(self._task if snapshot else self._freeze)
+            except StopIteration:
+                if snapshot:
+                    self._task = None
+                    self.cycles += 1
+                    self.cycle_s_total += time.monotonic() - self._cycle_start
+                else:
+                    self._freeze = None
+                if self._task is None and self._freeze is None:
+                    break
+                continue                   # ending a cycle is no query: the capture may use this tick
+            took = time.monotonic() - q0
+            if took >= FREE_QUERY_S:
+                issued += 1
+                self._avg_query_s = took if not self._avg_query_s else 0.8 * self._avg_query_s + 0.2 * took
+            if issued and time.monotonic() - now + self._avg_query_s > budget_s:
+                break
+        self.queries += issued
+        self.busy_ticks += 1
+        self.tick_s_max = max(self.tick_s_max, time.monotonic() - now)
+        return issued
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "cycles": self.cycles, "queries": self.queries, "busy_ticks": self.busy_ticks,
+                "snapshot_rows": self.snapshot_rows, "event_rows": self.event_rows,
+                "list_reads": self.list_reads, "list_reads_on_status_change": self.list_reads_on_change,
+                "queries_by_pid": dict(self.query_counts),
+                "freeze_captures": self.freeze_captures, "freeze_rows": self.freeze_rows,
+                "freeze_from_bitmap": self.freeze_from_bitmap, "freeze_truncated": self.freeze_truncated,
+                "freeze_longest_s": round(self.freeze_s_max, 3),
+                "avg_cycle_s": round(self.cycle_s_total / self.cycles, 3) if self.cycles else None,
+                "avg_query_ms": round(self._avg_query_s * 1000, 2), "max_tick_ms": round(self.tick_s_max * 1000, 2)}
+
+    def summary(self) -> str:
+        s = self.stats()
+        cycle = f"{s['avg_cycle_s']:.1f} s" if s["avg_cycle_s"] is not None else "n/a"
+        text = (f"{s['cycles']} snapshots in {s['snapshot_rows']} rows (avg {cycle} per cycle), {s['queries']} adapter queries over "
+                f"{s['busy_ticks']} ticks, avg {s['avg_query_ms']:.1f} ms per query, at most {s['max_tick_ms']:.1f} ms of a tick")
+        if self.mode == "status":
+            text += (f"; DTC lists read {self.list_reads}x ({self.list_reads_on_change} on a STATUS change, "
+                     f"safety net {self.lists_s:g} s)")
+        if self.freeze_captures:
+            text += (f"; {self.freeze_captures} freeze frames ({self.freeze_rows} values, longest "
+                     f"{self.freeze_s_max:.1f} s, {self.freeze_truncated} cut at {self.freeze_max_s:g} s)")
+        return text
+
+    # ------------ cycle ------------
+    def _snapshot_cmds(self) -> List[Tuple[str, Any]]:
+        return [("pending", self.CMD_GET_CURRENT_DTC), ("confirmed", self.CMD_GET_DTC),
+                ("permanent", self.CMD_GET_PERMANENT_DTC), ("status", self.CMD_STATUS),
+                ("warmups", self.CMD_WARMUPS_SINCE_CLEAR), ("time_since_clear", self.CMD_TIME_SINCE_CLEAR),
+                ("time_with_mil_on", self.CMD_TIME_WITH_MIL_ON), ("dist_mil_on", self.CMD_DISTANCE_WITH_MIL_ON),
+                ("dist_since_clear", self.CMD_DISTANCE_SINCE_CLEAR)]
+
+    def _fetch(self, vals: dict, keys) -> Any:
+        """Read the given snapshot keys into vals; a generator yielding after each adapter query."""
+        cmds = dict(self._snapshot_cmds())
+        for key in keys:
+            cmd = cmds[key]
+            if cmd is None or not _conn_supports(self.conn, cmd):
+                vals[key] = None       # no adapter round-trip: do not spend a tick on it
+                continue
+            vals[key] = self._q(cmd)
+            self.query_counts[key] = self.query_counts.get(key, 0) + 1
+            yield
+
+    def _cycle(self):
+        """One snapshot as a generator that yields after each adapter query (driven by step())."""
+        keys = [k for k, _ in self._snapshot_cmds()]
+        vals: dict = dict(self._last_vals)
+        now = self._clock()
+        yield from self._fetch(vals, ["status"])
+        status = _status_to_dict(vals["status"])
+        if self.mode == "full" or vals["status"] is None:
+            todo = [k for k in keys if k != "status"]
+        else:
+            key = (bool(status.get("mil", False)), int(status.get("dtc_count", 0)))
+            changed = self._status_key is not None and key != self._status_key
+            todo = []
+            if changed or self._lists_at is None or now - self._lists_at >= self.lists_s:
+                todo += LIST_KEYS
+                self.list_reads_on_change += int(changed)
+            if self._counters_at is None or now - self._counters_at >= self.counters_s:
+                todo += COUNTER_KEYS
+            self._status_key = key
+        if LIST_KEYS[0] in todo:
+            self.list_reads += 1
+            self._lists_at = now
+        if COUNTER_KEYS[0] in todo:
+            self._counters_at = now
+        yield from self._fetch(vals, todo)
+        self._last_vals = vals
+        confirmed, new_codes = self._record(vals)
+        if self._enable_freeze and new_codes and self._freeze is None:
+            self._freeze = self._freeze_frame(confirmed)
+
+    def _record(self, vals: dict) -> Tuple[List[Tuple[str, str]], bool]:
+        """Write the snapshot row and edge events; returns (confirmed list, new codes seen)."""
+        pending   = _normalize_dtc_list(vals["pending"])
+        confirmed = _normalize_dtc_list(vals["confirmed"])
+        permanent = _normalize_dtc_list(vals["permanent"])
+        status_val = vals["status"]
+        warmups = vals["warmups"]
+        time_since_clear = vals["time_since_clear"]
+        time_with_mil_on = vals["time_with_mil_on"]
+        dist_mil_on = vals["dist_mil_on"]
+        dist_since_clear = vals["dist_since_clear"]
 
         status = _status_to_dict(status_val)
         mil_on = bool(status.get("mil", False))
@@ -221,8 +492,8 @@ class DTCLogger:
 
         # snapshot row
         status_str = f"MIL={'ON' if mil_on else 'OFF'}; DTC={dtc_count}"
-        self._snap.writerow([
-            ts, int(mil_on), dtc_count,
+        self._snapshot(ts, [
+            int(mil_on), dtc_count,
             "|".join(sorted(set_p)), "|".join(sorted(set_c)), "|".join(sorted(set_perm)),
             str(warmups if warmups is not None else ""),
             str(time_since_clear if time_since_clear is not None else ""),
@@ -232,9 +503,10 @@ class DTCLogger:
             status_str,  # <- use this instead of raw object repr
         ])
 
-        # events (diffs)
+        # events (diffs), written as one batch
+        events: list = []
         def log_event(event: str, mode: str, code: str, desc: str):
-            self._ev.writerow([ts, event, mode, code, desc, int(mil_on), len(set_p), len(set_c), len(set_perm)])
+            events.append([ts, event, mode, code, desc, int(mil_on), len(set_p), len(set_c), len(set_perm)])
 
         new_p = set_p - self._prev_pending
         cleared_p = self._prev_pending - set_p
@@ -262,17 +534,41 @@ class DTCLogger:
 
         if self._prev_mil is not None and mil_on != self._prev_mil:
             log_event("mil_on" if mil_on else "mil_off", "-", "-", "-")
-
-        if self._enable_freeze and (new_c or new_p):
-            self._log_freeze_frame(confirmed)
-
+        if events:
+            self._ev.writerows(events)
+            self.event_rows += len(events)
 
         # update edges
         self._prev_pending, self._prev_confirmed, self._prev_permanent = set_p, set_c, set_perm
         self._prev_mil = mil_on
+        return confirmed, bool(new_c or new_p)
+
+    def _snapshot(self, ts: str, fields: list) -> None:
+        """Run-length encoded snapshot row (see the class docstring)."""
+        now = self._clock()
+        if fields == self._snap_fields:
+            self._held_n += 1
+            self._held_ts = ts
+            if now - self._snap_at >= self.heartbeat_s:
+                self._emit_snapshot(ts, fields, "heartbeat")
+            return
+        if self._held_n:
+            self._emit_snapshot(self._held_ts, self._snap_fields, "end")
+        self._held_n = 1
+        self._emit_snapshot(ts, fields, "change")
+
+    def _emit_snapshot(self, ts: str, fields: list, kind: str) -> None:
+        self._snap.writerow([ts, *fields, kind, self._held_n])
+        self.snapshot_rows += 1
+        self._snap_fields, self._snap_at, self._held_n = fields, self._clock(), 0
 
     def close(self) -> None:
         """Close files (call in your runner's finally)."""
+        if self._held_n and self._snap_fields is not None:
+            try:
+                self._emit_snapshot(self._held_ts, self._snap_fields, "end")
+            except Exception:
+                pass
         for w in (self._snap, self._ev, self._frz):
             try:
                 w.close()
@@ -280,18 +576,49 @@ class DTCLogger:
                 pass
 
     # ------------ internals ------------
-    def _q(self, cmd: Any):
+    def _q(self, cmd: Any, force: bool = False):
         if self._lock is None:
-            return _query(self.conn, cmd)
+            return _query(self.conn, cmd, force)
         # Optional: serialize with your main lock if you already use one
         try:
             with self._lock:
-                return _query(self.conn, cmd)
+                return _query(self.conn, cmd, force)
         except Exception:
-            return _query(self.conn, cmd)
+            return _query(self.conn, cmd, force)
 
-    def _log_freeze_frame(self, confirmed_list: List[Tuple[str, str]]) -> None:
+    def _raw(self, cmd: Any):
+        """Undecoded response (for the Mode 02 bitmaps python-OBD leaves as raw bytes), or None."""
+        try:
+            if self._lock is None:
+                return self.conn.query(cmd, force=True)
+            with self._lock:
+                return self.conn.query(cmd, force=True)
+        except Exception:
+            return None
+
+    def _freeze_support(self):
+        """PIDs stored in freeze frame 0 per the ECU's Mode 02 bitmaps; a generator yielding after
+        each query whose return value is the set, or None when the ECU does not answer PID 00."""
+        pids: Optional[set] = None
+        for cmd in self.CMD_FREEZE_BITMAPS:
+            if cmd is None:
+                break
+            bits = _bitmap_bits(self._raw(cmd))
+            self.query_counts["freeze_bitmap"] = self.query_counts.get("freeze_bitmap", 0) + 1
+            yield
+            if bits is None:
+                break
+            base = getattr(cmd, "pid", 0)
+            pids = (pids or set()) | {base + i + 1 for i in range(32) if bits >> (31 - i) & 1}
+            if not bits & 1:               # bit 32: the next block is supported
+                break
+        return pids
+
+    def _freeze_frame(self, confirmed_list: List[Tuple[str, str]]):
+        """Freeze-frame rows for a new DTC; a generator like _cycle (yields after each query)."""
         frz = self._q(self.CMD_FREEZE_DTC)
+        if self.CMD_FREEZE_DTC is not None and _conn_supports(self.conn, self.CMD_FREEZE_DTC):
+            yield
         frz_dtc = None
         frz_desc = ""
         if frz:
@@ -305,15 +632,34 @@ class DTCLogger:
         if not frz_dtc or frz_dtc == self._last_freeze_code:
             return
 
+        # Values cached by an earlier capture (TTL_FREEZE) belong to the previous fault's frame
+        invalidate = getattr(self.conn, "invalidate", None)
+        if callable(invalidate):
+            for cmd in list(self.CMD_FREEZE_BITMAPS) + list(self.DTC_PID_CMDS):
+                if cmd is not None:
+                    invalidate(cmd)
+
+        # The frame was stored when the fault was set: reading it over several ticks is consistent.
+        t0 = time.monotonic()
         ts = _now_iso_local()
-        cmds = self.DTC_PID_CMDS
+        stored = yield from self._freeze_support()
+        if stored is None:
+            cmds = [c for c in self.DTC_PID_CMDS if _conn_supports(self.conn, c)]
+        else:
+            cmds = [c for c in self.DTC_PID_CMDS if getattr(c, "pid", None) in stored]
+            self.freeze_from_bitmap += 1
+        rows = []
         for cmd in cmds:
-            name = getattr(cmd, "name", str(cmd))
-            if name == "FREEZE_DTC":
-                continue
-            val = self._q(cmd)
-            if val is None:
-                continue
-            self._frz.writerow([ts, frz_dtc, frz_desc, name, str(val)])
-
+            if time.monotonic() - t0 + self._avg_query_s > self.freeze_max_s:
+                self.freeze_truncated += 1
+                break
+            val = self._q(cmd, force=stored is not None)   # the ECU's bitmap beats python-OBD's mirror
+            self.query_counts["freeze"] = self.query_counts.get("freeze", 0) + 1
+            yield
+            if val is not None:
+                rows.append([ts, frz_dtc, frz_desc, getattr(cmd, "name", str(cmd)), str(val)])
+        self._frz.writerows(rows)
+        self.freeze_captures += 1
+        self.freeze_rows += len(rows)
+        self.freeze_s_max = max(self.freeze_s_max, time.monotonic() - t0)
         self._last_freeze_code = frz_dtc
@@ -0,0 +1,146 @@
+from __future__ import annotations
+import re, struct, time, zlib
+from typing import List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# Streaming .ods: one zip whose last member, content.xml, is a deflate stream that keeps growing.
+#   mimetype | styles.xml | META-INF/manifest.xml | content.xml (data descriptor) ... | tail
+# Rows are serialized and compressed as they arrive; a checkpoint writes the compressed bytes
+# produced since the previous one, then a fresh tail (a copy of the compressor finishing the XML,
+# the data descriptor, central directory and end record) and truncates the file there. Its cost
+# depends on the rows since the last checkpoint, never on the history, and after each checkpoint
+# the file is a complete spreadsheet. Limit: 4 GiB per file (no zip64), so rotate long logs.
+
+DEFAULT_CHECKPOINT_MS = 10_000.0   # checkpoint at least this often while rows arrive
+MIMETYPE = b"application/vnd.oasis.opendocument.spreadsheet"
+_NS = ('xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+       'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+       'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"')
+MANIFEST = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">'
+            '<manifest:file-entry manifest:full-path="/" manifest:version="1.2" '
+            'manifest:media-type="application/vnd.oasis.opendocument.spreadsheet"/>'
+            '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+            '<manifest:file-entry manifest:full-path="styles.xml" manifest:media-type="text/xml"/>'
+            '</manifest:manifest>').encode()
+STYLES = (f'<?xml version="1.0" encoding="UTF-8"?>\n<office:document-styles {_NS} office:version="1.2">'
+          '<office:styles/></office:document-styles>').encode()
+CONTENT_HEAD = (f'<?xml version="1.0" encoding="UTF-8"?>\n<office:document-content {_NS} office:version="1.2">'
+                '<office:body><office:spreadsheet><table:table table:name="OBD">').encode()
+CONTENT_TAIL = b"</table:table></office:spreadsheet></office:body></office:document-content>"
+
+_LOCAL = struct.Struct("<IHHHHHIIIHH")
+_DESCRIPTOR = struct.Struct("<IIII")
+_CENTRAL = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END = struct.Struct("<IHHHHIIH")
+_FLAG_DESCRIPTOR = 0x08
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _dos_time(t: float) -> Tuple[int, int]:
+    lt = time.localtime(t)
+    return ((lt.tm_hour << 11) | (lt.tm_min << 5) | (lt.tm_sec // 2),
+            ((max(1980, lt.tm_year) - 1980) << 9) | (lt.tm_mon << 5) | lt.tm_mday)
+
+
+def row_xml(row: Sequence) -> str:
+    """One <table:table-row>: numbers as float cells, None/"" as empty cells, the rest as text."""
+    cells = []
+    for val in row:
+        if val is None or val == "":
+            cells.append("<table:table-cell/>")
+        elif isinstance(val, (int, float)) and not isinstance(val, bool):
+            cells.append(f'<table:table-cell office:value-type="float" office:value="{val}"/>')
+        else:
+            text = escape(_INVALID_XML.sub("", str(val)))
+            cells.append(f'<table:table-cell office:value-type="string"><text:p>{text}</text:p></table:table-cell>')
+    return "<table:table-row>" + "".join(cells) + "</table:table-row>"
+
+
+class OdsStreamWriter:
+    """Append-only .ods with constant-cost checkpoints. Used as both the file and the row writer
+    of a BackgroundWriter: writerow() serializes, flush() checkpoints, fileno() lets it fsync."""
+
+    def __init__(self, path: str, header: Sequence, units_row: Optional[Sequence] = None, level: int = 6):
+        self.name = path
+        self.rows = self.checkpoints = 0
+        self.checkpoint_s_max = 0.0
+        self._f = open(path, "w+b")
+        self._dos = _dos_time(time.time())
+        self._entries: List[tuple] = []   # (name, method, flags, crc, csize, usize, offset)
+        self._add_member("mimetype", MIMETYPE, stored=True)
+        self._add_member("styles.xml", STYLES)
+        self._add_member("META-INF/manifest.xml", MANIFEST)
+        self._content_offset = self._f.tell()
+        name = b"content.xml"
+        self._f.write(_LOCAL.pack(0x04034B50, 20, _FLAG_DESCRIPTOR, 8, *self._dos, 0, 0, 0, len(name), 0) + name)
+        self._data_end = self._f.tell()
+        self._z = zlib.compressobj(level, zlib.DEFLATED, -15)
+        self._crc = self._usize = self._csize = 0
+        self._pending: List[bytes] = []
+        self._dirty = True
+        self._feed(CONTENT_HEAD)
+        self._feed(row_xml(header).encode())
+        if units_row is not None:
+            self._feed(row_xml(units_row).encode())
+        self.flush()
+
+    def _add_member(self, name: str, data: bytes, stored: bool = False) -> None:
+        raw = name.encode()
+        payload = data if stored else zlib.compress(data, 6)[2:-4]   # raw deflate
+        crc = zlib.crc32(data)
+        offset = self._f.tell()
+        method = 0 if stored else 8
+        self._f.write(_LOCAL.pack(0x04034B50, 20, 0, method, *self._dos, crc, len(payload), len(data), len(raw), 0) + raw)
+        self._f.write(payload)
+        self._entries.append((raw, method, 0, crc, len(payload), len(data), offset))
+
+    def _feed(self, data: bytes) -> None:
+        self._crc = zlib.crc32(data, self._crc)
+        self._usize += len(data)
+        out = self._z.compress(data)
+        if out:
+            self._pending.append(out)
+
+    def writerow(self, row: Sequence) -> None:
+        self._feed(row_xml(row).encode("utf-8"))
+        self.rows += 1
+        self._dirty = True
+
+    def flush(self) -> None:
+        """Checkpoint: make the file on disk a complete .ods holding every row so far."""
+        if not self._dirty:
+            return
+        t = time.perf_counter()
+        finisher = self._z.copy()
+        tail = finisher.compress(CONTENT_TAIL) + finisher.flush()
+        body = b"".join(self._pending)
+        self._pending.clear()
+        crc = zlib.crc32(CONTENT_TAIL, self._crc)
+        usize = self._usize + len(CONTENT_TAIL)
+        csize = self._csize + len(body) + len(tail)
+
+        entries = self._entries + [(b"content.xml", 8, _FLAG_DESCRIPTOR, crc, csize, usize, self._content_offset)]
+        cd_offset = self._data_end + len(body) + len(tail) + _DESCRIPTOR.size
+        central = b"".join(_CENTRAL.pack(0x02014B50, 20, 20, flags, method, *self._dos, c, cs, us, len(n), 0, 0, 0, 0, 0, off) + n
+                           for n, method, flags, c, cs, us, off in entries)
+        end = _END.pack(0x06054B50, 0, 0, len(entries), len(entries), len(central), cd_offset, 0)
+
+        self._f.seek(self._data_end)
+        self._f.write(body + tail + _DESCRIPTOR.pack(0x08074B50, crc, csize, usize) + central + end)
+        self._f.truncate()
+        self._f.flush()
+        self._data_end += len(body)
+        self._csize += len(body)
+        self.checkpoints += 1
+        self._dirty = False
+        self.checkpoint_s_max = max(self.checkpoint_s_max, time.perf_counter() - t)
+
+    def fileno(self) -> int:
+        return self._f.fileno()
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.close()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+import json, math, os, time
+from collections import deque
+from typing import Callable, Optional
+
+from ..csvio.compressed import strip_compression_ext
+
+MAX_SAMPLES = 100_000   # percentiles cover the most recent ticks (~28 h at 1 Hz); counters cover the whole run
+
+
+def percentile(values, p: float) -> float:
+    """Nearest-rank percentile (p in 0..100); NaN for an empty sequence."""
+    s = sorted(values)
+    if not s:
+        return math.nan
+    return s[min(len(s) - 1, max(0, math.ceil(p / 100 * len(s)) - 1))]
+
+
+class DeadlinePacer:
+    """Fixed-rate loop pacing on the monotonic clock.
+
+    Deadlines sit on a fixed grid (start + k * interval), so the time spent querying and
+    writing is subtracted from the sleep and the rate does not drift. A cycle that ends past
+    the next deadline is an overrun: the next cycle starts at once, and deadlines missed
+    entirely are skipped (counted, never replayed as a burst).
+    """
+
+    def __init__(self, interval: float, clock: Optional[Callable[[], float]] = None,
+                 sleep: Optional[Callable[[float], None]] = None, max_samples: int = MAX_SAMPLES):
+        self.interval = float(interval)
+        self._clock = clock or time.monotonic
+        self._sleep = sleep
+        self.deadline: Optional[float] = None
+        self.ticks = self.overruns = self.skipped = 0
+        self.late_ms: deque = deque(maxlen=max_samples)   # cycle start - its deadline
+        self.work_ms: deque = deque(maxlen=max_samples)   # cycle start -> end of work
+        self.late_max_ms = 0.0
+        self._first = self._start = 0.0
+
+    def tick(self) -> None:
+        """Mark the start of a cycle."""
+        now = self._clock()
+        if self.deadline is None:
+            self.deadline = self._first = now
+        late = (now - self.deadline) * 1000.0
+        self.late_ms.append(late)
+        self.late_max_ms = max(self.late_max_ms, late)
+        self._start = now
+        self.ticks += 1
+
+    def wait(self) -> None:
+        """End of a cycle's work: sleep until the next deadline (sleep(0) when behind)."""
+        now = self._clock()
+        if self.deadline is None:
+            self.deadline = self._first = self._start = now
+        self.work_ms.append((now - self._start) * 1000.0)
+        self.deadline += self.interval
+        if now > self.deadline:
+            self.overruns += 1
+            missed = int((now - self.deadline) // self.interval)
+            if missed:
+                self.skipped += missed
+                self.deadline += missed * self.interval
+        (self._sleep or time.sleep)(max(0.0, self.deadline - self._clock()))
+
+    def stats(self) -> dict:
+        elapsed = self._start - self._first
+        achieved = (self.ticks - 1) / elapsed if self.ticks > 1 and elapsed > 0 else 0.0
+        out = {
+            "interval_s": self.interval,
+            "target_hz": 1.0 / self.interval if self.interval > 0 else 0.0,
+            "achieved_hz": achieved,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped_ticks": self.skipped,
+            "late_max_ms": self.late_max_ms,
+        }
+        for name, values in (("late", self.late_ms), ("work", self.work_ms)):
+            for p in (50, 95, 99):
+                v = percentile(values, p)
+                out[f"{name}_p{p}_ms"] = None if math.isnan(v) else round(v, 3)
+        return out
+
+    def summary(self) -> str:
+        s = self.stats()
+        def ms(v): return "n/a" if v is None else f"{v:.1f}"
+        return (f"{s['ticks']} ticks at {s['achieved_hz']:.2f} Hz (target {s['target_hz']:.2f}), "
+                f"{s['overruns']} overruns, {s['skipped_ticks']} skipped ticks; start jitter "
+                f"p50/p95/p99/max {ms(s['late_p50_ms'])}/{ms(s['late_p95_ms'])}/{ms(s['late_p99_ms'])}/"
+                f"{s['late_max_ms']:.1f} ms; cycle work p50/p99 {ms(s['work_p50_ms'])}/{ms(s['work_p99_ms'])} ms")
+
+    def write_stats(self, path: str, **extra) -> str:
+        """Write stats() (plus extra keys) as JSON; returns the path."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**extra, **self.stats()}, f, indent=2)
+        return path
+
+
+class StageTimer:
+    """Monotonic time spent in named startup stages (connect, discovery, ...); `mark(stage)`
+    closes the stage that ends now."""
+
+    def __init__(self, clock: Optional[Callable[[], float]] = None):
+        self._clock = clock or time.monotonic
+        self._t0 = self._last = self._clock()
+        self.stages: dict = {}
+
+    def mark(self, stage: str) -> None:
+        now = self._clock()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def total(self) -> float:
+        return self._last - self._t0
+
+    def stats(self) -> dict:
+        return {**{k: round(v, 3) for k, v in self.stages.items()}, "total": round(self.total(), 3)}
+
+    def summary(self) -> str:
+        return ", ".join(f"{k} {v:.2f} s" for k, v in self.stages.items()) + f"; total {self.total():.2f} s"
+
+
+def stats_path_for(log_path: str) -> str:
+    """Sidecar next to a log: outputs/csv/obd_all_X.csv (or .csv.gz, .arrow, .npzc) -> outputs/csv/obd_all_X.stats.json"""
+    return os.path.splitext(strip_compression_ext(log_path.rstrip("/" + os.sep)))[0] + ".stats.json"
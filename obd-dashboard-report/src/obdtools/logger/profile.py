@@ -0,0 +1,180 @@
+from __future__ import annotations
+import csv, json, math, os, time
+from array import array
+from typing import Callable, Optional, Sequence, Tuple
+
+from ..csvio.compressed import strip_compression_ext
+from .pacing import MAX_SAMPLES, percentile
+
+# Stages of one logger cycle, in loop order (see runner.run_logger); "sleep" is the pacer's wait
+STAGES = ("query", "write", "ods", "dtc", "rotate", "sleep")
+# Per-PID latency histogram: log-spaced bins, 10% wide, from 0.1 ms up to ~30 s
+_BIN0_S = 1e-4
+_BIN_LOG = math.log(1.1)
+_BINS = 132
+
+
+def profile_paths_for(log_path: str) -> Tuple[str, str]:
+    """Sidecars next to a log: obd_all_X.csv(.gz) -> (obd_all_X.profile.json, obd_all_X.profile.tsv).
+
+    The per-cycle table is tab separated so it never matches an obd_all_*.csv log glob."""
+    base = os.path.splitext(strip_compression_ext(log_path.rstrip("/" + os.sep)))[0]
+    return base + ".profile.json", base + ".profile.tsv"
+
+
+def _ms(v: float) -> Optional[float]:
+    return None if v is None or math.isnan(v) else round(v * 1000.0, 3)
+
+
+class CycleProfiler:
+    """Per-cycle stage durations and per-PID query latency / null counts (`obdtools log --profile`).
+
+    Everything is preallocated: one float ring of max_cycles per stage (percentiles cover the
+    most recent cycles, totals the whole run) and, per PID, counters and a fixed log-spaced
+    latency histogram. Recording is a clock read and a few index stores. Call begin() at the
+    start of a cycle, mark(stage) when a stage ends (time since the previous mark), end() last.
+    """
+
+    def __init__(self, pid_names: Sequence[str], max_cycles: int = MAX_SAMPLES,
+                 clock: Optional[Callable[[], float]] = None):
+        self._clock = clock or time.perf_counter
+        self.pid_names = list(pid_names)
+        self._index = {n: i for i, n in enumerate(self.pid_names)}
+        self.capacity = max(1, int(max_cycles))
+        zeros = array("d", bytes(8 * self.capacity))
+        self.stage_s = {s: array("d", zeros) for s in STAGES}
+        self.cycle_s = array("d", zeros)
+        self.start_s = array("d", zeros)        # cycle start, seconds since the profiler was created
+        self.total_s = dict.fromkeys(STAGES, 0.0)
+        self.max_s = dict.fromkeys(STAGES, 0.0)
+        n = len(self.pid_names)
+        self.queries = array("q", bytes(8 * n))
+        self.nulls = array("q", bytes(8 * n))
+        self.latency_s = array("d", bytes(8 * n))
+        self.latency_max_s = array("d", bytes(8 * n))
+        self.hist = [array("q", bytes(8 * _BINS)) for _ in range(n)]
+        self.cycles = 0
+        self._created = self._clock()
+        self._slot = 0
+        self._t = self._t0 = 0.0
+
+    # ------------ recording ------------
+    def begin(self) -> None:
+        self._slot = slot = self.cycles % self.capacity
+        for a in self.stage_s.values():
+            a[slot] = 0.0
+        self._t = self._t0 = self._clock()
+        self.start_s[slot] = self._t0 - self._created
+
+    def mark(self, stage: str) -> None:
+        now = self._clock()
+        self.stage_s[stage][self._slot] += now - self._t
+        self._t = now
+
+    def end(self) -> None:
+        slot = self._slot
+        self.cycle_s[slot] = self._t - self._t0
+        for s, a in self.stage_s.items():
+            v = a[slot]
+            self.total_s[s] += v
+            if v > self.max_s[s]:
+                self.max_s[s] = v
+        self.cycles += 1
+
+    def pid(self, name: str, seconds: float, null: bool) -> None:
+        i = self._index.get(name)
+        if i is None:
+            return
+        self.queries[i] += 1
+        self.nulls[i] += null
+        self.latency_s[i] += seconds
+        if seconds > self.latency_max_s[i]:
+            self.latency_max_s[i] = seconds
+        b = int(math.log(seconds / _BIN0_S) / _BIN_LOG) + 1 if seconds > _BIN0_S else 0
+        self.hist[i][min(b, _BINS - 1)] += 1
+
+    # ------------ results ------------
+    def _retained(self) -> list:
+        """Ring slots of the retained cycles, oldest first."""
+        n = min(self.cycles, self.capacity)
+        first = self.cycles - n
+        return [(first + k) % self.capacity for k in range(n)]
+
+    def _hist_percentile(self, i: int, p: float) -> float:
+        """Upper edge of the histogram bin holding the p-th percentile latency (seconds)."""
+        total = self.queries[i]
+        if not total:
+            return math.nan
+        rank, seen = max(1, math.ceil(p / 100 * total)), 0
+        for b, c in enumerate(self.hist[i]):
+            seen += c
+            if seen >= rank:
+                return _BIN0_S * math.exp(b * _BIN_LOG)
+        return self.latency_max_s[i]
+
+    def stats(self) -> dict:
+        slots = self._retained()
+        run = sum(self.total_s.values())
+        stages = {}
+        for s in STAGES:
+            vals = [self.stage_s[s][k] for k in slots]
+            stages[s] = {"total_s": round(self.total_s[s], 3),
+                         "mean_ms": _ms(self.total_s[s] / self.cycles) if self.cycles else None,
+                         "p50_ms": _ms(percentile(vals, 50)), "p95_ms": _ms(percentile(vals, 95)),
+                         "p99_ms": _ms(percentile(vals, 99)), "max_ms": _ms(self.max_s[s]),
+                         "share": round(self.total_s[s] / run, 4) if run else 0.0}
+        cycle = [self.cycle_s[k] for k in slots]
+        pids = {}
+        for i, name in enumerate(self.pid_names):
+            q = self.queries[i]
+            pids[name] = {"queries": q, "nulls": self.nulls[i],
+                          "null_rate": round(self.nulls[i] / q, 4) if q else None,
+                          "mean_ms": _ms(self.latency_s[i] / q) if q else None,
+                          "p50_ms": _ms(self._hist_percentile(i, 50)), "p95_ms": _ms(self._hist_percentile(i, 95)),
+                          "max_ms": _ms(self.latency_max_s[i]) if q else None}
+        return {"cycles": self.cycles, "retained_cycles": len(slots), "run_s": round(run, 3),
+                "cycle": {"mean_ms": _ms(run / self.cycles) if self.cycles else None,
+                          "p50_ms": _ms(percentile(cycle, 50)), "p95_ms": _ms(percentile(cycle, 95)),
+                          "p99_ms": _ms(percentile(cycle, 99)), "max_ms": _ms(max(cycle) if cycle else math.nan)},
+                "stages": stages, "pids": pids}
+
+    def summary(self, top: int = 5) -> str:
+        """Stage table plus the slowest and most often null PIDs."""
+        s = self.stats()
+        def ms(v): return f"{'n/a':>8}" if v is None else f"{v:8.1f}"
+        lines = [f"{s['cycles']} cycles, mean {ms(s['cycle']['mean_ms']).strip()} ms "
+                 f"(p95 {ms(s['cycle']['p95_ms']).strip()}, max {ms(s['cycle']['max_ms']).strip()} ms)",
+                 f"  {'stage':<8} {'mean ms':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'share':>6}"]
+        for name, st in s["stages"].items():
+            lines.append(f"  {name:<8} {ms(st['mean_ms'])} {ms(st['p50_ms'])} {ms(st['p95_ms'])} "
+                         f"{ms(st['p99_ms'])} {ms(st['max_ms'])} {st['share']:>6.0%}")
+        queried = [(n, p) for n, p in s["pids"].items() if p["queries"]]
+        slow = sorted(queried, key=lambda x: -(x[1]["p95_ms"] or 0))[:top]
+        if slow:
+            lines.append("  slowest PIDs (p95): " + ", ".join(f"{n} {p['p95_ms']:.1f} ms" for n, p in slow))
+        nulls = sorted((x for x in queried if x[1]["nulls"]), key=lambda x: -x[1]["null_rate"])[:top]
+        if nulls:
+            lines.append("  null answers: " + ", ".join(f"{n} {p['null_rate']:.0%}" for n, p in nulls))
+        return "\n".join(lines)
+
+    def write(self, log_path: str, **extra) -> Tuple[str, str]:
+        """<log>.profile.json (stats() plus extra keys) and <log>.profile.tsv (one row per retained cycle)."""
+        json_path, csv_path = profile_paths_for(log_path)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({**extra, **self.stats()}, f, indent=2)
+        first = self.cycles - min(self.cycles, self.capacity)
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, delimiter="\t")
+            w.writerow(["cycle", "t_s", "cycle_ms"] + [f"{s}_ms" for s in STAGES])
+            for k, slot in enumerate(self._retained()):
+                w.writerow([first + k, round(self.start_s[slot], 4), round(self.cycle_s[slot] * 1000, 3)]
+                           + [round(self.stage_s[s][slot] * 1000, 3) for s in STAGES])
+        return json_path, csv_path
+
+
+class NoProfile:
+    """Stand-in when --profile is off: the loop's marks cost a no-op call."""
+
+    def begin(self) -> None: pass
+    def mark(self, stage: str) -> None: pass
+    def end(self) -> None: pass
@@ -1,26 +1,87 @@
 from __future__ import annotations
-import os, sys, time, signal, datetime as dt
-from .core import (safe_fsync, list_supported_commands, detect_units_map, value_to_cell,
-                   NULL_CELL, open_csv_with_header, ods_open_with_header, ods_append_row,
-                   make_output_filename)
+import math, os, sys, time, signal, datetime as dt
+from .core import (list_supported_commands, detect_units_map, units_from_definitions, mark_supported,
+                   value_to_cell, NULL_CELL, open_csv_with_header, make_output_filename)
+from .capabilities import CapabilityCache, commands_from_names, vehicle_key
 from .dtc import DTCLogger
+from .cache import CachedConnection
+from .writer import BackgroundWriter, CommitPolicy, SegmentCompressor, WriterError, DEFAULT_COMMIT_MS
+from .ods_stream import OdsStreamWriter, DEFAULT_CHECKPOINT_MS
+from .pacing import DeadlinePacer, StageTimer, stats_path_for
+from .profile import CycleProfiler, NoProfile
+from .deadband import DeadbandFilter, DEADBAND_MARK, DEFAULT_HOLD_S
+from .schedule import RateSchedule, LONG_HEADER, SPARSE_MARK
+from ..csvio.columnar import EXTENSIONS, DEFAULT_CHUNK_ROWS, open_columnar_log, to_float
+from ..csvio.compressed import COMPRESSIONS
 
 def run_logger(*, port: str = "/dev/ttyUSB0", baud: int | None = None, interval: float = 1.0,
                out_base: str = "outputs/csv/obd_all", add_epoch: bool = False, rotate_min: int = 0,
-               only: str = "", skip: str = "", ods: bool = False, ods_save_every: int = 5) -> str:
-    """Run the logger until Ctrl+C. Returns last CSV path written."""
+               only: str = "", skip: str = "", ods: bool = False, ods_save_every: int = 5,
+               capture: str | None = None, cache: bool = True,
+               cache_ttl: dict | None = None, fsync_rows: int = 0,
+               fsync_ms: float = DEFAULT_COMMIT_MS, paranoid: bool = False,
+               rates: dict | None = None, layout: str = "wide", fmt: str = "csv",
+               chunk_rows: int = DEFAULT_CHUNK_ROWS, rotate_mb: float = 0, rotate_rows: int = 0,
+               compress: str = "", compress_when: str = "stream", capability_cache: str | None = None,
+               rediscover: bool = False, dtc_budget_ms: float = 0.0, dtc_mode: str = "status",
+               dtc_lists_s: float = 60.0, dtc_heartbeat_s: float = 60.0, dtc_journal: bool = False,
+               profile: bool = False, deadband: dict | None = None,
+               deadband_hold_s: float = DEFAULT_HOLD_S) -> str:
+    """Run the logger until Ctrl+C. Returns last CSV path written.
+
+    capture: optional path of a JSON-lines transcript of every byte exchanged with the adapter.
+    cache: reuse answers younger than each PID's TTL (see logger.cache); cache_ttl overrides per PID name.
+    fsync_rows / fsync_ms / paranoid: group-commit policy of the background CSV writer (see logger.writer).
+    The loop is paced on fixed deadlines (see logger.pacing); rate and jitter go to <csv>.stats.json on exit.
+    rates: per-PID sampling rates in Hz keyed by normalized name (see logger.schedule.parse_rates); other
+    PIDs run every `interval`. layout: "wide" (one row per tick, empty cells for PIDs not sampled) or
+    "long" (one timestamp;pid;value;unit row per sample).
+    fmt: "csv", or a columnar format ("arrow", "npz-chunks"; see csvio.columnar) written in chunks of
+    chunk_rows rows: epoch-ns timestamps and float32 PID columns, wide layout only, no ODS.
+    rotate_min / rotate_mb / rotate_rows: start a new file after N minutes, N MB on disk or N rows.
+    compress: "gzip" or "zstd" (CSV only); compress_when "stream" writes <name>.csv.gz directly
+    (flushed at every commit), "closed" compresses each finished segment on a worker thread.
+    capability_cache: JSON file of supported PIDs and units per vehicle (see logger.capabilities);
+    a hit skips PID discovery, rediscover ignores and refreshes the vehicle's entry.
+    dtc_budget_ms: time per tick the DTC snapshot task may use (see DTCLogger.step); 0 = one query per tick.
+    dtc_mode: "status" reads the DTC lists only when STATUS changes (or every dtc_lists_s), "full" every cycle.
+    dtc_heartbeat_s: an unchanged DTC snapshot is written this often (0 = every cycle); dtc_journal writes
+    one JSON-lines DTC journal instead of the three DTC CSVs.
+    profile: time each loop stage per cycle and each PID query (see logger.profile); a summary is printed
+    on exit and written to <log>.profile.json / .profile.tsv.
+    deadband: per-PID bands keyed by normalized name, '*' for the others (see logger.deadband); a value
+    is written only when it moves more than its band or deadband_hold_s after the PID's last write.
+    Wide CSV only; the .ods copy keeps every value.
+    """
+    if fmt != "csv" and layout == "long":
+        raise ValueError(f"--format {fmt} is columnar; it cannot be combined with --layout long")
+    if compress and fmt != "csv":
+        raise ValueError(f"--compress applies to CSV logs, not --format {fmt}")
+    if deadband and (fmt != "csv" or layout == "long"):
+        raise ValueError("--deadband applies to wide CSV logs (not --layout long or a columnar --format)")
+    if fmt != "csv" and ods:
+        print("[!] --ods is only written with --format csv; ignoring it.", file=sys.stderr)
+        ods = False
+
     try:
         import obd
     except Exception as e:
         print("python-OBD not installed. Install with: pip install python-OBD", file=sys.stderr)
         raise
 
-    if port and not os.path.exists(port):
+    startup = StageTimer()
+    if port and "://" not in port and not os.path.exists(port):
         print(f"[!] Serial port not found: {port}", file=sys.stderr)
 
     try:
         print("[*] Connecting to ELM327 on serial port...", flush=True)
-        conn = obd.OBD(portstr=port, baudrate=baud)
+        if capture:
+            from .transcript import capture_serial
+            with capture_serial(capture):
+                conn = obd.OBD(portstr=port, baudrate=baud)
+            print(f"[*] Recording adapter traffic to {capture}")
+        else:
+            conn = obd.OBD(portstr=port, baudrate=baud)
     except Exception as e:
         raise SystemExit(f"[-] Failed to open OBD connection on {port}: {e}")
 
@@ -33,22 +94,36 @@ def run_logger(*, port: str = "/dev/ttyUSB0", baud: int | None = None, interval:
         try: conn.close()
         except Exception: pass
         raise SystemExit("[-] Could not connect to vehicle (check ignition ON and cabling)")
+    startup.mark("connect")
 
-    # Inline DTC helper (no thread, no args; defaults live inside DTCLogger)
-    dtc = DTCLogger(conn, obd_module=obd)
-
-    # Main sampling cadence (keep your existing default/arg here)
-    interval_s = max(0.05, float(interval))  # or whatever your logger already uses
-
-    # Pacing with monotonic time (robust to system clock jumps)
-    next_t = time.monotonic()
-
-    # Tick DTC roughly once per second (same cadence as before)
-    last_dtc_tick = 0.0
+    # Discovery, unit detection, sampling and DTC polling share one response cache
+    if cache:
+        conn = CachedConnection(conn, ttl=cache_ttl)
 
-
-    print("[*] Discovering supported PIDs (Mode 01)...", flush=True)
-    supported_cmds = list_supported_commands(conn)
+    # Inline DTC helper (no thread, no args; defaults live inside DTCLogger)
+    dtc = DTCLogger(conn, obd_module=obd, mode=dtc_mode, lists_s=dtc_lists_s,
+                    heartbeat_s=dtc_heartbeat_s, journal=dtc_journal)
+
+    # Main sampling cadence
+    interval_s = max(0.05, float(interval))
+
+
+    caps = CapabilityCache(capability_cache) if capability_cache else None
+    vkey = vehicle_key(conn) if caps is not None else ""
+    startup.mark("identify")
+    cached = caps.lookup(vkey) if caps is not None and not rediscover else None
+    if cached:
+        supported_cmds = commands_from_names(cached["commands"])
+        print(f"[*] Supported PIDs from the capability cache ({vkey}, saved {cached.get('saved', '?')}); "
+              f"use --rediscover if the vehicle or adapter changed.")
+    else:
+        if caps is not None and not vkey:
+            print("[!] No VIN or PID bitmaps readable; the capability cache is not used.", file=sys.stderr)
+        print("[*] Discovering supported PIDs (Mode 01)...", flush=True)
+        supported_cmds = list_supported_commands(conn)
+    # Probed or cached commands may be missing from python-OBD's own supported set
+    mark_supported(conn, supported_cmds)
+    startup.mark("discovery")
     if not supported_cmds:
         try: conn.close()
         except Exception: pass
@@ -79,40 +154,100 @@ def run_logger(*, port: str = "/dev/ttyUSB0", baud: int | None = None, interval:
         except Exception: pass
         raise SystemExit("[-] After applying --only/--skip, no PIDs remain.")
 
-    try:
-        units_map = detect_units_map(conn, filtered_cmds)
-    except Exception:
-        units_map = {}
+    # Units come from the command definitions; only commands that cannot be decoded offline are queried
+    units_map, unresolved = units_from_definitions(supported_cmds)
+    if cached:
+        units_map.update({k: v for k, v in cached.get("units", {}).items() if k not in units_map})
+        unresolved = [c for c in unresolved if getattr(c, "name", "") not in units_map]
+    unresolved = [c for c in unresolved if c in filtered_cmds]
+    if unresolved:
+        try:
+            units_map.update(detect_units_map(conn, unresolved))
+        except Exception:
+            pass
+    startup.mark("units")
+    if caps is not None and vkey and not cached:
+        try:
+            caps.store(vkey, [getattr(c, "name", "") for c in supported_cmds], units_map,
+                       protocol=str(conn.protocol_name()), discovery_s=round(startup.stages["discovery"], 3))
+            print(f"[*] Saved vehicle capabilities to {caps.path} ({vkey})")
+        except Exception as e:
+            print(f"[!] Cannot write capability cache: {e}", file=sys.stderr)
 
-    base_header = ["timestamp_iso", "date", "time"]
-    if add_epoch:
-        base_header.append("timestamp_epoch_ms")
     pid_names = [getattr(c, "name", "UNKNOWN") for c in filtered_cmds]
-    header = base_header + pid_names
-
-    units_row = ["", "", ""] + ([""] if add_epoch else [])
-    for name in pid_names:
-        units_row.append(units_map.get(name, ""))
+    unknown = sorted(set(rates or {}) - {norm(n) for n in pid_names})
+    if unknown:
+        print(f"[!] --rate for PIDs not being logged: {', '.join(unknown)}", file=sys.stderr)
+    schedule = RateSchedule.build(pid_names, rates or {}, interval_s)
+    prof = CycleProfiler(pid_names) if profile else NoProfile()
+    band = None
+    if deadband:
+        unknown = sorted(set(deadband) - {norm(n) for n in pid_names} - {"*"})
+        if unknown:
+            print(f"[!] --deadband for PIDs not being logged: {', '.join(unknown)}", file=sys.stderr)
+        band = DeadbandFilter(pid_names, deadband, deadband_hold_s)
+
+    # Deadline pacing on the monotonic clock (robust to system clock jumps, no drift);
+    # the base tick is the fastest PID period
+    pacer = DeadlinePacer(schedule.base)
+
+    if layout == "long":
+        base_header = ["timestamp_iso"] + (["timestamp_epoch_ms"] if add_epoch else [])
+        header = base_header + LONG_HEADER
+        units_row = None
+    else:
+        base_header = ["timestamp_iso", "date", "time"]
+        if add_epoch:
+            base_header.append("timestamp_epoch_ms")
+        header = base_header + pid_names
+        # Multi-rate wide files are marked so readers know empty cells mean "not sampled"
+        units_row = [SPARSE_MARK if not schedule.uniform else "", "", ""] + ([""] if add_epoch else [])
+        for name in pid_names:
+            units_row.append(units_map.get(name, ""))
+    # Deadband files say so instead: an empty cell then repeats the value above (sampled or not)
+    csv_units_row = [DEADBAND_MARK] + units_row[1:] if band is not None else units_row
+
+    # Columnar logs carry units and run metadata in their header
+    meta = {"created": dt.datetime.now().isoformat(), "port": port, "interval_s": schedule.base,
+            "rates_hz": {n: round(1.0 / p, 6) for n, p in zip(pid_names, schedule.periods)},
+            "sparse": not schedule.uniform,
+            "utc_offset_s": int(dt.datetime.now().astimezone().utcoffset().total_seconds())}
+    try: meta["protocol"] = conn.protocol_name()
+    except Exception: pass
+    stream_compress = compress if compress and compress_when == "stream" else None
+    ext = EXTENSIONS.get(fmt, ".csv") + (COMPRESSIONS[compress] if stream_compress else "")
+
+    def open_output(path: str):
+        if fmt == "csv":
+            return open_csv_with_header(path, header, csv_units_row, compress=stream_compress)
+        w = open_columnar_log(fmt, path, pid_names, units_map, meta, chunk_rows=chunk_rows)
+        return w, w
 
     os.makedirs(os.path.dirname(out_base), exist_ok=True)
-    csv_path = make_output_filename(out_base, ".csv")
-    f_csv, w_csv = open_csv_with_header(csv_path, header, units_row)
-
-    ods_doc = ods_table = None
+    csv_path = make_output_filename(out_base, ext)
+    f_csv, w_csv = open_output(csv_path)
+    policy = CommitPolicy(every_rows=max(0, int(fsync_rows)), every_ms=max(0.0, float(fsync_ms)), paranoid=paranoid)
+    # Closed segments are compressed off both the sampling and the writer thread
+    compressor = SegmentCompressor(compress) if compress and not stream_compress else None
+    writer = BackgroundWriter(f_csv, w_csv, policy, on_close=compressor.submit if compressor else None)
+    rows_in_file = 0
+
+    # The .ods is streamed by its own writer thread; a checkpoint (every --ods-save-every rows or
+    # DEFAULT_CHECKPOINT_MS) costs the rows since the previous one, not the whole history.
+    ods_writer = None
     ods_path = None
-    rows_since_ods_save = 0
+    def open_ods():
+        os.makedirs("outputs/calc", exist_ok=True)
+        path = make_output_filename("outputs/calc/" + os.path.basename(out_base), ".ods")
+        return path, OdsStreamWriter(path, header, units_row)
     if ods:
         try:
-            os.makedirs("outputs/calc", exist_ok=True)
-            ods_path = make_output_filename("outputs/calc/" + os.path.basename(out_base), ".ods")
-            from .core import ODF_AVAILABLE
-            if not ODF_AVAILABLE:
-                print("[!] --ods requested but odfpy is missing.", file=sys.stderr)
-            else:
-                ods_doc, ods_table = ods_open_with_header(ods_path, header, units_row)
+            ods_path, ods_stream = open_ods()
+            ods_policy = CommitPolicy(every_rows=max(1, int(ods_save_every)), every_ms=DEFAULT_CHECKPOINT_MS)
+            ods_writer = BackgroundWriter(ods_stream, ods_stream, ods_policy, name="obd-ods-writer")
         except Exception as e:
             print(f"[!] Failed to create ODS: {e}", file=sys.stderr)
-            ods_doc = ods_table = None
+            ods_writer = ods_path = None
 
     file_start = dt.datetime.now()
     running = True
@@ -125,111 +260,187 @@ def run_logger(*, port: str = "/dev/ttyUSB0", baud: int | None = None, interval:
         pass
 
     print(f"[*] Logging started. Writing to: {csv_path}" + (f" and {ods_path}" if ods_path else ""))
+    print(f"[*] Durability: {policy.describe()}; rows go through a background writer (queue of {writer.maxsize}).")
+    if layout == "long" or not schedule.uniform:
+        print(f"[*] Sampling ({layout}, base tick {schedule.base:g} s): {schedule.describe()}")
+    if band is not None:
+        print(f"[*] Deadband: {len(band.active)} of {len(pid_names)} PIDs written on change, "
+              f"at least every {band.hold_s:g} s")
+    limits = [f"{rotate_min} min" if rotate_min and rotate_min > 0 else "",
+              f"{rotate_mb:g} MB" if rotate_mb and rotate_mb > 0 else "",
+              f"{rotate_rows} rows" if rotate_rows and rotate_rows > 0 else ""]
+    if any(limits) or compress:
+        how = f"{compress} {'streaming' if stream_compress else 'of closed segments (worker thread)'}" if compress else "none"
+        print(f"[*] Rotation: {' / '.join(x for x in limits if x) or 'off'}; compression: {how}")
     print("[*] Press Ctrl+C to stop.")
 
+    # Live samples are read fresh every time: a cached answer (or null answer) is only reused
+    # within half the PID's period, i.e. from the same tick (unit detection, DTC reads). An
+    # explicit --cache-ttl for a PID still applies.
+    overrides = {k.upper() for k in (cache_ttl or {})}
+    fresh = [None if n.upper() in overrides else p / 2.0 for n, p in zip(pid_names, schedule.periods)]
+
+    def sample(i):
+        cmd = filtered_cmds[i]
+        try:
+            r = conn.query(cmd, max_age=fresh[i]) if cache and fresh[i] is not None else conn.query(cmd)
+            if r is None or r.is_null():
+                return None
+            return r.value
+        except Exception:
+            return None
+    if profile:
+        query_value = sample
+        def sample(i):
+            t = time.perf_counter()
+            v = query_value(i)
+            prof.pid(pid_names[i], time.perf_counter() - t, v is None)
+            return v
+
     last_csv = csv_path
+    startup.mark("setup")
     try:
         while running:
+            pacer.tick()
+            prof.begin()
+            t_mono = time.monotonic()
+            due = schedule.due(t_mono)
             now = dt.datetime.now()
 
-            # Build CSV row
-            row = [now.isoformat(sep=' '), now.date().isoformat(), now.strftime("%H:%M:%S")]
-            if add_epoch:
-                row.append(int(now.timestamp() * 1000))
-
-            # Query PIDs
-            for cmd in filtered_cmds:
-                try:
-                    r = conn.query(cmd)
-                    if r is None or r.is_null():
-                        row.append(NULL_CELL)
-                    else:
-                        row.append(value_to_cell(r.value))
-                except Exception:
-                    row.append(NULL_CELL)
-
-            # Write CSV
+            # Query the PIDs due this tick
+            if fmt != "csv":
+                # Columnar: epoch-ns + floats, NaN for nulls and PIDs not sampled this tick
+                rows = []
+                if due:
+                    values = [math.nan] * len(filtered_cmds)
+                    for i in due:
+                        values[i] = to_float(sample(i))
+                    rows = [[time.time_ns()] + values]
+            else:
+                stamp = [now.isoformat(sep=' ')] if layout == "long" else \
+                        [now.isoformat(sep=' '), now.date().isoformat(), now.strftime("%H:%M:%S")]
+                if add_epoch:
+                    stamp.append(int(now.timestamp() * 1000))
+                if layout == "long":
+                    rows = [stamp + [pid_names[i], value_to_cell(sample(i)), units_map.get(pid_names[i], "")]
+                            for i in due]
+                elif due:
+                    row = list(stamp)
+                    due_set = set(due)
+                    for i in range(len(filtered_cmds)):
+                        row.append(value_to_cell(sample(i)) if i in due_set else NULL_CELL)
+                    rows = [row]
+                else:
+                    rows = []
+
+            prof.mark("query")
+            for row in rows:
+                # Hand the row to the writer thread (it writes and fsyncs per the commit policy)
+                writer.put(band.apply(row, len(stamp), t_mono, None if schedule.uniform else due_set)
+                           if band is not None else row)
+                rows_in_file += 1
             try:
-                w_csv.writerow(row)
-                safe_fsync(f_csv)
-            except Exception as e:
-                print(f"[!] CSV write error: {e}", file=sys.stderr)
-
-            # ODS append
-            if ods_doc and ods_table:
-                try:
-                    ods_append_row(ods_doc, ods_table, row, ods_path, False)
-                    rows_since_ods_save += 1
-                    if rows_since_ods_save >= max(1, ods_save_every):
-                        ods_doc.save(ods_path)
-                        rows_since_ods_save = 0
-                except Exception as e:
-                    print(f"[!] ODS write error: {e}", file=sys.stderr)
-
-            # inline DTC tick every ~1.0s, no threading
+                writer.check()
+            except WriterError as e:
+                # Disk full, storage gone...: the log would silently stop growing
+                print(f"[-] {e}; stopping.", file=sys.stderr)
+                break
+            if rows and "first_row" not in startup.stages:
+                startup.mark("first_row")
+                print(f"[*] Startup: {startup.summary()}")
+            prof.mark("write")
+            if ods_writer is not None:
+                for row in rows:
+                    ods_writer.put(row)
+            prof.mark("ods")
+
+            # DTC snapshot as a cooperative task: one adapter query per tick (or what fits
+            # in dtc_budget_ms), a new cycle at most once per second
             try:
-                now_mono = time.monotonic()
-                if now_mono - last_dtc_tick >= 1.0:
-                    dtc.poll_once()           # safe, internal try/except in dtc.py keeps it quiet
-                    last_dtc_tick = now_mono
+                dtc.step(dtc_budget_ms / 1000.0)
             except Exception as e:
                 # keep logger resilient if DTC has a hiccup
                 print(f"[!] DTC poll error: {e}", file=sys.stderr)
+            prof.mark("dtc")
+
+            # Rotation: by age, size on disk (as of the last commit) or row count
+            if (rotate_min and rotate_min > 0 and (now - file_start).total_seconds() / 60.0 >= rotate_min) \
+                    or (rotate_mb and rotate_mb > 0 and writer.file_bytes >= rotate_mb * 1e6) \
+                    or (rotate_rows and rotate_rows > 0 and rows_in_file >= rotate_rows):
+                # Open new CSV; the writer commits and closes the current one in order
+                csv_path = make_output_filename(out_base, ext)
+                try:
+                    f_csv, w_csv = open_output(csv_path)
+                    writer.rotate(f_csv, w_csv)
+                    file_start = now
+                    rows_in_file = 0
+                    if band is not None:
+                        band.reset()
+                    last_csv = csv_path
+                    print(f"[*] Rotated file. Now writing to: {csv_path}")
+                except Exception as e:
+                    print(f"[-] Cannot open new CSV '{csv_path}': {e}", file=sys.stderr)
+                    break
 
-            # Rotation
-            if rotate_min and rotate_min > 0:
-                elapsed = (now - file_start).total_seconds() / 60.0
-                if elapsed >= rotate_min:
-                    # Close current CSV
-                    try:
-                        safe_fsync(f_csv)
-                        f_csv.close()
-                    except Exception:
-                        pass
-
-                    # Open new CSV
-                    csv_path = make_output_filename(out_base, ".csv")
+                # Rotate ODS too (if enabled)
+                if ods_writer is not None:
                     try:
-                        f_csv, w_csv = open_csv_with_header(csv_path, header, units_row)
-                        file_start = now
-                        last_csv = csv_path
-                        print(f"[*] Rotated file. Now writing to: {csv_path}")
+                        ods_path, ods_stream = open_ods()
+                        ods_writer.rotate(ods_stream, ods_stream)
+                        print(f"[*] Rotated ODS. Now writing to: {ods_path}")
                     except Exception as e:
-                        print(f"[-] Cannot open new CSV '{csv_path}': {e}", file=sys.stderr)
-                        break
-
-                    # Rotate ODS too (if enabled)
-                    if ods_doc and ods_table:
-                        try:
-                            ods_doc.save(ods_path)
-                        except Exception:
-                            pass
-                        ods_path = make_output_filename("outputs/calc/" + os.path.basename(out_base), ".ods")
-                        try:
-                            from .core import ods_open_with_header
-                            ods_doc, ods_table = ods_open_with_header(ods_path, header, units_row)
-                            rows_since_ods_save = 0
-                            print(f"[*] Rotated ODS. Now writing to: {ods_path}")
-                        except Exception as e:
-                            print(f"[!] Cannot open new ODS '{ods_path}': {e}", file=sys.stderr)
-                            ods_doc = ods_table = None
-
-            # Pace the loop
+                        print(f"[!] Cannot open new ODS: {e}", file=sys.stderr)
+
+            prof.mark("rotate")
+
+            # Pace the loop: sleep what is left of this period
             try:
-                time.sleep(max(0.0, interval))
+                pacer.wait()
             except Exception:
                 pass
+            prof.mark("sleep")
+            prof.end()
 
     finally:
-        try: safe_fsync(f_csv); f_csv.close()
-        except Exception: pass
-        if ods_doc:
-            try: ods_doc.save(ods_path)
-            except Exception: pass
+        writer.close()
+        print(f"[*] Writer: {writer.summary()}")
+        if compressor is not None:
+            if compressor.pending():
+                print(f"[*] Compressing {compressor.pending()} closed segment(s)...", flush=True)
+            compressor.close()
+            last_csv = compressor.renamed.get(last_csv, last_csv)
+            print(f"[*] Compression: {compressor.summary()}")
+        print(f"[*] Pacing: {pacer.summary()}")
+        print(f"[*] DTC: {dtc.summary()}")
+        if layout == "long" or not schedule.uniform:
+            print(f"[*] Achieved rates: {schedule.summary()}")
+        if band is not None:
+            print(f"[*] Deadband: {band.summary()}")
+        try:
+            extra = {"deadband": band.stats()} if band is not None else {}
+            pacer.write_stats(stats_path_for(last_csv), csv=os.path.basename(last_csv), pids=len(pid_names),
+                              layout=layout, rates_hz={n: round(1.0 / p, 6) for n, p in zip(pid_names, schedule.periods)},
+                              startup_s=startup.stats(), dtc=dtc.stats(), **extra)
+        except Exception as e:
+            print(f"[!] Cannot write stats file: {e}", file=sys.stderr)
+        if ods_writer is not None:
+            ods_writer.close()
+            print(f"[*] ODS: {ods_writer.summary()}")
+        if profile:
+            print(f"[*] Profile: {prof.summary()}")
+            try:
+                paths = prof.write(last_csv, csv=os.path.basename(last_csv), pacing=pacer.stats(),
+                                   writer=writer.stats(), ods_writer=ods_writer.stats() if ods_writer else None,
+                                   dtc=dtc.stats())
+                print(f"[*] Profile written to {paths[0]} and {paths[1]}")
+            except Exception as e:
+                print(f"[!] Cannot write profile: {e}", file=sys.stderr)
         try: conn.close()
         except Exception: pass
 
         try: dtc.close()
         except Exception: pass
+        if isinstance(conn, CachedConnection):
+            print(f"[*] Response cache: {conn.summary()}")
     print("[*] Done.")
     return last_csv
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import math
+from typing import Dict, List, Sequence
+
+LAYOUTS = ("wide", "long")
+LONG_HEADER = ["pid", "value", "unit"]
+SPARSE_MARK = "sparse"   # units-row cell under timestamp_iso: empty cells mean "not sampled this tick"
+
+
+def _norm(s: str) -> str:
+    return s.strip().lower().replace(" ", "_")
+
+
+def parse_rates(spec: str) -> Dict[str, float]:
+    """'RPM=10,COOLANT_TEMP=0.2' -> {'rpm': 10.0, 'coolant_temp': 0.2} (Hz, names normalized like --only)."""
+    out: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, sep, value = part.partition("=")
+        try:
+            hz = float(value) if sep else math.nan
+        except ValueError:
+            hz = math.nan
+        if not name.strip() or not (hz > 0 and math.isfinite(hz)):
+            raise ValueError(f"Bad rate '{part}' (expected PID=HZ with HZ > 0)")
+        out[_norm(name)] = hz
+    return out
+
+
+class RateSchedule:
+    """Per-PID sampling deadlines on the monotonic clock.
+
+    Each PID has its own period and a fixed grid of deadlines; `due(now)` returns the PIDs
+    whose deadline has come (within half a base tick, so a PID is not pushed back a whole
+    tick by scheduling jitter) and advances them. Deadlines missed entirely are skipped.
+    """
+
+    def __init__(self, names: Sequence[str], periods: Sequence[float], base: float):
+        self.names = list(names)
+        self.periods = [float(p) for p in periods]
+        self.base = float(base)
+        self.slack = self.base / 2.0
+        self.next: List[float] | None = None
+        self.samples = [0] * len(self.names)
+        self.skipped = [0] * len(self.names)
+        self._first = [0.0] * len(self.names)
+        self._last = [0.0] * len(self.names)
+
+    @classmethod
+    def build(cls, names: Sequence[str], rates: Dict[str, float], interval: float,
+              min_interval: float = 0.05) -> "RateSchedule":
+        """Unlisted PIDs run every `interval`; the base tick is the shortest period (floored)."""
+        periods = [1.0 / rates[_norm(n)] if _norm(n) in rates else interval for n in names]
+        base = max(min_interval, min(periods or [interval]))
+        return cls(names, [max(base, p) for p in periods], base)
+
+    @property
+    def uniform(self) -> bool:
+        return all(p == self.base for p in self.periods)
+
+    def due(self, now: float) -> List[int]:
+        if self.next is None:
+            self.next = [now] * len(self.names)
+        out = []
+        for i, t in enumerate(self.next):
+            if now + self.slack < t:
+                continue
+            out.append(i)
+            if not self.samples[i]:
+                self._first[i] = now
+            self._last[i] = now
+            self.samples[i] += 1
+            t += self.periods[i]
+            if t <= now:
+                missed = int((now - t) // self.periods[i]) + 1
+                self.skipped[i] += missed
+                t += missed * self.periods[i]
+            self.next[i] = t
+        return out
+
+    def describe(self) -> str:
+        return ", ".join(f"{n} {1.0 / p:g} Hz" for n, p in zip(self.names, self.periods))
+
+    def achieved_hz(self, i: int) -> float:
+        span = self._last[i] - self._first[i]
+        return (self.samples[i] - 1) / span if self.samples[i] > 1 and span > 0 else 0.0
+
+    def summary(self) -> str:
+        parts = [f"{n} {self.achieved_hz(i):.2f} Hz" + (f" ({self.skipped[i]} skipped)" if self.skipped[i] else "")
+                 for i, n in enumerate(self.names)]
+        return ", ".join(parts)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import contextlib, json, threading, time
+from typing import Any, Iterator, List, Optional, Tuple
+
+__all__ = ["TranscriptWriter", "RecordingPort", "capture_serial"]
+
+# Same JSON-lines format as obd_dashboard_server.transcript, so logger captures can be
+# replayed with `python -m obd_dashboard_server.transcript replay FILE --listen PORT`:
+#   {"format": "elm-transcript", "version": 1, "port": ..., "started": epoch}
+#   {"t": seconds since start, "dir": "tx"|"rx", "data": latin-1 text}
+TRANSCRIPT_FORMAT = "elm-transcript"
+TRANSCRIPT_VERSION = 1
+_FLUSH_PERIOD = 1.0
+
+class TranscriptWriter:
+    """Append tx/rx events; same-direction chunks are merged, flushes are batched (~1/s)."""
+
+    def __init__(self, path: str, port: str = ""):
+        self.path = path
+        self._f = open(path, "w", encoding="utf-8")
+        self._t0 = self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._pending: Optional[Tuple[str, float, bytearray]] = None
+        self._f.write(json.dumps({"format": TRANSCRIPT_FORMAT, "version": TRANSCRIPT_VERSION,
+                                  "port": port, "started": time.time()}) + "\n")
+
+    def record(self, direction: str, data: bytes) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._f.closed:
+                return
+            if self._pending is not None and self._pending[0] == direction:
+                self._pending = (direction, now, self._pending[2] + data)
+            else:
+                self._write_pending()
+                self._pending = (direction, now, bytearray(data))
+            if direction == "rx" and b">" in data:
+                self._write_pending()
+            if now - self._last_flush >= _FLUSH_PERIOD:
+                self._f.flush()
+                self._last_flush = now
+
+    def _write_pending(self) -> None:
+        if self._pending is None:
+            return
+        direction, stamp, data = self._pending
+        self._pending = None
+        self._f.write(json.dumps({"t": round(stamp - self._t0, 6), "dir": direction,
+                                  "data": bytes(data).decode("latin-1")}) + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._f.closed:
+                self._write_pending()
+                self._f.close()
+
+class RecordingPort:
+    """Transparent pyserial proxy recording every read and write."""
+
+    def __init__(self, port: Any, writer: TranscriptWriter):
+        object.__setattr__(self, "_port", port)
+        object.__setattr__(self, "_writer", writer)
+
+    def write(self, data: bytes):
+        self._writer.record("tx", bytes(data))
+        return self._port.write(data)
+
+    def read(self, size: int = 1) -> bytes:
+        data = self._port.read(size)
+        if data:
+            self._writer.record("rx", bytes(data))
+        return data
+
+    def close(self) -> None:
+        try:
+            self._port.close()
+        finally:
+            self._writer.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._port, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._port, name, value)  # python-OBD sets baudrate/timeout on its port
+
+@contextlib.contextmanager
+def capture_serial(path: str) -> Iterator[List[RecordingPort]]:
+    """Record the port(s) python-OBD opens inside the block; closed with the connection."""
+    import serial
+    original = serial.serial_for_url
+    opened: List[RecordingPort] = []
+
+    def recording(url, *args, **kwargs):
+        port = original(url, *args, **kwargs)
+        for prev in opened:
+            prev._writer.close()
+        opened.append(RecordingPort(port, TranscriptWriter(path, port=str(url))))
+        return opened[-1]
+
+    serial.serial_for_url = recording
+    try:
+        yield opened
+    finally:
+        serial.serial_for_url = original
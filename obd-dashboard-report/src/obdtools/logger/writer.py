@@ -0,0 +1,233 @@
+from __future__ import annotations
+import os, queue, sys, threading, time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from .core import safe_fsync
+from ..csvio.compressed import compress_file
+
+DEFAULT_QUEUE_ROWS = 4096
+DEFAULT_COMMIT_MS = 1000.0
+_STOP = object()
+
+
+class WriterError(RuntimeError):
+    """The writer thread could not write or commit rows: the log is incomplete from there on."""
+
+
+@dataclass
+class CommitPolicy:
+    """When the writer thread fsyncs: after `every_rows` rows, `every_ms` after the
+    first uncommitted row, whichever comes first (0 disables a limit); paranoid = every row."""
+    every_rows: int = 0
+    every_ms: float = DEFAULT_COMMIT_MS
+    paranoid: bool = False
+
+    def due(self, pending: int, age_ms: float) -> bool:
+        if self.paranoid:
+            return pending > 0
+        if self.every_rows and pending >= self.every_rows:
+            return True
+        return bool(self.every_ms) and age_ms >= self.every_ms
+
+    def describe(self) -> str:
+        if self.paranoid:
+            return "fsync after every row (paranoid)"
+        parts = []
+        if self.every_rows:
+            parts.append(f"every {self.every_rows} rows")
+        if self.every_ms:
+            parts.append(f"every {self.every_ms:g} ms")
+        return "fsync " + (" or ".join(parts) if parts else "only on rotation and exit")
+
+
+class BackgroundWriter:
+    """Write CSV rows on a dedicated thread and fsync them in groups (group commit).
+
+    The sampling loop only pays for a queue put; a full queue (slow storage) blocks it
+    rather than dropping rows. Rotation goes through the queue, so rows stay in order.
+    `file_bytes` is the current file's size on disk after the last commit (used for size
+    rotation); `on_close(path)` is called on this thread once a file is committed and closed.
+    After a write error the thread keeps draining the queue (so producers never block) but
+    drops the rows: `error` is set and `check()` raises, callers should stop logging."""
+
+    def __init__(self, f, w, policy: CommitPolicy | None = None, maxsize: int = DEFAULT_QUEUE_ROWS,
+                 on_close: Optional[Callable[[str], None]] = None, name: str = "obd-csv-writer"):
+        self.policy = policy or CommitPolicy()
+        self.maxsize = maxsize
+        self.on_close = on_close
+        self._file_bytes = 0
+        self._rotations = self._rotated = 0
+        self.rows = self.commits = self.waits = self.dropped = 0
+        self.commit_s_total = self.commit_s_max = 0.0
+        self.error: Exception | None = None
+        self._f, self._w = f, w
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+        self._pending = 0
+        self._first_pending = 0.0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, row: list) -> None:
+        try:
+            self._q.put_nowait(row)
+        except queue.Full:
+            self.waits += 1
+            self._q.put(row)
+
+    def put_many(self, rows: list) -> None:
+        """Queue several rows as one item: one queue round-trip and writer wakeup per batch."""
+        if rows:
+            self.put(("rows", rows))
+
+    def rotate(self, f, w) -> None:
+        """Commit and close the current file, then continue in (f, w)."""
+        self._rotations += 1
+        self._q.put(("rotate", f, w))
+
+    def check(self) -> None:
+        """Raise WriterError if rows could not be written (see `error`)."""
+        if self.error is not None:
+            raise WriterError(f"{self._thread.name} failed ({self.error}); {self.dropped} rows lost")
+
+    @property
+    def file_bytes(self) -> int:
+        """Size on disk of the file being written, as of its last commit (0 until a rotation is processed)."""
+        return self._file_bytes if self._rotated == self._rotations else 0
+
+    def close(self) -> None:
+        self._q.put(_STOP)
+        self._thread.join()
+
+    def stats(self) -> dict:
+        return {"rows": self.rows, "commits": self.commits, "commit_s_total": round(self.commit_s_total, 3),
+                "commit_max_ms": round(self.commit_s_max * 1000, 3), "queue_waits": self.waits,
+                "dropped": self.dropped, "error": str(self.error) if self.error is not None else None}
+
+    def summary(self) -> str:
+        per = self.rows / self.commits if self.commits else 0.0
+        avg = self.commit_s_total / self.commits * 1000 if self.commits else 0.0
+        text = (f"{self.rows} rows, {self.commits} fsyncs ({per:.1f} rows each, avg {avg:.1f} ms, "
+                f"max {self.commit_s_max * 1000:.1f} ms), sampling loop blocked {self.waits}x on a full queue")
+        if self.error is not None:
+            text += f"; {self.dropped} rows lost after a write error ({self.error})"
+        return text
+
+    # ------------ writer thread ------------
+    def _fail(self, e: Exception, rows: int) -> None:
+        if self.error is None:
+            print(f"[!] {self._thread.name} write error: {e}", file=sys.stderr)
+        self.error = e
+        self.dropped += rows
+
+    def _commit(self) -> None:
+        if not self._pending:
+            return
+        t = time.perf_counter()
+        try:
+            self._f.flush()              # buffered rows reach the file here (ENOSPC shows up now)
+        except Exception as e:
+            self._fail(e, self._pending)
+            self._pending = 0
+            return
+        safe_fsync(self._f)
+        el = time.perf_counter() - t
+        self.commits += 1; self.commit_s_total += el; self.commit_s_max = max(self.commit_s_max, el)
+        self._pending = 0
+        try:
+            self._file_bytes = os.fstat(self._f.fileno()).st_size
+        except Exception:
+            self._file_bytes = getattr(self._f, "bytes_written", 0)
+
+    def _close_file(self) -> None:
+        self._commit()
+        try: self._f.close()
+        except Exception: pass
+        if self.on_close is not None and getattr(self._f, "name", None):
+            self.on_close(self._f.name)
+
+    def _run(self) -> None:
+        policy = self.policy
+        while True:
+            timeout = None
+            if self._pending and policy.every_ms:
+                timeout = max(0.0, self._first_pending + policy.every_ms / 1000.0 - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                self._commit(); continue
+            if item is _STOP:
+                self._close_file()
+                return
+            if isinstance(item, tuple) and item and item[0] == "rotate":
+                self._close_file()
+                self._f, self._w = item[1], item[2]
+                self._file_bytes = 0
+                self._rotated += 1
+                continue
+            batch = item[1] if isinstance(item, tuple) and item and item[0] == "rows" else None
+            n = 1 if batch is None else len(batch)
+            if self.error is not None:
+                self.dropped += n
+                continue
+            try:
+                if batch is None:
+                    self._w.writerow(item)
+                elif hasattr(self._w, "writerows"):
+                    self._w.writerows(batch)
+                else:
+                    for row in batch:
+                        self._w.writerow(row)
+            except Exception as e:
+                self._fail(e, n)
+                continue
+            self.rows += n
+            if not self._pending:
+                self._first_pending = time.monotonic()
+            self._pending += n
+            if policy.due(self._pending, (time.monotonic() - self._first_pending) * 1000.0):
+                self._commit()
+
+
+class SegmentCompressor:
+    """Compress closed log segments on a worker thread of their own, so neither the sampling
+    loop nor the CSV writer waits for it. Each segment is replaced atomically (see csvio.compressed)."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.renamed: Dict[str, str] = {}
+        self.segments = self.bytes_in = self.bytes_out = 0
+        self.seconds = 0.0
+        self._q: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="obd-segment-compressor", daemon=True)
+        self._thread.start()
+
+    def submit(self, path: str) -> None:
+        self._q.put(path)
+
+    def pending(self) -> int:
+        return self._q.qsize()
+
+    def close(self) -> None:
+        self._q.put(_STOP)
+        self._thread.join()
+
+    def summary(self) -> str:
+        ratio = self.bytes_in / self.bytes_out if self.bytes_out else 0.0
+        return (f"{self.segments} segments, {self.bytes_in / 1e6:.1f} MB -> {self.bytes_out / 1e6:.1f} MB "
+                f"({ratio:.1f}x, {self.seconds:.1f} s on the compressor thread)")
+
+    def _run(self) -> None:
+        while True:
+            path = self._q.get()
+            if path is _STOP:
+                return
+            try:
+                size = os.path.getsize(path)
+                t = time.perf_counter()
+                out = compress_file(path, self.kind)
+                self.seconds += time.perf_counter() - t
+                self.renamed[path] = out
+                self.segments += 1; self.bytes_in += size; self.bytes_out += os.path.getsize(out)
+            except Exception as e:
+                print(f"[!] Cannot compress {path}: {e}", file=sys.stderr)
@@ -0,0 +1,431 @@
+from __future__ import annotations
+import asyncio, datetime as dt, json, math, os, signal, sys, time
+from typing import Dict, List, Optional
+
+from .core import OBD_CMDS, NULL_CELL, PRECISION, make_output_filename, open_csv_with_header, units_from_definitions, value_to_cell
+from .deadband import DeadbandFilter, DEADBAND_MARK, DEFAULT_HOLD_S
+from .pacing import stats_path_for
+from .schedule import LONG_HEADER
+from .writer import BackgroundWriter, CommitPolicy, SegmentCompressor, WriterError, DEFAULT_COMMIT_MS
+from ..csvio.columnar import EXTENSIONS, DEFAULT_CHUNK_ROWS, open_columnar_log, to_float
+from ..csvio.compressed import COMPRESSIONS
+
+try:
+    import websockets
+    WEBSOCKETS_AVAILABLE = True
+except Exception:
+    websockets = None
+    WEBSOCKETS_AVAILABLE = False
+
+DEFAULT_BATCH_MS = 200.0
+RECONNECT_MIN_S = 0.5
+RECONNECT_MAX_S = 10.0
+GAP_FACTOR = 3.0        # without seq numbers: a gap is a step of more than 3x the usual sample period
+MAX_GAPS = 1000         # gaps kept in the stats sidecar (all are counted)
+GAP_REPORT_S = 10.0     # console: gaps in quick succession are summed up
+
+
+class GapDetector:
+    """Missed samples in the server stream.
+
+    obd-dashboard-server numbers its samples (`seq`, from 1 at server start): a jump means samples
+    this client never received (dropped while disconnected, or superseded in the server's per-client
+    queue), a smaller number a server restart. Streams without `seq` fall back to timestamps: a step
+    longer than GAP_FACTOR times the usual sample period (moving average) counts as a gap.
+    """
+
+    def __init__(self, factor: float = GAP_FACTOR):
+        self.factor = factor
+        self.last_seq: Optional[int] = None
+        self.last_t: Optional[float] = None
+        self.period: Optional[float] = None
+        self.gaps: List[dict] = []
+        self.count = self.missed = self.resets = 0
+        self._after_reconnect = False
+
+    def reconnected(self) -> None:
+        """The next gap (if any) spans a reconnect."""
+        self._after_reconnect = True
+
+    def observe(self, seq: Optional[int], t: float) -> Optional[dict]:
+        gap = None
+        if seq is not None and self.last_seq is not None:
+            if seq > self.last_seq + 1:
+                gap = {"kind": "missed", "missed": seq - self.last_seq - 1}
+            elif seq <= self.last_seq:
+                gap = {"kind": "restart", "missed": None}
+                self.resets += 1
+        elif seq is None and self.last_t is not None and self.period and t - self.last_t > self.factor * self.period:
+            gap = {"kind": "time", "missed": max(1, round((t - self.last_t) / self.period) - 1)}
+        if gap is None and self.last_t is not None and t > self.last_t:
+            d = t - self.last_t
+            self.period = d if self.period is None else 0.9 * self.period + 0.1 * d
+        if gap is not None:
+            gap.update(start=self.last_t, end=t, seconds=round(t - self.last_t, 3) if self.last_t is not None else None,
+                       reconnect=self._after_reconnect)
+            self.count += 1
+            self.missed += gap["missed"] or 0
+            if len(self.gaps) < MAX_GAPS:
+                self.gaps.append(gap)
+        self._after_reconnect = False
+        self.last_seq, self.last_t = seq, t
+        return gap
+
+
+def _cell(value):
+    """JSON value -> cell; text stays text (bitmaps like "1011..." are not numbers)."""
+    if type(value) is float and math.isfinite(value):      # the common case, without value_to_cell's probing
+        return round(value, PRECISION)
+    return value if isinstance(value, str) else value_to_cell(value)
+
+
+def _sample_time(message: dict) -> dt.datetime:
+    """Server timestamp of a sample (local time), or now when it is missing or unparsable."""
+    try:
+        return dt.datetime.fromisoformat(str(message["timestamp"]))
+    except Exception:
+        return dt.datetime.now()
+
+
+class StreamRecorder:
+    """Turn server sample messages into log rows and hand them to the writer thread in batches.
+
+    The header is fixed by the first sample (after only/skip); PIDs appearing later (a new
+    polling profile or a `control` reconfiguration) start a new file with the extended header.
+    """
+
+    def __init__(self, out_base: str, *, add_epoch: bool = False, only: str = "", skip: str = "",
+                 layout: str = "wide", fmt: str = "csv", chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 compress: str = "", compress_when: str = "stream", rotate_min: int = 0,
+                 rotate_mb: float = 0, rotate_rows: int = 0, policy: CommitPolicy | None = None,
+                 batch_rows: int = 512, source: str = "", detector: GapDetector | None = None,
+                 deadband: Dict[str, float] | None = None, deadband_hold_s: float = DEFAULT_HOLD_S):
+        self.out_base, self.add_epoch, self.layout, self.fmt, self.chunk_rows = out_base, add_epoch, layout, fmt, chunk_rows
+        norm = lambda s: s.strip().lower().replace(" ", "_")
+        self._norm = norm
+        self.only = {norm(x) for x in only.split(",") if x.strip()}
+        self.skip = {norm(x) for x in skip.split(",") if x.strip()}
+        self._kept: Dict[str, bool] = {}
+        self.stream_compress = compress if compress and compress_when == "stream" else None
+        self.ext = EXTENSIONS.get(fmt, ".csv") + (COMPRESSIONS[compress] if self.stream_compress else "")
+        self.compressor = SegmentCompressor(compress) if compress and not self.stream_compress else None
+        self.rotate_min, self.rotate_mb, self.rotate_rows = rotate_min, rotate_mb, rotate_rows
+        self.policy = policy or CommitPolicy()
+        self.batch_rows = max(1, int(batch_rows))
+        self.source = source
+        self.detector = detector or GapDetector()
+        self.band = DeadbandFilter([], deadband, deadband_hold_s) if deadband else None
+        self.pid_names: List[str] = []
+        self._columns: set = set()
+        self.units: Dict[str, str] = {}
+        self.writer: BackgroundWriter | None = None
+        self.path = self.last_path = ""
+        self.pending: List[list] = []
+        self.samples = self.events = self.rejected = self.batches = self.rows_in_file = self.files = 0
+        self.file_start = dt.datetime.now()
+        self._gap_printed = float("-inf")
+        self._quiet_gaps = self._quiet_missed = 0
+
+    # ------------ files ------------
+    def _keep(self, name: str) -> bool:
+        keep = self._kept.get(name)
+        if keep is None:
+            n = self._norm(name)
+            keep = self._kept[name] = (not self.only or n in self.only) and n not in self.skip
+        return keep
+
+    def _units_for(self, names: List[str]) -> None:
+        """Units from python-OBD's command definitions when it is installed ('' otherwise)."""
+        names = [n for n in names if n not in self.units]
+        if not names:
+            return
+        cmds = [getattr(OBD_CMDS, n, None) for n in names] if OBD_CMDS is not None else []
+        units, _ = units_from_definitions([c for c in cmds if c is not None])
+        self.units.update({n: units.get(n, "") for n in names})
+
+    def _open(self):
+        self.path = make_output_filename(self.out_base, self.ext)
+        if self.fmt != "csv":
+            meta = {"created": dt.datetime.now().isoformat(), "source": self.source,
+                    "utc_offset_s": int(dt.datetime.now().astimezone().utcoffset().total_seconds())}
+            w = open_columnar_log(self.fmt, self.path, self.pid_names, self.units, meta, chunk_rows=self.chunk_rows)
+            f = w
+        elif self.layout == "long":
+            f, w = open_csv_with_header(self.path, ["timestamp_iso"] + (["timestamp_epoch_ms"] if self.add_epoch else [])
+                                        + LONG_HEADER, None, compress=self.stream_compress)
+        else:
+            base = ["timestamp_iso", "date", "time"] + (["timestamp_epoch_ms"] if self.add_epoch else [])
+            units_row = [DEADBAND_MARK if self.band is not None else ""] + [""] * (len(base) - 1) \
+                        + [self.units.get(n, "") for n in self.pid_names]
+            f, w = open_csv_with_header(self.path, base + self.pid_names, units_row, compress=self.stream_compress)
+        self.files += 1
+        self.rows_in_file = 0
+        if self.band is not None:
+            self.band.reset()
+        self.file_start = dt.datetime.now()
+        return f, w
+
+    def _start_file(self) -> None:
+        f, w = self._open()
+        if self.writer is None:
+            self.writer = BackgroundWriter(f, w, self.policy, on_close=self.compressor.submit if self.compressor else None)
+        else:
+            self.writer.rotate(f, w)
+        self.last_path = self.path
+
+    def _report(self, gap: dict) -> None:
+        """Print a gap; after one, further gaps are summed up at most every GAP_REPORT_S."""
+        self._quiet_gaps += 1
+        self._quiet_missed += gap["missed"] or 0
+        now = time.monotonic()
+        if gap["kind"] != "restart" and not gap["reconnect"] and now - self._gap_printed < GAP_REPORT_S:
+            return
+        if self._quiet_gaps > 1:
+            what = f"{self._quiet_gaps} gaps, {self._quiet_missed} samples missed in the last {now - self._gap_printed:.0f} s"
+        elif gap["missed"] is None:
+            what = "server restarted"
+        else:
+            what = f"{gap['missed']} sample(s) missed" + (f" over {gap['seconds']:g} s" if gap["seconds"] is not None else "")
+        print(f"[!] Stream gap: {what}" + (" (reconnect)" if gap["reconnect"] else ""), file=sys.stderr)
+        self._gap_printed, self._quiet_gaps, self._quiet_missed = now, 0, 0
+
+    # ------------ stream ------------
+    def feed(self, raw) -> int:
+        """One WebSocket message; returns the rows it produced (0 for events and unusable messages)."""
+        try:
+            message = json.loads(raw)
+        except (TypeError, ValueError):
+            self.rejected += 1
+            return 0
+        if not isinstance(message, dict) or message.get("type") is not None:
+            self.events += 1
+            return 0
+        pids = message.get("pids")
+        if not isinstance(pids, dict):
+            self.rejected += 1
+            return 0
+        self.samples += 1
+        when = _sample_time(message)
+        seq = message.get("seq")
+        gap = self.detector.observe(seq if isinstance(seq, int) else None, when.timestamp())
+        if gap is not None:
+            self._report(gap)
+
+        names = [n for n in pids if self._keep(n)]
+        if self.layout == "wide":
+            new = [n for n in names if n not in self._columns]
+            if new:
+                self.flush()
+                self._units_for(new)
+                if self.pid_names:
+                    print(f"[*] New PIDs in the stream ({', '.join(new)}); starting a new file.")
+                self.pid_names += new
+                self._columns.update(new)
+                if self.band is not None:
+                    self.band.add(new)
+                self._start_file()
+        elif self.writer is None:
+            self._start_file()
+
+        if self.fmt != "csv":
+            rows = [[int(when.timestamp() * 1e9)] + [to_float(pids.get(n)) for n in self.pid_names]]
+        else:
+            stamp = [when.isoformat(sep=" ")]
+            if self.layout == "wide":
+                stamp += [when.date().isoformat(), when.strftime("%H:%M:%S")]
+            if self.add_epoch:
+                stamp.append(int(when.timestamp() * 1000))
+            if self.layout == "long":
+                self._units_for(names)
+                rows = [stamp + [n, _cell(pids[n]), self.units.get(n, "")] for n in names]
+            else:
+                rows = [stamp + [_cell(pids[n]) if n in pids else NULL_CELL for n in self.pid_names]]
+                if self.band is not None:
+                    rows = [self.band.apply(rows[0], len(stamp), when.timestamp())]
+        self.pending += rows
+        self.rows_in_file += len(rows)
+        if len(self.pending) >= self.batch_rows:
+            self.flush()
+        return len(rows)
+
+    def flush(self) -> None:
+        """Hand the pending rows to the writer thread as one batch, then rotate if a limit is reached.
+
+        Raises WriterError once the writer thread has failed (the rows would be lost)."""
+        if not self.pending or self.writer is None:
+            return
+        self.writer.check()
+        self.writer.put_many(self.pending)
+        self.pending = []
+        self.batches += 1
+        if (self.rotate_min and self.rotate_min > 0 and (dt.datetime.now() - self.file_start).total_seconds() / 60.0 >= self.rotate_min) \
+                or (self.rotate_mb and self.rotate_mb > 0 and self.writer.file_bytes >= self.rotate_mb * 1e6) \
+                or (self.rotate_rows and self.rotate_rows > 0 and self.rows_in_file >= self.rotate_rows):
+            self._start_file()
+            print(f"[*] Rotated file. Now writing to: {self.path}")
+
+    def close(self) -> str:
+        try:
+            self.flush()
+        except WriterError:
+            pass                          # already reported; the summary counts the lost rows
+        if self.writer is not None:
+            self.writer.close()
+        if self.compressor is not None:
+            self.compressor.close()
+            self.last_path = self.compressor.renamed.get(self.last_path, self.last_path)
+        return self.last_path
+
+
+async def _follow(source: str, rec: StreamRecorder, stop: asyncio.Event, batch_s: float, max_rows: int,
+                  stats: dict, open_timeout: float) -> None:
+    """Subscribe to `source` until stop is set, reconnecting with exponential backoff."""
+    delay = RECONNECT_MIN_S
+    rows = 0
+
+    async def flusher():
+        while True:
+            await asyncio.sleep(batch_s)
+            try:
+                rec.flush()
+            except WriterError as e:
+                print(f"[-] {e}; stopping.", file=sys.stderr)
+                stop.set()
+                return
+
+    async def receive(ws):
+        nonlocal rows
+        async for raw in ws:
+            rows += rec.feed(raw)
+            if max_rows and rows >= max_rows:
+                stop.set()
+                return
+
+    flush_task = asyncio.ensure_future(flusher()) if batch_s > 0 else None
+    down_since: Optional[float] = None
+    try:
+        while not stop.is_set():
+            try:
+                async with websockets.connect(source, open_timeout=open_timeout, max_size=2 ** 22) as ws:
+                    if down_since is not None:
+                        stats["reconnects"] += 1
+                        stats["downtime_s"] += time.monotonic() - down_since
+                        rec.detector.reconnected()
+                        print(f"[*] Reconnected to {source} after {time.monotonic() - down_since:.1f} s")
+                    else:
+                        print(f"[*] Connected to {source}")
+                    down_since = None
+                    delay = RECONNECT_MIN_S
+                    recv = asyncio.ensure_future(receive(ws))
+                    waiter = asyncio.ensure_future(stop.wait())
+                    await asyncio.wait({recv, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                    waiter.cancel()
+                    if not recv.done():
+                        recv.cancel()
+                        await asyncio.gather(recv, return_exceptions=True)
+                    elif recv.exception() is not None:
+                        raise recv.exception()
+                    if stop.is_set():
+                        return
+                    raise ConnectionError("server closed the stream")
+            except (OSError, asyncio.TimeoutError, ConnectionError, websockets.exceptions.WebSocketException) as e:
+                if isinstance(e, websockets.exceptions.InvalidURI):
+                    raise SystemExit(f"[-] Invalid --source URL {source}: {e}")
+                if down_since is None:
+                    down_since = time.monotonic()
+                    stats["disconnects"] += 1
+                    print(f"[!] Stream from {source} lost ({e or type(e).__name__}); reconnecting...", file=sys.stderr)
+                rec.flush()
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(RECONNECT_MAX_S, delay * 2)
+    except WriterError as e:
+        print(f"[-] {e}; stopping.", file=sys.stderr)
+    finally:
+        if down_since is not None:
+            stats["downtime_s"] += time.monotonic() - down_since
+        if flush_task is not None:
+            flush_task.cancel()
+            await asyncio.gather(flush_task, return_exceptions=True)
+
+
+def run_ws_logger(*, source: str, out_base: str = "outputs/csv/obd_all", add_epoch: bool = False,
+                  only: str = "", skip: str = "", layout: str = "wide", fmt: str = "csv",
+                  chunk_rows: int = DEFAULT_CHUNK_ROWS, rotate_min: int = 0, rotate_mb: float = 0,
+                  rotate_rows: int = 0, compress: str = "", compress_when: str = "stream",
+                  fsync_rows: int = 0, fsync_ms: float = DEFAULT_COMMIT_MS, paranoid: bool = False,
+                  batch_ms: float = DEFAULT_BATCH_MS, max_rows: int = 0, open_timeout: float = 5.0,
+                  deadband: dict | None = None, deadband_hold_s: float = DEFAULT_HOLD_S) -> str:
+    """Log the samples streamed by obd-dashboard-server (ws://host:port) until Ctrl+C (or max_rows),
+    without opening the adapter. Returns the last log path written.
+
+    Rows are collected for batch_ms (or 512 rows) and handed to the background writer as one batch
+    (0 = hand over every message as it arrives). The connection is retried with exponential backoff
+    (0.5 s to 10 s); gaps in the server's sample numbers, restarts and reconnects are printed and
+    saved with the stream stats in <log>.stats.json. deadband / deadband_hold_s: change-only
+    recording as with the adapter (see logger.deadband), timed by the samples' timestamps.
+    """
+    if not WEBSOCKETS_AVAILABLE:
+        raise SystemExit("[-] --source needs the websockets package (pip install websockets)")
+    if fmt != "csv" and layout == "long":
+        raise ValueError(f"--format {fmt} is columnar; it cannot be combined with --layout long")
+    if compress and fmt != "csv":
+        raise ValueError(f"--compress applies to CSV logs, not --format {fmt}")
+    if deadband and (fmt != "csv" or layout == "long"):
+        raise ValueError("--deadband applies to wide CSV logs (not --layout long or a columnar --format)")
+    os.makedirs(os.path.dirname(out_base) or ".", exist_ok=True)
+    policy = CommitPolicy(every_rows=max(0, int(fsync_rows)), every_ms=max(0.0, float(fsync_ms)), paranoid=paranoid)
+    rec = StreamRecorder(out_base, add_epoch=add_epoch, only=only, skip=skip, layout=layout, fmt=fmt,
+                         chunk_rows=chunk_rows, compress=compress, compress_when=compress_when,
+                         rotate_min=rotate_min, rotate_mb=rotate_mb, rotate_rows=rotate_rows, policy=policy,
+                         batch_rows=512 if batch_ms > 0 else 1, source=source, deadband=deadband,
+                         deadband_hold_s=deadband_hold_s)
+    stats = {"reconnects": 0, "disconnects": 0, "downtime_s": 0.0}
+    t0 = time.monotonic()
+
+    async def main() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass
+        await _follow(source, rec, stop, batch_ms / 1000.0, max_rows, stats, open_timeout)
+
+    print(f"[*] Following {source}; rows go to the background writer in {batch_ms:g} ms batches "
+          f"({policy.describe()}). Press Ctrl+C to stop.")
+    try:
+        asyncio.run(main())
+    finally:
+        last = rec.close()
+        el = max(1e-9, time.monotonic() - t0)
+        d = rec.detector
+        print(f"[*] Stream: {rec.samples} samples ({rec.samples / el:.1f}/s), {rec.events} events, "
+              f"{rec.batches} batches ({rec.writer.rows / rec.batches if rec.batches and rec.writer else 0:.1f} rows each), "
+              f"{d.count} gaps ({d.missed} samples missed, {d.resets} server restarts), "
+              f"{stats['reconnects']} reconnects ({stats['downtime_s']:.1f} s down)")
+        if rec.writer is not None:
+            print(f"[*] Writer: {rec.writer.summary()}")
+        if rec.band is not None:
+            print(f"[*] Deadband: {rec.band.summary()}")
+        if last:
+            try:
+                with open(stats_path_for(last), "w", encoding="utf-8") as f:
+                    json.dump({"csv": os.path.basename(last), "source": source, "pids": len(rec.pid_names),
+                               "layout": layout, "elapsed_s": round(el, 3), "samples": rec.samples,
+                               "events": rec.events, "rejected": rec.rejected, "batches": rec.batches,
+                               "files": rec.files, "gaps": d.count, "missed_samples": d.missed,
+                               "server_restarts": d.resets, **{k: round(v, 3) for k, v in stats.items()},
+                               "writer": rec.writer.stats() if rec.writer else None,
+                               **({"deadband": rec.band.stats()} if rec.band is not None else {}),
+                               "gap_list": d.gaps},
+                              f, indent=2)
+            except Exception as e:
+                print(f"[!] Cannot write stats file: {e}", file=sys.stderr)
+        else:
+            print("[!] No samples received; nothing written.", file=sys.stderr)
+    print("[*] Done.")
+    return last
@@ -2,11 +2,13 @@ from __future__ import annotations
 import csv
 from typing import List
 from ..csvio.readers import detect_units_row
+from ..csvio.compressed import open_text
 
 def csv_to_ods(csv_path: str, out_path: str, sep: str = ";") -> None:
     """
     Convert the logger CSV (semicolon; optional units row as 2nd line) into a Calc-friendly .ods.
     Empty cells stay empty. Numeric cells become numeric, others are strings.
+    Deadband logs are filled in: an empty cell gets the value written above it.
     """
     try:
         from odf.opendocument import OpenDocumentSpreadsheet
@@ -15,10 +17,11 @@ def csv_to_ods(csv_path: str, out_path: str, sep: str = ";") -> None:
     except Exception as e:
         raise RuntimeError("odfpy not available. Install it: pip install odfpy") from e
 
-    headers, _units_map, has_units = detect_units_row(csv_path, sep=sep)
+    headers, units_map, has_units = detect_units_row(csv_path, sep=sep)
+    held = units_map.get("timestamp_iso") == "deadband"
 
     # Read raw CSV rows
-    with open(csv_path, "r", encoding="utf-8") as f:
+    with open_text(csv_path) as f:
         reader = csv.reader(f, delimiter=sep)
         rows = list(reader)
 
@@ -53,11 +56,17 @@ def csv_to_ods(csv_path: str, out_path: str, sep: str = ";") -> None:
     # Optional units row
     start = 1
     if has_units and len(rows) > 1:
-        add_row(rows[1], numeric_mask=[False] * len(rows[1]))
+        add_row([""] + rows[1][1:] if held else rows[1], numeric_mask=[False] * len(rows[1]))
         start = 2
 
     # Data rows
+    last = [""] * len(headers)
     for r in rows[start:]:
+        if held:
+            # 'nan' ends a held value (the PID stopped answering)
+            r = [last[i] if c == "" and i < len(last) else c for i, c in enumerate(r)]
+            last = r
+            r = ["" if c == "nan" else c for c in r]
         mask: List[bool] = []
         for c in r:
             try:
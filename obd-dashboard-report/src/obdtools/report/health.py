@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import os
+from html import escape
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from ..logger.profile import STAGES, profile_paths_for
+from ..utils.downsample import thin_slice
+
+STAGE_COLORS = {"query": "#1f77b4", "write": "#ff7f0e", "ods": "#9467bd",
+                "dtc": "#d62728", "rotate": "#8c564b", "sleep": "#c7c7c7"}
+
+
+def load_profile(log_path: str, profile_path: Optional[str] = None
+                 ) -> Optional[Tuple[dict, Optional[pd.DataFrame]]]:
+    """Summary and per-cycle frame written by `obdtools log --profile`, or None when absent.
+
+    profile_path may point at either sidecar; by default they are looked up next to log_path.
+    """
+    if profile_path:
+        base = os.path.splitext(profile_path)[0]
+        json_path, tsv_path = base + ".json", base + ".tsv"
+    else:
+        json_path, tsv_path = profile_paths_for(log_path)
+    if not os.path.isfile(json_path):
+        return None
+    with open(json_path, encoding="utf-8") as f:
+        summary = json.load(f)
+    cycles = pd.read_csv(tsv_path, sep="\t") if os.path.isfile(tsv_path) else None
+    return summary, cycles
+
+
+def fig_cycle_stages(cycles: pd.DataFrame, max_points: int = 5000) -> Optional[go.Figure]:
+    """Stacked per-cycle stage durations over time; sleep on top shows the slack left."""
+    if cycles is None or cycles.empty:
+        return None
+    d = cycles.iloc[thin_slice(cycles.shape[0], max_points)]
+    fig = go.Figure()
+    for s in STAGES:
+        col = f"{s}_ms"
+        if col in d.columns:
+            fig.add_trace(go.Scatter(x=d["t_s"], y=d[col], name=s, mode="lines", stackgroup="one",
+                                     line=dict(width=0.5, color=STAGE_COLORS.get(s))))
+    fig.update_layout(title="Durée des étapes par cycle", height=360, hovermode="x unified",
+                      xaxis_title="s depuis le début", yaxis_title="ms",
+                      margin=dict(l=40, r=10, t=50, b=40))
+    return fig
+
+
+def _cell(v, pct: bool = False) -> str:
+    if v is None:
+        return ""
+    return f"{v:.1%}" if pct else (f"{v:.1f}" if isinstance(v, float) else str(v))
+
+
+def stage_table(summary: dict) -> str:
+    rows = "\n".join(
+        f"<tr><td>{escape(name)}</td><td>{_cell(st.get('mean_ms'))}</td><td>{_cell(st.get('p50_ms'))}</td>"
+        f"<td>{_cell(st.get('p95_ms'))}</td><td>{_cell(st.get('p99_ms'))}</td><td>{_cell(st.get('max_ms'))}</td>"
+        f"<td>{_cell(st.get('share'), pct=True)}</td></tr>"
+        for name, st in summary.get("stages", {}).items())
+    return ("<table class='summary'><thead><tr><th>Étape</th><th>Moy. ms</th><th>p50</th><th>p95</th>"
+            f"<th>p99</th><th>Max</th><th>Part</th></tr></thead><tbody>{rows}</tbody></table>")
+
+
+def pid_table(summary: dict) -> str:
+    pids = [(n, p) for n, p in summary.get("pids", {}).items() if p.get("queries")]
+    pids.sort(key=lambda x: -(x[1].get("p95_ms") or 0))
+    rows = "\n".join(
+        f"<tr><td>{escape(n)}</td><td>{p['queries']}</td><td>{_cell(p.get('null_rate'), pct=True)}</td>"
+        f"<td>{_cell(p.get('mean_ms'))}</td><td>{_cell(p.get('p50_ms'))}</td><td>{_cell(p.get('p95_ms'))}</td>"
+        f"<td>{_cell(p.get('max_ms'))}</td></tr>"
+        for n, p in pids)
+    return ("<table class='summary'><thead><tr><th>PID</th><th>Requêtes</th><th>Nulles</th><th>Moy. ms</th>"
+            f"<th>p50</th><th>p95</th><th>Max</th></tr></thead><tbody>{rows}</tbody></table>")
+
+
+def health_section(summary: dict, cycles: Optional[pd.DataFrame], to_div: Callable[[go.Figure], str],
+                   max_points: int = 5000) -> str:
+    """'Acquisition health' report section: headline, stacked stage chart, stage and PID tables."""
+    c = summary.get("cycle", {})
+    pacing = summary.get("pacing") or {}
+    head = (f"{summary.get('cycles', 0)} cycles, moyenne {_cell(c.get('mean_ms'))} ms "
+            f"(p95 {_cell(c.get('p95_ms'))}, max {_cell(c.get('max_ms'))} ms)")
+    if pacing.get("achieved_hz") is not None:
+        head += f", {pacing['achieved_hz']:.2f} Hz atteints, {pacing.get('overruns', 0)} dépassements"
+    fig = fig_cycle_stages(cycles, max_points)
+    chart = f"<section class='chart'>{to_div(fig)}</section>" if fig is not None else ""
+    return f"""
+<section class='report-section' id='acquisition-health'>
+  <h3>Acquisition health</h3>
+  <p class='muted'>Où part le temps de chaque cycle du logger (<code>obdtools log --profile</code>) : requêtes
+  adaptateur, écriture, ODS, DTC, rotation, puis attente du prochain tick. Peu d’attente = cadence limitée par
+  l’adaptateur ; PIDs lents ou souvent nuls en tête du tableau. {escape(head)}.</p>
+  {chart}
+  {stage_table(summary)}
+  {pid_table(summary)}
+</section>
+"""
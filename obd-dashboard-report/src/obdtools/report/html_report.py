@@ -11,12 +11,13 @@ import plotly.graph_objects as go
 import plotly.io as pio
 from plotly.subplots import make_subplots
 
-from ..csvio.readers import load_csv_with_units
+from ..csvio.readers import load_log
 from ..analysis.corr import pearson_heatmap_fig
 from ..plotting.plotly_helpers import per_pid_figure
 from ..utils.downsample import thin_slice
 from ..utils.names import normalize_header, safe_id
 from .template_loader import load_template, copy_assets
+from .health import health_section, load_profile
 
 
 # ---------------------------
@@ -312,15 +313,21 @@ def build_html_report(
     corr_top: int = 12,
     template_path: Optional[str] = None,
     source_name: Optional[str] = None,
+    profile: Optional[tuple] = None,
 ) -> str:
     """
     Build a single HTML string with:
       - a single general correlation heatmap at the top (in __HEAT__) — inject Plotly runtime inline there
+      - an acquisition health section when `profile` is given (load_profile() result)
       - overlay sections (each chart on its own line)
       - per-PID charts (each chart on its own line)
     """
     # Time parsing & sort
-    ts = parse_time_column(df)
+    sparse = bool(df.attrs.get("sparse"))
+    if "_ts" in df.columns and pd.api.types.is_datetime64_any_dtype(df["_ts"]):
+        ts = df["_ts"]   # parsed by the loader (columnar logs: epoch shifted to the logger's local time)
+    else:
+        ts = parse_time_column(df)
     df = df.assign(_ts=ts).dropna(subset=["_ts"]).sort_values("_ts")
     ts = df["_ts"]
 
@@ -395,6 +402,9 @@ def build_html_report(
         # If no heatmap was created (rare), the first call here will still include Plotly inline
         # by setting include_plotlyjs=True just once.
         nonlocal plotly_rt
+        if sparse:
+            # Multi-rate log: a slow PID is NaN on most rows; draw its line across them
+            fig.for_each_trace(lambda t: t.update(connectgaps=True) if t.type in ("scatter", "scattergl") else None)
         if plotly_rt:
             return pio.to_html(fig, include_plotlyjs=False, full_html=False)
         # No inline runtime earlier -> include it here for the first chart
@@ -406,6 +416,10 @@ def build_html_report(
     # ----- Overlay sections (each chart one per line)
     sections_html: List[str] = []
 
+    # 0) Acquisition health (logger --profile sidecars)
+    if profile:
+        sections_html.append(health_section(profile[0], profile[1], to_div, max_points))
+
     # A) Fuel trims (Bank 1)
     trims_fig = fig_fuel_trims_b1(ts, df)
     if trims_fig:
@@ -528,10 +542,16 @@ def build_html_report(
     for col in ordered_for_individual:
         unit = units_map.get(col, "")
         series = df[col]
-        fig = per_pid_figure(
-            ts.iloc[idx], series.iloc[idx], col, unit,
-            rolling_n=roll_n, max_points=max_points
-        )
+        if sparse:
+            # Plot this PID's own samples (thinning the shared rows would mostly pick NaN)
+            series = series.dropna()
+            fig = per_pid_figure(ts.loc[series.index], series, col, unit,
+                                 rolling_n=roll_n, max_points=max_points)
+        else:
+            fig = per_pid_figure(
+                ts.iloc[idx], series.iloc[idx], col, unit,
+                rolling_n=roll_n, max_points=max_points
+            )
         div = to_div(fig)
         indiv_blocks.append(
             f"<section class='chart' id='sec_{safe_id(col)}' "
@@ -631,12 +651,15 @@ def build_html_from_csv(
     max_points: int = 5000,
     corr_top: int = 12,
     template_path: Optional[str] = None,
+    profile_path: Optional[str] = None,
 ) -> str:
     """
-    Convenience wrapper: load CSV (semicolon separator + units row), build HTML,
+    Convenience wrapper: load CSV (semicolon separator + units row) or an ingest
+    partition directory, build HTML (with the acquisition health section when a
+    `log --profile` sidecar sits next to the log or profile_path is given),
     copy CSS/JS assets next to the output file (if out_path given), return HTML string.
     """
-    df, units_map = load_csv_with_units(csv_path, sep=";")
+    df, units_map = load_log(csv_path, sep=";")
     html = build_html_report(
         df=df,
         units_map=units_map,
@@ -647,7 +670,8 @@ def build_html_from_csv(
         max_points=max_points,
         corr_top=corr_top,
         template_path=template_path,
-        source_name=os.path.basename(csv_path),
+        source_name=os.path.basename(os.path.normpath(csv_path)),
+        profile=load_profile(csv_path, profile_path),
     )
 
     if out_path:
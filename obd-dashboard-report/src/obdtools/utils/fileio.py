@@ -50,6 +50,11 @@ class AtomicCSVWriter:
         self._w.writerow(row)
         safe_fsync(self._f)
 
+    def writerows(self, rows: Iterable[Sequence[object]]) -> None:
+        """Write a batch of rows with a single fsync."""
+        self._w.writerows(rows)
+        safe_fsync(self._f)
+
     def close(self) -> None:
         try:
             self._f.close()
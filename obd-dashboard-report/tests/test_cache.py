@@ -0,0 +1,65 @@
+# tests/test_cache.py
+import math
+
+import pytest
+
+from obdtools.logger.cache import CachedConnection, default_ttl, parse_ttl_overrides
+from obdtools.logger.core import detect_units_map
+
+
+class Cmd:
+    mode = 1
+    def __init__(self, name, command):
+        self.name, self.command = name, command
+
+class Resp:
+    def __init__(self, val):
+        self.value = val
+    def is_null(self):
+        return self.value is None
+
+class CountingConn:
+    def __init__(self):
+        self.calls = []
+    def query(self, cmd, force=False):
+        self.calls.append(cmd.name)
+        return Resp(len(self.calls))
+    def supports(self, cmd):
+        return True
+
+
+def test_cached_connection_honours_per_pid_ttl():
+    now = [0.0]
+    raw = CountingConn()
+    conn = CachedConnection(raw, ttl={"rpm": 0.5}, clock=lambda: now[0])
+    rpm, coolant = Cmd("RPM", b"010C"), Cmd("COOLANT_TEMP", b"0105")
+
+    assert conn.query(rpm).value == 1 and conn.query(rpm).value == 1
+    assert conn.query(coolant).value == 2
+    now[0] = 1.0
+    assert conn.query(rpm).value == 3          # override: 0.5 s
+    assert conn.query(coolant).value == 2      # slow class: 2 s
+    assert conn.query(coolant, max_age=0.5).value == 4
+    assert conn.supports(rpm)                  # delegated
+    assert (conn.hits, conn.misses) == (2, 4)
+    assert conn.per_pid["RPM"] == [1, 2]
+
+
+def test_detect_units_map_reuses_fresh_answers():
+    raw = CountingConn()
+    conn = CachedConnection(raw, clock=lambda: 0.0)
+    cmds = [Cmd("RPM", b"010C"), Cmd("SPEED", b"010D")]
+    for cmd in cmds:
+        conn.query(cmd, force=True)
+    detect_units_map(conn, cmds)
+    assert raw.calls == ["RPM", "SPEED"]
+    assert "2 hits / 2 misses" in conn.summary()
+
+
+def test_ttl_defaults_and_overrides():
+    assert default_ttl("PIDS_A") == math.inf
+    assert default_ttl("coolant_temp") > default_ttl("RPM")
+    assert default_ttl("TIME_SINCE_DTC_CLEARED") >= 30
+    assert parse_ttl_overrides("rpm=0, COOLANT_TEMP=5") == {"RPM": 0.0, "COOLANT_TEMP": 5.0}
+    with pytest.raises(ValueError):
+        parse_ttl_overrides("RPM")
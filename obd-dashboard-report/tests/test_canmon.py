@@ -0,0 +1,63 @@
+# tests/test_canmon.py
+import json
+
+from obdtools.csvio.readers import load_csv_with_units
+from obdtools.logger.canmon import LineParser, run_can_monitor
+
+
+def _write_drive(tmp_path):
+    signals = tmp_path / "signals.json"
+    signals.write_text(json.dumps([
+        {"name": "RPM", "id": "0C9", "start": 8, "length": 16, "scale": 0.25, "unit": "rpm"},
+        {"name": "SPEED", "id": "0x3E9", "start": 0, "length": 16, "scale": 0.01, "unit": "km/h"},
+    ]))
+    dump = tmp_path / "drive.log"
+    dump.write_text(
+        "(1700000000.000000) can0 0C9#0012C00000000000\n"
+        "(1700000000.004000) can0 1A0#FFFFFFFFFFFFFFFF\n"
+        "(1700000000.010000) can0 3E9#1770000000000000\n"
+        "(1700000000.020000) can0 0C9#001F400000000000\n"
+    )
+    return signals, dump
+
+
+def test_can_monitor_writes_decoded_rows_from_dump(tmp_path):
+    signals, dump = _write_drive(tmp_path)
+    csv_path = run_can_monitor(signals=str(signals), dump=str(dump), out_base=str(tmp_path / "can"),
+                               add_epoch=True, max_rows=3)
+
+    df, units = load_csv_with_units(csv_path)
+    assert units["RPM"] == "rpm" and units["SPEED"] == "km/h"
+    assert df["RPM"].tolist() == [1200.0, 1200.0, 2000.0]
+    assert df["SPEED"].isna().tolist() == [True, False, False] and df["SPEED"].iloc[-1] == 60.0
+
+
+def test_can_monitor_stops_at_the_end_of_the_dump(tmp_path, capsys):
+    signals, dump = _write_drive(tmp_path)
+    csv_path = run_can_monitor(signals=str(signals), dump=str(dump), out_base=str(tmp_path / "can"))
+    df, _units = load_csv_with_units(csv_path)
+    assert len(df) == 3 and df["RPM"].iloc[-1] == 2000.0
+    out = capsys.readouterr().out
+    assert f"End of {dump}." in out and "3 rows" in out
+
+
+def test_line_parser_splits_chunks_and_counts_overflows():
+    p = LineParser()
+    stream = b"0C9 00 12 C0\r3E9 177\rBUFFER FULL\r>"
+    out = []
+    for i in range(0, len(stream), 5):
+        out += p.feed(stream[i:i + 5])
+    assert out == [(0x0C9, b"\x00\x12\xc0")]
+    assert (p.errors, p.overflows) == (1, 1)
+
+
+def test_cli_warns_about_options_ignored_by_can_monitor(tmp_path, capsys, monkeypatch):
+    from obdtools.logger import canmon
+    from obdtools.logger.cli_adapter import main
+    calls = []
+    monkeypatch.setattr(canmon, "run_can_monitor", lambda **kw: calls.append(kw) or str(tmp_path / "can.csv"))
+    assert main(["--can-monitor", "signals.json", "--rotate-min", "5", "--compress", "gzip", "--rate", "RPM=10",
+                 "--paranoid"]) == 0
+    err = capsys.readouterr().err
+    assert "--rate, --compress, --rotate-min do not apply" in err and "--paranoid" not in err
+    assert calls[0]["paranoid"] is True and calls[0]["fsync_ms"] == 1000.0
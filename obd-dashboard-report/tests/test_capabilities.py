@@ -0,0 +1,63 @@
+# tests/test_capabilities.py
+import json
+
+import pytest
+
+obd = pytest.importorskip("obd")
+
+from obdtools.logger.capabilities import CapabilityCache, commands_from_names, vehicle_key
+from obdtools.logger.core import units_from_definitions
+
+
+class Resp:
+    def __init__(self, value):
+        self.value = value
+    def is_null(self):
+        return self.value is None
+
+
+class Conn:
+    def __init__(self, answers, supported=()):
+        self.answers = answers
+        self.supported_commands = set(supported)
+        self.queries = []
+    def supports(self, cmd):
+        return cmd in self.supported_commands
+    def query(self, cmd, force=False):
+        self.queries.append(cmd.name)
+        return Resp(self.answers.get(cmd.name))
+
+
+def test_units_come_from_command_definitions():
+    class Opaque:
+        name = "CUSTOM"
+    units, unresolved = units_from_definitions([obd.commands.RPM, obd.commands.COOLANT_TEMP,
+                                                obd.commands.STATUS, Opaque()])
+    assert units == {"RPM": "revolutions_per_minute", "COOLANT_TEMP": "degree_Celsius", "STATUS": ""}
+    assert [c.name for c in unresolved] == ["CUSTOM"]
+
+
+def test_vehicle_key_prefers_vin_then_bitmaps():
+    bits = [True, False] * 16
+    assert vehicle_key(Conn({"VIN": bytearray(b"WVWZZZ1JZXW000001"), "PIDS_A": bits})) == "vin:WVWZZZ1JZXW000001"
+    # Mode 09 bitmap known and VIN not in it: no VIN query at all
+    conn = Conn({"PIDS_A": bits}, supported=[obd.commands.PIDS_9A])
+    assert vehicle_key(conn) == "pids:aaaaaaaa.-.-" and "VIN" not in conn.queries
+    assert vehicle_key(Conn({})) == ""
+
+
+def test_cache_round_trip_and_bad_file(tmp_path):
+    path = tmp_path / "caps" / "capabilities.json"
+    cache = CapabilityCache(str(path))
+    assert cache.lookup("vin:X") is None
+    cache.store("vin:X", ["RPM", "SPEED", "NOT_A_COMMAND"], {"RPM": "revolutions_per_minute"}, protocol="CAN")
+
+    again = CapabilityCache(str(path))
+    entry = again.lookup("vin:X")
+    assert entry["protocol"] == "CAN" and entry["units"]["RPM"] == "revolutions_per_minute"
+    assert [c.name for c in commands_from_names(entry["commands"])] == ["RPM", "SPEED"]
+
+    path.write_text("{not json")
+    assert CapabilityCache(str(path)).lookup("vin:X") is None
+    path.write_text(json.dumps({"version": 999, "vehicles": {"vin:X": {"commands": ["RPM"]}}}))
+    assert CapabilityCache(str(path)).lookup("vin:X") is None
@@ -0,0 +1,69 @@
+# tests/test_columnar.py
+import math
+
+import numpy as np
+import pytest
+
+from obdtools.csvio import columnar
+from obdtools.csvio.columnar import open_columnar_log, load_columnar_log, is_columnar_log
+from obdtools.csvio.readers import load_log
+
+T0 = 1_760_000_000_000_000_000  # epoch ns
+META = {"sparse": True, "utc_offset_s": 7200}
+
+
+def _write(fmt, path, rows=10, chunk_rows=4):
+    w = open_columnar_log(fmt, str(path), ["RPM", "COOLANT_TEMP"], {"RPM": "revolutions_per_minute"}, META,
+                          chunk_rows=chunk_rows)
+    for i in range(rows):
+        w.writerow([T0 + i * 100_000_000, 800.0 + i, 55.0 if i % 5 == 0 else math.nan])
+    w.close()
+    return w
+
+
+def _check(df, units, rows=10):
+    assert len(df) == rows and list(df.columns) == ["timestamp_epoch_ms", "RPM", "COOLANT_TEMP", "_ts"]
+    assert df["RPM"].dtype == np.float32 and df["RPM"].tolist() == [800.0 + i for i in range(rows)]
+    assert df["COOLANT_TEMP"].notna().sum() == 2
+    assert units == {"RPM": "revolutions_per_minute"} and df.attrs["sparse"] is True
+    # UTC epoch shifted by the logger's UTC offset (+2 h) like local CSV timestamps
+    assert str(df["_ts"].iloc[0]) == "2025-10-09 10:53:20"
+
+
+def test_npz_chunks_round_trip_and_mmap(tmp_path):
+    path = tmp_path / "log.npzc"
+    w = _write("npz-chunks", path)
+    assert w.chunks == 3 and sorted(p.name for p in path.iterdir())[-1] == "header.json"
+    (path / "chunk_000003.npz.tmp").write_bytes(b"half-written")   # crash mid-chunk: ignored
+    assert is_columnar_log(path)
+    _check(*load_log(str(path)))
+
+    members = columnar._npz_members(path / "chunk_000000.npz")
+    assert isinstance(members["values"], np.memmap) and members["values"].shape == (2, 4)
+
+
+def test_npz_chunk_cut_on_age(tmp_path, monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(columnar.time, "monotonic", lambda: clock[0])
+    w = open_columnar_log("npz-chunks", str(tmp_path / "a.npzc"), ["RPM"], {}, {}, chunk_rows=100, chunk_s=10)
+    w.writerow([T0, 1.0]); w.flush()
+    assert w.chunks == 0
+    clock[0] = 10.0; w.flush()
+    assert w.chunks == 1
+    df, _ = load_columnar_log(tmp_path / "a.npzc")
+    assert df["RPM"].tolist() == [1.0]
+
+
+def test_arrow_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "log.arrow"
+    _write("arrow", path)
+    _check(*load_log(str(path)))
+
+
+def test_report_plots_columnar_logs_in_local_time(tmp_path):
+    from obdtools.report.html_report import build_html_from_csv
+    path = tmp_path / "log.npzc"
+    _write("npz-chunks", path, rows=50)
+    html = build_html_from_csv(str(path))
+    assert "2025-10-09T10:53:2" in html and "2025-10-09T08:53" not in html   # utc_offset_s=7200
@@ -0,0 +1,59 @@
+# tests/test_compressed.py
+import csv
+import os
+
+import pytest
+
+from obdtools.csvio.compressed import compress_file, open_text, open_text_writer
+from obdtools.csvio.readers import load_csv_with_units
+from obdtools.logger.core import make_output_filename
+from obdtools.logger.writer import BackgroundWriter, CommitPolicy, SegmentCompressor
+
+HEADER = "timestamp_iso;date;time;RPM\n;;;revolutions_per_minute\n"
+
+
+def _rows(n, start=0):
+    return "".join(f"2025-10-05 10:00:{i:02d};2025-10-05;10:00:{i:02d};{800 + i}\n" for i in range(start, start + n))
+
+
+@pytest.mark.parametrize("kind,ext", [("gzip", ".gz"), ("zstd", ".zst")])
+def test_streamed_log_survives_a_crash_after_commit(tmp_path, kind, ext):
+    if kind == "zstd":
+        pytest.importorskip("zstandard")
+    path = str(tmp_path / f"log.csv{ext}")
+    f = open_text_writer(path, kind)
+    f.write(HEADER + _rows(30)); f.flush()          # a commit
+    crashed = open(path, "rb").read()               # what is on disk if the logger dies now
+    f.write(_rows(10, 30)); f.close()
+
+    df, units = load_csv_with_units(path)
+    assert len(df) == 40 and units["RPM"] == "revolutions_per_minute"
+    crash_path = tmp_path / f"crash.csv{ext}"
+    crash_path.write_bytes(crashed)
+    df, _ = load_csv_with_units(str(crash_path))
+    assert df["RPM"].tolist() == [800 + i for i in range(30)]
+
+
+def test_closed_segments_compressed_off_the_writer_thread(tmp_path):
+    comp = SegmentCompressor("gzip")
+    a, b = str(tmp_path / "a.csv"), str(tmp_path / "b.csv")
+    fa = open(a, "w", newline="", encoding="utf-8")
+    w = BackgroundWriter(fa, csv.writer(fa, delimiter=";"), CommitPolicy(every_rows=1, every_ms=0), on_close=comp.submit)
+    w.put([1, 2])
+    fb = open(b, "w", newline="", encoding="utf-8")
+    w.rotate(fb, csv.writer(fb, delimiter=";"))
+    w.put([3, 4])
+    w.close(); comp.close()
+
+    assert comp.renamed == {a: a + ".gz", b: b + ".gz"} and comp.segments == 2
+    assert not os.path.exists(a) and open_text(a + ".gz").read() == "1;2\r\n"
+    assert sorted(os.listdir(tmp_path)) == ["a.csv.gz", "b.csv.gz"]
+
+
+def test_output_names_never_collide_with_compressed_segments(tmp_path):
+    base = str(tmp_path / "obd_all")
+    first = make_output_filename(base, ".csv")
+    open(first, "w").close()
+    compress_file(first, "gzip")
+    second = make_output_filename(base, ".csv")
+    assert second != first and not os.path.exists(second)
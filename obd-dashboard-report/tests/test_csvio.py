@@ -14,3 +14,30 @@ def test_load_csv_with_units(sample_csv):
     # Ensure time is monotonic after sort
     assert df["_ts"].is_monotonic_increasing
     assert units.get("Engine RPM") == "revolutions_per_minute"
+
+def test_load_long_format_pivots_to_wide(tmp_path):
+    p = tmp_path / "long.csv"
+    p.write_text(
+        "timestamp_iso;pid;value;unit\n"
+        "2025-10-05 10:00:00.000;RPM;800;revolutions_per_minute\n"
+        "2025-10-05 10:00:00.000;COOLANT_TEMP;55;degree_Celsius\n"
+        "2025-10-05 10:00:00.100;RPM;810;revolutions_per_minute\n"
+        "2025-10-05 10:00:00.200;RPM;;revolutions_per_minute\n",
+        encoding="utf-8")
+    df, units = load_csv_with_units(str(p))
+    assert list(df.columns) == ["timestamp_iso", "RPM", "COOLANT_TEMP", "_ts"]
+    assert df["RPM"].tolist()[:2] == [800, 810] and df["COOLANT_TEMP"].notna().sum() == 1
+    assert units == {"RPM": "revolutions_per_minute", "COOLANT_TEMP": "degree_Celsius"}
+    assert df.attrs["sparse"] is True
+
+def test_load_sparse_wide_marks_frame(tmp_path):
+    p = tmp_path / "wide.csv"
+    p.write_text(
+        "timestamp_iso;date;time;RPM;COOLANT_TEMP\n"
+        "sparse;;;revolutions_per_minute;degree_Celsius\n"
+        "2025-10-05 10:00:00.000;2025-10-05;10:00:00;800;55\n"
+        "2025-10-05 10:00:00.100;2025-10-05;10:00:00;810;\n",
+        encoding="utf-8")
+    df, units = load_csv_with_units(str(p))
+    assert df.attrs["sparse"] is True and "timestamp_iso" not in units
+    assert units["RPM"] == "revolutions_per_minute" and df["COOLANT_TEMP"].isna().sum() == 1
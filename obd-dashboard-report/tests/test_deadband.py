@@ -0,0 +1,92 @@
+# tests/test_deadband.py
+import csv
+import math
+
+import pytest
+
+from obdtools.csvio.readers import load_csv_with_units
+from obdtools.logger.deadband import DEADBAND_MARK, GAP_CELL, DeadbandFilter, parse_deadbands
+
+
+def test_parse_deadbands():
+    assert parse_deadbands("RPM=25, Coolant Temp=0.5,*=0") == {"rpm": 25.0, "coolant_temp": 0.5, "*": 0.0}
+    assert parse_deadbands("") == {}
+    for bad in ("RPM", "RPM=-1", "=3", "RPM=x", "RPM=inf"):
+        with pytest.raises(ValueError):
+            parse_deadbands(bad)
+
+
+def test_filter_band_hold_gaps_and_reset():
+    f = DeadbandFilter(["RPM", "SPEED", "FUEL_STATUS"], {"rpm": 25.0, "fuel_status": 0.0}, hold_s=10.0)
+    rows = [(800.0, 0.0, "OL"), (810.0, 0.0, "OL"), (824.0, 0.0, "OL"), (826.0, 0.0, "CL"),
+            (826.0, 0.0, "CL"), ("", 0.0, "CL"), ("", 0.0, "CL"), (900.0, 0.0, "CL")]
+    out = [f.apply(["t", *r], 1, float(k))[1:] for k, r in enumerate(rows)]
+    assert [o[0] for o in out] == [800.0, "", "", 826.0, "", GAP_CELL, "", 900.0]
+    assert [o[1] for o in out] == [0.0] * 8                     # no band: written every time
+    assert [o[2] for o in out] == ["OL", "", "", "CL", "", "", "", ""]
+
+    # hold: written again 10 s after the last write (FUEL_STATUS at 3 s, RPM at 7 s)
+    assert f.apply(["t", 900.0, 0.0, "CL"], 1, 16.9)[1:] == ["", 0.0, "CL"]
+    assert f.apply(["t", 900.0, 0.0, "CL"], 1, 17.0)[1:] == [900.0, 0.0, ""]
+    f.reset()
+    assert f.apply(["t", 900.0, 0.0, "CL"], 1, 17.5)[1:] == [900.0, 0.0, "CL"]   # new file starts complete
+
+    s = f.stats()
+    assert set(s["pids"]) == {"RPM", "FUEL_STATUS"}
+    rpm = s["pids"]["RPM"]
+    assert (rpm["samples"], rpm["written"], rpm["max_error"]) == (9, 6, 24.0)   # 5 values + 1 gap mark
+    assert s["pids"]["FUEL_STATUS"]["max_error"] == 0.0 and 0 < s["saved"] < 1
+
+
+def test_round_trip_is_within_band(tmp_path):
+    """Every value read back is within its band of the value sampled at that row."""
+    bands = {"rpm": 25.0, "speed": 0.5, "*": 0.0}
+    names = ["RPM", "SPEED", "COOLANT_TEMP"]
+    f = DeadbandFilter(names, bands, hold_s=5.0)
+    p = tmp_path / "obd_all_db.csv"
+    sampled = []
+    with p.open("w", newline="", encoding="utf-8") as fh:
+        w = csv.writer(fh, delimiter=";")
+        w.writerow(["timestamp_iso", "date", "time"] + names)
+        w.writerow([DEADBAND_MARK, "", "", "revolutions_per_minute", "kilometer_per_hour", "degree_Celsius"])
+        for k in range(600):
+            t = k * 0.1
+            row = [round(800 + 300 * math.sin(t / 3) + (k % 7), 3), round(50 + t / 10, 3), 90.0]
+            if 200 <= k < 220:
+                row[0] = ""                                      # RPM not answering for 2 s
+            sampled.append(row)
+            stamp = f"2025-10-05 10:{int(t) // 60:02d}:{t % 60:06.3f}"
+            w.writerow(f.apply([stamp, "2025-10-05", stamp[11:19]] + row, 3, t))
+
+    df, units = load_csv_with_units(str(p))
+    assert units["SPEED"] == "kilometer_per_hour" and df.attrs["sparse"] is False and len(df) == 600
+    for j, name in enumerate(names):
+        band = bands.get(name.lower(), 0.0)
+        for k, got in enumerate(df[name]):
+            want = sampled[k][j]
+            if want == "":
+                assert math.isnan(got), (name, k)
+            else:
+                assert abs(got - want) <= band + 1e-9, (name, k, got, want)
+    s = f.stats()
+    assert s["pids"]["COOLANT_TEMP"]["written"] == 12          # constant: once per 5 s hold
+    assert s["pids"]["RPM"]["max_error"] <= 25.0 and s["saved"] > 0.5
+
+
+def test_calc_export_fills_held_cells(tmp_path):
+    pytest.importorskip("odf")
+    import pandas as pd
+    from obdtools.report.calc_export import csv_to_ods
+
+    p = tmp_path / "db.csv"
+    p.write_text("timestamp_iso;date;time;RPM\n"
+                 "deadband;;;revolutions_per_minute\n"
+                 "2025-10-05 10:00:00;2025-10-05;10:00:00;800.0\n"
+                 "2025-10-05 10:00:01;2025-10-05;10:00:01;\n"
+                 "2025-10-05 10:00:02;2025-10-05;10:00:02;nan\n"
+                 "2025-10-05 10:00:03;2025-10-05;10:00:03;\n", encoding="utf-8")
+    out = tmp_path / "db.ods"
+    csv_to_ods(str(p), str(out))
+    sheet = pd.read_excel(out, engine="odf", header=0)
+    assert sheet["RPM"].tolist()[1:3] == [800, 800] and sheet["RPM"].iloc[3:].isna().all()
+    assert pd.isna(sheet["timestamp_iso"].iloc[0])              # the mark is not copied
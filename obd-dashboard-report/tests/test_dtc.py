@@ -0,0 +1,227 @@
+# tests/test_dtc.py
+import csv
+import json
+import time
+import types
+
+from obdtools import dtc_to_text
+from obdtools.logger.cache import CachedConnection
+from obdtools.logger.dtc import DTCLogger
+
+NAMES = ["STATUS", "GET_CURRENT_DTC", "GET_DTC", "GET_PERMANENT_DTC",
+         "WARMUPS_SINCE_DTC_CLEAR", "TIME_SINCE_DTC_CLEARED"]
+
+
+class Cmd:
+    def __init__(self, name, pid=None):
+        self.name, self.pid = name, pid
+
+
+class Resp:
+    def __init__(self, value):
+        self.value = value
+    def is_null(self):
+        return self.value is None
+
+
+class Status:
+    def __init__(self, mil, dtc_count):
+        self.mil, self.dtc_count = mil, dtc_count
+
+
+class Conn:
+    """Every query takes 3 ms (slower than a cache hit); GET_DTC reports `codes`."""
+    def __init__(self):
+        self.log = []
+        self.codes = [("P0301", "Cylinder 1 misfire")]
+        self.status = Status(False, 1)
+    def supports(self, cmd):
+        return cmd.name in NAMES
+    def query(self, cmd, force=False):
+        self.log.append(cmd.name)
+        time.sleep(0.003)
+        if cmd.name == "GET_DTC":
+            return Resp(list(self.codes))
+        if cmd.name == "STATUS":
+            return Resp(self.status)
+        return Resp([] if cmd.name.endswith("_DTC") else 5)
+
+
+def _logger(tmp_path, conn, extra=(), **kw):
+    cmds = {n: Cmd(n) for n in NAMES + ["TIME_WITH_MIL_ON"]}
+    cmds.update({c.name: c for c in extra})
+    kw.setdefault("enable_freeze", False)
+    kw.setdefault("period_s", 0.0)
+    return DTCLogger(conn, types.SimpleNamespace(commands=types.SimpleNamespace(**cmds)), out_dir=tmp_path, **kw)
+
+
+def _rows(tmp_path, kind):
+    path = next(tmp_path.glob(f"obd_dtc_{kind}_*.csv"))
+    return list(csv.reader(path.open(encoding="utf-8"), delimiter=";"))[1:]
+
+
+def test_snapshot_cycle_spreads_one_query_per_tick(tmp_path):
+    conn = Conn()
+    dtc = _logger(tmp_path, conn)
+    issued = [dtc.step() for _ in range(len(NAMES))]
+    assert issued == [1] * len(NAMES)              # unsupported TIME_WITH_MIL_ON costs no tick
+    assert conn.log == NAMES and dtc.cycles == 0
+    dtc.step()                                     # the cycle ends: rows are written
+    assert dtc.cycles == 1
+    dtc.close()
+
+    snap = _rows(tmp_path, "snapshot")
+    assert len(snap) == 1 and snap[0][4] == "P0301" and snap[0][6] == "5" and snap[0][2] == "1"
+    assert [r[1:4] for r in _rows(tmp_path, "events")] == [["appeared", "confirmed", "P0301"]]
+
+
+def test_budget_allows_several_queries_per_tick(tmp_path):
+    dtc = _logger(tmp_path, Conn())
+    assert dtc.step(budget_s=1.0) == len(NAMES) and dtc.cycles == 1
+    dtc.poll_once()                                # blocking full cycle still available
+    dtc.close()
+    assert len(_rows(tmp_path, "snapshot")) == 2
+
+
+def test_status_mode_reads_lists_only_on_status_change(tmp_path):
+    conn = Conn()
+    dtc = _logger(tmp_path, conn, lists_s=3600, counters_s=3600)
+    for _ in range(5):
+        dtc.poll_once()
+    assert conn.log == NAMES + ["STATUS"] * 4      # lists and counters once, then STATUS only
+
+    conn.log.clear()
+    conn.codes.append(("P0420", "Catalyst efficiency below threshold"))
+    conn.status = Status(True, 2)
+    dtc.poll_once()
+    assert conn.log == ["STATUS", "GET_CURRENT_DTC", "GET_DTC", "GET_PERMANENT_DTC"]
+    assert dtc.list_reads == 2 and dtc.list_reads_on_change == 1
+    dtc.close()
+
+    snap = _rows(tmp_path, "snapshot")
+    assert [(r[12], r[13]) for r in snap] == [("change", "1"), ("end", "4"), ("change", "1")]
+    assert all(r[6] == "5" for r in snap)          # counters carried over
+    assert snap[1][4] == "P0301" and snap[2][4] == "P0301|P0420"
+    assert [r[1:4] for r in _rows(tmp_path, "events")][1:] == [["appeared", "confirmed", "P0420"], ["mil_on", "-", "-"]]
+
+
+def test_full_mode_reads_everything_every_cycle(tmp_path):
+    conn = Conn()
+    dtc = _logger(tmp_path, conn, mode="full")
+    dtc.poll_once(); dtc.poll_once()
+    dtc.close()
+    assert conn.log == NAMES * 2
+
+
+# Mode 02 PIDs: the bitmaps, and values python-OBD mirrors from Mode 01 support
+FREEZE = [Cmd("DTC_PIDS_A", 0x00), Cmd("DTC_FREEZE_DTC", 0x02), Cmd("DTC_COOLANT_TEMP", 0x05),
+          Cmd("DTC_RPM", 0x0C), Cmd("DTC_SPEED", 0x0D), Cmd("DTC_INTAKE_TEMP", 0x0F), Cmd("FREEZE_DTC", 0x02)]
+
+
+class FreezeConn(Conn):
+    """Mirrors DTC_COOLANT_TEMP/RPM/SPEED/INTAKE_TEMP as supported; `bitmap` answers Mode 02 PID 00."""
+    def __init__(self, bitmap=None):
+        super().__init__()
+        self.bitmap = bitmap
+        self.freeze_code = ("P0301", "Cylinder 1 misfire")
+    def supports(self, cmd):
+        return super().supports(cmd) or cmd.name in ("FREEZE_DTC", "DTC_COOLANT_TEMP", "DTC_RPM",
+                                                     "DTC_SPEED", "DTC_INTAKE_TEMP")
+    def query(self, cmd, force=False):
+        if cmd.name == "DTC_PIDS_A":
+            self.log.append(cmd.name)
+            time.sleep(0.003)
+            if self.bitmap is None:
+                return types.SimpleNamespace(messages=[types.SimpleNamespace(data=bytearray(b"\x7f\x02\x12"))])
+            data = bytearray([0x42, 0x00, 0x00]) + self.bitmap.to_bytes(4, "big")
+            return types.SimpleNamespace(messages=[types.SimpleNamespace(data=data)])
+        if cmd.name == "FREEZE_DTC":
+            self.log.append(cmd.name)
+            time.sleep(0.003)
+            return Resp(self.freeze_code)
+        return super().query(cmd, force)
+
+
+def test_freeze_frame_reads_only_bitmap_pids_in_background(tmp_path):
+    bits = (1 << (32 - 0x05)) | (1 << (32 - 0x0C))     # PIDs 05 and 0C stored in the frame
+    conn = FreezeConn(bits)
+    dtc = _logger(tmp_path, conn, extra=FREEZE, enable_freeze=True, period_s=3600)
+    for _ in range(len(NAMES)):                    # snapshot cycle: sees P0301 and queues the capture
+        dtc.step()
+    conn.log.clear()
+    issued = [dtc.step() for _ in range(4)]        # cycle ends, then FREEZE_DTC, PID 00 bitmap, 2 values
+    assert issued == [1, 1, 1, 1] and conn.log == ["FREEZE_DTC", "DTC_PIDS_A", "DTC_COOLANT_TEMP", "DTC_RPM"]
+    assert _rows(tmp_path, "freeze") == []         # written in one batch at the end
+    assert dtc.step() == 0
+    dtc.close()
+    assert [r[3] for r in _rows(tmp_path, "freeze")] == ["DTC_COOLANT_TEMP", "DTC_RPM"]
+    assert dtc.freeze_from_bitmap == 1 and dtc.freeze_rows == 2
+
+
+def test_freeze_frame_falls_back_to_mirror_and_stops_at_time_budget(tmp_path):
+    conn = FreezeConn(bitmap=None)                 # negative response to PID 00
+    dtc = _logger(tmp_path, conn, extra=FREEZE, enable_freeze=True)
+    dtc.poll_once()
+    assert [r[3] for r in _rows(tmp_path, "freeze")] == ["DTC_COOLANT_TEMP", "DTC_INTAKE_TEMP", "DTC_RPM", "DTC_SPEED"]
+
+    conn = FreezeConn(bitmap=None)
+    dtc = _logger(tmp_path / "cut", conn, extra=FREEZE, enable_freeze=True, freeze_max_s=0.0)
+    dtc.poll_once()
+    assert dtc.freeze_truncated == 1 and dtc.freeze_rows == 0 and "DTC_RPM" not in conn.log
+
+
+def test_freeze_capture_does_not_reuse_cached_frame(tmp_path):
+    bits = (1 << (32 - 0x05)) | (1 << (32 - 0x0C))
+    conn = FreezeConn(bits)
+    now = [0.0]
+    dtc = _logger(tmp_path, CachedConnection(conn, clock=lambda: now[0]), extra=FREEZE,
+                  enable_freeze=True, mode="full")
+    dtc.poll_once()
+    now[0] = 5.0                                                        # DTC lists expired, frame not
+    conn.codes = [("P0420", "Catalyst efficiency below threshold")]    # a second fault within TTL_FREEZE
+    conn.freeze_code = conn.codes[0]
+    conn.log.clear()
+    dtc.poll_once()
+    dtc.close()
+    assert dtc.freeze_captures == 2
+    assert {"DTC_PIDS_A", "DTC_COOLANT_TEMP", "DTC_RPM"} <= set(conn.log)
+
+
+def test_snapshots_are_run_length_encoded_with_heartbeat(tmp_path):
+    now = [0.0]
+    conn = Conn()
+    dtc = _logger(tmp_path, conn, heartbeat_s=60, lists_s=3600, counters_s=3600, clock=lambda: now[0])
+    for t in range(150):                           # 150 identical 1 s cycles, then the MIL comes on
+        now[0] = float(t)
+        dtc.poll_once()
+    conn.status = Status(True, 1)
+    now[0] = 150.0
+    dtc.poll_once()
+    dtc.close()
+    snap = _rows(tmp_path, "snapshot")
+    assert [(r[12], r[13]) for r in snap] == [("change", "1"), ("heartbeat", "60"), ("heartbeat", "60"),
+                                              ("end", "29"), ("change", "1")]
+    assert sum(int(r[13]) for r in snap) == 151
+
+
+def test_journal_holds_all_tables_and_rebuilds_timeline(tmp_path):
+    conn = FreezeConn(bitmap=1 << (32 - 0x0C))
+    dtc = _logger(tmp_path, conn, extra=FREEZE, enable_freeze=True, journal=True, lists_s=0)
+    for _ in range(3):
+        dtc.poll_once()
+    conn.codes = []
+    conn.status = Status(False, 0)
+    dtc.poll_once()
+    dtc.close()
+    assert [p.suffix for p in tmp_path.iterdir()] == [".jsonl"]
+    path = next(tmp_path.iterdir())
+    recs = [json.loads(line) for line in path.open(encoding="utf-8")]
+    assert recs[0]["format"] == "dtc-journal" and [r["table"] for r in recs[1:4]] == ["snapshot", "events", "freeze"]
+    assert [r[0] for r in recs[4:]] == ["snapshot", "events", "freeze", "snapshot", "snapshot", "events"]
+
+    out = tmp_path / "report.txt"
+    dtc_to_text.main(["--journal", str(path), "--out", str(out)])
+    text = out.read_text(encoding="utf-8")
+    timeline = text.split("TIMELINE")[1].split("EVENTS")[0]
+    assert "(3 cycles)" in timeline and "confirmed P0301" in timeline and "(1 cycle)" in timeline
+    assert "DTC_RPM: 5" in text and "cleared   | confirmed | P0301" in text
@@ -0,0 +1,134 @@
+# tests/test_ingest.py
+from __future__ import annotations
+import asyncio, gzip, json, math, os, time
+from array import array
+
+import pytest
+
+from obdtools.cli import main as cli_main
+from obdtools.ingest.batch import decode_batch
+from obdtools.ingest.server import IngestServer
+from obdtools.ingest.store import PartitionStore, load_partition
+
+T0 = 1759658400.0  # 2025-10-05 10:00:00 UTC
+
+def make_batch(vehicle: str, seq: int, start: float, rows: int, pids=("RPM", "SPEED")) -> bytes:
+    """Same layout as the bridge uplink: magic, JSON header, f64 timestamps, f64 columns."""
+    ts = [start + i for i in range(rows)]
+    header = {"vehicle": vehicle, "seq": seq, "start": ts[0], "end": ts[-1], "rows": rows, "pids": list(pids)}
+    body = b"OBDB1\n" + json.dumps(header).encode() + b"\n" + array("d", ts).tobytes()
+    for k, _ in enumerate(pids):
+        body += array("d", [800.0 + 10 * i + k for i in range(rows)]).tobytes()
+    return gzip.compress(body)
+
+def test_store_appends_aligned_columns_and_dedupes(tmp_path):
+    store = PartitionStore(tmp_path)
+    b1 = decode_batch(make_batch("car-1", 0, T0, 5))
+    b2 = decode_batch(make_batch("car-1", 1, T0 + 5, 3, pids=("RPM", "COOLANT_TEMP")))
+    res = store.write_batches([b1, b2, b1])
+    store.close()
+    assert [r["duplicate"] for r in res] == [False, False, True]
+
+    df, units = load_partition(tmp_path / "car-1" / "2025-10-05")
+    assert len(df) == 8 and units == {}
+    assert df["RPM"].tolist()[:2] == [800.0, 810.0]
+    assert df["SPEED"].isna().sum() == 3 and df["COOLANT_TEMP"].isna().sum() == 5
+    # Retries of an already stored batch are acknowledged but not stored twice after a restart.
+    assert PartitionStore(tmp_path).write_batches([b2])[0]["duplicate"] is True
+
+def test_store_splits_batches_on_utc_day(tmp_path):
+    store = PartitionStore(tmp_path)
+    midnight = 1759708800.0  # 2025-10-06 00:00:00 UTC
+    store.write_batches([decode_batch(make_batch("car-2", 0, midnight - 2, 4))])
+    store.close()
+    assert len(load_partition(tmp_path / "car-2" / "2025-10-05")[0]) == 2
+    assert len(load_partition(tmp_path / "car-2" / "2025-10-06")[0]) == 2
+
+def test_store_recovers_uncommitted_rows(tmp_path):
+    store = PartitionStore(tmp_path)
+    store.write_batches([decode_batch(make_batch("car-3", 0, T0, 4))])
+    store.close()
+    part = tmp_path / "car-3" / "2025-10-05"
+    with open(part / "RPM.f64", "ab") as f:  # column written, timestamps never committed
+        f.write(array("d", [1.0, 2.0]).tobytes())
+    PartitionStore(tmp_path).write_batches([decode_batch(make_batch("car-3", 1, T0 + 4, 2))])
+    df, _ = load_partition(part)
+    assert len(df) == 6 and 1.0 not in df["RPM"].tolist()
+
+def test_store_failed_commit_is_rolled_back_and_retried(tmp_path, monkeypatch):
+    store = PartitionStore(tmp_path)
+    store.write_batches([decode_batch(make_batch("car-4", 0, T0, 4))])
+    b1 = decode_batch(make_batch("car-4", 1, T0 + 4, 3))
+    real_fsync = os.fsync
+    def failing_fsync(fd):
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    with pytest.raises(OSError):
+        store.write_batches([b1])
+    monkeypatch.setattr(os, "fsync", real_fsync)
+    part = tmp_path / "car-4" / "2025-10-05"
+    assert len(load_partition(part)[0]) == 4                   # the failed rows are gone
+    assert len((tmp_path / "car-4" / "batches.log").read_text().splitlines()) == 1
+    # The retry is stored, not acknowledged as a duplicate
+    assert store.write_batches([b1])[0] == {"rows": 3, "duplicate": False}
+    store.close()
+    df, _ = load_partition(part)
+    assert len(df) == 7 and df["RPM"].tolist()[4:] == [800.0, 810.0, 820.0]
+
+def test_ingest_server_acks_after_write_and_reports_metrics(tmp_path):
+    async def scenario():
+        srv = IngestServer(PartitionStore(tmp_path))
+        server = await srv.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async def post(body: bytes) -> dict:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"POST /ingest HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            raw = await reader.read()
+            writer.close()
+            return json.loads(raw.split(b"\r\n\r\n", 1)[1])
+
+        acks = await asyncio.gather(*(post(make_batch(f"car-{v}", 0, T0, 10)) for v in range(8)))
+        bad = await post(b"not a batch")
+        metrics = srv.metrics.snapshot()
+        server.close()
+        await server.wait_closed()
+        await srv.stop()
+        return acks, bad, metrics
+
+    acks, bad, metrics = asyncio.run(scenario())
+    assert all(a["ok"] and a["rows"] == 10 for a in acks)
+    assert bad["ok"] is False and metrics["errors"] == 1
+    assert metrics["vehicles"] == 8 and metrics["samples"] == 8 * 10 * 2
+    assert len(load_partition(tmp_path / "car-5" / "2025-10-05")[0]) == 10
+
+def test_ingest_server_rejects_bad_content_length(tmp_path):
+    async def scenario():
+        srv = IngestServer(PartitionStore(tmp_path))
+        server = await srv.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        answers = []
+        for length in ("ten", "-5"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"POST /ingest HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+            answers.append(await asyncio.wait_for(reader.read(), 5))
+            writer.close()
+        metrics = srv.metrics.snapshot()
+        server.close()
+        await server.wait_closed()
+        await srv.stop()
+        return answers, metrics
+
+    answers, metrics = asyncio.run(scenario())
+    for raw in answers:
+        assert raw.startswith(b"HTTP/1.1 400 ") and b"Connection: close" in raw
+        assert json.loads(raw.split(b"\r\n\r\n", 1)[1]) == {"ok": False, "error": "bad Content-Length"}
+    assert metrics["errors"] == 2
+
+def test_cli_html_reads_partition(tmp_path):
+    store = PartitionStore(tmp_path / "fleet")
+    store.write_batches([decode_batch(make_batch("car-1", 0, T0, 30))])
+    store.close()
+    out = tmp_path / "r.html"
+    rc = cli_main(["html", "--in", str(tmp_path / "fleet" / "car-1" / "2025-10-05"), "--out", str(out)])
+    assert rc == 0 and "RPM" in out.read_text(encoding="utf-8")
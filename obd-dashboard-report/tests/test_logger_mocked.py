@@ -1,7 +1,9 @@
 # tests/test_logger_mocked.py
 from __future__ import annotations
 
+import json
 import sys
+import time
 import types
 from pathlib import Path
 import pytest
@@ -108,6 +110,29 @@ def test_run_logger_writes_csv_and_stops_cleanly_with_systemexit(tmp_path, monke
     assert len(lines) >= 3
     # Header should include the two fake PIDs
     assert "Engine RPM" in lines[0] and "Vehicle Speed" in lines[0]
+    # Pacing stats sidecar is written on exit
+    stats = json.loads(p.with_name(p.stem + ".stats.json").read_text(encoding="utf-8"))
+    assert not lines[1].startswith("deadband;") and "deadband" not in stats
+
+
+def test_run_logger_deadband_marks_units_row_and_stats(tmp_path, monkeypatch):
+    """--deadband: the units row is marked and the per-PID counts land in the stats sidecar."""
+    _inject_fake_obd(monkeypatch)
+
+    def fake_sleep(_):
+        raise SystemExit()
+
+    monkeypatch.setattr("obdtools.logger.runner.time.sleep", fake_sleep)
+
+    with pytest.raises(SystemExit):
+        run_logger(port="/dev/fake0", interval=0.01, out_base=str(tmp_path / "csv" / "obd_all"),
+                   deadband={"*": 0.0})
+
+    p = sorted((tmp_path / "csv").glob("obd_all_*.csv"))[-1]
+    lines = p.read_text(encoding="utf-8").splitlines()
+    assert lines[1].startswith("deadband;") and lines[2].endswith(";900.0;0.0")   # first row is complete
+    stats = json.loads(p.with_name(p.stem + ".stats.json").read_text(encoding="utf-8"))
+    assert set(stats["deadband"]["pids"]) == {"Engine RPM", "Vehicle Speed"}
 
 
 def test_run_logger_handles_keyboard_interrupt(tmp_path, monkeypatch):
@@ -145,3 +170,51 @@ def test_run_logger_handles_keyboard_interrupt(tmp_path, monkeypatch):
     lines = p.read_text(encoding="utf-8").splitlines()
     assert len(lines) >= 3
     assert "Engine RPM" in lines[0] and "Vehicle Speed" in lines[0]
+    # Without --profile, no profile sidecars
+    assert not p.with_name(p.stem + ".profile.json").exists()
+
+
+def test_run_logger_profile_sidecars_written_on_interrupt(tmp_path, monkeypatch):
+    """--profile: the sidecars are written during cleanup, with the one interrupted cycle's PIDs."""
+    _inject_fake_obd(monkeypatch)
+
+    def boom(_):
+        raise KeyboardInterrupt()
+
+    monkeypatch.setattr("obdtools.logger.runner.time.sleep", boom)
+
+    with pytest.raises(KeyboardInterrupt):
+        run_logger(port="/dev/fake0", interval=0.01, out_base=str(tmp_path / "csv" / "obd_all"), profile=True)
+
+    p = sorted((tmp_path / "csv").glob("obd_all_*.csv"))[-1]
+    summary = json.loads(p.with_name(p.stem + ".profile.json").read_text(encoding="utf-8"))
+    assert summary["csv"] == p.name and all(v["queries"] == 1 for v in summary["pids"].values())
+    assert p.with_name(p.stem + ".profile.tsv").exists()
+
+
+def test_run_logger_samples_fresh_values_each_tick_with_cache(tmp_path, monkeypatch):
+    """The response cache must not hand a live PID the previous tick's answer."""
+    _inject_fake_obd(monkeypatch)
+    asked = []
+
+    class CountingConn(FakeConn):
+        def query(self, cmd, force: bool = False):
+            asked.append(cmd.name)
+            return super().query(cmd, force)
+
+    sys.modules["obd"].OBD = lambda *a, **k: CountingConn()
+    real_sleep = time.sleep
+    ticks = {"n": 0}
+
+    def fake_sleep(_):
+        ticks["n"] += 1
+        if ticks["n"] == 3:
+            raise SystemExit()
+        real_sleep(0.02)                           # longer than half the 10 ms period, shorter than TTL_FAST
+
+    monkeypatch.setattr("obdtools.logger.runner.time.sleep", fake_sleep)
+
+    with pytest.raises(SystemExit):
+        run_logger(port="/dev/fake0", interval=0.01, out_base=str(tmp_path / "csv" / "obd_all"))
+
+    assert asked.count("Engine RPM") == asked.count("Vehicle Speed") == 2   # one query per tick
@@ -0,0 +1,73 @@
+# tests/test_ods_stream.py
+import zipfile
+
+import pytest
+
+from obdtools.logger.ods_stream import MIMETYPE, OdsStreamWriter
+from obdtools.logger.writer import BackgroundWriter, CommitPolicy
+
+HEADER = ["timestamp_iso", "RPM", "STATUS"]
+UNITS = ["", "revolutions_per_minute", ""]
+
+
+def _row(i):
+    return [f"2025-10-05 10:00:{i % 60:02d}", 800.0 + i, "<MIL & off>" if i % 10 == 0 else None]
+
+
+def test_every_checkpoint_is_a_complete_spreadsheet(tmp_path):
+    path = tmp_path / "log.ods"
+    w = OdsStreamWriter(str(path), HEADER, UNITS)
+    snapshots = []
+    for i in range(300):
+        w.writerow(_row(i))
+        if i % 100 == 99:
+            w.flush()
+            snapshots.append(path.read_bytes())
+    w.close()
+
+    for k, data in enumerate(snapshots + [path.read_bytes()]):
+        snap = tmp_path / f"snap{k}.ods"
+        snap.write_bytes(data)
+        with zipfile.ZipFile(snap) as z:
+            assert z.testzip() is None
+            assert z.namelist()[0] == "mimetype" and z.read("mimetype") == MIMETYPE
+            assert z.getinfo("mimetype").compress_type == zipfile.ZIP_STORED
+
+    pytest.importorskip("odf")
+    import pandas as pd
+    df = pd.read_excel(tmp_path / "snap0.ods", engine="odf")
+    assert len(df) == 101 and df["RPM"].iloc[1:].tolist() == [800.0 + i for i in range(100)]
+    df = pd.read_excel(path, engine="odf")
+    assert len(df) == 301 and df["STATUS"].iloc[1] == "<MIL & off>"
+
+
+def test_checkpoints_only_append(tmp_path):
+    path = tmp_path / "log.ods"
+    w = OdsStreamWriter(str(path), HEADER, UNITS)
+    for i in range(2000):
+        w.writerow(_row(i))
+    w.flush()
+    body = w._data_end
+    before = path.read_bytes()[:body]
+    for i in range(2000, 2100):
+        w.writerow(_row(i))
+    w.flush()
+    assert path.read_bytes()[:body] == before   # history is never rewritten
+    w.close()
+
+
+def test_background_writer_checkpoints_and_rotates(tmp_path):
+    a, b = str(tmp_path / "a.ods"), str(tmp_path / "b.ods")
+    sa = OdsStreamWriter(a, HEADER, UNITS)
+    w = BackgroundWriter(sa, sa, CommitPolicy(every_rows=5, every_ms=0), name="obd-ods-writer")
+    for i in range(12):
+        w.put(_row(i))
+    sb = OdsStreamWriter(b, HEADER, UNITS)
+    w.rotate(sb, sb)
+    w.put(_row(12))
+    w.close()
+
+    assert w.rows == 13 and sa.rows == 12 and sb.rows == 1
+    assert sa.checkpoints >= 3
+    for p in (a, b):
+        assert zipfile.ZipFile(p).testzip() is None
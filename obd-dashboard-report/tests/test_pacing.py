@@ -0,0 +1,40 @@
+# tests/test_pacing.py
+import json
+
+from obdtools.logger.pacing import DeadlinePacer, percentile, stats_path_for
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+    def __call__(self):
+        return self.t
+    def sleep(self, s):
+        self.sleeps.append(s); self.t += s
+
+
+def test_pacer_subtracts_work_and_skips_missed_deadlines(tmp_path):
+    clock = FakeClock(); clock.sleeps = []
+    pacer = DeadlinePacer(0.1, clock=clock, sleep=clock.sleep)
+    # Work per cycle: 30 ms, 30 ms, 250 ms (overrun, misses one deadline), 30 ms
+    for work in (0.03, 0.03, 0.25, 0.03):
+        pacer.tick(); clock.t += work; pacer.wait()
+
+    assert [round(s, 3) for s in clock.sleeps] == [0.07, 0.07, 0.0, 0.02]
+    assert pacer.ticks == 4 and pacer.overruns == 1 and pacer.skipped == 1
+    # Ticks start at 0, 100, 200 ms, then 450 ms (deadline 400 ms: 50 ms late); 300 ms was skipped
+    assert [round(x, 3) for x in pacer.late_ms] == [0.0, 0.0, 0.0, 50.0]
+    s = pacer.stats()
+    assert round(s["late_max_ms"], 3) == 50.0 and s["work_p50_ms"] == 30.0
+    assert abs(s["achieved_hz"] - 3 / 0.45) < 1e-6
+
+    path = pacer.write_stats(stats_path_for(str(tmp_path / "log.csv")), csv="log.csv")
+    assert path.endswith("log.stats.json")
+    data = json.loads(open(path).read())
+    assert data["csv"] == "log.csv" and data["skipped_ticks"] == 1
+
+
+def test_percentile_nearest_rank():
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    assert percentile(range(1, 101), 99) == 99
+    assert percentile([], 50) != percentile([], 50)   # NaN
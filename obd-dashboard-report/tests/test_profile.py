@@ -0,0 +1,71 @@
+# tests/test_profile.py
+import csv
+import json
+
+from obdtools.logger.profile import STAGES, CycleProfiler, profile_paths_for
+from obdtools.report.html_report import build_html_from_csv
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 10.0
+    def __call__(self):
+        return self.t
+
+
+def _cycle(prof, clock, **work):
+    prof.begin()
+    for s in STAGES:
+        clock.t += work.get(s, 0.0)
+        prof.mark(s)
+    prof.end()
+
+
+def test_profiler_stage_stats_and_ring_wrap():
+    clock = FakeClock()
+    prof = CycleProfiler(["RPM", "SPEED"], max_cycles=4, clock=clock)
+    for k in range(6):                             # last cycle is slow on the adapter
+        _cycle(prof, clock, query=0.5 if k == 5 else 0.1, write=0.01, sleep=0.39 if k < 5 else 0.0)
+    s = prof.stats()
+    assert s["cycles"] == 6 and s["retained_cycles"] == 4
+    assert s["stages"]["query"]["max_ms"] == 500.0 and s["stages"]["query"]["p50_ms"] == 100.0
+    assert round(s["stages"]["query"]["total_s"], 3) == 1.0      # totals cover every cycle
+    assert s["stages"]["dtc"]["max_ms"] == 0.0 and s["cycle"]["max_ms"] == 510.0
+    assert abs(sum(st["share"] for st in s["stages"].values()) - 1.0) < 1e-3
+
+
+def test_profiler_pid_latency_and_null_rate():
+    prof = CycleProfiler(["RPM", "SPEED", "MAF"], clock=FakeClock())
+    for k in range(100):
+        prof.pid("RPM", 0.040, False)
+        prof.pid("SPEED", 0.200 if k >= 90 else 0.050, k % 4 == 0)
+    prof.pid("UNKNOWN", 1.0, True)                 # not a logged PID: ignored
+    p = prof.stats()["pids"]
+    assert p["RPM"]["queries"] == 100 and p["RPM"]["null_rate"] == 0.0
+    assert 40.0 <= p["RPM"]["p50_ms"] <= 44.0      # histogram bins are 10% wide
+    assert p["SPEED"]["null_rate"] == 0.25 and p["SPEED"]["max_ms"] == 200.0
+    assert 200.0 <= p["SPEED"]["p95_ms"] <= 220.0
+    assert p["MAF"]["queries"] == 0 and p["MAF"]["mean_ms"] is None
+    text = prof.summary()
+    assert "slowest PIDs (p95): SPEED" in text and "null answers: SPEED 25%" in text
+
+
+def test_profile_sidecars_feed_html_health_section(sample_csv, tmp_path):
+    log = tmp_path / "obd_all_test.csv"
+    log.write_bytes(sample_csv.read_bytes())
+    clock = FakeClock()
+    prof = CycleProfiler(["RPM"], clock=clock)
+    for _ in range(3):
+        prof.pid("RPM", 0.03, False)
+        _cycle(prof, clock, query=0.03, sleep=0.97)
+    json_path, csv_path = prof.write(str(log), pacing={"achieved_hz": 1.0, "overruns": 0})
+    assert (json_path, csv_path) == profile_paths_for(str(log) + ".gz")
+    assert json.load(open(json_path))["pacing"]["achieved_hz"] == 1.0
+    rows = list(csv.reader(open(csv_path), delimiter="\t"))
+    assert rows[0][:4] == ["cycle", "t_s", "cycle_ms", "query_ms"] and len(rows) == 4
+    assert rows[2][1] == "1.0" and rows[2][3] == "30.0"
+
+    html = build_html_from_csv(str(log), title="Health")
+    assert "Acquisition health" in html and "<td>RPM</td><td>3</td>" in html
+    plain = build_html_from_csv(str(sample_csv), title="No profile")
+    assert "Acquisition health" not in plain
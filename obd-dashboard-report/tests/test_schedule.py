@@ -0,0 +1,30 @@
+# tests/test_schedule.py
+import pytest
+
+from obdtools.logger.schedule import RateSchedule, parse_rates
+
+
+def test_parse_rates_normalizes_and_validates():
+    assert parse_rates("RPM=10, Coolant Temp=0.2") == {"rpm": 10.0, "coolant_temp": 0.2}
+    for bad in ("RPM", "RPM=0", "RPM=x", "=5"):
+        with pytest.raises(ValueError):
+            parse_rates(bad)
+
+
+def test_schedule_samples_each_pid_at_its_own_rate():
+    s = RateSchedule.build(["RPM", "SPEED", "COOLANT_TEMP"], {"rpm": 10, "coolant_temp": 0.5}, interval=1.0)
+    assert s.base == 0.1 and not s.uniform
+    counts = [0, 0, 0]
+    for k in range(50):                      # 5 s of 100 ms ticks, with a little jitter
+        for i in s.due(k * 0.1 + (0.004 if k % 3 else 0.0)):
+            counts[i] += 1
+    assert counts == [50, 5, 3]              # COOLANT_TEMP at 0, 2 and 4 s
+    assert s.achieved_hz(2) == pytest.approx(0.5, rel=0.01)
+
+
+def test_schedule_skips_missed_deadlines():
+    s = RateSchedule.build(["RPM"], {"rpm": 10}, interval=1.0)
+    assert s.due(0.0) == [0]
+    assert s.due(0.35) == [0]                # late for 0.1; 0.2 and 0.3 skipped, next on 0.4
+    assert s.skipped == [2] and s.next == [pytest.approx(0.4)]
+    assert RateSchedule.build(["A", "B"], {}, interval=0.5).uniform
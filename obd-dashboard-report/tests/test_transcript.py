@@ -0,0 +1,36 @@
+# tests/test_transcript.py
+import json
+
+import pytest
+
+from obdtools.logger.transcript import capture_serial
+
+def test_capture_serial_records_merged_tx_rx(tmp_path, monkeypatch):
+    serial = pytest.importorskip("serial")
+
+    class FakePort:
+        def __init__(self):
+            self.buf = b""
+            self.baudrate = None
+        def write(self, data):
+            self.buf = b"41 0D 32 \r\r>"
+        def read(self, size=1):
+            out, self.buf = self.buf[:size], self.buf[size:]
+            return out
+        def close(self):
+            pass
+
+    monkeypatch.setattr(serial, "serial_for_url", lambda *a, **k: FakePort())
+    path = tmp_path / "t.jsonl"
+    with capture_serial(str(path)):
+        port = serial.serial_for_url("/dev/fake")
+    port.baudrate = 38400
+    port.write(b"010D\r")
+    while port.read(1) != b">":
+        pass
+    port.close()
+
+    lines = [json.loads(x) for x in path.read_text(encoding="utf-8").splitlines()]
+    assert lines[0]["format"] == "elm-transcript"
+    assert [(e["dir"], e["data"]) for e in lines[1:]] == [("tx", "010D\r"), ("rx", "41 0D 32 \r\r>")]
+    assert port._port.baudrate == 38400
@@ -0,0 +1,74 @@
+# tests/test_writer.py
+import csv
+
+import pytest
+
+from obdtools.logger import writer as writer_mod
+from obdtools.logger.writer import BackgroundWriter, CommitPolicy
+
+
+def _open(path):
+    f = open(path, "w", newline="", encoding="utf-8")
+    return f, csv.writer(f, delimiter=";")
+
+
+def test_background_writer_group_commits_and_rotates_in_order(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(writer_mod, "safe_fsync", lambda f: synced.append(f.name))
+    a, b = tmp_path / "a.csv", tmp_path / "b.csv"
+    w = BackgroundWriter(*_open(a), CommitPolicy(every_rows=3, every_ms=0))
+    for i in range(7):
+        w.put([i])
+    w.rotate(*_open(b))
+    w.put([99])
+    w.close()
+
+    assert a.read_text().split() == [str(i) for i in range(7)]
+    assert b.read_text().split() == ["99"]
+    # 3 + 3 rows by count, the 7th on rotation, the last on close
+    assert synced == [str(a)] * 3 + [str(b)]
+    assert w.rows == 8 and w.commits == 4
+
+
+def test_commit_policy_describe_and_due():
+    assert "every row" in CommitPolicy(paranoid=True).describe()
+    p = CommitPolicy(every_rows=50, every_ms=200)
+    assert p.describe() == "fsync every 50 rows or every 200 ms"
+    assert not p.due(10, 100) and p.due(50, 0) and p.due(1, 250)
+
+
+def test_put_many_writes_a_batch_as_one_queue_item(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(writer_mod, "safe_fsync", lambda f: synced.append(f.name))
+    a = tmp_path / "a.csv"
+    w = BackgroundWriter(*_open(a), CommitPolicy(every_rows=4, every_ms=0))
+    w.put_many([[i] for i in range(5)])
+    w.put_many([])
+    w.put([5])
+    w.close()
+    assert a.read_text().split() == [str(i) for i in range(6)]
+    assert w.rows == 6 and synced == [str(a)] * 2      # the 5-row batch passes the 4-row limit once
+
+
+class _FullDisk:
+    name = "full.csv"
+    def writerow(self, row):
+        raise OSError(28, "No space left on device")
+    def flush(self):
+        pass
+    def close(self):
+        pass
+
+
+def test_write_error_counts_dropped_rows_and_check_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer_mod, "safe_fsync", lambda f: None)
+    disk = _FullDisk()
+    w = BackgroundWriter(disk, disk, CommitPolicy(every_ms=0))
+    w.check()
+    w.put([1])
+    w.put_many([[2], [3]])
+    w.close()
+    assert w.rows == 0 and w.dropped == 3 and w.stats()["error"].endswith("No space left on device")
+    with pytest.raises(writer_mod.WriterError, match="3 rows lost"):
+        w.check()
+    assert "3 rows lost after a write error" in w.summary()
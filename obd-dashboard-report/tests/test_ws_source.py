@@ -0,0 +1,147 @@
+# tests/test_ws_source.py
+import asyncio
+import csv
+import json
+import threading
+import time
+
+import pytest
+
+from obdtools.logger.core import OBD_CMDS
+from obdtools.csvio.readers import load_csv_with_units
+from obdtools.logger.wsource import GapDetector, StreamRecorder, run_ws_logger
+
+
+def test_gap_detector_uses_seq_then_timestamps():
+    d = GapDetector()
+    assert d.observe(1, 0.0) is None and d.observe(2, 0.2) is None
+    gap = d.observe(5, 0.8)
+    assert gap["kind"] == "missed" and gap["missed"] == 2 and gap["seconds"] == 0.6
+    d.reconnected()
+    gap = d.observe(1, 9.0)                       # server restarted: numbering starts again
+    assert gap["kind"] == "restart" and gap["reconnect"] and d.resets == 1
+
+    d = GapDetector()                             # no seq: steps of 3x the usual period
+    for k in range(10):
+        assert d.observe(None, k * 0.2) is None
+    gap = d.observe(None, 1.8 + 1.0)
+    assert gap["kind"] == "time" and gap["missed"] == 4
+    assert d.count == 1 and d.missed == 4
+
+
+def _sample(seq, **pids):
+    return json.dumps({"timestamp": f"2025-10-05T10:00:{seq:02d}.000", "seq": seq, "pids": pids})
+
+
+class Server:
+    """Serves two connections: seq 1-6 (3 and 4 dropped, one event), then 7-10 with a new PID."""
+
+    def __init__(self):
+        websockets = pytest.importorskip("websockets")
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        async def handler(ws, *_):
+            self.connections += 1
+            if self.connections == 1:
+                for seq in (1, 2, 5, 6):
+                    await ws.send(_sample(seq, RPM=800 + seq, SPEED=10, FUEL_STATUS="Closed loop"))
+                await ws.send(json.dumps({"type": "dtc", "mil": False}))
+                await ws.send("not json")
+                return                            # closes the connection: the client reconnects
+            for seq in (7, 8, 9, 10):
+                pids = dict(RPM=800 + seq, SPEED=10)
+                if seq >= 9:
+                    pids["COOLANT_TEMP"] = 90
+                await ws.send(_sample(seq, **pids))
+            await ws.wait_closed()
+
+        async def main():
+            async with websockets.serve(handler, "127.0.0.1", 0) as server:
+                self.port = server.sockets[0].getsockname()[1]
+                ready.set()
+                self.stop = asyncio.Event()
+                await self.stop.wait()
+
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(main(),), daemon=True)
+        self.thread.start()
+        ready.wait(5)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.stop.set)
+        self.thread.join(5)
+
+
+def test_ws_logger_reconnects_detects_gaps_and_extends_columns(tmp_path):
+    server = Server()
+    try:
+        last = run_ws_logger(source=f"ws://127.0.0.1:{server.port}", out_base=str(tmp_path / "obd_all"),
+                             skip="fuel_status", batch_ms=50, max_rows=8)
+    finally:
+        server.close()
+
+    first, second = sorted(tmp_path.glob("obd_all_*.csv"))
+    assert str(second) == last and server.connections == 2
+    rows = list(csv.reader(first.open(encoding="utf-8"), delimiter=";"))
+    assert rows[0] == ["timestamp_iso", "date", "time", "RPM", "SPEED"]
+    # units from python-OBD's command definitions, when it is installed
+    assert rows[1][3:] == (["revolutions_per_minute", "kilometer_per_hour"] if OBD_CMDS is not None else ["", ""])
+    assert [r[3] for r in rows[2:]] == ["801.0", "802.0", "805.0", "806.0", "807.0", "808.0"]
+    assert rows[2][0] == "2025-10-05 10:00:01"
+    rows = list(csv.reader(second.open(encoding="utf-8"), delimiter=";"))
+    assert rows[0][3:] == ["RPM", "SPEED", "COOLANT_TEMP"] and [r[5] for r in rows[2:]] == ["90.0", "90.0"]
+
+    stats = json.loads(second.with_name(second.stem + ".stats.json").read_text(encoding="utf-8"))
+    assert stats["samples"] == 8 and stats["events"] == 1 and stats["rejected"] == 1
+    assert stats["gaps"] == 1 and stats["missed_samples"] == 2 and stats["reconnects"] == 1
+    assert stats["writer"]["rows"] == 8 and stats["batches"] < 8
+
+
+def test_stream_recorder_deadband_round_trip(tmp_path):
+    rec = StreamRecorder(str(tmp_path / "obd_all"), deadband={"rpm": 20.0, "*": 0.0}, deadband_hold_s=60.0)
+    for seq, rpm in enumerate((800, 810, 830, 835, 835, 900), start=1):
+        pids = dict(RPM=rpm, SPEED=10)
+        if seq >= 5:
+            pids["COOLANT_TEMP"] = 90                 # new column: a new file, written in full
+        rec.feed(_sample(seq, **pids))
+    last = rec.close()
+
+    first, second = sorted(tmp_path.glob("obd_all_*.csv"))
+    rows = list(csv.reader(first.open(encoding="utf-8"), delimiter=";"))
+    assert rows[1][0] == "deadband" and [r[3:] for r in rows[2:]] == [["800.0", "10.0"], ["", ""], ["830.0", ""], ["", ""]]
+    df, _ = load_csv_with_units(str(first))
+    assert df["RPM"].tolist() == [800, 800, 830, 830] and df["SPEED"].tolist() == [10] * 4
+    df, _ = load_csv_with_units(last)
+    assert df["RPM"].tolist() == [835, 900] and df["COOLANT_TEMP"].tolist() == [90, 90]
+    assert rec.band.stats()["pids"]["RPM"]["max_error"] == 10.0
+
+
+def test_stream_recorder_stops_after_a_write_error(tmp_path):
+    from obdtools.logger.writer import WriterError
+    rec = StreamRecorder(str(tmp_path / "obd_all"), batch_rows=1)
+    rec.feed(_sample(1, RPM=800))
+    rec.writer._f.close()                         # the next write fails on the writer thread
+    rec.feed(_sample(2, RPM=810))
+    for _ in range(200):
+        if rec.writer.error is not None:
+            break
+        time.sleep(0.01)
+    with pytest.raises(WriterError):
+        rec.feed(_sample(3, RPM=820))
+    rec.close()
+    assert rec.writer.dropped >= 1
+
+
+def test_cli_warns_on_stderr_about_options_ignored_by_source(tmp_path, capsys, monkeypatch):
+    from obdtools.logger import cli_adapter
+    monkeypatch.setattr(cli_adapter, "WEBSOCKETS_AVAILABLE", True)
+    monkeypatch.setattr(cli_adapter, "run_ws_logger", lambda **kw: str(tmp_path / "obd_all.csv"))
+    assert cli_adapter.main(["--source", "ws://127.0.0.1:1", "--rate", "RPM=10", "--ods", "--interval", "0.5",
+                             "--cache-ttl", "RPM=0", "--dtc-mode", "full", "--dtc-budget-ms", "20", "--rediscover",
+                             "--fsync-ms", "200"]) == 0
+    out, err = capsys.readouterr()
+    assert ("--interval, --rate, --ods, --cache-ttl, --rediscover, --dtc-budget-ms, --dtc-mode only apply when "
+            "polling the adapter") in err and "ignored" not in out
+    assert cli_adapter.main(["--source", "ws://127.0.0.1:1", "--fsync-ms", "200", "--only", "RPM"]) == 0
+    assert "ignored" not in capsys.readouterr().err